@@ -18,11 +18,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_categ
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_combined_equipment_input_category_hourly`
  (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_combined_equipment_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -34,11 +67,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_combined_equipment_input_item_hourly`
  (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_item_daily`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_combined_equipment_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -50,11 +116,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_cate
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_output_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_combined_equipment_output_category_hourly`
  (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_output_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_equipment_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -66,11 +165,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_category_hourl
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_equipment_input_category_hourly`
  (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_equipment_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -82,11 +214,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_equipment_input_item_hourly`
  (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_item_daily`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_item_monthly`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_equipment_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -98,11 +263,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_output_category_hour
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_output_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_equipment_output_category_hourly`
  (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_output_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_equipment_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_output_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -113,11 +311,42 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_meter_hourly` (
   `meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_meter_hourly_index_1`
  ON `myems_carbon_db`.`tbl_meter_hourly`
  (`meter_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_meter_daily`
+ (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_meter_monthly`
+ (`meter_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_offline_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -128,11 +357,55 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_offline_meter_hourly` (
   `offline_meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_offline_meter_hourly_index_1`
  ON `myems_carbon_db`.`tbl_offline_meter_hourly`
  (`offline_meter_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_offline_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_offline_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_offline_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_offline_meter_daily`
+ (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_offline_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_offline_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_offline_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_offline_meter_monthly`
+ (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_rollup_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_rollup_watermarks` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_rollup_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `last_hourly_id` BIGINT NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_rollup_watermarks_index_1`
+ ON `myems_carbon_db`.`tbl_rollup_watermarks` (`table_name`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_shopfloor_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -144,11 +417,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_hourl
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_shopfloor_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_shopfloor_input_category_hourly`
  (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_category_daily`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_category_monthly`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_shopfloor_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -160,11 +466,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_shopfloor_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_shopfloor_input_item_hourly`
  (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_item_daily`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_item_monthly`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_space_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -176,11 +515,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_category_hourly` (
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_space_input_category_hourly`
  (`space_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_space_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -192,11 +564,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_space_input_item_hourly`
  (`space_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_item_daily`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_item_monthly`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_space_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -208,11 +613,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_output_category_hourly`
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_output_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_space_output_category_hourly`
  (`space_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_output_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_space_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_output_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_store_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -224,11 +662,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_category_hourly` (
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_store_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_store_input_category_hourly`
  (`store_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_store_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_category_daily`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_store_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_category_monthly`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_store_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -240,11 +711,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_store_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_store_input_item_hourly`
  (`store_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_store_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_item_daily`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_store_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_item_monthly`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_tenant_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -256,11 +760,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_category_hourly`
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_tenant_input_category_hourly_index_1`
  ON `myems_carbon_db`.`tbl_tenant_input_category_hourly`
  (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_tenant_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_category_daily`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_tenant_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_category_monthly`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_tenant_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -272,11 +809,44 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_tenant_input_item_hourly_index_1`
  ON `myems_carbon_db`.`tbl_tenant_input_item_hourly`
  (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_tenant_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_item_daily`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_tenant_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_item_monthly`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_carbon_db`.`tbl_virtual_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -287,6 +857,35 @@ CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_virtual_meter_hourly` (
   `virtual_meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_virtual_meter_hourly_index_1`
  ON `myems_carbon_db`.`tbl_virtual_meter_hourly` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_virtual_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_virtual_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_virtual_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_virtual_meter_daily` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_virtual_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_carbon_db`.`tbl_virtual_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_virtual_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_virtual_meter_monthly` (`virtual_meter_id`, `start_datetime_utc`);
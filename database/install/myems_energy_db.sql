@@ -18,11 +18,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_categ
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_input_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_combined_equipment_input_category_hourly`
  (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_combined_equipment_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -34,11 +67,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_input_item_hourly_index_1`
  ON `myems_energy_db`.`tbl_combined_equipment_input_item_hourly`
  (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_item_daily`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_item_monthly`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_combined_equipment_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -50,11 +116,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_output_cate
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_combined_equipment_output_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_combined_equipment_output_category_hourly`
  (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_output_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_output_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_equipment_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -66,11 +165,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_category_hourl
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_input_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_equipment_input_category_hourly`
  (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_equipment_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -82,10 +214,41 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_input_item_hourly_index_1`
  ON `myems_energy_db`.`tbl_equipment_input_item_hourly` (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_item_daily` (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_item_monthly` (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_equipment_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -97,11 +260,59 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_output_category_hour
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_equipment_output_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_equipment_output_category_hourly`
  (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_output_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_equipment_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_output_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_hourly_notifications`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_hourly_notifications` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_hourly_notifications` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `object_id` BIGINT NOT NULL,
+  `origin_datetime_utc` DATETIME NOT NULL,
+  `created_datetime_utc` DATETIME NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_hourly_notifications_index_1`
+ ON `myems_energy_db`.`tbl_hourly_notifications` (`created_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -112,9 +323,68 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_hourly` (
   `meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_meter_hourly_index_1` ON `myems_energy_db`.`tbl_meter_hourly`   (`meter_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_daily_index_1` ON `myems_energy_db`.`tbl_meter_daily`   (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_monthly_index_1` ON `myems_energy_db`.`tbl_meter_monthly`   (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_normalization_states`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_meter_normalization_states` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_normalization_states` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `point_id` BIGINT NOT NULL,
+  `last_start_datetime_utc` DATETIME NOT NULL,
+  `last_utc_date_time` DATETIME,
+  `last_actual_value` DECIMAL(18, 3),
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_meter_normalization_states_index_1`
+ ON `myems_energy_db`.`tbl_meter_normalization_states` (`meter_id`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_notification_consumers`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_notification_consumers` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_notification_consumers` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `consumer_name` VARCHAR(128) NOT NULL,
+  `last_notification_id` BIGINT NOT NULL,
+  `last_handled_datetime_utc` DATETIME,
+  `last_stage_lag_seconds` INT,
+  `last_end_to_end_lag_seconds` INT,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_notification_consumers_index_1`
+ ON `myems_energy_db`.`tbl_notification_consumers` (`consumer_name`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_offline_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -125,10 +395,52 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_offline_meter_hourly` (
   `offline_meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_offline_meter_hourly_index_1`
  ON `myems_energy_db`.`tbl_offline_meter_hourly` (`offline_meter_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_offline_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_offline_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_offline_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_daily_index_1`
+ ON `myems_energy_db`.`tbl_offline_meter_daily` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_offline_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_offline_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_offline_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_monthly_index_1`
+ ON `myems_energy_db`.`tbl_offline_meter_monthly` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_rollup_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_rollup_watermarks` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_rollup_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `last_hourly_id` BIGINT NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_rollup_watermarks_index_1`
+ ON `myems_energy_db`.`tbl_rollup_watermarks` (`table_name`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_shopfloor_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -140,11 +452,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_hourl
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_shopfloor_input_category_hourly_index_1`
  ON  `myems_energy_db`.`tbl_shopfloor_input_category_hourly`
  (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_daily_index_1`
+ ON  `myems_energy_db`.`tbl_shopfloor_input_category_daily`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_monthly_index_1`
+ ON  `myems_energy_db`.`tbl_shopfloor_input_category_monthly`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_shopfloor_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -156,11 +501,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_shopfloor_input_item_hourly_index_1`
   ON `myems_energy_db`.`tbl_shopfloor_input_item_hourly`
   (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_daily_index_1`
+  ON `myems_energy_db`.`tbl_shopfloor_input_item_daily`
+  (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_monthly_index_1`
+  ON `myems_energy_db`.`tbl_shopfloor_input_item_monthly`
+  (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_space_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -172,11 +550,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_category_hourly` (
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_input_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_space_input_category_hourly`
  (`space_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_input_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_input_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_space_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -188,10 +599,41 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_input_item_hourly_index_1`
  ON `myems_energy_db`.`tbl_space_input_item_hourly` (`space_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_input_item_daily` (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_input_item_monthly` (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_space_output_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -203,11 +645,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_output_category_hourly`
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_space_output_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_space_output_category_hourly`
  (`space_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_output_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_output_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_space_output_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_output_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_store_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -219,11 +694,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_category_hourly` (
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_store_input_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_store_input_category_hourly`
  (`store_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_store_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_store_input_category_daily`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_store_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_store_input_category_monthly`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_store_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -235,10 +743,41 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_store_input_item_hourly_index_1`
  ON `myems_energy_db`.`tbl_store_input_item_hourly` (`store_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_store_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_store_input_item_daily` (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_store_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_store_input_item_monthly` (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_tenant_input_category_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -250,11 +789,44 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_category_hourly`
   `energy_category_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_tenant_input_category_hourly_index_1`
  ON `myems_energy_db`.`tbl_tenant_input_category_hourly`
  (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_tenant_input_category_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_category_daily`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_tenant_input_category_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_category_monthly`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_tenant_input_item_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -266,10 +838,41 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_item_hourly` (
   `energy_item_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_tenant_input_item_hourly_index_1`
  ON `myems_energy_db`.`tbl_tenant_input_item_hourly` (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_tenant_input_item_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_item_daily` (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_tenant_input_item_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_item_monthly` (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_energy_db`.`tbl_virtual_meter_hourly`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -280,6 +883,35 @@ CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_virtual_meter_hourly` (
   `virtual_meter_id` BIGINT NOT NULL,
   `start_datetime_utc` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `start_datetime_utc`))
+PARTITION BY RANGE COLUMNS(`start_datetime_utc`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_virtual_meter_hourly_index_1`
  ON `myems_energy_db`.`tbl_virtual_meter_hourly` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_virtual_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_virtual_meter_daily` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_virtual_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_daily_index_1`
+ ON `myems_energy_db`.`tbl_virtual_meter_daily` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_virtual_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_energy_db`.`tbl_virtual_meter_monthly` ;
+
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_virtual_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_monthly_index_1`
+ ON `myems_energy_db`.`tbl_virtual_meter_monthly` (`virtual_meter_id`, `start_datetime_utc`);
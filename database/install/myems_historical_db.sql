@@ -18,7 +18,8 @@ CREATE TABLE IF NOT EXISTS `myems_historical_db`.`tbl_analog_value` (
   `utc_date_time` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
   `is_bad` BOOL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `utc_date_time`))
+PARTITION BY RANGE COLUMNS(`utc_date_time`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_analog_value_index_1` ON `myems_historical_db`.`tbl_analog_value` (`point_id`, `utc_date_time`);
 CREATE INDEX `tbl_analog_value_index_2` ON `myems_historical_db`.`tbl_analog_value` (`utc_date_time`);
 
@@ -62,7 +63,8 @@ CREATE TABLE IF NOT EXISTS `myems_historical_db`.`tbl_digital_value` (
   `utc_date_time` DATETIME NOT NULL,
   `actual_value` INT NOT NULL,
   `is_bad` BOOL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `utc_date_time`))
+PARTITION BY RANGE COLUMNS(`utc_date_time`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_digital_value_index_1` ON `myems_historical_db`.`tbl_digital_value` (`point_id`, `utc_date_time`);
 CREATE INDEX `tbl_digital_value_index_2` ON `myems_historical_db`.`tbl_digital_value` (`utc_date_time`);
 
@@ -92,10 +94,24 @@ CREATE TABLE IF NOT EXISTS `myems_historical_db`.`tbl_energy_value` (
   `utc_date_time` DATETIME NOT NULL,
   `actual_value` DECIMAL(18, 3) NOT NULL,
   `is_bad` BOOL,
-  PRIMARY KEY (`id`));
+  PRIMARY KEY (`id`, `utc_date_time`))
+PARTITION BY RANGE COLUMNS(`utc_date_time`) (PARTITION pmax VALUES LESS THAN (MAXVALUE));
 CREATE INDEX `tbl_energy_value_index_1` ON `myems_historical_db`.`tbl_energy_value` (`point_id`, `utc_date_time`);
 CREATE INDEX `tbl_energy_value_index_2` ON `myems_historical_db`.`tbl_energy_value` (`utc_date_time`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_historical_db`.`tbl_energy_value_cleaning_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+DROP TABLE IF EXISTS `myems_historical_db`.`tbl_energy_value_cleaning_watermarks` ;
+
+CREATE TABLE IF NOT EXISTS `myems_historical_db`.`tbl_energy_value_cleaning_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `point_id` BIGINT NOT NULL,
+  `last_utc_date_time` DATETIME NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_energy_value_cleaning_watermarks_index_1`
+ ON `myems_historical_db`.`tbl_energy_value_cleaning_watermarks` (`point_id`);
+
 -- ---------------------------------------------------------------------------------------------------------------------
 -- Table `myems_historical_db`.`tbl_energy_value_latest`
 -- ---------------------------------------------------------------------------------------------------------------------
@@ -6,163 +6,485 @@
 DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_combined_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_combined_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+-- NOTE: the normalization states must be deleted along with tbl_meter_hourly,
+-- then myems-normalization restarts every meter from the latest time slot left in tbl_meter_hourly
+DELETE FROM `myems_energy_db`.`tbl_meter_normalization_states`;
+
 -- NOTE: if you delete tbl_offline_meter_hourly, the offline meter files should be reuploaded
 -- DELETE FROM `myems_energy_db`.`tbl_offline_meter_hourly`
 -- WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+-- DELETE FROM `myems_energy_db`.`tbl_offline_meter_daily`
+-- WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+-- DELETE FROM `myems_energy_db`.`tbl_offline_meter_monthly`
+-- WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_shopfloor_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_space_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_space_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_space_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_space_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_space_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_space_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_space_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_space_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_space_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_store_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_store_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_store_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_store_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_store_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_store_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_tenant_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_tenant_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_tenant_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_tenant_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_tenant_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_tenant_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_energy_db`.`tbl_virtual_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_energy_db`.`tbl_virtual_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_energy_db`.`tbl_virtual_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_combined_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_combined_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_offline_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_offline_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_offline_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_shopfloor_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_space_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_space_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_space_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_space_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_space_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_space_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_space_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_space_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_space_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_store_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_store_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_store_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_store_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_store_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_store_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_tenant_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_tenant_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_tenant_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_tenant_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_tenant_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_tenant_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_billing_db`.`tbl_virtual_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_billing_db`.`tbl_virtual_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_billing_db`.`tbl_virtual_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 
 DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_equipment_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_equipment_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_equipment_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_equipment_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_equipment_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_equipment_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_equipment_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_equipment_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_equipment_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_offline_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_offline_meter_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_offline_meter_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_shopfloor_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_space_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_space_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_space_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_space_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_space_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_space_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_space_output_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_space_output_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_space_output_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_store_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_store_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_store_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_store_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_store_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_store_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_tenant_input_category_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_tenant_input_category_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_tenant_input_category_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_tenant_input_item_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
 
+DELETE FROM `myems_carbon_db`.`tbl_tenant_input_item_daily`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
+DELETE FROM `myems_carbon_db`.`tbl_tenant_input_item_monthly`
+WHERE start_datetime_utc >= '2020-12-31 16:00:00';
+
 DELETE FROM `myems_carbon_db`.`tbl_virtual_meter_hourly`
 WHERE start_datetime_utc >= '2020-12-31 16:00:00';
\ No newline at end of file
@@ -4,59 +4,178 @@
 -- NOTE  after running this script, you should start the myems-normalization service and myems-aggregation service
 
 TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_output_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_output_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_combined_equipment_output_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_equipment_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_equipment_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_equipment_output_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_output_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_equipment_output_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_meter_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_meter_daily;
+TRUNCATE TABLE myems_energy_db.tbl_meter_monthly;
+-- NOTE: the normalization states must be truncated along with tbl_meter_hourly
+TRUNCATE TABLE myems_energy_db.tbl_meter_normalization_states;
 -- NOTE: if you truncate tbl_offline_meter_hourly, the offline meter files should be reuploaded
 -- TRUNCATE TABLE myems_energy_db.tbl_offline_meter_hourly;
+-- TRUNCATE TABLE myems_energy_db.tbl_offline_meter_daily;
+-- TRUNCATE TABLE myems_energy_db.tbl_offline_meter_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_shopfloor_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_space_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_space_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_space_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_space_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_space_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_space_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_space_output_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_space_output_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_space_output_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_store_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_store_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_store_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_store_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_store_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_store_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_tenant_input_category_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_tenant_input_category_daily;
+TRUNCATE TABLE myems_energy_db.tbl_tenant_input_category_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_tenant_input_item_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_tenant_input_item_daily;
+TRUNCATE TABLE myems_energy_db.tbl_tenant_input_item_monthly;
 TRUNCATE TABLE myems_energy_db.tbl_virtual_meter_hourly;
+TRUNCATE TABLE myems_energy_db.tbl_virtual_meter_daily;
+TRUNCATE TABLE myems_energy_db.tbl_virtual_meter_monthly;
 
 TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_output_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_output_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_combined_equipment_output_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_equipment_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_equipment_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_equipment_output_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_output_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_equipment_output_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_meter_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_meter_daily;
+TRUNCATE TABLE myems_billing_db.tbl_meter_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_meter_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_meter_daily;
+TRUNCATE TABLE myems_billing_db.tbl_meter_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_shopfloor_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_space_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_space_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_space_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_space_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_space_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_space_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_space_output_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_space_output_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_space_output_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_store_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_store_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_store_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_store_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_store_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_store_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_tenant_input_category_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_tenant_input_category_daily;
+TRUNCATE TABLE myems_billing_db.tbl_tenant_input_category_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_tenant_input_item_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_tenant_input_item_daily;
+TRUNCATE TABLE myems_billing_db.tbl_tenant_input_item_monthly;
 TRUNCATE TABLE myems_billing_db.tbl_virtual_meter_hourly;
+TRUNCATE TABLE myems_billing_db.tbl_virtual_meter_daily;
+TRUNCATE TABLE myems_billing_db.tbl_virtual_meter_monthly;
 
 TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_output_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_output_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_combined_equipment_output_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_equipment_output_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_output_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_equipment_output_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_meter_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_meter_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_meter_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_meter_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_meter_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_meter_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_shopfloor_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_space_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_space_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_space_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_space_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_space_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_space_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_space_output_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_space_output_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_space_output_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_store_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_store_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_store_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_store_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_store_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_store_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_category_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_category_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_category_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_item_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_item_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_tenant_input_item_monthly;
 TRUNCATE TABLE myems_carbon_db.tbl_virtual_meter_hourly;
+TRUNCATE TABLE myems_carbon_db.tbl_virtual_meter_daily;
+TRUNCATE TABLE myems_carbon_db.tbl_virtual_meter_monthly;
+
+-- NOTE: the rollup watermarks must be reset because truncating restarts the ids of the hourly tables
+TRUNCATE TABLE myems_energy_db.tbl_rollup_watermarks;
+TRUNCATE TABLE myems_billing_db.tbl_rollup_watermarks;
+TRUNCATE TABLE myems_carbon_db.tbl_rollup_watermarks;
+
+-- NOTE: the notifications and their consumers must be reset along with the hourly tables
+TRUNCATE TABLE myems_energy_db.tbl_hourly_notifications;
+TRUNCATE TABLE myems_energy_db.tbl_notification_consumers;
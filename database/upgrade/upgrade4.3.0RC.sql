@@ -9,6 +9,1574 @@ START TRANSACTION;
 ALTER TABLE myems_system_db.tbl_microgrids_loads DROP INDEX tbl_microgrids_grids_index_1;
 CREATE INDEX `tbl_microgrids_loads_index_1` ON `myems_system_db`.`tbl_microgrids_loads` (`microgrid_id`);
 
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_item_daily`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_input_item_monthly`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_output_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_combined_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_combined_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_combined_equipment_output_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_item_daily` (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_input_item_monthly` (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_equipment_output_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_equipment_output_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_hourly_notifications`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_hourly_notifications` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `object_id` BIGINT NOT NULL,
+  `origin_datetime_utc` DATETIME NOT NULL,
+  `created_datetime_utc` DATETIME NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_hourly_notifications_index_1`
+ ON `myems_energy_db`.`tbl_hourly_notifications` (`created_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_daily_index_1` ON `myems_energy_db`.`tbl_meter_daily`   (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_monthly_index_1` ON `myems_energy_db`.`tbl_meter_monthly`   (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_meter_normalization_states`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_meter_normalization_states` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `point_id` BIGINT NOT NULL,
+  `last_start_datetime_utc` DATETIME NOT NULL,
+  `last_utc_date_time` DATETIME,
+  `last_actual_value` DECIMAL(18, 3),
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_meter_normalization_states_index_1`
+ ON `myems_energy_db`.`tbl_meter_normalization_states` (`meter_id`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_notification_consumers`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_notification_consumers` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `consumer_name` VARCHAR(128) NOT NULL,
+  `last_notification_id` BIGINT NOT NULL,
+  `last_handled_datetime_utc` DATETIME,
+  `last_stage_lag_seconds` INT,
+  `last_end_to_end_lag_seconds` INT,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_notification_consumers_index_1`
+ ON `myems_energy_db`.`tbl_notification_consumers` (`consumer_name`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_offline_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_offline_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_daily_index_1`
+ ON `myems_energy_db`.`tbl_offline_meter_daily` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_offline_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_offline_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_monthly_index_1`
+ ON `myems_energy_db`.`tbl_offline_meter_monthly` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_rollup_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_rollup_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `last_hourly_id` BIGINT NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_rollup_watermarks_index_1`
+ ON `myems_energy_db`.`tbl_rollup_watermarks` (`table_name`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_daily_index_1`
+ ON  `myems_energy_db`.`tbl_shopfloor_input_category_daily`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_monthly_index_1`
+ ON  `myems_energy_db`.`tbl_shopfloor_input_category_monthly`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_daily_index_1`
+  ON `myems_energy_db`.`tbl_shopfloor_input_item_daily`
+  (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_shopfloor_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_shopfloor_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_monthly_index_1`
+  ON `myems_energy_db`.`tbl_shopfloor_input_item_monthly`
+  (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_input_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_input_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_input_item_daily` (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_input_item_monthly` (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_space_output_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_space_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_space_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_space_output_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_store_input_category_daily`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_store_input_category_monthly`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_store_input_item_daily` (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_store_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_store_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_store_input_item_monthly` (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_daily_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_category_daily`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_monthly_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_category_monthly`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_daily_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_item_daily` (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_tenant_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_tenant_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_monthly_index_1`
+ ON `myems_energy_db`.`tbl_tenant_input_item_monthly` (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_virtual_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_virtual_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_daily_index_1`
+ ON `myems_energy_db`.`tbl_virtual_meter_daily` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_energy_db`.`tbl_virtual_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_energy_db`.`tbl_virtual_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_monthly_index_1`
+ ON `myems_energy_db`.`tbl_virtual_meter_monthly` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_input_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_input_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_input_item_daily`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_input_item_monthly`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_output_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_combined_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_combined_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_combined_equipment_output_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_equipment_input_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_equipment_input_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_equipment_input_item_daily`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_equipment_input_item_monthly`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_equipment_output_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_equipment_output_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_daily_index_1` ON `myems_billing_db`.`tbl_meter_daily` (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_monthly_index_1` ON `myems_billing_db`.`tbl_meter_monthly` (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_offline_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_offline_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_daily_index_1`
+ ON `myems_billing_db`.`tbl_offline_meter_daily` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_offline_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_offline_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_monthly_index_1`
+ ON `myems_billing_db`.`tbl_offline_meter_monthly` (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_rollup_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_rollup_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `last_hourly_id` BIGINT NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_rollup_watermarks_index_1`
+ ON `myems_billing_db`.`tbl_rollup_watermarks` (`table_name`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_shopfloor_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_shopfloor_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_shopfloor_input_category_daily`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_shopfloor_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_shopfloor_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_shopfloor_input_category_monthly`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_shopfloor_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_shopfloor_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_shopfloor_input_item_daily`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_shopfloor_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_shopfloor_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_shopfloor_input_item_monthly`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_space_input_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_space_input_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_space_input_item_daily`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_space_input_item_monthly`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_space_output_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_space_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_space_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_space_output_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_store_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_store_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_store_input_category_daily`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_store_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_store_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_store_input_category_monthly`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_store_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_store_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_store_input_item_daily`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_store_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_store_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_store_input_item_monthly`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_tenant_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_tenant_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_daily_index_1`
+ ON `myems_billing_db`.`tbl_tenant_input_category_daily`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_tenant_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_tenant_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_monthly_index_1`
+ ON `myems_billing_db`.`tbl_tenant_input_category_monthly`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_tenant_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_tenant_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_daily_index_1`
+ ON `myems_billing_db`.`tbl_tenant_input_item_daily`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_tenant_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_tenant_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_monthly_index_1`
+ ON `myems_billing_db`.`tbl_tenant_input_item_monthly`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_virtual_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_virtual_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_daily_index_1`
+ ON `myems_billing_db`.`tbl_virtual_meter_daily` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_billing_db`.`tbl_virtual_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_billing_db`.`tbl_virtual_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_monthly_index_1`
+ ON `myems_billing_db`.`tbl_virtual_meter_monthly` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_item_daily`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_input_item_monthly`
+ (`combined_equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_output_category_daily`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `combined_equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_combined_equipment_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_combined_equipment_output_category_monthly`
+ (`combined_equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_item_daily`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_input_item_monthly`
+ (`equipment_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_output_category_daily`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_equipment_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_equipment_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `equipment_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_equipment_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_equipment_output_category_monthly`
+ (`equipment_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_meter_daily`
+ (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_meter_monthly`
+ (`meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_offline_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_offline_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_offline_meter_daily`
+ (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_offline_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_offline_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `offline_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_offline_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_offline_meter_monthly`
+ (`offline_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_rollup_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_rollup_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `table_name` VARCHAR(128) NOT NULL,
+  `last_hourly_id` BIGINT NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_rollup_watermarks_index_1`
+ ON `myems_carbon_db`.`tbl_rollup_watermarks` (`table_name`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_category_daily`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_category_monthly`
+ (`shopfloor_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_item_daily`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_shopfloor_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_shopfloor_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `shopfloor_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_shopfloor_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_shopfloor_input_item_monthly`
+ (`shopfloor_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_item_daily`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_input_item_monthly`
+ (`space_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_output_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_output_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_space_output_category_daily`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_space_output_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_space_output_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `space_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_space_output_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_space_output_category_monthly`
+ (`space_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_category_daily`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_category_monthly`
+ (`store_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_item_daily`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_store_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_store_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `store_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_store_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_store_input_item_monthly`
+ (`store_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_category_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_category_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_daily_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_category_daily`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_category_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_category_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_category_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_category_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_category_monthly`
+ (`tenant_id`, `energy_category_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_item_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_item_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_daily_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_item_daily`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_tenant_input_item_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_tenant_input_item_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `tenant_id` BIGINT NOT NULL,
+  `energy_item_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_tenant_input_item_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_tenant_input_item_monthly`
+ (`tenant_id`, `energy_item_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_virtual_meter_daily`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_virtual_meter_daily` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_daily_index_1`
+ ON `myems_carbon_db`.`tbl_virtual_meter_daily` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_carbon_db`.`tbl_virtual_meter_monthly`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_carbon_db`.`tbl_virtual_meter_monthly` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `virtual_meter_id` BIGINT NOT NULL,
+  `start_datetime_utc` DATETIME NOT NULL,
+  `actual_value` DECIMAL(18, 3) NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE INDEX `tbl_virtual_meter_monthly_index_1`
+ ON `myems_carbon_db`.`tbl_virtual_meter_monthly` (`virtual_meter_id`, `start_datetime_utc`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Table `myems_historical_db`.`tbl_energy_value_cleaning_watermarks`
+-- ---------------------------------------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS `myems_historical_db`.`tbl_energy_value_cleaning_watermarks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `point_id` BIGINT NOT NULL,
+  `last_utc_date_time` DATETIME NOT NULL,
+  PRIMARY KEY (`id`));
+CREATE UNIQUE INDEX `tbl_energy_value_cleaning_watermarks_index_1`
+ ON `myems_historical_db`.`tbl_energy_value_cleaning_watermarks` (`point_id`);
+
+-- ---------------------------------------------------------------------------------------------------------------------
+-- Partition the historical tables and the hourly tables by month
+-- NOTE: the existing tables are converted online by the partition manager of myems-cleaning, instead of ALTER TABLE
+-- which blocks the inserts until all rows are copied. Run the commands after upgrading:
+--   cd /myems-cleaning
+--   python3 partition_manager.py historical
+--   python3 partition_manager.py energy
+--   python3 partition_manager.py billing
+--   python3 partition_manager.py carbon
+-- The rows are copied before the partitioned tables replace the old tables, so the readers keep reading all rows.
+-- The rows updated or deleted after they are copied are not converted, so stop myems-cleaning and don't import data
+-- repair files while converting the historical tables, and don't import offline meter files or run backfill.py of
+-- myems-aggregation while converting the hourly tables.
+-- ---------------------------------------------------------------------------------------------------------------------
+
 -- UPDATE VERSION NUMBER
 UPDATE `myems_system_db`.`tbl_versions` SET version='4.3.0RC', release_date='2024-03-01' WHERE id=1;
 
@@ -0,0 +1,458 @@
+import argparse
+import logging
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+from multiprocessing import Pool
+
+import mysql.connector
+
+import config
+import hierarchy
+import rollup
+import scheduler
+
+
+# the maximum number of object ids in the IN clause of one query
+id_chunk_size = 500
+
+# the object types of the id columns in the hourly tables
+id_column_type_dict = {
+    'meter_id': 'meter',
+    'virtual_meter_id': 'virtual_meter',
+    'offline_meter_id': 'offline_meter',
+    'equipment_id': 'equipment',
+    'combined_equipment_id': 'combined_equipment',
+    'shopfloor_id': 'shopfloor',
+    'store_id': 'store',
+    'tenant_id': 'tenant',
+    'space_id': 'space',
+}
+
+# the databases recalculated in every scope,
+# billing and carbon dioxide emissions are calculated from energy, so they are recalculated along with energy
+scope_database_dict = {
+    'all': ('energy', 'billing', 'carbon'),
+    'billing': ('billing', ),
+    'carbon': ('carbon', ),
+}
+
+
+########################################################################################################################
+# Recalculate the historical data of some objects and all objects aggregating them
+#
+# Usage: python3 backfill.py OBJECT_TYPE IDS START_DATETIME_UTC [--end END_DATETIME_UTC] [--scope all|billing|carbon]
+#                             [--chunk-days CHUNK_DAYS]
+#   for example, recalculate the equipments 1 and 2 and the combined equipments, shopfloors and spaces aggregating them
+#   in January 2024 in UTC after fixing the meters associated with the equipments:
+#   python3 backfill.py equipment 1,2 "2024-01-01 00:00:00" --end "2024-02-01 00:00:00"
+#   or recalculate billing of the meter 3 and all objects aggregating it since 2024-01-01 00:00:00 in UTC up to now
+#   after fixing a tariff:
+#   python3 backfill.py meter 3 "2024-01-01 00:00:00" --scope billing
+#
+# PROCEDURES
+# Step 1: get the objects to recalculate from the hierarchy snapshot, including the virtual meters whose equations
+#         reference the meters, and the objects aggregating them up to the root space
+# Step 2: delete the hourly data of the objects in the time window, and the daily and monthly data of the local days
+#         and the local months overlapping the time window
+# Step 3: split the time window into chunks, recalculate the chunks of the objects in dependency order in the worker
+#         pool, and count the hourly data recalculated
+#
+# NOTE: stop the myems-aggregation service before running the backfill, and stop the myems-normalization service too
+# if the scope includes energy of meters or virtual meters, then start them after running the backfill.
+# NOTE: the energy data of meters and virtual meters are deleted along with their normalization states, and they are
+# normalized again by myems-normalization up to now after it is started, so the end datetime is not supported for them.
+# The objects aggregating them have no input data until then, so they are not recalculated in step 3, but by
+# myems-aggregation when notified of the appended data.
+# NOTE: every task calculates one object or one module in one chunk, from the latest hourly data of the object in the
+# chunk up to the end of the chunk, so the chunks of the same object are calculated in parallel, the chunk of an object
+# waits for the same chunk of the objects it aggregates only, and the data after the time window are kept
+########################################################################################################################
+def main():
+    parser = argparse.ArgumentParser(description='Recalculate the historical data of MyEMS objects')
+    parser.add_argument('object_type', choices=hierarchy.meter_type_list + hierarchy.object_type_list)
+    parser.add_argument('ids', help='the comma separated ids of the objects, such as 1,2,3')
+    parser.add_argument('start_datetime_utc', help="the start datetime in UTC, such as '2024-01-01 00:00:00'")
+    parser.add_argument('--end', dest='end_datetime_utc',
+                        help="the end datetime in UTC, which is not included, such as '2024-02-01 00:00:00', "
+                             "or recalculate up to now if it is omitted")
+    parser.add_argument('--scope', choices=list(scope_database_dict.keys()), default='all',
+                        help='all for energy, billing and carbon dioxide emissions, '
+                             'or billing or carbon only after fixing tariffs or emission factors')
+    parser.add_argument('--chunk-days', dest='chunk_days', type=int, default=7,
+                        help='the number of days of every chunk of the time window calculated in parallel')
+    args = parser.parse_args()
+    if args.chunk_days < 1:
+        parser.error("the number of days of every chunk must be at least 1")
+        return
+
+    try:
+        id_set = set(int(object_id) for object_id in args.ids.split(','))
+        start_datetime_utc = datetime.strptime(args.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
+        end_datetime_utc = None
+        if args.end_datetime_utc is not None:
+            end_datetime_utc = datetime.strptime(args.end_datetime_utc, '%Y-%m-%d %H:%M:%S')
+    except ValueError as e:
+        parser.error(str(e))
+        return
+    # align the start datetime and the end datetime to the time slots
+    start_datetime_utc = start_datetime_utc.replace(minute=start_datetime_utc.minute -
+                                                    start_datetime_utc.minute % config.minutes_to_count,
+                                                    second=0, microsecond=0)
+    if end_datetime_utc is not None:
+        end_datetime_utc = end_datetime_utc.replace(minute=end_datetime_utc.minute -
+                                                    end_datetime_utc.minute % config.minutes_to_count,
+                                                    second=0, microsecond=0)
+        if end_datetime_utc <= start_datetime_utc:
+            parser.error("the end datetime must be later than the start datetime")
+            return
+
+    # create logger
+    logger = logging.getLogger('myems-aggregation')
+    logger.setLevel(logging.ERROR)
+    fh = RotatingFileHandler('myems-aggregation.log', maxBytes=1024*1024, backupCount=1)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    fh.setFormatter(formatter)
+    logger.addHandler(fh)
+    logger.addHandler(logging.StreamHandler())
+
+    ####################################################################################################################
+    # Step 1: get the objects to recalculate from the hierarchy snapshot
+    ####################################################################################################################
+    snapshot = hierarchy.get_snapshot(logger)
+    if snapshot is None:
+        logger.error("Error in step 1 of backfill, the system database is not ready")
+        return
+
+    object_id_set_dict = get_affected_object_id_set_dict(logger, snapshot, args.object_type, id_set)
+    if object_id_set_dict is None:
+        return
+    for object_type in hierarchy.meter_type_list + hierarchy.object_type_list:
+        print("Step 1: " + str(len(object_id_set_dict[object_type])) + " " + object_type + "s to recalculate")
+
+    is_meter_energy_deleted = 'energy' in scope_database_dict[args.scope] and \
+        (len(object_id_set_dict['meter']) > 0 or len(object_id_set_dict['virtual_meter']) > 0)
+    if is_meter_energy_deleted and end_datetime_utc is not None:
+        parser.error("the end datetime is not supported for the energy of meters and virtual meters, "
+                     "which are normalized again by myems-normalization up to now")
+        return
+
+    ####################################################################################################################
+    # Step 2: delete the hourly data of the objects in the time window, and the daily and monthly data
+    ####################################################################################################################
+    for database_name in scope_database_dict[args.scope]:
+        if not delete_data(logger, database_name, object_id_set_dict, start_datetime_utc, end_datetime_utc):
+            return
+
+    ####################################################################################################################
+    # Step 3: split the time window into chunks, recalculate the chunks of the objects in dependency order in the
+    # worker pool, and count the hourly data recalculated
+    ####################################################################################################################
+    # the data after the start of the backfill are left to myems-aggregation if the end datetime is omitted
+    recalculated_end_datetime_utc = end_datetime_utc
+    if recalculated_end_datetime_utc is None:
+        recalculated_end_datetime_utc = datetime.utcnow()
+        recalculated_end_datetime_utc = \
+            recalculated_end_datetime_utc.replace(minute=recalculated_end_datetime_utc.minute -
+                                                  recalculated_end_datetime_utc.minute % config.minutes_to_count,
+                                                  second=0, microsecond=0)
+
+    recalculated_id_set_dict = object_id_set_dict
+    if is_meter_energy_deleted:
+        recalculated_id_set_dict = get_recalculated_object_id_set_dict(snapshot, object_id_set_dict)
+        for object_type in hierarchy.meter_type_list + hierarchy.object_type_list:
+            waiting_count = len(object_id_set_dict[object_type]) - len(recalculated_id_set_dict[object_type])
+            if waiting_count > 0:
+                print("Step 3: " + str(waiting_count) + " " + object_type + "s are left to myems-normalization and "
+                      "myems-aggregation, because the energy data of meters or virtual meters are deleted")
+
+    chunk_list = get_chunks(start_datetime_utc, recalculated_end_datetime_utc, args.chunk_days)
+    task_dict = create_chunked_tasks(create_tasks(snapshot, recalculated_id_set_dict, args.scope), chunk_list)
+    print("Step 3: created " + str(len(task_dict)) + " tasks in " + str(len(chunk_list)) + " chunks")
+    pool = Pool(processes=config.pool_size)
+    scheduler.run_tasks(logger, pool, task_dict)
+    pool.close()
+    pool.join()
+
+    recalculated_row_count = 0
+    for database_name in scope_database_dict[args.scope]:
+        row_count_dict = count_data(logger, database_name, recalculated_id_set_dict,
+                                    start_datetime_utc, recalculated_end_datetime_utc)
+        if row_count_dict is None:
+            return
+        for table_name, row_count in row_count_dict.items():
+            print("Step 3: recalculated " + str(row_count) + " rows of " + table_name + " in " + database_name)
+            recalculated_row_count += row_count
+
+    print("Backfill is done, recalculated " + str(recalculated_row_count) + " hourly rows in " +
+          str(len(task_dict)) + " tasks from " + start_datetime_utc.isoformat()[0:19] + " to " +
+          recalculated_end_datetime_utc.isoformat()[0:19])
+    if is_meter_energy_deleted:
+        print("Start myems-normalization and myems-aggregation to normalize the energy data of the meters and "
+              "virtual meters again and to recalculate the objects aggregating them")
+
+
+########################################################################################################################
+# Get the objects to recalculate
+# Returns: dict of object type to the set of object ids, or None if the system database is not ready
+#   the virtual meters whose equations reference the meters, offline meters or virtual meters are included
+#   recursively, and so are the objects aggregating any of them up to the root space
+########################################################################################################################
+def get_affected_object_id_set_dict(logger, snapshot, object_type, id_set):
+    object_dict = snapshot['object_dict']
+    object_id_set_dict = dict()
+    for current_type in hierarchy.meter_type_list + hierarchy.object_type_list:
+        object_id_set_dict[current_type] = set()
+    object_id_set_dict[object_type] = set(object_id for object_id in id_set if object_id in object_dict[object_type])
+
+    if object_type in hierarchy.meter_type_list:
+        cnx_system_db = None
+        cursor_system_db = None
+        try:
+            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
+            cursor_system_db = cnx_system_db.cursor()
+            cursor_system_db.execute(" SELECT virtual_meter_id, meter_type, meter_id "
+                                     " FROM tbl_variables ")
+            rows_variables = cursor_system_db.fetchall()
+        except Exception as e:
+            logger.error("Error in step 1 of backfill.get_affected_object_id_set_dict " + str(e))
+            return None
+        finally:
+            if cursor_system_db:
+                cursor_system_db.close()
+            if cnx_system_db:
+                cnx_system_db.close()
+
+        # add the virtual meters referencing the affected meters until there isn't any more
+        while True:
+            virtual_meter_id_set = set(row[0] for row in rows_variables
+                                       if row[1] in object_id_set_dict and row[2] in object_id_set_dict[row[1]]
+                                       and row[0] in object_dict['virtual_meter'])
+            if virtual_meter_id_set.issubset(object_id_set_dict['virtual_meter']):
+                break
+            object_id_set_dict['virtual_meter'] |= virtual_meter_id_set
+
+    for current_type in hierarchy.object_type_list:
+        object_id_set_dict[current_type] |= scheduler.get_affected_object_id_set(current_type,
+                                                                                 object_id_set_dict,
+                                                                                 snapshot['child_id_dict'])
+
+    # the parent spaces aggregate the spaces to recalculate, including the spaces given
+    while True:
+        ancestor_id_set = set(parent_space_id for parent_space_id, child_space_id_set
+                              in snapshot['child_id_dict'][('space', 'space')].items()
+                              if not child_space_id_set.isdisjoint(object_id_set_dict['space']))
+        if ancestor_id_set.issubset(object_id_set_dict['space']):
+            break
+        object_id_set_dict['space'] |= ancestor_id_set
+
+    return object_id_set_dict
+
+
+########################################################################################################################
+# Delete the data of the objects to recalculate in one database in one transaction
+# database_name: energy, billing or carbon
+# end_datetime_utc: the end of the time window, or None to delete the data up to now
+# Returns: True if the data are deleted, or else False
+# NOTE: the energy data of offline meters are imported from files, so they are never deleted,
+# and the normalization states of the meters are deleted along with their energy data
+########################################################################################################################
+def delete_data(logger, database_name, object_id_set_dict, start_datetime_utc, end_datetime_utc):
+    database = {'energy': config.myems_energy_db,
+                'billing': config.myems_billing_db,
+                'carbon': config.myems_carbon_db}[database_name]
+    (day_start_datetime_utc, _), (month_start_datetime_utc, _) = rollup.get_rollup_periods(start_datetime_utc)
+    day_end_datetime_utc = None
+    month_end_datetime_utc = None
+    if end_datetime_utc is not None:
+        # the local day and the local month containing the last time slot of the time window
+        (_, day_end_datetime_utc), (_, month_end_datetime_utc) = \
+            rollup.get_rollup_periods(end_datetime_utc - timedelta(minutes=config.minutes_to_count))
+
+    cnx = None
+    cursor = None
+    try:
+        cnx = mysql.connector.connect(**database)
+        cursor = cnx.cursor()
+
+        for hourly_table_name, key_columns in rollup.hourly_table_list:
+            id_column_name = key_columns[0]
+            object_type = id_column_type_dict[id_column_name]
+            if database_name == 'energy' and object_type == 'offline_meter':
+                continue
+
+            table_name_list = [(hourly_table_name, start_datetime_utc, end_datetime_utc),
+                               (hourly_table_name[:-len('_hourly')] + '_daily',
+                                day_start_datetime_utc, day_end_datetime_utc),
+                               (hourly_table_name[:-len('_hourly')] + '_monthly',
+                                month_start_datetime_utc, month_end_datetime_utc)]
+            if database_name == 'energy' and object_type == 'meter':
+                table_name_list.append(('tbl_meter_normalization_states', None, None))
+
+            id_list = sorted(object_id_set_dict[object_type])
+            while len(id_list) > 0:
+                query_id_list = id_list[:id_chunk_size]
+                id_list = id_list[id_chunk_size:]
+                for table_name, table_start_datetime_utc, table_end_datetime_utc in table_name_list:
+                    if table_start_datetime_utc is None:
+                        cursor.execute(" DELETE FROM " + table_name +
+                                       " WHERE " + id_column_name + " IN (" +
+                                       ", ".join(["%s"] * len(query_id_list)) + ") ",
+                                       tuple(query_id_list))
+                    elif table_end_datetime_utc is None:
+                        cursor.execute(" DELETE FROM " + table_name +
+                                       " WHERE " + id_column_name + " IN (" +
+                                       ", ".join(["%s"] * len(query_id_list)) + ") "
+                                       "       AND start_datetime_utc >= %s ",
+                                       tuple(query_id_list) + (table_start_datetime_utc, ))
+                    else:
+                        cursor.execute(" DELETE FROM " + table_name +
+                                       " WHERE " + id_column_name + " IN (" +
+                                       ", ".join(["%s"] * len(query_id_list)) + ") "
+                                       "       AND start_datetime_utc >= %s "
+                                       "       AND start_datetime_utc < %s ",
+                                       tuple(query_id_list) + (table_start_datetime_utc, table_end_datetime_utc))
+                    print("Step 2: deleted " + str(cursor.rowcount) + " rows of " + table_name + " in " +
+                          database['database'])
+
+        cnx.commit()
+    except Exception as e:
+        logger.error("Error in step 2 of backfill.delete_data " + database_name + " " + str(e))
+        if cnx:
+            cnx.rollback()
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if cnx:
+            cnx.close()
+
+    return True
+
+
+########################################################################################################################
+# Count the hourly data of the objects recalculated in the time window in one database
+# database_name: energy, billing or carbon
+# Returns: dict of hourly table name to the number of rows, or None if the database is not ready
+########################################################################################################################
+def count_data(logger, database_name, object_id_set_dict, start_datetime_utc, end_datetime_utc):
+    database = {'energy': config.myems_energy_db,
+                'billing': config.myems_billing_db,
+                'carbon': config.myems_carbon_db}[database_name]
+
+    row_count_dict = dict()
+    cnx = None
+    cursor = None
+    try:
+        cnx = mysql.connector.connect(**database)
+        cursor = cnx.cursor()
+
+        for hourly_table_name, key_columns in rollup.hourly_table_list:
+            id_column_name = key_columns[0]
+            id_list = sorted(object_id_set_dict[id_column_type_dict[id_column_name]])
+            if len(id_list) == 0 or (database_name == 'energy' and id_column_name == 'offline_meter_id'):
+                continue
+
+            row_count_dict[hourly_table_name] = 0
+            while len(id_list) > 0:
+                query_id_list = id_list[:id_chunk_size]
+                id_list = id_list[id_chunk_size:]
+                cursor.execute(" SELECT COUNT(*) "
+                               " FROM " + hourly_table_name +
+                               " WHERE " + id_column_name + " IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                               "       AND start_datetime_utc >= %s "
+                               "       AND start_datetime_utc < %s ",
+                               tuple(query_id_list) + (start_datetime_utc, end_datetime_utc))
+                row_count_dict[hourly_table_name] += cursor.fetchone()[0]
+    except Exception as e:
+        logger.error("Error in step 3 of backfill.count_data " + database_name + " " + str(e))
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if cnx:
+            cnx.close()
+
+    return row_count_dict
+
+
+########################################################################################################################
+# Get the objects to recalculate in step 3 when the energy data of meters or virtual meters are deleted
+# Returns: dict of object type to the set of object ids, without the meters and virtual meters and the objects
+#   aggregating any of them, which have no input data until the meters and virtual meters are normalized again
+########################################################################################################################
+def get_recalculated_object_id_set_dict(snapshot, object_id_set_dict):
+    waiting_id_set_dict = {'meter': object_id_set_dict['meter'],
+                           'virtual_meter': object_id_set_dict['virtual_meter']}
+    for object_type in hierarchy.object_type_list:
+        waiting_id_set_dict[object_type] = scheduler.get_affected_object_id_set(object_type,
+                                                                                waiting_id_set_dict,
+                                                                                snapshot['child_id_dict'])
+
+    recalculated_id_set_dict = dict()
+    for object_type in hierarchy.meter_type_list + hierarchy.object_type_list:
+        recalculated_id_set_dict[object_type] = object_id_set_dict[object_type] - \
+            waiting_id_set_dict.get(object_type, set())
+    return recalculated_id_set_dict
+
+
+########################################################################################################################
+# Create the tasks to recalculate the objects with the same dependencies as the tasks of the scheduler
+# Returns: dict of task key to task, only the tasks of billing or carbon dioxide emissions modules and the rollup task
+# are kept if the scope is billing or carbon
+########################################################################################################################
+def create_tasks(snapshot, object_id_set_dict, scope):
+    task_dict = scheduler.create_tasks(snapshot, object_id_set_dict, False)
+    if scope == 'all':
+        return task_dict
+
+    task_dict = dict((key, task) for key, task in task_dict.items()
+                     if ('_' + scope) in task['module_name'] or task['module_name'] == rollup.__name__)
+    for task in task_dict.values():
+        task['dependency_set'] = set(key for key in task['dependency_set'] if key in task_dict)
+    return task_dict
+
+
+########################################################################################################################
+# Split the time window into chunks of days
+# Returns: list of (start datetime, end datetime) of the chunks
+########################################################################################################################
+def get_chunks(start_datetime_utc, end_datetime_utc, chunk_days):
+    chunk_list = list()
+    chunk_start_datetime_utc = start_datetime_utc
+    while chunk_start_datetime_utc < end_datetime_utc:
+        chunk_end_datetime_utc = min(chunk_start_datetime_utc + timedelta(days=chunk_days), end_datetime_utc)
+        chunk_list.append((chunk_start_datetime_utc, chunk_end_datetime_utc))
+        chunk_start_datetime_utc = chunk_end_datetime_utc
+    return chunk_list
+
+
+########################################################################################################################
+# Create the tasks of every chunk from the tasks of the objects
+# task_dict: dict of task key to task, returned by create_tasks
+# chunk_list: list of (start datetime, end datetime) of the chunks, returned by get_chunks
+# Returns: dict of (task key, chunk index) to task, and the rollup task after all other tasks
+# NOTE: the task of a chunk depends on the tasks of the same chunk only, so the chunks of every level of the hierarchy
+# are calculated in parallel
+########################################################################################################################
+def create_chunked_tasks(task_dict, chunk_list):
+    chunked_task_dict = dict()
+    for key, task in task_dict.items():
+        if task['module_name'] == rollup.__name__:
+            continue
+        for chunk_index, chunk in enumerate(chunk_list):
+            chunked_task = dict(task)
+            chunked_task['window'] = chunk
+            chunked_task['dependency_set'] = set((dependency, chunk_index) for dependency in task['dependency_set']
+                                                 if task_dict[dependency]['module_name'] != rollup.__name__)
+            chunked_task_dict[(key, chunk_index)] = chunked_task
+
+    for key, task in task_dict.items():
+        if task['module_name'] == rollup.__name__:
+            rollup_task = dict(task)
+            rollup_task['dependency_set'] = set(chunked_task_dict.keys())
+            chunked_task_dict[key] = rollup_task
+    return chunked_task_dict
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import config
+import window
+
+
+# the maximum number of object ids in the IN clause of one query
+id_chunk_size = 500
+
+# the maximum number of rows in one INSERT statement
+insert_chunk_size = 1000
+
+# the maximum number of objects calculated and committed in one batch
+batch_object_count = 500
+
+# the maximum length of the time window calculated and committed in one batch, so that the first pass or a catch-up
+# after a long outage doesn't load the whole history since config.start_datetime_utc at once
+batch_time_window = timedelta(days=7)
+
+
+########################################################################################################################
+# Get the start datetime of the pending time slots of many objects in one query per chunk of ids
+# cursor: the cursor of billing or carbon database
+# table_name: the hourly table, such as tbl_meter_hourly
+# id_column_name: the object id column in the hourly table, such as meter_id
+# id_list: the ids of the objects
+# Returns: dict of object id to the next time slot after the latest start_datetime_utc of the object in the time window,
+#          or to the start of the time window if there isn't any data of the object in it
+########################################################################################################################
+def get_start_datetimes(cursor, table_name, id_column_name, id_list):
+    default_start_datetime_utc = window.get_start_datetime()
+
+    start_datetime_dict = dict()
+    for object_id in id_list:
+        start_datetime_dict[object_id] = default_start_datetime_utc
+
+    id_list = sorted(set(id_list))
+    while len(id_list) > 0:
+        query_id_list = id_list[:id_chunk_size]
+        id_list = id_list[id_chunk_size:]
+        cursor.execute(" SELECT " + id_column_name + ", MAX(start_datetime_utc) "
+                       " FROM " + table_name +
+                       " WHERE " + id_column_name + " IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                       "       AND start_datetime_utc >= %s AND start_datetime_utc < %s "
+                       " GROUP BY " + id_column_name,
+                       tuple(query_id_list) + (window.get_start_datetime(), window.get_end_datetime()))
+        for row in cursor.fetchall():
+            if isinstance(row[1], datetime):
+                # replace second and microsecond with 0
+                # note: do not replace minute in case of calculating in half hourly
+                # start from the next time slot
+                start_datetime_dict[row[0]] = row[1].replace(second=0, microsecond=0, tzinfo=None) + \
+                    timedelta(minutes=config.minutes_to_count)
+
+    return start_datetime_dict
+
+
+########################################################################################################################
+# Split the pending objects into batches, and the pending time slots of every batch into time windows
+# start_datetime_dict: dict of object id to its start datetime, returned by get_start_datetimes
+# Returns: list of (dict of object id to its start datetime of the objects in the batch,
+#                   list of (start datetime, end datetime) of the time windows of the batch)
+# NOTE: the caller commits after every time window, and skips the later time windows of a batch once a time window
+# fails, so that no object is left with a gap before its latest start_datetime_utc
+########################################################################################################################
+def get_batches(start_datetime_dict):
+    end_datetime_utc = window.get_end_datetime()
+    id_list = sorted(object_id for object_id, start_datetime_utc in start_datetime_dict.items()
+                     if start_datetime_utc < end_datetime_utc)
+
+    batch_list = list()
+    while len(id_list) > 0:
+        batch_id_list = id_list[:batch_object_count]
+        id_list = id_list[batch_object_count:]
+        batch_start_datetime_dict = dict((object_id, start_datetime_dict[object_id]) for object_id in batch_id_list)
+
+        time_window_list = list()
+        window_start_datetime_utc = min(batch_start_datetime_dict.values())
+        while window_start_datetime_utc < end_datetime_utc:
+            window_end_datetime_utc = min(window_start_datetime_utc + batch_time_window, end_datetime_utc)
+            time_window_list.append((window_start_datetime_utc, window_end_datetime_utc))
+            window_start_datetime_utc = window_end_datetime_utc
+        batch_list.append((batch_start_datetime_dict, time_window_list))
+
+    return batch_list
+
+
+########################################################################################################################
+# Get the energy data of many objects since their own start datetimes in a time window
+# cursor: the cursor of energy database
+# table_name: the hourly table, such as tbl_meter_hourly
+# id_column_name: the object id column in the hourly table, such as meter_id
+# start_datetime_dict: dict of object id to its start datetime, returned by get_start_datetimes
+# window_start_datetime_utc, window_end_datetime_utc: the time window, returned by get_batches
+# Returns: dict of object id to list of (start_datetime_utc, actual_value), the objects without data are omitted
+# NOTE: the objects are queried in groups sharing the same start datetime, which is the latest time slot for almost
+# all objects after the first pass, so that the data already calculated are not read again
+########################################################################################################################
+def get_pending_values(cursor, table_name, id_column_name, start_datetime_dict,
+                       window_start_datetime_utc, window_end_datetime_utc):
+    id_list_dict = dict()
+    for object_id, start_datetime_utc in start_datetime_dict.items():
+        start_datetime_utc = max(start_datetime_utc, window_start_datetime_utc)
+        if start_datetime_utc < window_end_datetime_utc:
+            id_list_dict.setdefault(start_datetime_utc, list()).append(object_id)
+
+    pending_values = dict()
+    for start_datetime_utc, id_list in sorted(id_list_dict.items()):
+        id_list = sorted(id_list)
+        while len(id_list) > 0:
+            query_id_list = id_list[:id_chunk_size]
+            id_list = id_list[id_chunk_size:]
+            cursor.execute(" SELECT " + id_column_name + ", start_datetime_utc, actual_value "
+                           " FROM " + table_name +
+                           " WHERE " + id_column_name + " IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                           "       AND start_datetime_utc >= %s "
+                           "       AND start_datetime_utc < %s "
+                           " ORDER BY " + id_column_name + ", start_datetime_utc ",
+                           tuple(query_id_list) + (start_datetime_utc, window_end_datetime_utc))
+            # iterate the cursor to put the rows into the lists of objects without keeping the whole result set
+            for row in cursor:
+                pending_values.setdefault(row[0], list()).append((row[1], row[2]))
+
+    return pending_values
+
+
+########################################################################################################################
+# Multiply the energy data of a group of objects with a factor series shared by the group
+# value_list_dict: dict of object id to list of (start_datetime_utc, actual_value) of the objects in the group
+# factor_dict: dict of start_datetime_utc to the factor, such as the tariff price or the emission factor,
+#              evaluated once for every time slot of the group instead of once for every object
+# Returns: dict of object id to list of (start_datetime_utc, product), where both values are Decimal
+########################################################################################################################
+def multiply_values(value_list_dict, factor_dict):
+    product_list_dict = dict()
+    for object_id, value_list in value_list_dict.items():
+        product_list = list()
+        for start_datetime_utc, actual_value in value_list:
+            factor = factor_dict.get(start_datetime_utc)
+            if isinstance(factor, Decimal) and isinstance(actual_value, Decimal):
+                product_list.append((start_datetime_utc, actual_value * factor))
+        if len(product_list) > 0:
+            product_list_dict[object_id] = product_list
+    return product_list_dict
+
+
+########################################################################################################################
+# Save the calculated data of many objects to an hourly table
+# cursor: the cursor of billing or carbon database, the caller commits the transaction of every time window of a batch
+# table_name: the hourly table, such as tbl_meter_hourly
+# id_column_name: the object id column in the hourly table, such as meter_id
+# product_list_dict: dict of object id to list of (start_datetime_utc, actual_value), returned by multiply_values
+# Returns: the number of rows inserted
+########################################################################################################################
+def save_values(cursor, table_name, id_column_name, product_list_dict):
+    row_list = list()
+    for object_id in sorted(product_list_dict.keys()):
+        for start_datetime_utc, actual_value in product_list_dict[object_id]:
+            row_list.append(" (" + str(object_id) + ",'" + start_datetime_utc.isoformat()[0:19] + "'," +
+                            str(actual_value) + ")")
+
+    row_count = len(row_list)
+    while len(row_list) > 0:
+        insert_rows = row_list[:insert_chunk_size]
+        row_list = row_list[insert_chunk_size:]
+        cursor.execute(" INSERT INTO " + table_name +
+                       "             (" + id_column_name + ", start_datetime_utc, actual_value) "
+                       " VALUES " + ", ".join(insert_rows))
+    return row_count
@@ -7,11 +7,14 @@ from multiprocessing import Pool
 import mysql.connector
 
 import config
+import energy_data
+import hierarchy
+import window
 
 
 ########################################################################################################################
 # PROCEDURES
-# Step 1: get all combined equipments
+# Step 1: get all combined equipments with their meters and child objects from the hierarchy snapshot
 # Step 2: Create multiprocessing pool to call worker in parallel
 ########################################################################################################################
 
@@ -20,73 +23,62 @@ def main(logger):
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all combined equipments
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of combined_equipment_energy_output_category.main " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        if not aggregate_all(logger):
             # sleep and continue the outer loop to reconnect the database
             time.sleep(60)
             continue
-        print("Connected to MyEMS System Database")
 
-        combined_equipment_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name "
-                                     " FROM tbl_combined_equipments "
-                                     " ORDER BY id ")
-            rows_combined_equipments = cursor_system_db.fetchall()
+        print("go to sleep 300 seconds...")
+        time.sleep(300)
+        print("wake from sleep, and continue to work...")
+    # end of outer while
 
-            if rows_combined_equipments is None or len(rows_combined_equipments) == 0:
-                print("There isn't any combined equipments ")
-                # sleep and continue the outer loop to reconnect the database
-                time.sleep(60)
-                continue
 
-            for row in rows_combined_equipments:
-                combined_equipment_list.append({"id": row[0], "name": row[1]})
+########################################################################################################################
+# Aggregate energy output by energy categories of all combined equipments once
+# object_id_set: the ids of the combined equipments to aggregate, None for all combined equipments
+# NOTE: returns False if the system database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all combined equipments with their meters and child objects from the hierarchy snapshot
+    ####################################################################################################################
+    snapshot = hierarchy.get_snapshot(logger)
+    if snapshot is None:
+        return False
 
-        except Exception as e:
-            logger.error("Error in step 1.2 of combined_equipment_energy_output_category.main " + str(e))
-            # sleep and continue the outer loop to reconnect the database
-            time.sleep(60)
-            continue
-        finally:
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+    if len(snapshot['object_dict']['combined_equipment']) == 0:
+        print("There isn't any combined equipments ")
+        return False
 
-        print("Got all combined equipments in MyEMS System Database")
+    combined_equipment_list = list()
+    for combined_equipment_id in sorted(snapshot['object_dict']['combined_equipment'].keys()):
+        combined_equipment_list.append(hierarchy.get_worker_object(snapshot, 'combined_equipment', 'output_category',
+                                                                   combined_equipment_id))
 
-        # shuffle the combined equipment list for randomly calculating the meter hourly value
-        random.shuffle(combined_equipment_list)
+    print("Got all combined equipments in the hierarchy snapshot")
 
-        ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
-        ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, combined_equipment_list)
-        p.close()
-        p.join()
+    if object_id_set is not None:
+        # only aggregate the combined equipments whose input data were appended
+        combined_equipment_list = [combined_equipment for combined_equipment in combined_equipment_list
+                                   if combined_equipment['id'] in object_id_set]
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+    # shuffle the combined equipment list for randomly calculating the meter hourly value
+    random.shuffle(combined_equipment_list)
 
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of outer while
+    ####################################################################################################################
+    # Step 2: Create multiprocessing pool to call worker in parallel
+    ####################################################################################################################
+    p = Pool(processes=config.pool_size)
+    error_list = p.map(worker, combined_equipment_list)
+    p.close()
+    p.join()
+
+    for error in error_list:
+        if error is not None and len(error) > 0:
+            logger.error(error)
+
+    return True
 
 
 ########################################################################################################################
@@ -104,6 +96,7 @@ def main(logger):
 #   Step 11: aggregate energy data in the common time slot by energy categories and hourly
 #   Step 12: save energy data to energy database
 #
+# NOTE: the associated meters and objects are prepared by hierarchy.get_worker_object from the hierarchy snapshot
 # NOTE: returns None or the error string because that the logger object cannot be passed in as parameter
 ########################################################################################################################
 
@@ -112,140 +105,25 @@ def worker(combined_equipment):
     # Step 1: get all output meters associated with the combined equipment
     ####################################################################################################################
     print("Step 1: get all output meters associated with the combined equipment " + str(combined_equipment['name']))
-
-    meter_list = list()
-    cnx_system_db = None
-    cursor_system_db = None
-    try:
-        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-        cursor_system_db = cnx_system_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.1 of combined_equipment_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_meters m, tbl_combined_equipments_meters em "
-                                 " WHERE m.id = em.meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND em.is_output = 1 "
-                                 "       AND em.combined_equipment_id = %s ",
-                                 (combined_equipment['id'],))
-        rows_meters = cursor_system_db.fetchall()
-
-        if rows_meters is not None and len(rows_meters) > 0:
-            for row in rows_meters:
-                meter_list.append({"id": row[0],
-                                   "name": row[1],
-                                   "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 1.2 of combined_equipment_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    meter_list = combined_equipment['meter_list']
 
     ####################################################################################################################
     # Step 2: get all output virtual meters associated with the combined equipment
     ####################################################################################################################
     print("Step 2: get all output virtual meters associated with the combined equipment")
-    virtual_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_virtual_meters m, tbl_combined_equipments_virtual_meters em "
-                                 " WHERE m.id = em.virtual_meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND em.is_output = 1 "
-                                 "       AND em.combined_equipment_id = %s ",
-                                 (combined_equipment['id'],))
-        rows_virtual_meters = cursor_system_db.fetchall()
-
-        if rows_virtual_meters is not None and len(rows_virtual_meters) > 0:
-            for row in rows_virtual_meters:
-                virtual_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 2.1 of combined_equipment_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    virtual_meter_list = combined_equipment['virtual_meter_list']
 
     ####################################################################################################################
     # Step 3: get all output offline meters associated with the combined equipment
     ####################################################################################################################
     print("Step 3: get all output offline meters associated with the combined equipment")
-
-    offline_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_offline_meters m, tbl_combined_equipments_offline_meters em "
-                                 " WHERE m.id = em.offline_meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND em.is_output = 1 "
-                                 "       AND em.combined_equipment_id = %s ",
-                                 (combined_equipment['id'],))
-        rows_offline_meters = cursor_system_db.fetchall()
-
-        if rows_offline_meters is not None and len(rows_offline_meters) > 0:
-            for row in rows_offline_meters:
-                offline_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 3.1 of combined_equipment_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    offline_meter_list = combined_equipment['offline_meter_list']
 
     ####################################################################################################################
     # Step 4: get all equipments associated with the combined equipment
     ####################################################################################################################
     print("Step 4: get all equipments associated with the combined equipment")
-
-    equipment_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT e.id, e.name "
-                                 " FROM tbl_equipments e, tbl_combined_equipments_equipments ce "
-                                 " WHERE e.id = ce.equipment_id "
-                                 "       AND e.is_output_counted = 1 "
-                                 "       AND ce.combined_equipment_id = %s ",
-                                 (combined_equipment['id'],))
-        rows_equipments = cursor_system_db.fetchall()
-
-        if rows_equipments is not None and len(rows_equipments) > 0:
-            for row in rows_equipments:
-                equipment_list.append({"id": row[0],
-                                       "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 4 of combined_equipment_energy_output_category.worker " + str(e)
-        print(error_string)
-        return error_string
-    finally:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
+    equipment_list = combined_equipment['equipment_list']
 
     ####################################################################################################################
     # stop to the next combined equipment if this combined 3equipment is empty
@@ -278,11 +156,12 @@ def worker(combined_equipment):
     try:
         query = (" SELECT MAX(start_datetime_utc) "
                  " FROM tbl_combined_equipment_output_category_hourly "
-                 " WHERE combined_equipment_id = %s ")
-        cursor_energy_db.execute(query, (combined_equipment['id'],))
+                 " WHERE combined_equipment_id = %s "
+                 "       AND start_datetime_utc >= %s AND start_datetime_utc < %s ")
+        cursor_energy_db.execute(query, (combined_equipment['id'],
+                                         window.get_start_datetime(), window.get_end_datetime()))
         row_datetime = cursor_energy_db.fetchone()
-        start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-        start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        start_datetime_utc = window.get_start_datetime()
 
         if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
             # replace second and microsecond with 0
@@ -291,7 +170,7 @@ def worker(combined_equipment):
             # start from the next time slot
             start_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
-        end_datetime_utc = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=None)
+        end_datetime_utc = window.get_end_datetime()
 
         print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19]
               + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
@@ -305,29 +184,19 @@ def worker(combined_equipment):
         print(error_string)
         return error_string
 
+    # count the queries of hourly energy data, which were one query per object before
+    energy_data.reset_query_count()
+
     ####################################################################################################################
     # Step 6: for each meter in list, get energy output data from energy database
     ####################################################################################################################
     energy_meter_hourly = dict()
     try:
         if meter_list is not None and len(meter_list) > 0:
-            for meter in meter_list:
-                meter_id = str(meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_meter_hourly "
-                         " WHERE meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_meter_hourly[meter_id] = None
-                else:
-                    energy_meter_hourly[meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_meter_hourly[meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [meter['id'] for meter in meter_list]
+            energy_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_meter_hourly', 'meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
     except Exception as e:
         error_string = "Error in step 6.1 of combined_equipment_energy_output_category.worker " + str(e)
         if cursor_energy_db:
@@ -343,23 +212,10 @@ def worker(combined_equipment):
     energy_virtual_meter_hourly = dict()
     if virtual_meter_list is not None and len(virtual_meter_list) > 0:
         try:
-            for virtual_meter in virtual_meter_list:
-                virtual_meter_id = str(virtual_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_virtual_meter_hourly "
-                         " WHERE virtual_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (virtual_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_virtual_meter_hourly[virtual_meter_id] = None
-                else:
-                    energy_virtual_meter_hourly[virtual_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_virtual_meter_hourly[virtual_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [virtual_meter['id'] for virtual_meter in virtual_meter_list]
+            energy_virtual_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_virtual_meter_hourly', 'virtual_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
         except Exception as e:
             error_string = "Error in step 7.1 of combined_equipment_energy_output_category.worker " + str(e)
             if cursor_energy_db:
@@ -375,23 +231,10 @@ def worker(combined_equipment):
     energy_offline_meter_hourly = dict()
     if offline_meter_list is not None and len(offline_meter_list) > 0:
         try:
-            for offline_meter in offline_meter_list:
-                offline_meter_id = str(offline_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_offline_meter_hourly "
-                         " WHERE offline_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (offline_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_offline_meter_hourly[offline_meter_id] = None
-                else:
-                    energy_offline_meter_hourly[offline_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_offline_meter_hourly[offline_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [offline_meter['id'] for offline_meter in offline_meter_list]
+            energy_offline_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_offline_meter_hourly', 'offline_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
 
         except Exception as e:
             error_string = "Error in step 8.1 of combined_equipment_energy_output_category.worker " + str(e)
@@ -408,28 +251,10 @@ def worker(combined_equipment):
     energy_equipment_hourly = dict()
     if equipment_list is not None and len(equipment_list) > 0:
         try:
-            for equipment in equipment_list:
-                equipment_id = str(equipment['id'])
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_equipment_output_category_hourly "
-                         " WHERE equipment_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (equipment_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_equipment_hourly[equipment_id] = None
-                else:
-                    energy_equipment_hourly[equipment_id] = dict()
-                    for row_value in rows_energy_values:
-                        current_datetime_utc = row_value[0]
-                        if current_datetime_utc not in energy_equipment_hourly[equipment_id]:
-                            energy_equipment_hourly[equipment_id][current_datetime_utc] = dict()
-                        energy_category_id = row_value[1]
-                        actual_value = row_value[2]
-                        energy_equipment_hourly[equipment_id][current_datetime_utc][energy_category_id] = \
-                            actual_value
+            id_list = [equipment['id'] for equipment in equipment_list]
+            energy_equipment_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_equipment_output_category_hourly', 'equipment_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 9 of combined_equipment_energy_output_category.worker " + str(e)
             if cursor_energy_db:
@@ -442,6 +267,8 @@ def worker(combined_equipment):
     ####################################################################################################################
     # Step 10: determine common time slot to aggregate
     ####################################################################################################################
+    print("Got hourly energy data of " + str(energy_data.object_count) + " objects in " +
+          str(energy_data.query_count) + " queries")
 
     common_start_datetime_utc = start_datetime_utc
     common_end_datetime_utc = end_datetime_utc
@@ -55,5 +55,21 @@ utc_offset = config('UTC_OFFSET', default='+08:00')
 
 # the number of worker processes in parallel
 # the pool size depends on the computing performance of the database server and the analysis server
+# all tasks of myems-aggregation share one pool, so it also bounds the number of database connections
 pool_size = config('POOL_SIZE', default=5, cast=int)
 
+
+# indicates how the aggregation is triggered
+# 'polling' to aggregate all objects every 300 seconds
+# 'event' to aggregate only the objects whose energy data were appended as soon as myems-normalization notifies,
+# and to aggregate all objects every 300 seconds as fallback
+aggregation_trigger_mode = config('AGGREGATION_TRIGGER_MODE', default='polling')
+
+# the seconds between two queries of the notifications in event mode
+notification_poll_interval = config('NOTIFICATION_POLL_INTERVAL', default=5, cast=int)
+
+# the number of ids behind the rollup watermark of every hourly table to roll up again in every run
+# the ids of hourly rows are assigned when they are inserted, not when they are committed, so the rows of a long
+# transaction may be committed after the rows of higher ids are rolled up, increase it if the writers of hourly data
+# insert more rows than it while a transaction is open
+rollup_look_back_ids = config('ROLLUP_LOOK_BACK_IDS', default=10000, cast=int)
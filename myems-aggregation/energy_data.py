@@ -0,0 +1,66 @@
+# the maximum number of object ids in the IN clause of one query
+id_chunk_size = 500
+
+# the number of objects and the number of queries of hourly energy data in the current worker,
+# the former is the number of queries when fetching the hourly energy data object by object
+object_count = 0
+query_count = 0
+
+
+########################################################################################################################
+# Reset the counters of objects and queries at the beginning of a worker
+########################################################################################################################
+def reset_query_count():
+    global object_count, query_count
+    object_count = 0
+    query_count = 0
+
+
+########################################################################################################################
+# Get the hourly energy data of many objects in one query per chunk of ids
+# cursor: the cursor of energy database
+# table_name: the hourly table, such as tbl_meter_hourly or tbl_equipment_input_category_hourly
+# id_column_name: the object id column in the hourly table, such as meter_id or equipment_id
+# id_list: the ids of the objects
+# key_column_name: None for the tables of meters,
+#                  or energy_category_id or energy_item_id for the tables of equipments, spaces and so on
+# Returns: dict of object id string to None if there isn't any energy data of the object,
+#          or else to dict of start_datetime_utc to actual_value if key_column_name is None,
+#          or else to dict of start_datetime_utc to dict of key to actual_value
+########################################################################################################################
+def get_hourly_values(cursor, table_name, id_column_name, id_list, start_datetime_utc, end_datetime_utc,
+                      key_column_name=None):
+    global object_count, query_count
+
+    hourly_values = dict()
+    for object_id in id_list:
+        hourly_values[str(object_id)] = None
+    object_count += len(hourly_values)
+
+    id_list = sorted(set(int(object_id) for object_id in id_list))
+    while len(id_list) > 0:
+        query_id_list = id_list[:id_chunk_size]
+        id_list = id_list[id_chunk_size:]
+        query = (" SELECT " + id_column_name + ", start_datetime_utc, " +
+                 ("" if key_column_name is None else key_column_name + ", ") + "actual_value "
+                 " FROM " + table_name +
+                 " WHERE " + id_column_name + " IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                 "       AND start_datetime_utc >= %s "
+                 "       AND start_datetime_utc < %s "
+                 " ORDER BY " + id_column_name + ", start_datetime_utc ")
+        cursor.execute(query, tuple(query_id_list) + (start_datetime_utc, end_datetime_utc))
+        query_count += 1
+
+        # iterate the cursor to put the rows into the dicts of objects without keeping the whole result set
+        for row in cursor:
+            object_id = str(row[0])
+            if hourly_values[object_id] is None:
+                hourly_values[object_id] = dict()
+            if key_column_name is None:
+                hourly_values[object_id][row[1]] = row[2]
+            else:
+                if row[1] not in hourly_values[object_id]:
+                    hourly_values[object_id][row[1]] = dict()
+                hourly_values[object_id][row[1]][row[2]] = row[3]
+
+    return hourly_values
@@ -7,11 +7,14 @@ from multiprocessing import Pool
 import mysql.connector
 
 import config
+import energy_data
+import hierarchy
+import window
 
 
 ########################################################################################################################
 # PROCEDURES
-# Step 1: get all equipments
+# Step 1: get all equipments with their meters and child objects from the hierarchy snapshot
 # Step 2: Create multiprocessing pool to call worker in parallel
 ########################################################################################################################
 
@@ -20,73 +23,60 @@ def main(logger):
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all equipments
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of equipment_energy_input_item.main " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        if not aggregate_all(logger):
             # sleep and continue the outer loop to reconnect the database
             time.sleep(60)
             continue
-        print("Connected to MyEMS System Database")
 
-        equipment_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name "
-                                     " FROM tbl_equipments "
-                                     " ORDER BY id ")
-            rows_equipments = cursor_system_db.fetchall()
+        print("go to sleep 300 seconds...")
+        time.sleep(300)
+        print("wake from sleep, and continue to work...")
+    # end of outer while
 
-            if rows_equipments is None or len(rows_equipments) == 0:
-                print("There isn't any equipments ")
-                # sleep and continue the outer loop to reconnect the database
-                time.sleep(60)
-                continue
 
-            for row in rows_equipments:
-                equipment_list.append({"id": row[0], "name": row[1]})
+########################################################################################################################
+# Aggregate energy input by energy items of all equipments once
+# object_id_set: the ids of the equipments to aggregate, None for all equipments
+# NOTE: returns False if the system database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all equipments with their meters and child objects from the hierarchy snapshot
+    ####################################################################################################################
+    snapshot = hierarchy.get_snapshot(logger)
+    if snapshot is None:
+        return False
 
-        except Exception as e:
-            logger.error("Error in step 1.2 of equipment_energy_input_item.main " + str(e))
-            # sleep and continue the outer loop to reconnect the database
-            time.sleep(60)
-            continue
-        finally:
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+    if len(snapshot['object_dict']['equipment']) == 0:
+        print("There isn't any equipments ")
+        return False
 
-        print("Got all equipments in MyEMS System Database")
+    equipment_list = list()
+    for equipment_id in sorted(snapshot['object_dict']['equipment'].keys()):
+        equipment_list.append(hierarchy.get_worker_object(snapshot, 'equipment', 'input_item', equipment_id))
 
-        # shuffle the equipment list for randomly calculating the meter hourly value
-        random.shuffle(equipment_list)
+    print("Got all equipments in the hierarchy snapshot")
 
-        ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
-        ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, equipment_list)
-        p.close()
-        p.join()
+    if object_id_set is not None:
+        # only aggregate the equipments whose input data were appended
+        equipment_list = [equipment for equipment in equipment_list if equipment['id'] in object_id_set]
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+    # shuffle the equipment list for randomly calculating the meter hourly value
+    random.shuffle(equipment_list)
 
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of outer while
+    ####################################################################################################################
+    # Step 2: Create multiprocessing pool to call worker in parallel
+    ####################################################################################################################
+    p = Pool(processes=config.pool_size)
+    error_list = p.map(worker, equipment_list)
+    p.close()
+    p.join()
+
+    for error in error_list:
+        if error is not None and len(error) > 0:
+            logger.error(error)
+
+    return True
 
 
 ########################################################################################################################
@@ -102,6 +92,7 @@ def main(logger):
 #   Step 9: aggregate energy data in the common time slot by energy items and hourly
 #   Step 10: save energy data to energy database
 #
+# NOTE: the associated meters and objects are prepared by hierarchy.get_worker_object from the hierarchy snapshot
 # NOTE: returns None or the error string because that the logger object cannot be passed in as parameter
 ########################################################################################################################
 
@@ -110,113 +101,19 @@ def worker(equipment):
     # Step 1: get all input meters associated with the equipment
     ####################################################################################################################
     print("Step 1: get all input meters associated with the equipment " + str(equipment['name']))
-
-    meter_list = list()
-    cnx_system_db = None
-    cursor_system_db = None
-    try:
-        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-        cursor_system_db = cnx_system_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.1 of equipment_energy_input_item.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_item_id "
-                                 " FROM tbl_meters m, tbl_equipments_meters em "
-                                 " WHERE m.id = em.meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND m.energy_item_id is NOT NULL "
-                                 "       AND em.is_output = 0 "
-                                 "       AND em.equipment_id = %s ",
-                                 (equipment['id'],))
-        rows_meters = cursor_system_db.fetchall()
-
-        if rows_meters is not None and len(rows_meters) > 0:
-            for row in rows_meters:
-                meter_list.append({"id": row[0],
-                                   "name": row[1],
-                                   "energy_item_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 1.2 of equipment_energy_input_item.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    meter_list = equipment['meter_list']
 
     ####################################################################################################################
     # Step 2: get all input virtual meters associated with the equipment
     ####################################################################################################################
     print("Step 2: get all input virtual meters associated with the equipment")
-    virtual_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_item_id "
-                                 " FROM tbl_virtual_meters m, tbl_equipments_virtual_meters em "
-                                 " WHERE m.id = em.virtual_meter_id "
-                                 "       AND m.energy_item_id is NOT NULL "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND em.is_output = 0 "
-                                 "       AND em.equipment_id = %s ",
-                                 (equipment['id'],))
-        rows_virtual_meters = cursor_system_db.fetchall()
-
-        if rows_virtual_meters is not None and len(rows_virtual_meters) > 0:
-            for row in rows_virtual_meters:
-                virtual_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_item_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 2.1 of equipment_energy_input_item.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    virtual_meter_list = equipment['virtual_meter_list']
 
     ####################################################################################################################
     # Step 3: get all input offline meters associated with the equipment
     ####################################################################################################################
     print("Step 3: get all input offline meters associated with the equipment")
-
-    offline_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_item_id "
-                                 " FROM tbl_offline_meters m, tbl_equipments_offline_meters em "
-                                 " WHERE m.id = em.offline_meter_id "
-                                 "       AND m.energy_item_id is NOT NULL "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND em.is_output = 0 "
-                                 "       AND em.equipment_id = %s ",
-                                 (equipment['id'],))
-        rows_offline_meters = cursor_system_db.fetchall()
-
-        if rows_offline_meters is not None and len(rows_offline_meters) > 0:
-            for row in rows_offline_meters:
-                offline_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_item_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 3.1 of equipment_energy_input_item.worker " + str(e)
-        print(error_string)
-        return error_string
-    finally:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
+    offline_meter_list = equipment['offline_meter_list']
 
     ####################################################################################################################
     # stop to the next equipment if this equipment is empty
@@ -248,11 +145,11 @@ def worker(equipment):
     try:
         query = (" SELECT MAX(start_datetime_utc) "
                  " FROM tbl_equipment_input_item_hourly "
-                 " WHERE equipment_id = %s ")
-        cursor_energy_db.execute(query, (equipment['id'],))
+                 " WHERE equipment_id = %s "
+                 "       AND start_datetime_utc >= %s AND start_datetime_utc < %s ")
+        cursor_energy_db.execute(query, (equipment['id'], window.get_start_datetime(), window.get_end_datetime()))
         row_datetime = cursor_energy_db.fetchone()
-        start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-        start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        start_datetime_utc = window.get_start_datetime()
 
         if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
             # replace second and microsecond with 0
@@ -261,7 +158,7 @@ def worker(equipment):
             # start from the next time slot
             start_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
-        end_datetime_utc = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=None)
+        end_datetime_utc = window.get_end_datetime()
 
         print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19]
               + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
@@ -275,29 +172,19 @@ def worker(equipment):
         print(error_string)
         return error_string
 
+    # count the queries of hourly energy data, which were one query per object before
+    energy_data.reset_query_count()
+
     ####################################################################################################################
     # Step 5: for each meter in list, get energy input data from energy database
     ####################################################################################################################
     energy_meter_hourly = dict()
     try:
         if meter_list is not None and len(meter_list) > 0:
-            for meter in meter_list:
-                meter_id = str(meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_meter_hourly "
-                         " WHERE meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_meter_hourly[meter_id] = None
-                else:
-                    energy_meter_hourly[meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_meter_hourly[meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [meter['id'] for meter in meter_list]
+            energy_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_meter_hourly', 'meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
     except Exception as e:
         error_string = "Error in step 5.1 of equipment_energy_input_item.worker " + str(e)
         if cursor_energy_db:
@@ -313,23 +200,10 @@ def worker(equipment):
     energy_virtual_meter_hourly = dict()
     if virtual_meter_list is not None and len(virtual_meter_list) > 0:
         try:
-            for virtual_meter in virtual_meter_list:
-                virtual_meter_id = str(virtual_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_virtual_meter_hourly "
-                         " WHERE virtual_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (virtual_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_virtual_meter_hourly[virtual_meter_id] = None
-                else:
-                    energy_virtual_meter_hourly[virtual_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_virtual_meter_hourly[virtual_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [virtual_meter['id'] for virtual_meter in virtual_meter_list]
+            energy_virtual_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_virtual_meter_hourly', 'virtual_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
         except Exception as e:
             error_string = "Error in step 6.1 of equipment_energy_input_item.worker " + str(e)
             if cursor_energy_db:
@@ -345,23 +219,10 @@ def worker(equipment):
     energy_offline_meter_hourly = dict()
     if offline_meter_list is not None and len(offline_meter_list) > 0:
         try:
-            for offline_meter in offline_meter_list:
-                offline_meter_id = str(offline_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_offline_meter_hourly "
-                         " WHERE offline_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (offline_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_offline_meter_hourly[offline_meter_id] = None
-                else:
-                    energy_offline_meter_hourly[offline_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_offline_meter_hourly[offline_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [offline_meter['id'] for offline_meter in offline_meter_list]
+            energy_offline_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_offline_meter_hourly', 'offline_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
 
         except Exception as e:
             error_string = "Error in step 7.1 of equipment_energy_input_item.worker " + str(e)
@@ -375,6 +236,8 @@ def worker(equipment):
     ####################################################################################################################
     # Step 8: determine common time slot to aggregate
     ####################################################################################################################
+    print("Got hourly energy data of " + str(energy_data.object_count) + " objects in " +
+          str(energy_data.query_count) + " queries")
 
     common_start_datetime_utc = start_datetime_utc
     common_end_datetime_utc = end_datetime_utc
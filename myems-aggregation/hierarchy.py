@@ -0,0 +1,207 @@
+import mysql.connector
+
+import config
+
+
+########################################################################################################################
+# the meter types normalized by myems-normalization
+########################################################################################################################
+meter_type_list = ['meter', 'virtual_meter', 'offline_meter']
+
+########################################################################################################################
+# the object types aggregated from meters, in dependency order
+# combined equipments and shopfloors aggregate the energy data of their equipments,
+# and spaces aggregate the energy data of their combined equipments, equipments, shopfloors, stores, tenants and
+# child spaces
+########################################################################################################################
+object_type_list = ['equipment', 'combined_equipment', 'shopfloor', 'store', 'tenant', 'space']
+
+# the object types aggregated by every object type,
+# the association table is named like tbl_spaces_equipments with columns space_id and equipment_id
+child_type_dict = {
+    'equipment': ('meter', 'virtual_meter', 'offline_meter'),
+    'combined_equipment': ('meter', 'virtual_meter', 'offline_meter', 'equipment'),
+    'shopfloor': ('meter', 'virtual_meter', 'offline_meter', 'equipment'),
+    'store': ('meter', 'virtual_meter', 'offline_meter'),
+    'tenant': ('meter', 'virtual_meter', 'offline_meter'),
+    'space': ('meter', 'virtual_meter', 'offline_meter', 'combined_equipment', 'equipment', 'shopfloor', 'store',
+              'tenant'),
+}
+
+# the object types with column is_output_counted, and with column is_output in the association tables of meters
+output_object_type_set = {'equipment', 'combined_equipment', 'space'}
+output_association_type_set = {'equipment', 'combined_equipment'}
+
+# the snapshot of the last call of get_snapshot, it is rebuilt only when the version is changed
+current_snapshot = None
+
+
+########################################################################################################################
+# Get the tables read into the snapshot, the version of the snapshot is the checksums of these tables
+########################################################################################################################
+def get_snapshot_table_list():
+    table_list = list()
+    for object_type in meter_type_list + object_type_list:
+        table_list.append('tbl_' + object_type + 's')
+    for object_type, child_type_tuple in child_type_dict.items():
+        for child_type in child_type_tuple:
+            table_list.append('tbl_' + object_type + 's_' + child_type + 's')
+    return table_list
+
+
+########################################################################################################################
+# PROCEDURES
+# Step 1: get the version of the system topology
+# Step 2: return the current snapshot if the version is not changed
+# Step 3: get all meters and objects with their energy categories, energy items and is_counted flags
+# Step 4: get all associations between objects and their meters and child objects
+#
+# Returns: the read-only snapshot of the system topology, or None if the system database is not ready
+#   snapshot: dict of version, object_dict, association_dict and child_id_dict
+#   object_dict: dict of object type to dict of object id to object, including meter types
+#   association_dict: dict of (object type, child type) to dict of object id to list of (child id, is_output)
+#   child_id_dict: dict of (object type, child type) to dict of object id to set of child ids,
+#                  including (space, space) for child spaces
+# NOTE: the snapshot replaces the queries of the associations in every worker of every pass,
+# and the checksums of the tables are changed by any insert, update or delete in the system database
+########################################################################################################################
+def get_snapshot(logger):
+    global current_snapshot
+
+    cnx_system_db = None
+    cursor_system_db = None
+    try:
+        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
+        cursor_system_db = cnx_system_db.cursor()
+
+        ################################################################################################################
+        # Step 1: get the version of the system topology
+        ################################################################################################################
+        cursor_system_db.execute(" CHECKSUM TABLE " + ", ".join(get_snapshot_table_list()))
+        version = tuple(cursor_system_db.fetchall())
+
+        ################################################################################################################
+        # Step 2: return the current snapshot if the version is not changed
+        ################################################################################################################
+        if current_snapshot is not None and current_snapshot['version'] == version:
+            print("Step 2: the hierarchy snapshot is up to date")
+            return current_snapshot
+
+        ################################################################################################################
+        # Step 3: get all meters and objects with their energy categories, energy items and is_counted flags
+        ################################################################################################################
+        object_dict = dict()
+        for meter_type in meter_type_list:
+            object_dict[meter_type] = dict()
+            cursor_system_db.execute(" SELECT id, name, energy_category_id, energy_item_id, is_counted "
+                                     " FROM tbl_" + meter_type + "s ")
+            rows = cursor_system_db.fetchall()
+            if rows is not None:
+                for row in rows:
+                    object_dict[meter_type][row[0]] = {"id": row[0],
+                                                       "name": row[1],
+                                                       "energy_category_id": row[2],
+                                                       "energy_item_id": row[3],
+                                                       "is_counted": bool(row[4])}
+
+        for object_type in object_type_list:
+            object_dict[object_type] = dict()
+            cursor_system_db.execute(" SELECT id, name, is_input_counted, " +
+                                     ("is_output_counted, " if object_type in output_object_type_set else "0, ") +
+                                     ("parent_space_id " if object_type == 'space' else "NULL ") +
+                                     " FROM tbl_" + object_type + "s ")
+            rows = cursor_system_db.fetchall()
+            if rows is not None:
+                for row in rows:
+                    object_dict[object_type][row[0]] = {"id": row[0],
+                                                        "name": row[1],
+                                                        "is_input_counted": bool(row[2]),
+                                                        "is_output_counted": bool(row[3]),
+                                                        "parent_space_id": row[4]}
+
+        ################################################################################################################
+        # Step 4: get all associations between objects and their meters and child objects
+        ################################################################################################################
+        association_dict = dict()
+        child_id_dict = dict()
+        for object_type, child_type_tuple in child_type_dict.items():
+            for child_type in child_type_tuple:
+                association_dict[(object_type, child_type)] = dict()
+                child_id_dict[(object_type, child_type)] = dict()
+                is_output_column = "is_output " \
+                    if object_type in output_association_type_set and child_type in meter_type_list else "0 "
+                cursor_system_db.execute(" SELECT " + object_type + "_id, " + child_type + "_id, " +
+                                         is_output_column +
+                                         " FROM tbl_" + object_type + "s_" + child_type + "s ")
+                rows = cursor_system_db.fetchall()
+                if rows is not None:
+                    for row in rows:
+                        association_dict[(object_type, child_type)].setdefault(row[0], list()).append(
+                            (row[1], bool(row[2])))
+                        child_id_dict[(object_type, child_type)].setdefault(row[0], set()).add(row[1])
+
+        # parent spaces aggregate their child spaces
+        association_dict[('space', 'space')] = dict()
+        child_id_dict[('space', 'space')] = dict()
+        for space in object_dict['space'].values():
+            parent_space_id = space['parent_space_id']
+            if parent_space_id is not None and parent_space_id != space['id']:
+                association_dict[('space', 'space')].setdefault(parent_space_id, list()).append((space['id'], False))
+                child_id_dict[('space', 'space')].setdefault(parent_space_id, set()).add(space['id'])
+
+        current_snapshot = {"version": version,
+                            "object_dict": object_dict,
+                            "association_dict": association_dict,
+                            "child_id_dict": child_id_dict}
+        print("Step 4: rebuilt the hierarchy snapshot")
+        return current_snapshot
+    except Exception as e:
+        logger.error("Error in hierarchy.get_snapshot " + str(e))
+        return None
+    finally:
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+
+
+########################################################################################################################
+# Get the object to pass to the worker of an energy aggregation module
+# metric: input_category, input_item or output_category
+# Returns: dict of id, name and parent_space_id of the object, and the lists of its counted meters and child objects,
+# such as meter_list, equipment_list and child_space_list, in the same form as the worker queried them before
+########################################################################################################################
+def get_worker_object(snapshot, object_type, metric, object_id):
+    object_dict = snapshot['object_dict']
+    worker_object = {"id": object_id,
+                     "name": object_dict[object_type][object_id]['name'],
+                     "parent_space_id": object_dict[object_type][object_id]['parent_space_id']}
+
+    child_type_tuple = child_type_dict[object_type] + (('space', ) if object_type == 'space' else ())
+    for child_type in child_type_tuple:
+        child_list = list()
+        for child_id, is_output in snapshot['association_dict'][(object_type, child_type)].get(object_id, list()):
+            child = object_dict[child_type].get(child_id)
+            if child is None:
+                continue
+            if child_type in meter_type_list:
+                if not child['is_counted']:
+                    continue
+                if object_type in output_association_type_set and is_output != (metric == 'output_category'):
+                    continue
+                if metric == 'input_item':
+                    if child['energy_item_id'] is None:
+                        continue
+                    child_list.append({"id": child_id, "name": child['name'],
+                                       "energy_item_id": child['energy_item_id']})
+                else:
+                    child_list.append({"id": child_id, "name": child['name'],
+                                       "energy_category_id": child['energy_category_id']})
+            else:
+                if not child['is_output_counted' if metric == 'output_category' else 'is_input_counted']:
+                    continue
+                child_list.append({"id": child_id, "name": child['name']})
+
+        worker_object['child_space_list' if child_type == 'space' else child_type + '_list'] = child_list
+
+    return worker_object
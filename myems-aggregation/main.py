@@ -1,49 +1,7 @@
 import logging
 from logging.handlers import RotatingFileHandler
-from multiprocessing import Process
 
-import combined_equipment_billing_input_category
-import combined_equipment_billing_input_item
-import combined_equipment_billing_output_category
-import combined_equipment_carbon_input_category
-import combined_equipment_energy_input_category
-import combined_equipment_energy_input_item
-import combined_equipment_energy_output_category
-import equipment_billing_input_category
-import equipment_billing_input_item
-import equipment_billing_output_category
-import equipment_carbon_input_category
-import equipment_energy_input_category
-import equipment_energy_input_item
-import equipment_energy_output_category
-import meter_billing
-import meter_carbon
-import offline_meter_billing
-import offline_meter_carbon
-import shopfloor_billing_input_category
-import shopfloor_billing_input_item
-import shopfloor_carbon_input_category
-import shopfloor_energy_input_category
-import shopfloor_energy_input_item
-import space_billing_input_category
-import space_billing_input_item
-import space_billing_output_category
-import space_carbon_input_category
-import space_energy_input_category
-import space_energy_input_item
-import space_energy_output_category
-import store_billing_input_category
-import store_billing_input_item
-import store_carbon_input_category
-import store_energy_input_category
-import store_energy_input_item
-import tenant_billing_input_category
-import tenant_billing_input_item
-import tenant_carbon_input_category
-import tenant_energy_input_category
-import tenant_energy_input_item
-import virtual_meter_billing
-import virtual_meter_carbon
+import scheduler
 
 
 def main():
@@ -65,98 +23,9 @@ def main():
     # send logging output to sys.stderr
     logger.addHandler(logging.StreamHandler())
 
-    # combined equipment billing input by energy categories
-    Process(target=combined_equipment_billing_input_category.main, args=(logger,)).start()
-    # combined equipment billing input by energy items
-    Process(target=combined_equipment_billing_input_item.main, args=(logger,)).start()
-    # combined equipment billing output by energy categories
-    Process(target=combined_equipment_billing_output_category.main, args=(logger,)).start()
-    # combined equipment carbon dioxide emissions by energy categories
-    Process(target=combined_equipment_carbon_input_category.main, args=(logger,)).start()
-    # combined equipment energy input by energy categories
-    Process(target=combined_equipment_energy_input_category.main, args=(logger,)).start()
-    # combined equipment energy input by energy items
-    Process(target=combined_equipment_energy_input_item.main, args=(logger,)).start()
-    # combined equipment energy output by energy categories
-    Process(target=combined_equipment_energy_output_category.main, args=(logger,)).start()
-
-    # equipment billing input by energy categories
-    Process(target=equipment_billing_input_category.main, args=(logger,)).start()
-    # equipment billing input by energy items
-    Process(target=equipment_billing_input_item.main, args=(logger,)).start()
-    # equipment billing output by energy categories
-    Process(target=equipment_billing_output_category.main, args=(logger,)).start()
-    # equipment carbon dioxide emissions by energy categories
-    Process(target=equipment_carbon_input_category.main, args=(logger,)).start()
-    # equipment energy input by energy categories
-    Process(target=equipment_energy_input_category.main, args=(logger,)).start()
-    # equipment energy input by energy items
-    Process(target=equipment_energy_input_item.main, args=(logger,)).start()
-    # equipment energy output by energy categories
-    Process(target=equipment_energy_output_category.main, args=(logger,)).start()
-
-    # meter carbon dioxide emissions
-    Process(target=meter_carbon.main, args=(logger,)).start()
-    # meter billing
-    Process(target=meter_billing.main, args=(logger,)).start()
-
-    # offline meter carbon dioxide emissions
-    Process(target=offline_meter_carbon.main, args=(logger,)).start()
-    # offline meter billing
-    Process(target=offline_meter_billing.main, args=(logger,)).start()
-
-    # shopfloor billing input by energy categories
-    Process(target=shopfloor_billing_input_category.main, args=(logger,)).start()
-    # shopfloor billing input by energy items
-    Process(target=shopfloor_billing_input_item.main, args=(logger,)).start()
-    # shopfloor carbon dioxide emissions by energy categories
-    Process(target=shopfloor_carbon_input_category.main, args=(logger,)).start()
-    # shopfloor energy input by energy categories
-    Process(target=shopfloor_energy_input_category.main, args=(logger,)).start()
-    # shopfloor energy input by energy items
-    Process(target=shopfloor_energy_input_item.main, args=(logger,)).start()
-
-    # space billing input by energy categories
-    Process(target=space_billing_input_category.main, args=(logger,)).start()
-    # space billing input by energy items
-    Process(target=space_billing_input_item.main, args=(logger,)).start()
-    # space billing output by energy categories
-    Process(target=space_billing_output_category.main, args=(logger,)).start()
-    # space carbon dioxide emissions by energy categories
-    Process(target=space_carbon_input_category.main, args=(logger,)).start()
-    # space energy input by energy categories
-    Process(target=space_energy_input_category.main, args=(logger,)).start()
-    # space energy input by energy items
-    Process(target=space_energy_input_item.main, args=(logger,)).start()
-    # space energy output by energy categories
-    Process(target=space_energy_output_category.main, args=(logger,)).start()
-
-    # store billing input by energy categories
-    Process(target=store_billing_input_category.main, args=(logger,)).start()
-    # store billing input by energy items
-    Process(target=store_billing_input_item.main, args=(logger,)).start()
-    # store carbon dioxide emissions by energy categories
-    Process(target=store_carbon_input_category.main, args=(logger,)).start()
-    # store energy input by energy categories
-    Process(target=store_energy_input_category.main, args=(logger,)).start()
-    # store energy input by energy items
-    Process(target=store_energy_input_item.main, args=(logger,)).start()
-
-    # tenant billing input by energy categories
-    Process(target=tenant_billing_input_category.main, args=(logger,)).start()
-    # tenant billing input by energy items
-    Process(target=tenant_billing_input_item.main, args=(logger,)).start()
-    # tenant carbon dioxide emissions by energy categories
-    Process(target=tenant_carbon_input_category.main, args=(logger,)).start()
-    # tenant energy input by energy categories
-    Process(target=tenant_energy_input_category.main, args=(logger,)).start()
-    # tenant energy input by energy items
-    Process(target=tenant_energy_input_item.main, args=(logger,)).start()
-
-    # virtual meter carbon dioxide emission
-    Process(target=virtual_meter_carbon.main, args=(logger,)).start()
-    # virtual meter billing (cost or income)
-    Process(target=virtual_meter_billing.main, args=(logger,)).start()
+    # one scheduler process with one bounded worker pool runs the energy aggregation of all objects in dependency
+    # order, the billing and carbon dioxide emissions calculation, and the daily and monthly rollup
+    scheduler.main(logger)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,213 @@
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import config
+
+
+# the seconds between two full passes over all objects, in polling mode and as the fallback in event mode
+full_pass_interval = 300
+
+# the days to keep the notifications in energy database
+notification_retention_days = 1
+
+
+########################################################################################################################
+# Subscribe to the notifications of hourly data appended to energy database
+# consumer_name: the unique name of the subscriber, such as space_billing_input_category
+# table_name_list: the hourly tables to watch, such as ['tbl_space_input_category_hourly']
+# Returns: the subscription dict to pass to wait_for_changes
+########################################################################################################################
+def subscribe(consumer_name, table_name_list):
+    return {"consumer_name": consumer_name,
+            "table_name_list": table_name_list,
+            "last_full_pass_datetime_utc": datetime.utcnow(),
+            "last_notification_id": None,
+            # the oldest created and origin datetime of the notifications handled in the current pass
+            "handled_batch": None}
+
+
+########################################################################################################################
+# Save the notifications of hourly data appended to energy database
+# cursor: the cursor of energy database, the caller commits the transaction
+# table_name: the hourly table appended, such as tbl_equipment_input_category_hourly
+# object_id_set: the ids of the objects whose hourly data were appended
+# origin_datetime_utc: when the meter data that caused the change was normalized, for the end to end lag metrics
+########################################################################################################################
+def notify(cursor, table_name, object_id_set, origin_datetime_utc):
+    if object_id_set is None or len(object_id_set) == 0:
+        return
+
+    created_datetime_utc = datetime.utcnow()
+    object_id_list = sorted(object_id_set)
+    while len(object_id_list) > 0:
+        insert_1000 = object_id_list[:1000]
+        object_id_list = object_id_list[1000:]
+        add_values = (" INSERT INTO tbl_hourly_notifications "
+                      "             (table_name, object_id, origin_datetime_utc, created_datetime_utc) "
+                      " VALUES  ")
+        for object_id in insert_1000:
+            add_values += " ('" + table_name + "'," + str(object_id) + ","
+            add_values += "'" + origin_datetime_utc.isoformat()[0:19] + "',"
+            add_values += "'" + created_datetime_utc.isoformat()[0:19] + "'), "
+        # trim ", " at the end of string and then execute
+        cursor.execute(add_values[:-2])
+
+
+########################################################################################################################
+# PROCEDURES
+# Step 1: in polling mode, purge the expired notifications and sleep until the next full pass
+# Step 2: save the lag metrics of the notifications handled in the last pass
+# Step 3: poll the notifications appended since the last handled one until any arrives or the next full pass is due
+# Step 4: save the id of the last handled notification
+#
+# Returns: None for a full pass over all objects,
+# or a dict of table name to the set of object ids whose hourly data were appended
+# NOTE: if a pass with notifications fails, the objects are caught up by the next full pass
+########################################################################################################################
+def wait_for_changes(logger, subscription):
+    cnx_energy_db = None
+    cursor_energy_db = None
+    try:
+        cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+        cursor_energy_db = cnx_energy_db.cursor()
+
+        ################################################################################################################
+        # Step 1: in polling mode, purge the expired notifications and sleep until the next full pass
+        ################################################################################################################
+        if config.aggregation_trigger_mode != 'event':
+            purge_notifications(cnx_energy_db, cursor_energy_db)
+            cursor_energy_db.close()
+            cursor_energy_db = None
+            cnx_energy_db.close()
+            cnx_energy_db = None
+            print("go to sleep " + str(full_pass_interval) + " seconds...")
+            time.sleep(full_pass_interval)
+            print("wake from sleep, and continue to work...")
+            return None
+
+        ################################################################################################################
+        # Step 2: save the lag metrics of the notifications handled in the last pass
+        ################################################################################################################
+        if subscription['handled_batch'] is not None:
+            save_lag_metrics(cnx_energy_db, cursor_energy_db, subscription['consumer_name'],
+                             subscription['last_notification_id'], subscription['handled_batch'], datetime.utcnow())
+            subscription['handled_batch'] = None
+
+        ################################################################################################################
+        # Step 3: poll the notifications appended since the last handled one until any arrives or the next full pass
+        # is due
+        ################################################################################################################
+        if subscription['last_notification_id'] is None:
+            cursor_energy_db.execute(" SELECT last_notification_id "
+                                     " FROM tbl_notification_consumers "
+                                     " WHERE consumer_name = %s ",
+                                     (subscription['consumer_name'],))
+            row = cursor_energy_db.fetchone()
+            if row is not None:
+                subscription['last_notification_id'] = row[0]
+            else:
+                # start from the latest notification because the first pass is a full pass
+                cursor_energy_db.execute(" SELECT MAX(id) FROM tbl_hourly_notifications ")
+                row = cursor_energy_db.fetchone()
+                subscription['last_notification_id'] = row[0] if row is not None and row[0] is not None else 0
+                cursor_energy_db.execute(" INSERT INTO tbl_notification_consumers "
+                                         "             (consumer_name, last_notification_id) "
+                                         " VALUES (%s, %s) ",
+                                         (subscription['consumer_name'], subscription['last_notification_id']))
+                cnx_energy_db.commit()
+
+        rows_notifications = list()
+        while True:
+            if datetime.utcnow() - subscription['last_full_pass_datetime_utc'] >= \
+                    timedelta(seconds=full_pass_interval):
+                break
+
+            cursor_energy_db.execute(" SELECT id, table_name, object_id, origin_datetime_utc, created_datetime_utc "
+                                     " FROM tbl_hourly_notifications "
+                                     " WHERE id > %s "
+                                     "       AND table_name IN (" +
+                                     ", ".join(["%s"] * len(subscription['table_name_list'])) + ") "
+                                     " ORDER BY id ",
+                                     (subscription['last_notification_id'], ) +
+                                     tuple(subscription['table_name_list']))
+            rows_notifications = cursor_energy_db.fetchall()
+            if rows_notifications is not None and len(rows_notifications) > 0:
+                break
+
+            # end the read transaction to see the notifications committed by others in the next query
+            cnx_energy_db.commit()
+            time.sleep(config.notification_poll_interval)
+
+        if rows_notifications is None or len(rows_notifications) == 0:
+            print("Step 3: the next full pass is due for " + subscription['consumer_name'])
+            subscription['last_full_pass_datetime_utc'] = datetime.utcnow()
+            purge_notifications(cnx_energy_db, cursor_energy_db)
+            return None
+
+        ################################################################################################################
+        # Step 4: save the id of the last handled notification
+        ################################################################################################################
+        changed_dict = dict()
+        for table_name in subscription['table_name_list']:
+            changed_dict[table_name] = set()
+        for row in rows_notifications:
+            changed_dict[row[1]].add(row[2])
+        subscription['handled_batch'] = {"created_datetime_utc": min(row[4] for row in rows_notifications),
+                                         "origin_datetime_utc": min(row[3] for row in rows_notifications)}
+        subscription['last_notification_id'] = rows_notifications[-1][0]
+        cursor_energy_db.execute(" UPDATE tbl_notification_consumers "
+                                 " SET last_notification_id = %s "
+                                 " WHERE consumer_name = %s ",
+                                 (subscription['last_notification_id'], subscription['consumer_name']))
+        cnx_energy_db.commit()
+        print("Step 4: got " + str(len(rows_notifications)) + " notifications for " + subscription['consumer_name'])
+        return changed_dict
+
+    except Exception as e:
+        logger.error("Error in notification.wait_for_changes of " + subscription['consumer_name'] + " " + str(e))
+        # sleep and fall back to a full pass
+        time.sleep(60)
+        subscription['last_full_pass_datetime_utc'] = datetime.utcnow()
+        return None
+    finally:
+        if cursor_energy_db:
+            cursor_energy_db.close()
+        if cnx_energy_db:
+            cnx_energy_db.close()
+
+
+########################################################################################################################
+# Save the lag metrics of a consumer after it handled a batch of notifications
+# handled_batch: the oldest created and origin datetime of the handled notifications
+# NOTE: the stage lag is from the notification created to handled,
+# and the end to end lag is from the meter data normalized to handled
+########################################################################################################################
+def save_lag_metrics(cnx_energy_db, cursor_energy_db, consumer_name, last_notification_id, handled_batch,
+                     handled_datetime_utc):
+    stage_lag_seconds = int((handled_datetime_utc - handled_batch['created_datetime_utc']).total_seconds())
+    end_to_end_lag_seconds = int((handled_datetime_utc - handled_batch['origin_datetime_utc']).total_seconds())
+    print(consumer_name + " stage lag: " + str(stage_lag_seconds) + " seconds, " +
+          "end to end lag: " + str(end_to_end_lag_seconds) + " seconds")
+    cursor_energy_db.execute(" INSERT INTO tbl_notification_consumers "
+                             "             (consumer_name, last_notification_id, last_handled_datetime_utc, "
+                             "              last_stage_lag_seconds, last_end_to_end_lag_seconds) "
+                             " VALUES (%s, %s, %s, %s, %s) "
+                             " ON DUPLICATE KEY UPDATE "
+                             "     last_handled_datetime_utc = VALUES(last_handled_datetime_utc), "
+                             "     last_stage_lag_seconds = VALUES(last_stage_lag_seconds), "
+                             "     last_end_to_end_lag_seconds = VALUES(last_end_to_end_lag_seconds) ",
+                             (consumer_name, last_notification_id, handled_datetime_utc.isoformat()[0:19],
+                              stage_lag_seconds, end_to_end_lag_seconds))
+    cnx_energy_db.commit()
+
+
+########################################################################################################################
+# Delete the notifications older than the retention days
+########################################################################################################################
+def purge_notifications(cnx_energy_db, cursor_energy_db):
+    cursor_energy_db.execute(" DELETE FROM tbl_hourly_notifications "
+                             " WHERE created_datetime_utc < %s ",
+                             ((datetime.utcnow() - timedelta(days=notification_retention_days)).isoformat()[0:19],))
+    cnx_energy_db.commit()
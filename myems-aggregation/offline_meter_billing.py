@@ -1,266 +1,243 @@
 import time
-from datetime import datetime, timedelta
-from decimal import Decimal
 
 import mysql.connector
 
+import bulk_calculation
 import config
+import notification
 import tariff
 
 
 ########################################################################################################################
 # PROCEDURES
 # Step 1: get all offline meters
-# for each offline meter in list:
-#   Step 2: get the latest start_datetime_utc
-#   Step 3: get all energy data since the latest start_datetime_utc
-#   Step 4: get tariffs
-#   Step 5: calculate billing by multiplying energy with tariff
-#   Step 6: save billing data to database
+# Step 2: get the latest start_datetime_utc of all offline meters
+# Step 3: get the energy data of a batch of offline meters in a time window since the latest start_datetime_utc
+# Step 4: get tariffs of every group of offline meters sharing cost center and energy category
+# Step 5: calculate billing by multiplying energy with tariff
+# Step 6: save billing data to database and commit the time window
+# NOTE: step 3 to step 6 are repeated for every batch and every time window
 ########################################################################################################################
 
 
 def main(logger):
+    # subscribe to the energy data appended to tbl_offline_meter_hourly in energy database
+    subscription = notification.subscribe('offline_meter_billing', ['tbl_offline_meter_hourly'])
+    # the first pass is a full pass
+    changed_dict = None
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all offline meters
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of offline_meter_billing " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
-
-        print("Connected to MyEMS System Database")
-
-        offline_meter_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name, energy_category_id, cost_center_id "
-                                     " FROM tbl_offline_meters "
-                                     " ORDER BY id ")
-            rows_offline_meters = cursor_system_db.fetchall()
-
-            if rows_offline_meters is None or len(rows_offline_meters) == 0:
-                print("Step 1.2: There isn't any offline meters. ")
-                if cursor_system_db:
-                    cursor_system_db.close()
-                if cnx_system_db:
-                    cnx_system_db.close()
-                # sleep and continue the outermost while loop
-                time.sleep(60)
-                continue
-
-            for row in rows_offline_meters:
-                offline_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_category_id": row[2],
-                                           "cost_center_id": row[3]})
-
-        except Exception as e:
-            logger.error("Error in step 1.2 of offline_meter_billing " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        object_id_set = None if changed_dict is None else changed_dict['tbl_offline_meter_hourly']
+        if not aggregate_all(logger, object_id_set):
             # sleep and continue the outermost while loop
             time.sleep(60)
             continue
 
-        print("Step 1.2: Got all offline_meters from MyEMS System Database")
+        # wait for the appended energy data, or for the next full pass
+        changed_dict = notification.wait_for_changes(logger, subscription)
+    # end of the outermost while loop
 
-        cnx_energy_db = None
-        cursor_energy_db = None
-        try:
-            cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
-            cursor_energy_db = cnx_energy_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.3 of offline_meter_billing " + str(e))
-            if cursor_energy_db:
-                cursor_energy_db.close()
-            if cnx_energy_db:
-                cnx_energy_db.close()
 
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
-
-        print("Connected to MyEMS Energy Database")
+########################################################################################################################
+# Calculate billing of all offline meters once
+# object_id_set: the ids of the offline meters to calculate, None for all offline meters
+# NOTE: returns False if the database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all offline meters
+    ####################################################################################################################
+    cnx_system_db = None
+    cursor_system_db = None
+    try:
+        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
+        cursor_system_db = cnx_system_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.1 of offline_meter_billing " + str(e))
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
 
-        cnx_billing_db = None
-        cursor_billing_db = None
-        try:
-            cnx_billing_db = mysql.connector.connect(**config.myems_billing_db)
-            cursor_billing_db = cnx_billing_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.4 of offline_meter_billing " + str(e))
-            if cursor_billing_db:
-                cursor_billing_db.close()
-            if cnx_billing_db:
-                cnx_billing_db.close()
+    print("Connected to MyEMS System Database")
 
-            if cursor_energy_db:
-                cursor_energy_db.close()
-            if cnx_energy_db:
-                cnx_energy_db.close()
+    offline_meter_list = list()
+    try:
+        cursor_system_db.execute(" SELECT id, name, energy_category_id, cost_center_id "
+                                 " FROM tbl_offline_meters "
+                                 " ORDER BY id ")
+        rows_offline_meters = cursor_system_db.fetchall()
 
+        if rows_offline_meters is None or len(rows_offline_meters) == 0:
+            print("Step 1.2: There isn't any offline meters. ")
             if cursor_system_db:
                 cursor_system_db.close()
             if cnx_system_db:
                 cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
-
-        print("Connected to MyEMS Billing Database")
+            return False
 
-        for offline_meter in offline_meter_list:
+        for row in rows_offline_meters:
+            offline_meter_list.append({"id": row[0],
+                                       "name": row[1],
+                                       "energy_category_id": row[2],
+                                       "cost_center_id": row[3]})
 
-            ############################################################################################################
-            # Step 2: get the latest start_datetime_utc
-            ############################################################################################################
-            print("Step 2: get the latest start_datetime_utc from billing database for " + offline_meter['name'])
-            try:
-                cursor_billing_db.execute(" SELECT MAX(start_datetime_utc) "
-                                          " FROM tbl_offline_meter_hourly "
-                                          " WHERE offline_meter_id = %s ",
-                                          (offline_meter['id'], ))
-                row_datetime = cursor_billing_db.fetchone()
-                start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-                start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
-
-                if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
-                    # replace second and microsecond with 0
-                    # note: do not replace minute in case of calculating in half hourly
-                    start_datetime_utc = row_datetime[0].replace(second=0, microsecond=0, tzinfo=None)
-                    # start from the next time slot
-                    start_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-                print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19])
-            except Exception as e:
-                logger.error("Error in step 2 of offline_meter_billing " + str(e))
-                # break the for offline_meter loop
-                break
-
-            ############################################################################################################
-            # Step 3: get all energy data since the latest start_datetime_utc
-            ############################################################################################################
-            print("Step 3: get all energy data since the latest start_datetime_utc")
-            try:
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_offline_meter_hourly "
-                         " WHERE offline_meter_id = %s AND start_datetime_utc >= %s "
-                         " ORDER BY id ")
-                cursor_energy_db.execute(query, (offline_meter['id'], start_datetime_utc, ))
-                rows_hourly = cursor_energy_db.fetchall()
-
-                if rows_hourly is None or len(rows_hourly) == 0:
-                    print("Step 3: There isn't any energy input data to calculate. ")
-                    # continue the for offline_meter loop
-                    continue
-
-                energy_dict = dict()
-                end_datetime_utc = start_datetime_utc
-                for row_hourly in rows_hourly:
-                    current_datetime_utc = row_hourly[0]
-                    actual_value = row_hourly[1]
-                    if energy_dict.get(current_datetime_utc) is None:
-                        energy_dict[current_datetime_utc] = dict()
-                    energy_dict[current_datetime_utc][offline_meter['energy_category_id']] = actual_value
-                    if current_datetime_utc > end_datetime_utc:
-                        end_datetime_utc = current_datetime_utc
-            except Exception as e:
-                logger.error("Error in step 3 of offline_meter_billing " + str(e))
-                # break the for offline_meter loop
-                break
-            ############################################################################################################
-            # Step 4: get tariffs
-            ############################################################################################################
-            print("Step 4: get tariffs")
-            tariff_dict = dict()
-            tariff_dict[offline_meter['energy_category_id']] = \
-                tariff.get_energy_category_tariffs(offline_meter['cost_center_id'],
-                                                   offline_meter['energy_category_id'],
-                                                   start_datetime_utc,
-                                                   end_datetime_utc)
-            ############################################################################################################
-            # Step 5: calculate billing by multiplying energy with tariff
-            ############################################################################################################
-            print("Step 5: calculate billing by multiplying energy with tariff")
-            aggregated_values = list()
-
-            if len(energy_dict) > 0:
-                for current_datetime_utc in energy_dict.keys():
-                    aggregated_value = dict()
-                    aggregated_value['start_datetime_utc'] = current_datetime_utc
-                    aggregated_value['actual_value'] = None
-                    current_tariff = tariff_dict[offline_meter['energy_category_id']].get(current_datetime_utc)
-                    current_energy = energy_dict[current_datetime_utc].get(offline_meter['energy_category_id'])
-                    if current_tariff is not None \
-                            and isinstance(current_tariff, Decimal) \
-                            and current_energy is not None \
-                            and isinstance(current_energy, Decimal):
-                        aggregated_value['actual_value'] = current_energy * current_tariff
-                        aggregated_values.append(aggregated_value)
-
-            ############################################################################################################
-            # Step 6: save billing data to billing database
-            ############################################################################################################
-            print("Step 6: save billing data to billing database")
-
-            while len(aggregated_values) > 0:
-                insert_100 = aggregated_values[:100]
-                aggregated_values = aggregated_values[100:]
-                try:
-                    add_values = (" INSERT INTO tbl_offline_meter_hourly "
-                                  "             (offline_meter_id, "
-                                  "              start_datetime_utc, "
-                                  "              actual_value) "
-                                  " VALUES  ")
-
-                    for aggregated_value in insert_100:
-                        if aggregated_value['actual_value'] is not None and \
-                                isinstance(aggregated_value['actual_value'], Decimal):
-                            add_values += " (" + str(offline_meter['id']) + ","
-                            add_values += "'" + aggregated_value['start_datetime_utc'].isoformat()[0:19] + "',"
-                            add_values += str(aggregated_value['actual_value']) + "), "
-                    # trim ", " at the end of string and then execute
-                    cursor_billing_db.execute(add_values[:-2])
-                    cnx_billing_db.commit()
-                except Exception as e:
-                    logger.error("Error in step 6 of offline_meter_billing " + str(e))
-                    break
-
-        # end of for offline_meter loop
+    except Exception as e:
+        logger.error("Error in step 1.2 of offline_meter_billing " + str(e))
         if cursor_system_db:
             cursor_system_db.close()
         if cnx_system_db:
             cnx_system_db.close()
+        return False
+
+    print("Step 1.2: Got all offline_meters from MyEMS System Database")
 
+    cnx_energy_db = None
+    cursor_energy_db = None
+    try:
+        cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+        cursor_energy_db = cnx_energy_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.3 of offline_meter_billing " + str(e))
         if cursor_energy_db:
             cursor_energy_db.close()
         if cnx_energy_db:
             cnx_energy_db.close()
 
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
+
+    print("Connected to MyEMS Energy Database")
+
+    cnx_billing_db = None
+    cursor_billing_db = None
+    try:
+        cnx_billing_db = mysql.connector.connect(**config.myems_billing_db)
+        cursor_billing_db = cnx_billing_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.4 of offline_meter_billing " + str(e))
         if cursor_billing_db:
             cursor_billing_db.close()
         if cnx_billing_db:
             cnx_billing_db.close()
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of the outermost while loop
+
+        if cursor_energy_db:
+            cursor_energy_db.close()
+        if cnx_energy_db:
+            cnx_energy_db.close()
+
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
+
+    print("Connected to MyEMS Billing Database")
+
+    if object_id_set is not None:
+        # only calculate the offline meters whose energy data were appended
+        offline_meter_list = [offline_meter for offline_meter in offline_meter_list
+                             if offline_meter['id'] in object_id_set]
+
+    offline_meter_id_list = [offline_meter['id'] for offline_meter in offline_meter_list]
+
+    start_datetime_dict = dict()
+    try:
+        ################################################################################################################
+        # Step 2: get the latest start_datetime_utc of all offline meters
+        ################################################################################################################
+        print("Step 2: get the latest start_datetime_utc of all offline meters from billing database")
+        start_datetime_dict = bulk_calculation.get_start_datetimes(cursor_billing_db,
+                                                                   'tbl_offline_meter_hourly',
+                                                                   'offline_meter_id',
+                                                                   offline_meter_id_list)
+    except Exception as e:
+        logger.error("Error in step 2 of offline_meter_billing " + str(e))
+
+    # step 3 to step 6 are repeated for every batch of offline meters and every time window of the batch, and committed
+    # after every time window, so that one bad row only rolls back its own batch and time window
+    for batch_start_datetime_dict, time_window_list in bulk_calculation.get_batches(start_datetime_dict):
+        try:
+            for window_start_datetime_utc, window_end_datetime_utc in time_window_list:
+                ########################################################################################################
+                # Step 3: get the energy data of the batch in the time window
+                ########################################################################################################
+                print("Step 3: get the energy data of " + str(len(batch_start_datetime_dict)) + " offline meters " +
+                      "from " + window_start_datetime_utc.isoformat()[0:19] +
+                      " to " + window_end_datetime_utc.isoformat()[0:19])
+                energy_dict = bulk_calculation.get_pending_values(cursor_energy_db,
+                                                                  'tbl_offline_meter_hourly',
+                                                                  'offline_meter_id',
+                                                                  batch_start_datetime_dict,
+                                                                  window_start_datetime_utc,
+                                                                  window_end_datetime_utc)
+                if len(energy_dict) == 0:
+                    # there isn't any energy input data to calculate in the time window
+                    continue
+
+                ########################################################################################################
+                # Step 4: get tariffs of every group of offline meters sharing cost center and energy category
+                ########################################################################################################
+                print("Step 4: get tariffs")
+                group_dict = dict()
+                for offline_meter in offline_meter_list:
+                    if offline_meter['id'] in energy_dict:
+                        group_key = (offline_meter['cost_center_id'], offline_meter['energy_category_id'])
+                        group_dict.setdefault(group_key, dict())[offline_meter['id']] = energy_dict[offline_meter['id']]
+
+                factor_dict = dict()
+                for (cost_center_id, energy_category_id), value_list_dict in group_dict.items():
+                    compiled_tariff = tariff.get_compiled_tariff(cost_center_id, 'energy_category', energy_category_id)
+                    # look up the tariff once for every time slot of the group
+                    datetime_utc_list = sorted(set(start_datetime_utc for value_list in value_list_dict.values()
+                                                   for start_datetime_utc, _ in value_list))
+                    factor_dict[(cost_center_id, energy_category_id)] = \
+                        dict(zip(datetime_utc_list, tariff.get_tariff_values(compiled_tariff, datetime_utc_list)))
+
+                ########################################################################################################
+                # Step 5: calculate billing by multiplying energy with tariff
+                ########################################################################################################
+                print("Step 5: calculate billing by multiplying energy with tariff")
+                aggregated_values = dict()
+                for group_key, value_list_dict in group_dict.items():
+                    aggregated_values.update(bulk_calculation.multiply_values(value_list_dict, factor_dict[group_key]))
+
+                ########################################################################################################
+                # Step 6: save billing data to billing database and commit the time window
+                ########################################################################################################
+                print("Step 6: save billing data to billing database")
+                row_count = bulk_calculation.save_values(cursor_billing_db,
+                                                         'tbl_offline_meter_hourly',
+                                                         'offline_meter_id',
+                                                         aggregated_values)
+                cnx_billing_db.commit()
+                print("Step 6: saved " + str(row_count) + " rows of " + str(len(aggregated_values)) + " offline meters")
+        except Exception as e:
+            logger.error("Error in step 3 to step 6 of offline_meter_billing " + str(e))
+            # the later time windows of the batch are skipped, and calculated again in the next pass
+            try:
+                cnx_billing_db.rollback()
+            except Exception:
+                pass
+
+    if cursor_system_db:
+        cursor_system_db.close()
+    if cnx_system_db:
+        cnx_system_db.close()
+
+    if cursor_energy_db:
+        cursor_energy_db.close()
+    if cnx_energy_db:
+        cnx_energy_db.close()
+
+    if cursor_billing_db:
+        cursor_billing_db.close()
+    if cnx_billing_db:
+        cnx_billing_db.close()
+
+    return True
@@ -0,0 +1,253 @@
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import config
+
+
+########################################################################################################################
+# the hourly tables to roll up in energy database, billing database and carbon database,
+# and the columns identifying one series in each table
+# the rollup tables have the same name with suffix _daily and _monthly instead of _hourly
+########################################################################################################################
+hourly_table_list = [
+    ('tbl_combined_equipment_input_category_hourly', ('combined_equipment_id', 'energy_category_id')),
+    ('tbl_combined_equipment_input_item_hourly', ('combined_equipment_id', 'energy_item_id')),
+    ('tbl_combined_equipment_output_category_hourly', ('combined_equipment_id', 'energy_category_id')),
+    ('tbl_equipment_input_category_hourly', ('equipment_id', 'energy_category_id')),
+    ('tbl_equipment_input_item_hourly', ('equipment_id', 'energy_item_id')),
+    ('tbl_equipment_output_category_hourly', ('equipment_id', 'energy_category_id')),
+    ('tbl_meter_hourly', ('meter_id', )),
+    ('tbl_offline_meter_hourly', ('offline_meter_id', )),
+    ('tbl_shopfloor_input_category_hourly', ('shopfloor_id', 'energy_category_id')),
+    ('tbl_shopfloor_input_item_hourly', ('shopfloor_id', 'energy_item_id')),
+    ('tbl_space_input_category_hourly', ('space_id', 'energy_category_id')),
+    ('tbl_space_input_item_hourly', ('space_id', 'energy_item_id')),
+    ('tbl_space_output_category_hourly', ('space_id', 'energy_category_id')),
+    ('tbl_store_input_category_hourly', ('store_id', 'energy_category_id')),
+    ('tbl_store_input_item_hourly', ('store_id', 'energy_item_id')),
+    ('tbl_tenant_input_category_hourly', ('tenant_id', 'energy_category_id')),
+    ('tbl_tenant_input_item_hourly', ('tenant_id', 'energy_item_id')),
+    ('tbl_virtual_meter_hourly', ('virtual_meter_id', )),
+]
+
+# the maximum number of appended hourly rows to roll up in one transaction
+rollup_batch_size = 100000
+
+# the number of ids behind the watermark to read again in every run, which is less than rollup_batch_size
+rollup_look_back_ids = min(config.rollup_look_back_ids, rollup_batch_size // 2)
+
+
+########################################################################################################################
+# PROCEDURES
+# for each database in energy database, billing database and carbon database:
+#   Step 1: connect the database
+#   for each hourly table in list:
+#     Step 2: roll up the hourly rows appended since the last run into daily and monthly tables
+########################################################################################################################
+def main(logger):
+
+    while True:
+        # the outermost while loop
+        rollup_all(logger)
+
+        print("go to sleep 300 seconds...")
+        time.sleep(300)
+        print("wake from sleep, and continue to work...")
+    # end of the outermost while loop
+
+
+########################################################################################################################
+# Roll up the hourly rows appended since the last run in all databases once
+########################################################################################################################
+def rollup_all(logger):
+    for database in (config.myems_energy_db, config.myems_billing_db, config.myems_carbon_db):
+        ################################################################################################################
+        # Step 1: connect the database
+        ################################################################################################################
+        cnx = None
+        cursor = None
+        try:
+            cnx = mysql.connector.connect(**database)
+            cursor = cnx.cursor()
+        except Exception as e:
+            logger.error("Error in step 1 of rollup.rollup_all " + str(e))
+            if cursor:
+                cursor.close()
+            if cnx:
+                cnx.close()
+            # continue the for database loop
+            continue
+
+        print("Connected to " + database['database'])
+
+        ################################################################################################################
+        # Step 2: roll up the hourly rows appended since the last run into daily and monthly tables
+        ################################################################################################################
+        for hourly_table_name, key_columns in hourly_table_list:
+            error_string = rollup_hourly_table(cnx, cursor, hourly_table_name, key_columns)
+            if error_string is not None:
+                logger.error(error_string)
+
+        if cursor:
+            cursor.close()
+        if cnx:
+            cnx.close()
+
+
+########################################################################################################################
+# Get the local day and the local month containing the start datetime in utc
+# Returns: (start_datetime_utc, end_datetime_utc) of the local day and of the local month
+########################################################################################################################
+def get_rollup_periods(start_datetime_utc):
+    # get timezone offset in minutes
+    timezone_offset = int(config.utc_offset[1:3]) * 60 + int(config.utc_offset[4:6])
+    if config.utc_offset[0] == '-':
+        timezone_offset = -timezone_offset
+
+    start_datetime_local = start_datetime_utc + timedelta(minutes=timezone_offset)
+    day_start_datetime_local = datetime(start_datetime_local.year, start_datetime_local.month, start_datetime_local.day)
+    day_end_datetime_local = day_start_datetime_local + timedelta(days=1)
+    month_start_datetime_local = day_start_datetime_local.replace(day=1)
+    if month_start_datetime_local.month < 12:
+        month_end_datetime_local = month_start_datetime_local.replace(month=month_start_datetime_local.month + 1)
+    else:
+        month_end_datetime_local = month_start_datetime_local.replace(year=month_start_datetime_local.year + 1,
+                                                                      month=1)
+
+    return (day_start_datetime_local - timedelta(minutes=timezone_offset),
+            day_end_datetime_local - timedelta(minutes=timezone_offset)), \
+        (month_start_datetime_local - timedelta(minutes=timezone_offset),
+         month_end_datetime_local - timedelta(minutes=timezone_offset))
+
+
+########################################################################################################################
+# PROCEDURES:
+#   Step 1: get the id of the last hourly row rolled up
+#   Step 2: get the hourly rows appended since then, and the rows of the last ROLLUP_LOOK_BACK_IDS ids before then
+#   Step 3: determine the local days and local months touched by these rows
+#   Step 4: recalculate the touched days and months from the hourly table and save to rollup tables
+#   Step 5: save the id of the last hourly row rolled up
+#
+# NOTE: the watermark is the auto increment id of the hourly table, so late or backfilled hourly rows are rolled up too
+# NOTE: the ids are assigned when the rows are inserted, not when they are committed, so a transaction of the writers
+# running concurrently may commit rows of lower ids than the rows rolled up already. These rows are rolled up in the
+# next runs, as long as they are committed within ROLLUP_LOOK_BACK_IDS ids behind the watermark.
+# NOTE: the watermark never revisits the days and months of the hourly rows deleted without inserting them again, so
+# their rollup rows are stale. Only backfill.py deletes hourly rows this way, and it deletes the rollup rows of the
+# local days and local months overlapping the time window along with them. The other writers, such as the imports of
+# offline meter files, delete hourly rows only to insert the same time slots again in the same transaction.
+# NOTE: returns None or the error string
+########################################################################################################################
+def rollup_hourly_table(cnx, cursor, hourly_table_name, key_columns):
+    while True:
+        ################################################################################################################
+        # Step 1: get the id of the last hourly row rolled up
+        ################################################################################################################
+        try:
+            cursor.execute(" SELECT last_hourly_id "
+                           " FROM tbl_rollup_watermarks "
+                           " WHERE table_name = %s ",
+                           (hourly_table_name, ))
+            row = cursor.fetchone()
+            last_hourly_id = row[0] if row is not None else 0
+        except Exception as e:
+            return "Error in step 1 of rollup.rollup_hourly_table " + hourly_table_name + " " + str(e)
+
+        ################################################################################################################
+        # Step 2: get the hourly rows appended since then, and the rows of the last ROLLUP_LOOK_BACK_IDS ids before
+        # then, which may be committed after the last run
+        ################################################################################################################
+        try:
+            cursor.execute(" SELECT id, " + ", ".join(key_columns) + ", start_datetime_utc "
+                           " FROM " + hourly_table_name +
+                           " WHERE id > %s "
+                           " ORDER BY id "
+                           " LIMIT %s ",
+                           (max(last_hourly_id - rollup_look_back_ids, 0), rollup_batch_size))
+            rows_hourly = cursor.fetchall()
+        except Exception as e:
+            return "Error in step 2 of rollup.rollup_hourly_table " + hourly_table_name + " " + str(e)
+
+        if rows_hourly is None or len(rows_hourly) == 0:
+            print("Step 2: There isn't any appended rows in " + hourly_table_name)
+            return None
+
+        ################################################################################################################
+        # Step 3: determine the local days and local months touched by these rows
+        ################################################################################################################
+        daily_periods = set()
+        monthly_periods = set()
+        for row_hourly in rows_hourly:
+            key = tuple(row_hourly[1:-1])
+            day_period, month_period = get_rollup_periods(row_hourly[-1])
+            daily_periods.add(key + day_period)
+            monthly_periods.add(key + month_period)
+
+        ################################################################################################################
+        # Step 4: recalculate the touched days and months from the hourly table and save to rollup tables
+        ################################################################################################################
+        try:
+            for suffix, periods in (('_daily', daily_periods), ('_monthly', monthly_periods)):
+                rollup_table_name = hourly_table_name[:-len('_hourly')] + suffix
+                cursor.execute(" CREATE TEMPORARY TABLE tmp_rollup_periods ( " +
+                               ", ".join(column + " BIGINT NOT NULL" for column in key_columns) + ", "
+                               " start_datetime_utc DATETIME NOT NULL, "
+                               " end_datetime_utc DATETIME NOT NULL) ")
+
+                periods = sorted(periods)
+                while len(periods) > 0:
+                    insert_1000 = periods[:1000]
+                    periods = periods[1000:]
+                    add_values = (" INSERT INTO tmp_rollup_periods (" + ", ".join(key_columns) + ", "
+                                  "                                 start_datetime_utc, end_datetime_utc) "
+                                  " VALUES  ")
+                    for period in insert_1000:
+                        add_values += " (" + ",".join(str(value) for value in period[:-2]) + ","
+                        add_values += "'" + period[-2].isoformat()[0:19] + "',"
+                        add_values += "'" + period[-1].isoformat()[0:19] + "'), "
+                    # trim ", " at the end of string and then execute
+                    cursor.execute(add_values[:-2])
+
+                key_conditions = " AND ".join("r." + column + " = p." + column for column in key_columns)
+                cursor.execute(" DELETE r "
+                               " FROM " + rollup_table_name + " r, tmp_rollup_periods p "
+                               " WHERE " + key_conditions +
+                               "       AND r.start_datetime_utc = p.start_datetime_utc ")
+
+                key_conditions = " AND ".join("h." + column + " = p." + column for column in key_columns)
+                cursor.execute(" INSERT INTO " + rollup_table_name +
+                               "             (" + ", ".join(key_columns) + ", start_datetime_utc, actual_value) "
+                               " SELECT " + ", ".join("p." + column for column in key_columns) + ", "
+                               "        p.start_datetime_utc, SUM(h.actual_value) "
+                               " FROM tmp_rollup_periods p, " + hourly_table_name + " h "
+                               " WHERE " + key_conditions +
+                               "       AND h.start_datetime_utc >= p.start_datetime_utc "
+                               "       AND h.start_datetime_utc < p.end_datetime_utc "
+                               " GROUP BY " + ", ".join("p." + column for column in key_columns) + ", "
+                               "          p.start_datetime_utc ")
+
+                cursor.execute(" DROP TEMPORARY TABLE tmp_rollup_periods ")
+
+            ############################################################################################################
+            # Step 5: save the id of the last hourly row rolled up
+            ############################################################################################################
+            cursor.execute(" INSERT INTO tbl_rollup_watermarks (table_name, last_hourly_id) "
+                           " VALUES (%s, %s) "
+                           " ON DUPLICATE KEY UPDATE last_hourly_id = VALUES(last_hourly_id) ",
+                           (hourly_table_name, max(rows_hourly[-1][0], last_hourly_id)))
+            cnx.commit()
+        except Exception as e:
+            error_string = "Error in step 4 of rollup.rollup_hourly_table " + hourly_table_name + " " + str(e)
+            try:
+                cnx.rollback()
+                cursor.execute(" DROP TEMPORARY TABLE IF EXISTS tmp_rollup_periods ")
+            except Exception as e:
+                error_string += " " + str(e)
+            return error_string
+
+        print("Rolled up " + str(len(rows_hourly)) + " rows of " + hourly_table_name)
+
+        if len(rows_hourly) < rollup_batch_size:
+            return None
@@ -0,0 +1,400 @@
+import heapq
+import logging
+import queue
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+import mysql.connector
+
+import combined_equipment_billing_input_category
+import combined_equipment_billing_input_item
+import combined_equipment_billing_output_category
+import combined_equipment_carbon_input_category
+import combined_equipment_energy_input_category
+import combined_equipment_energy_input_item
+import combined_equipment_energy_output_category
+import config
+import equipment_billing_input_category
+import equipment_billing_input_item
+import equipment_billing_output_category
+import equipment_carbon_input_category
+import equipment_energy_input_category
+import equipment_energy_input_item
+import equipment_energy_output_category
+import hierarchy
+import meter_billing
+import meter_carbon
+import notification
+import offline_meter_billing
+import offline_meter_carbon
+import rollup
+import shopfloor_billing_input_category
+import shopfloor_billing_input_item
+import shopfloor_carbon_input_category
+import shopfloor_energy_input_category
+import shopfloor_energy_input_item
+import space_billing_input_category
+import space_billing_input_item
+import space_billing_output_category
+import space_carbon_input_category
+import space_energy_input_category
+import space_energy_input_item
+import space_energy_output_category
+import store_billing_input_category
+import store_billing_input_item
+import store_carbon_input_category
+import store_energy_input_category
+import store_energy_input_item
+import tenant_billing_input_category
+import tenant_billing_input_item
+import tenant_carbon_input_category
+import tenant_energy_input_category
+import tenant_energy_input_item
+import window
+import topology
+import virtual_meter_billing
+import virtual_meter_carbon
+
+
+# the meter types normalized by myems-normalization and their hourly tables
+meter_table_dict = {
+    'meter': 'tbl_meter_hourly',
+    'virtual_meter': 'tbl_virtual_meter_hourly',
+    'offline_meter': 'tbl_offline_meter_hourly',
+}
+
+# the energy aggregation modules by object type and metric, every object is a task calling the worker of the module
+energy_module_dict = {
+    ('equipment', 'input_category'): equipment_energy_input_category,
+    ('equipment', 'input_item'): equipment_energy_input_item,
+    ('equipment', 'output_category'): equipment_energy_output_category,
+    ('combined_equipment', 'input_category'): combined_equipment_energy_input_category,
+    ('combined_equipment', 'input_item'): combined_equipment_energy_input_item,
+    ('combined_equipment', 'output_category'): combined_equipment_energy_output_category,
+    ('shopfloor', 'input_category'): shopfloor_energy_input_category,
+    ('shopfloor', 'input_item'): shopfloor_energy_input_item,
+    ('store', 'input_category'): store_energy_input_category,
+    ('store', 'input_item'): store_energy_input_item,
+    ('tenant', 'input_category'): tenant_energy_input_category,
+    ('tenant', 'input_item'): tenant_energy_input_item,
+    ('space', 'input_category'): space_energy_input_category,
+    ('space', 'input_item'): space_energy_input_item,
+    ('space', 'output_category'): space_energy_output_category,
+}
+
+# the billing and carbon dioxide emissions modules with the object type and the energy metric they calculate from,
+# every module is a task calling aggregate_all of the module, because it shares the database connections in a pass
+calculation_module_list = [
+    (meter_billing, 'meter', None),
+    (meter_carbon, 'meter', None),
+    (offline_meter_billing, 'offline_meter', None),
+    (offline_meter_carbon, 'offline_meter', None),
+    (virtual_meter_billing, 'virtual_meter', None),
+    (virtual_meter_carbon, 'virtual_meter', None),
+    (equipment_billing_input_category, 'equipment', 'input_category'),
+    (equipment_billing_input_item, 'equipment', 'input_item'),
+    (equipment_billing_output_category, 'equipment', 'output_category'),
+    (equipment_carbon_input_category, 'equipment', 'input_category'),
+    (combined_equipment_billing_input_category, 'combined_equipment', 'input_category'),
+    (combined_equipment_billing_input_item, 'combined_equipment', 'input_item'),
+    (combined_equipment_billing_output_category, 'combined_equipment', 'output_category'),
+    (combined_equipment_carbon_input_category, 'combined_equipment', 'input_category'),
+    (shopfloor_billing_input_category, 'shopfloor', 'input_category'),
+    (shopfloor_billing_input_item, 'shopfloor', 'input_item'),
+    (shopfloor_carbon_input_category, 'shopfloor', 'input_category'),
+    (store_billing_input_category, 'store', 'input_category'),
+    (store_billing_input_item, 'store', 'input_item'),
+    (store_carbon_input_category, 'store', 'input_category'),
+    (tenant_billing_input_category, 'tenant', 'input_category'),
+    (tenant_billing_input_item, 'tenant', 'input_item'),
+    (tenant_carbon_input_category, 'tenant', 'input_category'),
+    (space_billing_input_category, 'space', 'input_category'),
+    (space_billing_input_item, 'space', 'input_item'),
+    (space_billing_output_category, 'space', 'output_category'),
+    (space_carbon_input_category, 'space', 'input_category'),
+]
+
+# the modules called by tasks in the worker processes, because modules cannot be passed as parameters
+module_dict = dict()
+for energy_module in energy_module_dict.values():
+    module_dict[energy_module.__name__] = energy_module
+for calculation_module, _, _ in calculation_module_list:
+    module_dict[calculation_module.__name__] = calculation_module
+module_dict[rollup.__name__] = rollup
+
+# the priorities of tasks, the smaller runs first when several tasks are ready
+# energy tasks are further ordered by their depth in the dependency graph
+energy_priority = 0
+calculation_priority = 1
+rollup_priority = 2
+
+
+########################################################################################################################
+# PROCEDURES
+# Step 1: get the hierarchy snapshot of all objects and their associations
+# Step 2: determine the objects whose input data were appended, or all objects for a full pass
+# Step 3: create the tasks with priorities and dependencies
+# Step 4: run the tasks in the worker pool
+# Step 5: save the lag metrics of every module
+# Step 6: wait for the appended meter data, or for the next full pass
+#
+# NOTE: one worker pool of config.pool_size processes is shared by all tasks, so the concurrency and the number of
+# database connections are bounded for the whole myems-aggregation service
+########################################################################################################################
+def main(logger):
+    pool = Pool(processes=config.pool_size)
+    subscription = notification.subscribe('scheduler', list(meter_table_dict.values()))
+    # the first pass is a full pass
+    changed_dict = None
+
+    while True:
+        # the outermost while loop
+        ################################################################################################################
+        # Step 1: get the hierarchy snapshot of all objects and their associations
+        ################################################################################################################
+        snapshot = hierarchy.get_snapshot(logger)
+        if snapshot is None:
+            # sleep and continue the outer loop to reconnect the database
+            time.sleep(60)
+            continue
+        object_dict = snapshot['object_dict']
+        child_id_dict = snapshot['child_id_dict']
+
+        ################################################################################################################
+        # Step 2: determine the objects whose input data were appended, or all objects for a full pass
+        ################################################################################################################
+        object_id_set_dict = dict()
+        if changed_dict is None:
+            for object_type in hierarchy.object_type_list:
+                object_id_set_dict[object_type] = set(object_dict[object_type].keys())
+        else:
+            for meter_type, table_name in meter_table_dict.items():
+                object_id_set_dict[meter_type] = changed_dict[table_name]
+            for object_type in hierarchy.object_type_list:
+                object_id_set_dict[object_type] = get_affected_object_id_set(object_type,
+                                                                             object_id_set_dict,
+                                                                             child_id_dict)
+
+        ################################################################################################################
+        # Step 3: create the tasks with priorities and dependencies
+        ################################################################################################################
+        task_dict = create_tasks(snapshot, object_id_set_dict, changed_dict is None)
+        print("Step 3: created " + str(len(task_dict)) + " tasks")
+
+        ################################################################################################################
+        # Step 4: run the tasks in the worker pool
+        ################################################################################################################
+        finished_datetime_dict = run_tasks(logger, pool, task_dict)
+
+        ################################################################################################################
+        # Step 5: save the lag metrics of every module
+        ################################################################################################################
+        if subscription['handled_batch'] is not None:
+            save_module_lag_metrics(logger, subscription, task_dict, finished_datetime_dict)
+
+        ################################################################################################################
+        # Step 6: wait for the appended meter data, or for the next full pass
+        ################################################################################################################
+        changed_dict = notification.wait_for_changes(logger, subscription)
+    # end of outer while
+
+
+########################################################################################################################
+# Get the ids of the objects which aggregate any changed object
+# object_id_set_dict: dict of object type to the set of changed object ids, with all types before the object type
+# Returns: the set of object ids of the object type
+########################################################################################################################
+def get_affected_object_id_set(object_type, object_id_set_dict, child_id_dict):
+    object_id_set = set()
+    for child_type in hierarchy.child_type_dict[object_type]:
+        changed_child_id_set = object_id_set_dict.get(child_type)
+        if changed_child_id_set is None or len(changed_child_id_set) == 0:
+            continue
+        for object_id, child_id_set in child_id_dict[(object_type, child_type)].items():
+            if not child_id_set.isdisjoint(changed_child_id_set):
+                object_id_set.add(object_id)
+
+    if object_type == 'space':
+        # parent spaces aggregate their child spaces, so add all ancestors of the affected spaces
+        parent_space_id_dict = dict()
+        for parent_space_id, child_space_id_set in child_id_dict[('space', 'space')].items():
+            for child_space_id in child_space_id_set:
+                parent_space_id_dict[child_space_id] = parent_space_id
+        for space_id in list(object_id_set):
+            parent_space_id = parent_space_id_dict.get(space_id)
+            while parent_space_id is not None and parent_space_id not in object_id_set:
+                object_id_set.add(parent_space_id)
+                parent_space_id = parent_space_id_dict.get(parent_space_id)
+
+    return object_id_set
+
+
+########################################################################################################################
+# Create the tasks of one pass
+# Returns: dict of task key to task, the task key is (object type, metric, object id) for energy tasks,
+# and the module name for billing, carbon dioxide emissions and rollup tasks
+#   task: dict of priority, dependency_set of task keys, module_name and object or object_id_set for the module
+########################################################################################################################
+def create_tasks(snapshot, object_id_set_dict, is_full_pass):
+    object_dict = snapshot['object_dict']
+    child_id_dict = snapshot['child_id_dict']
+    task_dict = dict()
+
+    # energy tasks, objects are visited in dependency order so the dependencies are created before their dependents,
+    # and a dependency is only added if its task exists, so the tasks never wait for each other in a cycle
+    for object_type in hierarchy.object_type_list:
+        for (module_object_type, metric), module in energy_module_dict.items():
+            if module_object_type != object_type:
+                continue
+            object_id_list = sorted(object_id_set_dict[object_type])
+            if object_type == 'space':
+                # place child spaces before their parent spaces
+                parent_space_id_dict = dict()
+                for parent_space_id, child_space_id_set in child_id_dict[('space', 'space')].items():
+                    for child_space_id in child_space_id_set:
+                        parent_space_id_dict[child_space_id] = parent_space_id
+                space_list = [{"id": space_id, "parent_space_id": parent_space_id_dict.get(space_id)}
+                              for space_id in object_id_list]
+                object_id_list = [space['id'] for space_level in topology.get_space_levels(space_list)
+                                  for space in space_level]
+            for object_id in object_id_list:
+                if object_id not in object_dict[object_type]:
+                    continue
+                dependency_set = set()
+                child_type_tuple = hierarchy.child_type_dict[object_type] + \
+                    (('space', ) if object_type == 'space' else ())
+                for child_type in child_type_tuple:
+                    for child_id in child_id_dict[(object_type, child_type)].get(object_id, set()):
+                        if (child_type, metric, child_id) in task_dict:
+                            dependency_set.add((child_type, metric, child_id))
+                depth = max([task_dict[key]['priority'][1] + 1 for key in dependency_set], default=0)
+                task_dict[(object_type, metric, object_id)] = {"priority": (energy_priority, depth),
+                                                               "dependency_set": dependency_set,
+                                                               "module_name": module.__name__,
+                                                               "object": hierarchy.get_worker_object(snapshot,
+                                                                                                     object_type,
+                                                                                                     metric,
+                                                                                                     object_id)}
+
+    # billing and carbon dioxide emissions tasks depend on all energy tasks they calculate from
+    for module, object_type, metric in calculation_module_list:
+        object_id_set = object_id_set_dict.get(object_type, set())
+        if not is_full_pass and len(object_id_set) == 0:
+            continue
+        dependency_set = set()
+        if metric is not None:
+            for object_id in object_id_set:
+                if (object_type, metric, object_id) in task_dict:
+                    dependency_set.add((object_type, metric, object_id))
+        task_dict[module.__name__] = {"priority": (calculation_priority, 0),
+                                      "dependency_set": dependency_set,
+                                      "module_name": module.__name__,
+                                      "object_id_set": None if is_full_pass else object_id_set}
+
+    # rollup task runs after all other tasks of the pass
+    task_dict[rollup.__name__] = {"priority": (rollup_priority, 0),
+                                  "dependency_set": set(task_dict.keys()),
+                                  "module_name": rollup.__name__}
+
+    return task_dict
+
+
+########################################################################################################################
+# Run the tasks in the worker pool
+# The ready tasks are dispatched by priority, no more than config.pool_size tasks are running at the same time,
+# and a task is ready when all of its dependencies are finished
+# Returns: dict of task key to the finished datetime in UTC
+########################################################################################################################
+def run_tasks(logger, pool, task_dict):
+    pending_count_dict = dict()
+    dependent_list_dict = dict()
+    for key, task in task_dict.items():
+        pending_count_dict[key] = len(task['dependency_set'])
+        for dependency in task['dependency_set']:
+            dependent_list_dict.setdefault(dependency, list()).append(key)
+
+    sequence = 0
+    ready_heap = list()
+    for key, pending_count in pending_count_dict.items():
+        if pending_count == 0:
+            heapq.heappush(ready_heap, (task_dict[key]['priority'], sequence, key))
+            sequence += 1
+
+    finished_queue = queue.Queue()
+    finished_datetime_dict = dict()
+    running_count = 0
+    while len(finished_datetime_dict) < len(task_dict):
+        while len(ready_heap) > 0 and running_count < config.pool_size:
+            _, _, key = heapq.heappop(ready_heap)
+            pool.apply_async(run_task, (task_dict[key], ),
+                             callback=lambda result, key=key: finished_queue.put((key, result)),
+                             error_callback=lambda e, key=key: finished_queue.put((key, "Error in task " +
+                                                                                   str(key) + " " + str(e))))
+            running_count += 1
+
+        key, error_string = finished_queue.get()
+        running_count -= 1
+        finished_datetime_dict[key] = datetime.utcnow()
+        if error_string is not None and len(error_string) > 0:
+            logger.error(error_string)
+        print("finished " + str(len(finished_datetime_dict)) + " of " + str(len(task_dict)) + " tasks: " + str(key))
+
+        for dependent in dependent_list_dict.get(key, list()):
+            pending_count_dict[dependent] -= 1
+            if pending_count_dict[dependent] == 0:
+                heapq.heappush(ready_heap, (task_dict[dependent]['priority'], sequence, dependent))
+                sequence += 1
+
+    return finished_datetime_dict
+
+
+########################################################################################################################
+# Run one task in a worker process
+# Returns: None or the error string
+# NOTE: the tasks of backfill calculate the chunks of their time windows, and the tasks of the scheduler have no time
+# window, so that they calculate since config.start_datetime_utc up to now
+########################################################################################################################
+def run_task(task):
+    window.set_window(*task.get('window', (None, None)))
+    module = module_dict[task['module_name']]
+    if 'object' in task:
+        return module.worker(task['object'])
+
+    # the logger is configured by main.py before the worker processes are forked
+    logger = logging.getLogger('myems-aggregation')
+    if module is rollup:
+        rollup.rollup_all(logger)
+    else:
+        module.aggregate_all(logger, task['object_id_set'])
+    return None
+
+
+########################################################################################################################
+# Save the lag metrics of every module in the pass, the consumer name is like scheduler.space_billing_input_category
+########################################################################################################################
+def save_module_lag_metrics(logger, subscription, task_dict, finished_datetime_dict):
+    module_finished_datetime_dict = dict()
+    for key, task in task_dict.items():
+        module_name = task['module_name']
+        if module_name not in module_finished_datetime_dict or \
+                module_finished_datetime_dict[module_name] < finished_datetime_dict[key]:
+            module_finished_datetime_dict[module_name] = finished_datetime_dict[key]
+
+    cnx_energy_db = None
+    cursor_energy_db = None
+    try:
+        cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+        cursor_energy_db = cnx_energy_db.cursor()
+        for module_name, finished_datetime_utc in module_finished_datetime_dict.items():
+            notification.save_lag_metrics(cnx_energy_db, cursor_energy_db,
+                                          subscription['consumer_name'] + '.' + module_name,
+                                          subscription['last_notification_id'], subscription['handled_batch'],
+                                          finished_datetime_utc)
+    except Exception as e:
+        logger.error("Error in scheduler.save_module_lag_metrics " + str(e))
+    finally:
+        if cursor_energy_db:
+            cursor_energy_db.close()
+        if cnx_energy_db:
+            cnx_energy_db.close()
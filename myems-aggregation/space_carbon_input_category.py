@@ -6,6 +6,8 @@ import mysql.connector
 
 import carbon_dioxide_emmision_factor
 import config
+import notification
+import window
 
 
 ########################################################################################################################
@@ -21,252 +23,266 @@ import config
 
 
 def main(logger):
+    # subscribe to the energy data appended to tbl_space_input_category_hourly in energy database
+    subscription = notification.subscribe('space_carbon_input_category', ['tbl_space_input_category_hourly'])
+    # the first pass is a full pass
+    changed_dict = None
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all spaces
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of space_carbon_input_category " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        object_id_set = None if changed_dict is None else changed_dict['tbl_space_input_category_hourly']
+        if not aggregate_all(logger, object_id_set):
             # sleep and continue the outermost while loop
             time.sleep(60)
             continue
 
-        print("Connected to MyEMS System Database")
-
-        space_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name, cost_center_id "
-                                     " FROM tbl_spaces "
-                                     " ORDER BY id ")
-            rows_spaces = cursor_system_db.fetchall()
-
-            if rows_spaces is None or len(rows_spaces) == 0:
-                print("Step 1.2: There isn't any spaces. ")
-                if cursor_system_db:
-                    cursor_system_db.close()
-                if cnx_system_db:
-                    cnx_system_db.close()
-                # sleep and continue the outermost while loop
-                time.sleep(60)
-                continue
-
-            for row in rows_spaces:
-                space_list.append({"id": row[0], "name": row[1], "cost_center_id": row[2]})
-
-        except Exception as e:
-            logger.error("Error in step 1.2 of space_carbon_input_category " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
-
-        print("Step 1.2: Got all spaces from MyEMS System Database")
-
-        cnx_energy_db = None
-        cursor_energy_db = None
-        try:
-            cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
-            cursor_energy_db = cnx_energy_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.3 of space_carbon_input_category " + str(e))
-            if cursor_energy_db:
-                cursor_energy_db.close()
-            if cnx_energy_db:
-                cnx_energy_db.close()
+        # wait for the appended energy data, or for the next full pass
+        changed_dict = notification.wait_for_changes(logger, subscription)
+    # end of the outermost while loop
 
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
 
-        print("Connected to MyEMS Energy Database")
+########################################################################################################################
+# Calculate carbon dioxide emissions of energy input by energy categories of all spaces once
+# object_id_set: the ids of the spaces to calculate, None for all spaces
+# NOTE: returns False if the database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all spaces
+    ####################################################################################################################
+    cnx_system_db = None
+    cursor_system_db = None
+    try:
+        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
+        cursor_system_db = cnx_system_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.1 of space_carbon_input_category " + str(e))
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
 
-        cnx_carbon_db = None
-        cursor_carbon_db = None
-        try:
-            cnx_carbon_db = mysql.connector.connect(**config.myems_carbon_db)
-            cursor_carbon_db = cnx_carbon_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.4 of space_carbon_input_category " + str(e))
-            if cursor_carbon_db:
-                cursor_carbon_db.close()
-            if cnx_carbon_db:
-                cnx_carbon_db.close()
+    print("Connected to MyEMS System Database")
 
-            if cursor_energy_db:
-                cursor_energy_db.close()
-            if cnx_energy_db:
-                cnx_energy_db.close()
+    space_list = list()
+    try:
+        cursor_system_db.execute(" SELECT id, name, cost_center_id "
+                                 " FROM tbl_spaces "
+                                 " ORDER BY id ")
+        rows_spaces = cursor_system_db.fetchall()
 
+        if rows_spaces is None or len(rows_spaces) == 0:
+            print("Step 1.2: There isn't any spaces. ")
             if cursor_system_db:
                 cursor_system_db.close()
             if cnx_system_db:
                 cnx_system_db.close()
-            # sleep and continue the outermost while loop
-            time.sleep(60)
-            continue
-
-        print("Connected to MyEMS Carbon Database")
-
-        for space in space_list:
+            return False
 
-            ############################################################################################################
-            # Step 2: get the latest start_datetime_utc
-            ############################################################################################################
-            print("Step 2: get the latest start_datetime_utc from carbon database for " + space['name'])
-            try:
-                cursor_carbon_db.execute(" SELECT MAX(start_datetime_utc) "
-                                         " FROM tbl_space_input_category_hourly "
-                                         " WHERE space_id = %s ",
-                                         (space['id'], ))
-                row_datetime = cursor_carbon_db.fetchone()
-                start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-                start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
-
-                if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
-                    # replace second and microsecond with 0
-                    # note: do not replace minute in case of calculating in half hourly
-                    start_datetime_utc = row_datetime[0].replace(second=0, microsecond=0, tzinfo=None)
-                    # start from the next time slot
-                    start_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-                print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19])
-            except Exception as e:
-                logger.error("Error in step 2 of space_carbon_input_category " + str(e))
-                # break the for space loop
-                break
+        for row in rows_spaces:
+            space_list.append({"id": row[0], "name": row[1], "cost_center_id": row[2]})
 
-            ############################################################################################################
-            # Step 3: get all energy input data since the latest start_datetime_utc
-            ############################################################################################################
-            print("Step 3: get all energy input data since the latest start_datetime_utc")
-
-            query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                     " FROM tbl_space_input_category_hourly "
-                     " WHERE space_id = %s AND start_datetime_utc >= %s "
-                     " ORDER BY id ")
-            cursor_energy_db.execute(query, (space['id'], start_datetime_utc, ))
-            rows_hourly = cursor_energy_db.fetchall()
-
-            if rows_hourly is None or len(rows_hourly) == 0:
-                print("Step 3: There isn't any energy input data to calculate. ")
-                # continue the for space loop
-                continue
-
-            energy_dict = dict()
-            energy_category_list = list()
-            end_datetime_utc = start_datetime_utc
-            for row_hourly in rows_hourly:
-                current_datetime_utc = row_hourly[0]
-                energy_category_id = row_hourly[1]
-
-                if energy_category_id not in energy_category_list:
-                    energy_category_list.append(energy_category_id)
-
-                actual_value = row_hourly[2]
-                if energy_dict.get(current_datetime_utc) is None:
-                    energy_dict[current_datetime_utc] = dict()
-                energy_dict[current_datetime_utc][energy_category_id] = actual_value
-                if current_datetime_utc > end_datetime_utc:
-                    end_datetime_utc = current_datetime_utc
-
-            ############################################################################################################
-            # Step 4: get carbon dioxide emissions factor
-            ############################################################################################################
-            print("Step 4: get carbon dioxide emissions factor")
-            factor_dict = dict()
-            for energy_category_id in energy_category_list:
-                factor_dict[energy_category_id] = \
-                    carbon_dioxide_emmision_factor.get_energy_category_factor(
-                        energy_category_id,
-                        start_datetime_utc,
-                        end_datetime_utc)
-            ############################################################################################################
-            # Step 5: calculate carbon dioxide emissions by multiplying energy with factor
-            ############################################################################################################
-            print("Step 5: calculate carbon dioxide emissions by multiplying energy with factor")
-            carbon_dict = dict()
-
-            if len(energy_dict) > 0:
-                for current_datetime_utc in energy_dict.keys():
-                    carbon_dict[current_datetime_utc] = dict()
-                    for energy_category_id in energy_category_list:
-                        current_factor = factor_dict[energy_category_id]
-                        current_energy = energy_dict[current_datetime_utc].get(energy_category_id)
-                        if current_factor is not None \
-                                and isinstance(current_factor, Decimal) \
-                                and current_energy is not None \
-                                and isinstance(current_energy, Decimal):
-                            carbon_dict[current_datetime_utc][energy_category_id] = \
-                                current_energy * current_factor
-
-                    if len(carbon_dict[current_datetime_utc]) == 0:
-                        del carbon_dict[current_datetime_utc]
-
-            ############################################################################################################
-            # Step 6: save carbon dioxide emissions data to database
-            ############################################################################################################
-            print("Step 6: save carbon dioxide emissions data to database")
-
-            if len(carbon_dict) > 0:
-                try:
-                    add_values = (" INSERT INTO tbl_space_input_category_hourly "
-                                  "             (space_id, "
-                                  "              energy_category_id, "
-                                  "              start_datetime_utc, "
-                                  "              actual_value) "
-                                  " VALUES  ")
-
-                    for current_datetime_utc in carbon_dict:
-                        for energy_category_id in energy_category_list:
-                            current_carbon = carbon_dict[current_datetime_utc].get(energy_category_id)
-                            if current_carbon is not None and isinstance(current_carbon, Decimal):
-                                add_values += " (" + str(space['id']) + ","
-                                add_values += " " + str(energy_category_id) + ","
-                                add_values += "'" + current_datetime_utc.isoformat()[0:19] + "',"
-                                add_values += str(current_carbon) + "), "
-                    print("add_values:" + add_values)
-                    # trim ", " at the end of string and then execute
-                    cursor_carbon_db.execute(add_values[:-2])
-                    cnx_carbon_db.commit()
-                except Exception as e:
-                    logger.error("Error in step 6 of space_carbon_input_category " + str(e))
-                    # break the for space loop
-                    break
-
-        # end of for space loop
+    except Exception as e:
+        logger.error("Error in step 1.2 of space_carbon_input_category " + str(e))
         if cursor_system_db:
             cursor_system_db.close()
         if cnx_system_db:
             cnx_system_db.close()
+        return False
+
+    print("Step 1.2: Got all spaces from MyEMS System Database")
 
+    cnx_energy_db = None
+    cursor_energy_db = None
+    try:
+        cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+        cursor_energy_db = cnx_energy_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.3 of space_carbon_input_category " + str(e))
         if cursor_energy_db:
             cursor_energy_db.close()
         if cnx_energy_db:
             cnx_energy_db.close()
 
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
+
+    print("Connected to MyEMS Energy Database")
+
+    cnx_carbon_db = None
+    cursor_carbon_db = None
+    try:
+        cnx_carbon_db = mysql.connector.connect(**config.myems_carbon_db)
+        cursor_carbon_db = cnx_carbon_db.cursor()
+    except Exception as e:
+        logger.error("Error in step 1.4 of space_carbon_input_category " + str(e))
         if cursor_carbon_db:
             cursor_carbon_db.close()
         if cnx_carbon_db:
             cnx_carbon_db.close()
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of the outermost while loop
+
+        if cursor_energy_db:
+            cursor_energy_db.close()
+        if cnx_energy_db:
+            cnx_energy_db.close()
+
+        if cursor_system_db:
+            cursor_system_db.close()
+        if cnx_system_db:
+            cnx_system_db.close()
+        return False
+
+    print("Connected to MyEMS Carbon Database")
+
+    if object_id_set is not None:
+        # only calculate the spaces whose energy data were appended
+        space_list = [space for space in space_list if space['id'] in object_id_set]
+
+    for space in space_list:
+
+        ################################################################################################################
+        # Step 2: get the latest start_datetime_utc
+        ################################################################################################################
+        print("Step 2: get the latest start_datetime_utc from carbon database for " + space['name'])
+        try:
+            cursor_carbon_db.execute(" SELECT MAX(start_datetime_utc) "
+                                     " FROM tbl_space_input_category_hourly "
+                                     " WHERE space_id = %s "
+                                     "       AND start_datetime_utc >= %s AND start_datetime_utc < %s ",
+                                     (space['id'], window.get_start_datetime(), window.get_end_datetime()))
+            row_datetime = cursor_carbon_db.fetchone()
+            start_datetime_utc = window.get_start_datetime()
+
+            if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
+                # replace second and microsecond with 0
+                # note: do not replace minute in case of calculating in half hourly
+                start_datetime_utc = row_datetime[0].replace(second=0, microsecond=0, tzinfo=None)
+                # start from the next time slot
+                start_datetime_utc += timedelta(minutes=config.minutes_to_count)
+
+            print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19])
+        except Exception as e:
+            logger.error("Error in step 2 of space_carbon_input_category " + str(e))
+            # break the for space loop
+            break
+
+        ################################################################################################################
+        # Step 3: get all energy input data since the latest start_datetime_utc
+        ################################################################################################################
+        print("Step 3: get all energy input data since the latest start_datetime_utc")
+
+        query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
+                 " FROM tbl_space_input_category_hourly "
+                 " WHERE space_id = %s "
+                 "       AND start_datetime_utc >= %s AND start_datetime_utc < %s "
+                 " ORDER BY id ")
+        cursor_energy_db.execute(query, (space['id'], start_datetime_utc, window.get_end_datetime()))
+        rows_hourly = cursor_energy_db.fetchall()
+
+        if rows_hourly is None or len(rows_hourly) == 0:
+            print("Step 3: There isn't any energy input data to calculate. ")
+            # continue the for space loop
+            continue
+
+        energy_dict = dict()
+        energy_category_list = list()
+        end_datetime_utc = start_datetime_utc
+        for row_hourly in rows_hourly:
+            current_datetime_utc = row_hourly[0]
+            energy_category_id = row_hourly[1]
+
+            if energy_category_id not in energy_category_list:
+                energy_category_list.append(energy_category_id)
+
+            actual_value = row_hourly[2]
+            if energy_dict.get(current_datetime_utc) is None:
+                energy_dict[current_datetime_utc] = dict()
+            energy_dict[current_datetime_utc][energy_category_id] = actual_value
+            if current_datetime_utc > end_datetime_utc:
+                end_datetime_utc = current_datetime_utc
+
+        ################################################################################################################
+        # Step 4: get carbon dioxide emissions factor
+        ################################################################################################################
+        print("Step 4: get carbon dioxide emissions factor")
+        factor_dict = dict()
+        for energy_category_id in energy_category_list:
+            factor_dict[energy_category_id] = \
+                carbon_dioxide_emmision_factor.get_energy_category_factor(
+                    energy_category_id,
+                    start_datetime_utc,
+                    end_datetime_utc)
+        ################################################################################################################
+        # Step 5: calculate carbon dioxide emissions by multiplying energy with factor
+        ################################################################################################################
+        print("Step 5: calculate carbon dioxide emissions by multiplying energy with factor")
+        carbon_dict = dict()
+
+        if len(energy_dict) > 0:
+            for current_datetime_utc in energy_dict.keys():
+                carbon_dict[current_datetime_utc] = dict()
+                for energy_category_id in energy_category_list:
+                    current_factor = factor_dict[energy_category_id]
+                    current_energy = energy_dict[current_datetime_utc].get(energy_category_id)
+                    if current_factor is not None \
+                            and isinstance(current_factor, Decimal) \
+                            and current_energy is not None \
+                            and isinstance(current_energy, Decimal):
+                        carbon_dict[current_datetime_utc][energy_category_id] = \
+                            current_energy * current_factor
+
+                if len(carbon_dict[current_datetime_utc]) == 0:
+                    del carbon_dict[current_datetime_utc]
+
+        ################################################################################################################
+        # Step 6: save carbon dioxide emissions data to database
+        ################################################################################################################
+        print("Step 6: save carbon dioxide emissions data to database")
+
+        if len(carbon_dict) > 0:
+            try:
+                add_values = (" INSERT INTO tbl_space_input_category_hourly "
+                              "             (space_id, "
+                              "              energy_category_id, "
+                              "              start_datetime_utc, "
+                              "              actual_value) "
+                              " VALUES  ")
+
+                for current_datetime_utc in carbon_dict:
+                    for energy_category_id in energy_category_list:
+                        current_carbon = carbon_dict[current_datetime_utc].get(energy_category_id)
+                        if current_carbon is not None and isinstance(current_carbon, Decimal):
+                            add_values += " (" + str(space['id']) + ","
+                            add_values += " " + str(energy_category_id) + ","
+                            add_values += "'" + current_datetime_utc.isoformat()[0:19] + "',"
+                            add_values += str(current_carbon) + "), "
+                print("add_values:" + add_values)
+                # trim ", " at the end of string and then execute
+                cursor_carbon_db.execute(add_values[:-2])
+                cnx_carbon_db.commit()
+            except Exception as e:
+                logger.error("Error in step 6 of space_carbon_input_category " + str(e))
+                # break the for space loop
+                break
+
+    # end of for space loop
+    if cursor_system_db:
+        cursor_system_db.close()
+    if cnx_system_db:
+        cnx_system_db.close()
+
+    if cursor_energy_db:
+        cursor_energy_db.close()
+    if cnx_energy_db:
+        cnx_energy_db.close()
+
+    if cursor_carbon_db:
+        cursor_carbon_db.close()
+    if cnx_carbon_db:
+        cnx_carbon_db.close()
+
+    return True
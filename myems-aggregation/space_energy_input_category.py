@@ -7,12 +7,16 @@ from multiprocessing import Pool
 import mysql.connector
 
 import config
+import energy_data
+import hierarchy
+import topology
+import window
 
 
 ########################################################################################################################
 # PROCEDURES
-# Step 1: get all spaces
-# Step 2: Create multiprocessing pool to call worker in parallel
+# Step 1: get all spaces with their meters and child objects from the hierarchy snapshot
+# Step 2: Create multiprocessing pool to call worker in parallel level by level
 ########################################################################################################################
 
 
@@ -20,73 +24,65 @@ def main(logger):
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all spaces
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of space_energy_input_category.main " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        if not aggregate_all(logger):
             # sleep and continue the outer loop to reconnect the database
             time.sleep(60)
             continue
-        print("Connected to MyEMS System Database")
 
-        space_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name "
-                                     " FROM tbl_spaces "
-                                     " ORDER BY id ")
-            rows_spaces = cursor_system_db.fetchall()
+        print("go to sleep 300 seconds...")
+        time.sleep(300)
+        print("wake from sleep, and continue to work...")
+    # end of outer while
 
-            if rows_spaces is None or len(rows_spaces) == 0:
-                print("There isn't any spaces ")
-                # sleep and continue the outer loop to reconnect the database
-                time.sleep(60)
-                continue
 
-            for row in rows_spaces:
-                space_list.append({"id": row[0], "name": row[1]})
+########################################################################################################################
+# Aggregate energy input by energy categories of all spaces once
+# object_id_set: the ids of the spaces to aggregate, None for all spaces
+# NOTE: returns False if the system database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all spaces with their meters and child objects from the hierarchy snapshot
+    ####################################################################################################################
+    snapshot = hierarchy.get_snapshot(logger)
+    if snapshot is None:
+        return False
 
-        except Exception as e:
-            logger.error("Error in step 1.2 of space_energy_input_category.main " + str(e))
-            # sleep and continue the outer loop to reconnect the database
-            time.sleep(60)
-            continue
-        finally:
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+    if len(snapshot['object_dict']['space']) == 0:
+        print("There isn't any spaces ")
+        return False
 
-        print("Got all spaces in MyEMS System Database")
+    space_list = list()
+    for space_id in sorted(snapshot['object_dict']['space'].keys()):
+        space_list.append(hierarchy.get_worker_object(snapshot, 'space', 'input_category', space_id))
 
-        # shuffle the space list for randomly calculating the meter hourly value
-        random.shuffle(space_list)
+    print("Got all spaces in the hierarchy snapshot")
 
-        ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
-        ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, space_list)
-        p.close()
-        p.join()
+    if object_id_set is not None:
+        # only aggregate the spaces whose input data were appended
+        space_list = [space for space in space_list if space['id'] in object_id_set]
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+    # group the space list into levels from leaves to root,
+    # so that all child spaces are aggregated before their parent space in the same cycle
+    space_levels = topology.get_space_levels(space_list)
 
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of outer while
+    ####################################################################################################################
+    # Step 2: Create multiprocessing pool to call worker in parallel level by level
+    ####################################################################################################################
+    p = Pool(processes=config.pool_size)
+    error_list = list()
+    for space_level in space_levels:
+        # shuffle the spaces in the same level for randomly calculating the meter hourly value
+        random.shuffle(space_level)
+        error_list.extend(p.map(worker, space_level))
+    p.close()
+    p.join()
+
+    for error in error_list:
+        if error is not None and len(error) > 0:
+            logger.error(error)
+
+    return True
 
 
 ########################################################################################################################
@@ -114,6 +110,7 @@ def main(logger):
 #   Step 21: aggregate energy data in the common time slot by energy categories and hourly
 #   Step 22: save energy data to energy database
 #
+# NOTE: the associated meters and objects are prepared by hierarchy.get_worker_object from the hierarchy snapshot
 # NOTE: returns None or the error string because that the logger object cannot be passed in as parameter
 ########################################################################################################################
 
@@ -122,286 +119,55 @@ def worker(space):
     # Step 1: get all input meters associated with the space
     ####################################################################################################################
     print("Step 1: get all input meters associated with the space " + str(space['name']))
-
-    cnx_system_db = None
-    cursor_system_db = None
-    try:
-        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-        cursor_system_db = cnx_system_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.1 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
-
-    meter_list = list()
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_meters m, tbl_spaces_meters sm "
-                                 " WHERE m.id = sm.meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND sm.space_id = %s ",
-                                 (space['id'],))
-        rows_meters = cursor_system_db.fetchall()
-
-        if rows_meters is not None and len(rows_meters) > 0:
-            for row in rows_meters:
-                meter_list.append({"id": row[0],
-                                   "name": row[1],
-                                   "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 1.2 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    meter_list = space['meter_list']
 
     ####################################################################################################################
     # Step 2: get all input virtual meters associated with the space
     ####################################################################################################################
     print("Step 2: get all input virtual meters associated with the space")
-    virtual_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_virtual_meters m, tbl_spaces_virtual_meters sm "
-                                 " WHERE m.id = sm.virtual_meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND sm.space_id = %s ",
-                                 (space['id'],))
-        rows_virtual_meters = cursor_system_db.fetchall()
-
-        if rows_virtual_meters is not None and len(rows_virtual_meters) > 0:
-            for row in rows_virtual_meters:
-                virtual_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 2 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    virtual_meter_list = space['virtual_meter_list']
 
     ####################################################################################################################
     # Step 3: get all input offline meters associated with the space
     ####################################################################################################################
     print("Step 3: get all input offline meters associated with the space")
-
-    offline_meter_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT m.id, m.name, m.energy_category_id "
-                                 " FROM tbl_offline_meters m, tbl_spaces_offline_meters sm "
-                                 " WHERE m.id = sm.offline_meter_id "
-                                 "       AND m.is_counted = 1 "
-                                 "       AND sm.space_id = %s ",
-                                 (space['id'],))
-        rows_offline_meters = cursor_system_db.fetchall()
-
-        if rows_offline_meters is not None and len(rows_offline_meters) > 0:
-            for row in rows_offline_meters:
-                offline_meter_list.append({"id": row[0],
-                                           "name": row[1],
-                                           "energy_category_id": row[2]})
-
-    except Exception as e:
-        error_string = "Error in step 3 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    offline_meter_list = space['offline_meter_list']
 
     ####################################################################################################################
     # Step 4: get all combined equipments associated with the space
     ####################################################################################################################
     print("Step 4: get all combined equipments associated with the space")
-
-    combined_equipment_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT e.id, e.name "
-                                 " FROM tbl_combined_equipments e, tbl_spaces_combined_equipments se "
-                                 " WHERE e.id = se.combined_equipment_id "
-                                 "       AND e.is_input_counted = 1 "
-                                 "       AND se.space_id = %s ",
-                                 (space['id'],))
-        rows_combined_equipments = cursor_system_db.fetchall()
-
-        if rows_combined_equipments is not None and len(rows_combined_equipments) > 0:
-            for row in rows_combined_equipments:
-                combined_equipment_list.append({"id": row[0],
-                                                "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 4 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    combined_equipment_list = space['combined_equipment_list']
 
     ####################################################################################################################
     # Step 5: get all equipments associated with the space
     ####################################################################################################################
     print("Step 5: get all equipments associated with the space")
-
-    equipment_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT e.id, e.name "
-                                 " FROM tbl_equipments e, tbl_spaces_equipments se "
-                                 " WHERE e.id = se.equipment_id "
-                                 "       AND e.is_input_counted = 1 "
-                                 "       AND se.space_id = %s ",
-                                 (space['id'],))
-        rows_equipments = cursor_system_db.fetchall()
-
-        if rows_equipments is not None and len(rows_equipments) > 0:
-            for row in rows_equipments:
-                equipment_list.append({"id": row[0],
-                                       "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 5 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    equipment_list = space['equipment_list']
 
     ####################################################################################################################
     # Step 6: get all shopfloors associated with the space
     ####################################################################################################################
     print("Step 6: get all shopfloors associated with the space")
-
-    shopfloor_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT s.id, s.name "
-                                 " FROM tbl_shopfloors s, tbl_spaces_shopfloors ss "
-                                 " WHERE s.id = ss.shopfloor_id "
-                                 "       AND s.is_input_counted = 1 "
-                                 "       AND ss.space_id = %s ",
-                                 (space['id'],))
-        rows_shopfloors = cursor_system_db.fetchall()
-
-        if rows_shopfloors is not None and len(rows_shopfloors) > 0:
-            for row in rows_shopfloors:
-                shopfloor_list.append({"id": row[0],
-                                       "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 6 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    shopfloor_list = space['shopfloor_list']
 
     ####################################################################################################################
     # Step 7: get all stores associated with the space
     ####################################################################################################################
     print("Step 7: get all stores associated with the space")
-
-    store_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT s.id, s.name "
-                                 " FROM tbl_stores s, tbl_spaces_stores ss "
-                                 " WHERE s.id = ss.store_id "
-                                 "       AND s.is_input_counted = 1 "
-                                 "       AND ss.space_id = %s ",
-                                 (space['id'],))
-        rows_stores = cursor_system_db.fetchall()
-
-        if rows_stores is not None and len(rows_stores) > 0:
-            for row in rows_stores:
-                store_list.append({"id": row[0],
-                                   "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 7 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    store_list = space['store_list']
 
     ####################################################################################################################
     # Step 8: get all tenants associated with the space
     ####################################################################################################################
     print("Step 8: get all tenants associated with the space")
-
-    tenant_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT t.id, t.name "
-                                 " FROM tbl_tenants t, tbl_spaces_tenants st "
-                                 " WHERE t.id = st.tenant_id "
-                                 "       AND t.is_input_counted = 1 "
-                                 "       AND st.space_id = %s ",
-                                 (space['id'],))
-        rows_tenants = cursor_system_db.fetchall()
-
-        if rows_tenants is not None and len(rows_tenants) > 0:
-            for row in rows_tenants:
-                tenant_list.append({"id": row[0],
-                                    "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 8 of space_energy_input_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    tenant_list = space['tenant_list']
 
     ####################################################################################################################
     # Step 9: get all child spaces associated with the space
     ####################################################################################################################
     print("Step 9: get all child spaces associated with the space")
-
-    child_space_list = list()
-
-    try:
-        cursor_system_db.execute(" SELECT id, name "
-                                 " FROM tbl_spaces "
-                                 " WHERE is_input_counted = 1 "
-                                 "       AND parent_space_id = %s ",
-                                 (space['id'],))
-        rows_child_spaces = cursor_system_db.fetchall()
-
-        if rows_child_spaces is not None and len(rows_child_spaces) > 0:
-            for row in rows_child_spaces:
-                child_space_list.append({"id": row[0],
-                                         "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 9 of space_energy_input_category.worker " + str(e)
-        print(error_string)
-        return error_string
-    finally:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
+    child_space_list = space['child_space_list']
 
     if (meter_list is None or len(meter_list) == 0) and \
             (virtual_meter_list is None or len(virtual_meter_list) == 0) and \
@@ -436,11 +202,11 @@ def worker(space):
     try:
         query = (" SELECT MAX(start_datetime_utc) "
                  " FROM tbl_space_input_category_hourly "
-                 " WHERE space_id = %s ")
-        cursor_energy_db.execute(query, (space['id'],))
+                 " WHERE space_id = %s "
+                 "       AND start_datetime_utc >= %s AND start_datetime_utc < %s ")
+        cursor_energy_db.execute(query, (space['id'], window.get_start_datetime(), window.get_end_datetime()))
         row_datetime = cursor_energy_db.fetchone()
-        start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-        start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        start_datetime_utc = window.get_start_datetime()
 
         if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
             # replace second and microsecond with 0
@@ -449,7 +215,7 @@ def worker(space):
             # start from the next time slot
             start_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
-        end_datetime_utc = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=None)
+        end_datetime_utc = window.get_end_datetime()
 
         print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19]
               + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
@@ -463,29 +229,19 @@ def worker(space):
         print(error_string)
         return error_string
 
+    # count the queries of hourly energy data, which were one query per object before
+    energy_data.reset_query_count()
+
     ####################################################################################################################
     # Step 11: for each meter in list, get energy input data from energy database
     ####################################################################################################################
     energy_meter_hourly = dict()
     try:
         if meter_list is not None and len(meter_list) > 0:
-            for meter in meter_list:
-                meter_id = str(meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_meter_hourly "
-                         " WHERE meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_meter_hourly[meter_id] = None
-                else:
-                    energy_meter_hourly[meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_meter_hourly[meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [meter['id'] for meter in meter_list]
+            energy_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_meter_hourly', 'meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
     except Exception as e:
         error_string = "Error in step 11 of space_energy_input_category.worker " + str(e)
         if cursor_energy_db:
@@ -501,23 +257,10 @@ def worker(space):
     energy_virtual_meter_hourly = dict()
     if virtual_meter_list is not None and len(virtual_meter_list) > 0:
         try:
-            for virtual_meter in virtual_meter_list:
-                virtual_meter_id = str(virtual_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_virtual_meter_hourly "
-                         " WHERE virtual_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (virtual_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_virtual_meter_hourly[virtual_meter_id] = None
-                else:
-                    energy_virtual_meter_hourly[virtual_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_virtual_meter_hourly[virtual_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [virtual_meter['id'] for virtual_meter in virtual_meter_list]
+            energy_virtual_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_virtual_meter_hourly', 'virtual_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
         except Exception as e:
             error_string = "Error in step 12 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -533,23 +276,10 @@ def worker(space):
     energy_offline_meter_hourly = dict()
     if offline_meter_list is not None and len(offline_meter_list) > 0:
         try:
-            for offline_meter in offline_meter_list:
-                offline_meter_id = str(offline_meter['id'])
-
-                query = (" SELECT start_datetime_utc, actual_value "
-                         " FROM tbl_offline_meter_hourly "
-                         " WHERE offline_meter_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (offline_meter_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_offline_meter_hourly[offline_meter_id] = None
-                else:
-                    energy_offline_meter_hourly[offline_meter_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        energy_offline_meter_hourly[offline_meter_id][row_energy_value[0]] = row_energy_value[1]
+            id_list = [offline_meter['id'] for offline_meter in offline_meter_list]
+            energy_offline_meter_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_offline_meter_hourly', 'offline_meter_id', id_list,
+                start_datetime_utc, end_datetime_utc)
 
         except Exception as e:
             error_string = "Error in step 13 of space_energy_input_category.worker " + str(e)
@@ -566,28 +296,10 @@ def worker(space):
     energy_combined_equipment_hourly = dict()
     if combined_equipment_list is not None and len(combined_equipment_list) > 0:
         try:
-            for combined_equipment in combined_equipment_list:
-                combined_equipment_id = str(combined_equipment['id'])
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_combined_equipment_input_category_hourly "
-                         " WHERE combined_equipment_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (combined_equipment_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_combined_equipment_hourly[combined_equipment_id] = None
-                else:
-                    energy_combined_equipment_hourly[combined_equipment_id] = dict()
-                    for row_value in rows_energy_values:
-                        current_datetime_utc = row_value[0]
-                        if current_datetime_utc not in energy_combined_equipment_hourly[combined_equipment_id]:
-                            energy_combined_equipment_hourly[combined_equipment_id][current_datetime_utc] = dict()
-                        energy_category_id = row_value[1]
-                        actual_value = row_value[2]
-                        energy_combined_equipment_hourly[combined_equipment_id][current_datetime_utc][
-                            energy_category_id] = actual_value
+            id_list = [combined_equipment['id'] for combined_equipment in combined_equipment_list]
+            energy_combined_equipment_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_combined_equipment_input_category_hourly', 'combined_equipment_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 14 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -603,28 +315,10 @@ def worker(space):
     energy_equipment_hourly = dict()
     if equipment_list is not None and len(equipment_list) > 0:
         try:
-            for equipment in equipment_list:
-                equipment_id = str(equipment['id'])
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_equipment_input_category_hourly "
-                         " WHERE equipment_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (equipment_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_equipment_hourly[equipment_id] = None
-                else:
-                    energy_equipment_hourly[equipment_id] = dict()
-                    for row_value in rows_energy_values:
-                        current_datetime_utc = row_value[0]
-                        if current_datetime_utc not in energy_equipment_hourly[equipment_id]:
-                            energy_equipment_hourly[equipment_id][current_datetime_utc] = dict()
-                        energy_category_id = row_value[1]
-                        actual_value = row_value[2]
-                        energy_equipment_hourly[equipment_id][current_datetime_utc][energy_category_id] = \
-                            actual_value
+            id_list = [equipment['id'] for equipment in equipment_list]
+            energy_equipment_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_equipment_input_category_hourly', 'equipment_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 15 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -640,28 +334,10 @@ def worker(space):
     energy_shopfloor_hourly = dict()
     if shopfloor_list is not None and len(shopfloor_list) > 0:
         try:
-            for shopfloor in shopfloor_list:
-                shopfloor_id = str(shopfloor['id'])
-
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_shopfloor_input_category_hourly "
-                         " WHERE shopfloor_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (shopfloor_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_shopfloor_hourly[shopfloor_id] = None
-                else:
-                    energy_shopfloor_hourly[shopfloor_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        current_datetime_utc = row_energy_value[0]
-                        if current_datetime_utc not in energy_shopfloor_hourly[shopfloor_id]:
-                            energy_shopfloor_hourly[shopfloor_id][current_datetime_utc] = dict()
-                        energy_category_id = row_energy_value[1]
-                        actual_value = row_energy_value[2]
-                        energy_shopfloor_hourly[shopfloor_id][current_datetime_utc][energy_category_id] = actual_value
+            id_list = [shopfloor['id'] for shopfloor in shopfloor_list]
+            energy_shopfloor_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_shopfloor_input_category_hourly', 'shopfloor_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 16 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -677,28 +353,10 @@ def worker(space):
     energy_store_hourly = dict()
     if store_list is not None and len(store_list) > 0:
         try:
-            for store in store_list:
-                store_id = str(store['id'])
-
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_store_input_category_hourly "
-                         " WHERE store_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (store_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_store_hourly[store_id] = None
-                else:
-                    energy_store_hourly[store_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        current_datetime_utc = row_energy_value[0]
-                        if current_datetime_utc not in energy_store_hourly[store_id]:
-                            energy_store_hourly[store_id][current_datetime_utc] = dict()
-                        energy_category_id = row_energy_value[1]
-                        actual_value = row_energy_value[2]
-                        energy_store_hourly[store_id][current_datetime_utc][energy_category_id] = actual_value
+            id_list = [store['id'] for store in store_list]
+            energy_store_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_store_input_category_hourly', 'store_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 17 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -714,28 +372,10 @@ def worker(space):
     energy_tenant_hourly = dict()
     if tenant_list is not None and len(tenant_list) > 0:
         try:
-            for tenant in tenant_list:
-                tenant_id = str(tenant['id'])
-
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_tenant_input_category_hourly "
-                         " WHERE tenant_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (tenant_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_tenant_hourly[tenant_id] = None
-                else:
-                    energy_tenant_hourly[tenant_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        current_datetime_utc = row_energy_value[0]
-                        if current_datetime_utc not in energy_tenant_hourly[tenant_id]:
-                            energy_tenant_hourly[tenant_id][current_datetime_utc] = dict()
-                        energy_category_id = row_energy_value[1]
-                        actual_value = row_energy_value[2]
-                        energy_tenant_hourly[tenant_id][current_datetime_utc][energy_category_id] = actual_value
+            id_list = [tenant['id'] for tenant in tenant_list]
+            energy_tenant_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_tenant_input_category_hourly', 'tenant_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 18 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -751,29 +391,10 @@ def worker(space):
     energy_child_space_hourly = dict()
     if child_space_list is not None and len(child_space_list) > 0:
         try:
-            for child_space in child_space_list:
-                child_space_id = str(child_space['id'])
-
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_space_input_category_hourly "
-                         " WHERE space_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (child_space_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_child_space_hourly[child_space_id] = None
-                else:
-                    energy_child_space_hourly[child_space_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        current_datetime_utc = row_energy_value[0]
-                        if current_datetime_utc not in energy_child_space_hourly[child_space_id]:
-                            energy_child_space_hourly[child_space_id][current_datetime_utc] = dict()
-                        energy_category_id = row_energy_value[1]
-                        actual_value = row_energy_value[2]
-                        energy_child_space_hourly[child_space_id][current_datetime_utc][energy_category_id] \
-                            = actual_value
+            id_list = [child_space['id'] for child_space in child_space_list]
+            energy_child_space_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_space_input_category_hourly', 'space_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 19 of space_energy_input_category.worker " + str(e)
             if cursor_energy_db:
@@ -786,6 +407,8 @@ def worker(space):
     ####################################################################################################################
     # Step 20: determine common time slot to aggregate
     ####################################################################################################################
+    print("Got hourly energy data of " + str(energy_data.object_count) + " objects in " +
+          str(energy_data.query_count) + " queries")
 
     common_start_datetime_utc = start_datetime_utc
     common_end_datetime_utc = end_datetime_utc
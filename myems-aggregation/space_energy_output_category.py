@@ -7,12 +7,16 @@ from multiprocessing import Pool
 import mysql.connector
 
 import config
+import energy_data
+import hierarchy
+import topology
+import window
 
 
 ########################################################################################################################
 # PROCEDURES
-# Step 1: get all spaces
-# Step 2: Create multiprocessing pool to call worker in parallel
+# Step 1: get all spaces with their meters and child objects from the hierarchy snapshot
+# Step 2: Create multiprocessing pool to call worker in parallel level by level
 ########################################################################################################################
 
 
@@ -20,73 +24,65 @@ def main(logger):
 
     while True:
         # the outermost while loop
-        ################################################################################################################
-        # Step 1: get all spaces
-        ################################################################################################################
-        cnx_system_db = None
-        cursor_system_db = None
-        try:
-            cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-            cursor_system_db = cnx_system_db.cursor()
-        except Exception as e:
-            logger.error("Error in step 1.1 of space_energy_output_category.main " + str(e))
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+        if not aggregate_all(logger):
             # sleep and continue the outer loop to reconnect the database
             time.sleep(60)
             continue
-        print("Connected to MyEMS System Database")
 
-        space_list = list()
-        try:
-            cursor_system_db.execute(" SELECT id, name "
-                                     " FROM tbl_spaces "
-                                     " ORDER BY id ")
-            rows_spaces = cursor_system_db.fetchall()
+        print("go to sleep 300 seconds...")
+        time.sleep(300)
+        print("wake from sleep, and continue to work...")
+    # end of outer while
 
-            if rows_spaces is None or len(rows_spaces) == 0:
-                print("There isn't any spaces ")
-                # sleep and continue the outer loop to reconnect the database
-                time.sleep(60)
-                continue
 
-            for row in rows_spaces:
-                space_list.append({"id": row[0], "name": row[1]})
+########################################################################################################################
+# Aggregate energy output by energy categories of all spaces once
+# object_id_set: the ids of the spaces to aggregate, None for all spaces
+# NOTE: returns False if the system database is not ready, and it should be retried after 60 seconds
+########################################################################################################################
+def aggregate_all(logger, object_id_set=None):
+    ####################################################################################################################
+    # Step 1: get all spaces with their meters and child objects from the hierarchy snapshot
+    ####################################################################################################################
+    snapshot = hierarchy.get_snapshot(logger)
+    if snapshot is None:
+        return False
 
-        except Exception as e:
-            logger.error("Error in step 1.2 of space_energy_output_category.main " + str(e))
-            # sleep and continue the outer loop to reconnect the database
-            time.sleep(60)
-            continue
-        finally:
-            if cursor_system_db:
-                cursor_system_db.close()
-            if cnx_system_db:
-                cnx_system_db.close()
+    if len(snapshot['object_dict']['space']) == 0:
+        print("There isn't any spaces ")
+        return False
 
-        print("Got all spaces in MyEMS System Database")
+    space_list = list()
+    for space_id in sorted(snapshot['object_dict']['space'].keys()):
+        space_list.append(hierarchy.get_worker_object(snapshot, 'space', 'output_category', space_id))
 
-        # shuffle the space list for randomly calculating the meter hourly value
-        random.shuffle(space_list)
+    print("Got all spaces in the hierarchy snapshot")
 
-        ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
-        ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, space_list)
-        p.close()
-        p.join()
+    if object_id_set is not None:
+        # only aggregate the spaces whose input data were appended
+        space_list = [space for space in space_list if space['id'] in object_id_set]
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+    # group the space list into levels from leaves to root,
+    # so that all child spaces are aggregated before their parent space in the same cycle
+    space_levels = topology.get_space_levels(space_list)
 
-        print("go to sleep 300 seconds...")
-        time.sleep(300)
-        print("wake from sleep, and continue to work...")
-    # end of outer while
+    ####################################################################################################################
+    # Step 2: Create multiprocessing pool to call worker in parallel level by level
+    ####################################################################################################################
+    p = Pool(processes=config.pool_size)
+    error_list = list()
+    for space_level in space_levels:
+        # shuffle the spaces in the same level for randomly calculating the meter hourly value
+        random.shuffle(space_level)
+        error_list.extend(p.map(worker, space_level))
+    p.close()
+    p.join()
+
+    for error in error_list:
+        if error is not None and len(error) > 0:
+            logger.error(error)
+
+    return True
 
 
 ########################################################################################################################
@@ -102,6 +98,7 @@ def main(logger):
 #   Step 9: aggregate energy data in the common time slot by energy categories and hourly
 #   Step 10: save energy data to energy database
 #
+# NOTE: the associated meters and objects are prepared by hierarchy.get_worker_object from the hierarchy snapshot
 # NOTE: returns None or the error string because that the logger object cannot be passed in as parameter
 ########################################################################################################################
 
@@ -111,102 +108,19 @@ def worker(space):
     # Step 1: get all combined equipments associated with the space
     ####################################################################################################################
     print("Step 1: get all combined equipments associated with the space")
-
-    cnx_system_db = None
-    cursor_system_db = None
-    try:
-        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-        cursor_system_db = cnx_system_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.1 of space_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
-
-    combined_equipment_list = list()
-    try:
-        cursor_system_db.execute(" SELECT e.id, e.name "
-                                 " FROM tbl_combined_equipments e, tbl_spaces_combined_equipments se "
-                                 " WHERE e.id = se.combined_equipment_id "
-                                 "       AND e.is_output_counted = 1 "
-                                 "       AND se.space_id = %s ",
-                                 (space['id'],))
-        rows_combined_equipments = cursor_system_db.fetchall()
-
-        if rows_combined_equipments is not None and len(rows_combined_equipments) > 0:
-            for row in rows_combined_equipments:
-                combined_equipment_list.append({"id": row[0],
-                                                "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 1.2 of space_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    combined_equipment_list = space['combined_equipment_list']
 
     ####################################################################################################################
     # Step 2: get all equipments associated with the space
     ####################################################################################################################
     print("Step 2: get all equipments associated with the space")
-
-    equipment_list = list()
-    try:
-        cursor_system_db.execute(" SELECT e.id, e.name "
-                                 " FROM tbl_equipments e, tbl_spaces_equipments se "
-                                 " WHERE e.id = se.equipment_id "
-                                 "       AND e.is_output_counted = 1 "
-                                 "       AND se.space_id = %s ",
-                                 (space['id'],))
-        rows_equipments = cursor_system_db.fetchall()
-
-        if rows_equipments is not None and len(rows_equipments) > 0:
-            for row in rows_equipments:
-                equipment_list.append({"id": row[0],
-                                       "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 2.2 of space_energy_output_category.worker " + str(e)
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        print(error_string)
-        return error_string
+    equipment_list = space['equipment_list']
 
     ####################################################################################################################
     # Step 3: get all child spaces associated with the space
     ####################################################################################################################
     print("Step 3: get all child spaces associated with the space")
-
-    child_space_list = list()
-    try:
-        cursor_system_db.execute(" SELECT id, name "
-                                 " FROM tbl_spaces "
-                                 " WHERE is_output_counted = 1 "
-                                 "       AND parent_space_id = %s ",
-                                 (space['id'],))
-        rows_child_spaces = cursor_system_db.fetchall()
-
-        if rows_child_spaces is not None and len(rows_child_spaces) > 0:
-            for row in rows_child_spaces:
-                child_space_list.append({"id": row[0],
-                                         "name": row[1]})
-
-    except Exception as e:
-        error_string = "Error in step 3 of space_energy_output_category.worker " + str(e)
-        print(error_string)
-        return error_string
-    finally:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
+    child_space_list = space['child_space_list']
 
     if ((combined_equipment_list is None or len(combined_equipment_list) == 0) and
             (equipment_list is None or len(equipment_list) == 0) and
@@ -235,11 +149,11 @@ def worker(space):
     try:
         query = (" SELECT MAX(start_datetime_utc) "
                  " FROM tbl_space_output_category_hourly "
-                 " WHERE space_id = %s ")
-        cursor_energy_db.execute(query, (space['id'],))
+                 " WHERE space_id = %s "
+                 "       AND start_datetime_utc >= %s AND start_datetime_utc < %s ")
+        cursor_energy_db.execute(query, (space['id'], window.get_start_datetime(), window.get_end_datetime()))
         row_datetime = cursor_energy_db.fetchone()
-        start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
-        start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        start_datetime_utc = window.get_start_datetime()
 
         if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
             # replace second and microsecond with 0
@@ -248,7 +162,7 @@ def worker(space):
             # start from the next time slot
             start_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
-        end_datetime_utc = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=None)
+        end_datetime_utc = window.get_end_datetime()
 
         print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19]
               + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
@@ -262,34 +176,19 @@ def worker(space):
         print(error_string)
         return error_string
 
+    # count the queries of hourly energy data, which were one query per object before
+    energy_data.reset_query_count()
+
     ####################################################################################################################
     # Step 5: for each combined equipment in list, get energy output data from energy database
     ####################################################################################################################
     energy_combined_equipment_hourly = dict()
     if combined_equipment_list is not None and len(combined_equipment_list) > 0:
         try:
-            for combined_equipment in combined_equipment_list:
-                combined_equipment_id = str(combined_equipment['id'])
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_combined_equipment_output_category_hourly "
-                         " WHERE combined_equipment_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (combined_equipment_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_combined_equipment_hourly[combined_equipment_id] = None
-                else:
-                    energy_combined_equipment_hourly[combined_equipment_id] = dict()
-                    for row_value in rows_energy_values:
-                        current_datetime_utc = row_value[0]
-                        if current_datetime_utc not in energy_combined_equipment_hourly[combined_equipment_id]:
-                            energy_combined_equipment_hourly[combined_equipment_id][current_datetime_utc] = dict()
-                        energy_category_id = row_value[1]
-                        actual_value = row_value[2]
-                        energy_combined_equipment_hourly[combined_equipment_id][current_datetime_utc][
-                            energy_category_id] = actual_value
+            id_list = [combined_equipment['id'] for combined_equipment in combined_equipment_list]
+            energy_combined_equipment_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_combined_equipment_output_category_hourly', 'combined_equipment_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 5 of space_energy_output_category.worker " + str(e)
             if cursor_energy_db:
@@ -305,28 +204,10 @@ def worker(space):
     energy_equipment_hourly = dict()
     if equipment_list is not None and len(equipment_list) > 0:
         try:
-            for equipment in equipment_list:
-                equipment_id = str(equipment['id'])
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_equipment_output_category_hourly "
-                         " WHERE equipment_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (equipment_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_equipment_hourly[equipment_id] = None
-                else:
-                    energy_equipment_hourly[equipment_id] = dict()
-                    for row_value in rows_energy_values:
-                        current_datetime_utc = row_value[0]
-                        if current_datetime_utc not in energy_equipment_hourly[equipment_id]:
-                            energy_equipment_hourly[equipment_id][current_datetime_utc] = dict()
-                        energy_category_id = row_value[1]
-                        actual_value = row_value[2]
-                        energy_equipment_hourly[equipment_id][current_datetime_utc][energy_category_id] = \
-                            actual_value
+            id_list = [equipment['id'] for equipment in equipment_list]
+            energy_equipment_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_equipment_output_category_hourly', 'equipment_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 6 of space_energy_output_category.worker " + str(e)
             if cursor_energy_db:
@@ -342,29 +223,10 @@ def worker(space):
     energy_child_space_hourly = dict()
     if child_space_list is not None and len(child_space_list) > 0:
         try:
-            for child_space in child_space_list:
-                child_space_id = str(child_space['id'])
-
-                query = (" SELECT start_datetime_utc, energy_category_id, actual_value "
-                         " FROM tbl_space_output_category_hourly "
-                         " WHERE space_id = %s "
-                         "       AND start_datetime_utc >= %s "
-                         "       AND start_datetime_utc < %s "
-                         " ORDER BY start_datetime_utc ")
-                cursor_energy_db.execute(query, (child_space_id, start_datetime_utc, end_datetime_utc,))
-                rows_energy_values = cursor_energy_db.fetchall()
-                if rows_energy_values is None or len(rows_energy_values) == 0:
-                    energy_child_space_hourly[child_space_id] = None
-                else:
-                    energy_child_space_hourly[child_space_id] = dict()
-                    for row_energy_value in rows_energy_values:
-                        current_datetime_utc = row_energy_value[0]
-                        if current_datetime_utc not in energy_child_space_hourly[child_space_id]:
-                            energy_child_space_hourly[child_space_id][current_datetime_utc] = dict()
-                        energy_category_id = row_energy_value[1]
-                        actual_value = row_energy_value[2]
-                        energy_child_space_hourly[child_space_id][current_datetime_utc][energy_category_id] \
-                            = actual_value
+            id_list = [child_space['id'] for child_space in child_space_list]
+            energy_child_space_hourly = energy_data.get_hourly_values(
+                cursor_energy_db, 'tbl_space_output_category_hourly', 'space_id', id_list,
+                start_datetime_utc, end_datetime_utc, key_column_name='energy_category_id')
         except Exception as e:
             error_string = "Error in step 7 of space_energy_output_category.worker " + str(e)
             if cursor_energy_db:
@@ -377,6 +239,8 @@ def worker(space):
     ####################################################################################################################
     # Step 8: determine common time slot to aggregate
     ####################################################################################################################
+    print("Got hourly energy data of " + str(energy_data.object_count) + " objects in " +
+          str(energy_data.query_count) + " queries")
 
     common_start_datetime_utc = start_datetime_utc
     common_end_datetime_utc = end_datetime_utc
@@ -1,207 +1,252 @@
-import collections
-from datetime import timedelta
+import bisect
+import math
+from datetime import datetime, timedelta
 
 import mysql.connector
 
 import config
 
 
+# the seconds between two checks of the tariff tables in system database for changes of the cached tariffs
+tariff_cache_check_interval = 60
+
+# the compiled tariffs by (cost center id, 'energy_category' or 'energy_item', energy category id or energy item id)
+compiled_tariff_dict = dict()
+# the checksums of the tariff tables when the cached tariffs were compiled, and the last time of checking them
+compiled_tariff_version = None
+compiled_tariff_check_datetime_utc = None
+
+
 ########################################################################################################################
-# Get tariffs by energy category
+# Get timezone offset in minutes
 ########################################################################################################################
-def get_energy_category_tariffs(cost_center_id, energy_category_id, start_datetime_utc, end_datetime_utc):
-    # todo: verify parameters
-    if cost_center_id is None:
-        return dict()
-
-    # get timezone offset in minutes, this value will be returned to client
+def get_timezone_offset():
     timezone_offset = int(config.utc_offset[1:3]) * 60 + int(config.utc_offset[4:6])
     if config.utc_offset[0] == '-':
         timezone_offset = -timezone_offset
+    return timezone_offset
 
-    tariff_dict = collections.OrderedDict()
 
-    cnx = None
-    cursor = None
-    try:
-        cnx = mysql.connector.connect(**config.myems_system_db)
-        cursor = cnx.cursor()
-        query_tariffs = (" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
-                         " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct "
-                         " WHERE t.energy_category_id = %s AND "
-                         "       t.id = cct.tariff_id AND "
-                         "       cct.cost_center_id = %s AND "
-                         "       t.valid_through_datetime_utc >= %s AND "
-                         "       t.valid_from_datetime_utc <= %s "
-                         " ORDER BY t.valid_from_datetime_utc ")
-        cursor.execute(query_tariffs, (energy_category_id, cost_center_id, start_datetime_utc, end_datetime_utc,))
-        rows_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
+########################################################################################################################
+# Compile tariffs into lookup tables
+# rows_tariffs: list of (tariff_id, valid_from_datetime_utc, valid_through_datetime_utc) ordered by valid from
+# rows_timeofuses: list of (tariff_id, start_time_of_day, end_time_of_day, value) ordered by start time of day,
+#                  the value is the price or the peak type
+# Returns: the compiled tariff, dict of
+#   valid_from_list: the sorted valid from datetimes of the validity windows, to search the windows by bisect
+#   window_list: list of dict of valid_from_datetime_utc, valid_through_datetime_utc and minute_value_list,
+#                minute_value_list is the value of every minute of the local day, None if no time of use matches
+#   timezone_offset: timezone offset in minutes
+# NOTE: compile_tariffs, get_tariff_value and get_tariff_slots are the same as in myems-api/core/utilities.py,
+# keep them the same
+########################################################################################################################
+def compile_tariffs(rows_tariffs, rows_timeofuses):
+    timeofuse_list_dict = dict()
+    for row in rows_timeofuses:
+        timeofuse_list_dict.setdefault(row[0], list()).append(row)
+
+    window_list = list()
+    for row in sorted(rows_tariffs, key=lambda x: x[1]):
+        minute_value_list = [None] * 1440
+        # the first time of use in order of start time of day matches the minute
+        for timeofuse in reversed(timeofuse_list_dict.get(row[0], list())):
+            # the minutes from start time of day inclusive to end time of day exclusive
+            start_minute = math.ceil(timeofuse[1].total_seconds() / 60)
+            end_minute = min(math.ceil(timeofuse[2].total_seconds() / 60), 1440)
+            for minute in range(start_minute, end_minute):
+                minute_value_list[minute] = timeofuse[3]
+        window_list.append({"valid_from_datetime_utc": row[1],
+                            "valid_through_datetime_utc": row[2],
+                            "minute_value_list": minute_value_list})
+
+    return {"valid_from_list": [window['valid_from_datetime_utc'] for window in window_list],
+            "window_list": window_list,
+            "timezone_offset": get_timezone_offset()}
 
-    if rows_tariffs is None or len(rows_tariffs) == 0:
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
 
-    for row in rows_tariffs:
-        tariff_dict[row[0]] = {'valid_from_datetime_utc': row[1],
-                               'valid_through_datetime_utc': row[2],
-                               'rates': list()}
+########################################################################################################################
+# Get the value of the compiled tariff at the datetime
+# Returns: the value, or None if there isn't any tariff at the datetime
+# NOTE: if the validity windows overlap, the window with the latest valid from datetime takes precedence
+########################################################################################################################
+def get_tariff_value(compiled_tariff, datetime_utc):
+    if compiled_tariff is None:
+        return None
+
+    datetime_local = datetime_utc + timedelta(minutes=compiled_tariff['timezone_offset'])
+    minute = datetime_local.hour * 60 + datetime_local.minute
+    index = bisect.bisect_right(compiled_tariff['valid_from_list'], datetime_utc) - 1
+    while index >= 0:
+        window = compiled_tariff['window_list'][index]
+        if datetime_utc < window['valid_through_datetime_utc'] and window['minute_value_list'][minute] is not None:
+            return window['minute_value_list'][minute]
+        index -= 1
+    return None
 
-    try:
-        query_timeofuse_tariffs = (" SELECT tariff_id, start_time_of_day, end_time_of_day, price "
-                                   " FROM tbl_tariffs_timeofuses "
-                                   " WHERE tariff_id IN ( " + ', '.join(map(str, tariff_dict.keys())) + ")"
-                                   " ORDER BY tariff_id, start_time_of_day ")
-        cursor.execute(query_timeofuse_tariffs, )
-        rows_timeofuse_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
 
-    if cursor:
-        cursor.close()
-    if cnx:
-        cnx.close()
+########################################################################################################################
+# Get the values of the compiled tariff at a series of datetimes
+# Returns: list of values in the same order of the datetimes, None if there isn't any tariff at the datetime
+# NOTE: the datetimes are sorted once and the validity windows are walked in one merge pass, instead of searching the
+# windows by bisect for every datetime, and the values are the same as get_tariff_value
+########################################################################################################################
+def get_tariff_values(compiled_tariff, datetime_utc_list):
+    value_list = [None] * len(datetime_utc_list)
+    if compiled_tariff is None:
+        return value_list
+
+    timezone_delta = timedelta(minutes=compiled_tariff['timezone_offset'])
+    valid_from_list = compiled_tariff['valid_from_list']
+    window_list = compiled_tariff['window_list']
+    # the index of the last window valid from before the current datetime
+    window_index = -1
+    for position in sorted(range(len(datetime_utc_list)), key=datetime_utc_list.__getitem__):
+        datetime_utc = datetime_utc_list[position]
+        while window_index + 1 < len(valid_from_list) and valid_from_list[window_index + 1] <= datetime_utc:
+            window_index += 1
+
+        datetime_local = datetime_utc + timezone_delta
+        minute = datetime_local.hour * 60 + datetime_local.minute
+        index = window_index
+        while index >= 0:
+            window = window_list[index]
+            if datetime_utc < window['valid_through_datetime_utc'] and window['minute_value_list'][minute] is not None:
+                value_list[position] = window['minute_value_list'][minute]
+                break
+            index -= 1
+
+    return value_list
+
 
-    if rows_timeofuse_tariffs is None or len(rows_timeofuse_tariffs) == 0:
-        return dict()
+########################################################################################################################
+# Whether the tariff tables should be checked again for changes of the cached tariffs
+########################################################################################################################
+def is_tariff_check_due():
+    return compiled_tariff_check_datetime_utc is None or \
+        datetime.utcnow() - compiled_tariff_check_datetime_utc >= timedelta(seconds=tariff_cache_check_interval)
 
-    for row in rows_timeofuse_tariffs:
-        tariff_dict[row[0]]['rates'].append({'start_time_of_day': row[1],
-                                             'end_time_of_day': row[2],
-                                             'price': row[3]})
 
-    result = dict()
-    for tariff_id, tariff_value in tariff_dict.items():
-        current_datetime_utc = tariff_value['valid_from_datetime_utc']
-        while current_datetime_utc < tariff_value['valid_through_datetime_utc']:
-            for rate in tariff_value['rates']:
-                current_datetime_local = current_datetime_utc + timedelta(minutes=timezone_offset)
-                seconds_since_midnight = (current_datetime_local -
-                                          current_datetime_local.replace(hour=0,
-                                                                         second=0,
-                                                                         microsecond=0,
-                                                                         tzinfo=None)).total_seconds()
-                if rate['start_time_of_day'].total_seconds() <= \
-                        seconds_since_midnight < rate['end_time_of_day'].total_seconds():
-                    result[current_datetime_utc] = rate['price']
-                    break
+########################################################################################################################
+# Clear the cached tariffs if the tariff tables in system database were changed
+# NOTE: the tables are checked at most once in tariff_cache_check_interval seconds
+########################################################################################################################
+def check_compiled_tariffs(cursor):
+    global compiled_tariff_version, compiled_tariff_check_datetime_utc
 
-            # start from the next time slot
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
+    if not is_tariff_check_due():
+        return
 
-    return {k: v for k, v in result.items() if start_datetime_utc <= k <= end_datetime_utc}
+    cursor.execute(" CHECKSUM TABLE tbl_tariffs, tbl_tariffs_timeofuses, tbl_cost_centers_tariffs, tbl_energy_items ")
+    version = tuple(cursor.fetchall())
+    if version != compiled_tariff_version:
+        compiled_tariff_dict.clear()
+        compiled_tariff_version = version
+    compiled_tariff_check_datetime_utc = datetime.utcnow()
 
 
 ########################################################################################################################
-# Get tariffs by energy item
+# Get the compiled tariff of the cost center by energy category or energy item from the cache or system database
+# tariff_type: 'energy_category' or 'energy_item'
+# Returns: the compiled tariff, or None if there isn't any tariff or the system database is not ready
 ########################################################################################################################
-def get_energy_item_tariffs(cost_center_id, energy_item_id, start_datetime_utc, end_datetime_utc):
-    # todo: verify parameters
+def get_compiled_tariff(cost_center_id, tariff_type, energy_category_or_item_id):
     if cost_center_id is None:
-        return dict()
+        return None
 
-    # get timezone offset in minutes, this value will be returned to client
-    timezone_offset = int(config.utc_offset[1:3]) * 60 + int(config.utc_offset[4:6])
-    if config.utc_offset[0] == '-':
-        timezone_offset = -timezone_offset
-
-    tariff_dict = collections.OrderedDict()
+    key = (cost_center_id, tariff_type, energy_category_or_item_id)
+    if key in compiled_tariff_dict and not is_tariff_check_due():
+        return compiled_tariff_dict[key]
 
     cnx = None
     cursor = None
     try:
         cnx = mysql.connector.connect(**config.myems_system_db)
         cursor = cnx.cursor()
-        query_tariffs = (" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
-                         " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct, tbl_energy_items ei "
-                         " WHERE ei.id = %s AND "
-                         "       t.energy_category_id = ei.energy_category_id AND "
-                         "       t.id = cct.tariff_id AND "
-                         "       cct.cost_center_id = %s AND "
-                         "       t.valid_through_datetime_utc >= %s AND "
-                         "       t.valid_from_datetime_utc <= %s "
-                         " ORDER BY t.valid_from_datetime_utc ")
-        cursor.execute(query_tariffs, (energy_item_id, cost_center_id, start_datetime_utc, end_datetime_utc,))
+        check_compiled_tariffs(cursor)
+        if key in compiled_tariff_dict:
+            return compiled_tariff_dict[key]
+
+        if tariff_type == 'energy_category':
+            cursor.execute(" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
+                           " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct "
+                           " WHERE t.energy_category_id = %s AND "
+                           "       t.id = cct.tariff_id AND "
+                           "       cct.cost_center_id = %s "
+                           " ORDER BY t.valid_from_datetime_utc ",
+                           (energy_category_or_item_id, cost_center_id,))
+        else:
+            cursor.execute(" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
+                           " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct, tbl_energy_items ei "
+                           " WHERE ei.id = %s AND "
+                           "       t.energy_category_id = ei.energy_category_id AND "
+                           "       t.id = cct.tariff_id AND "
+                           "       cct.cost_center_id = %s "
+                           " ORDER BY t.valid_from_datetime_utc ",
+                           (energy_category_or_item_id, cost_center_id,))
         rows_tariffs = cursor.fetchall()
+
+        rows_timeofuses = list()
+        if rows_tariffs is not None and len(rows_tariffs) > 0:
+            cursor.execute(" SELECT tariff_id, start_time_of_day, end_time_of_day, price "
+                           " FROM tbl_tariffs_timeofuses "
+                           " WHERE tariff_id IN ( " + ', '.join(str(row[0]) for row in rows_tariffs) + ")"
+                           " ORDER BY tariff_id, start_time_of_day ")
+            rows_timeofuses = cursor.fetchall()
+
+        if rows_tariffs is None or len(rows_tariffs) == 0 or rows_timeofuses is None or len(rows_timeofuses) == 0:
+            compiled_tariff_dict[key] = None
+        else:
+            compiled_tariff_dict[key] = compile_tariffs(rows_tariffs, rows_timeofuses)
+        return compiled_tariff_dict[key]
     except Exception as e:
         print(str(e))
+        return None
+    finally:
         if cursor:
             cursor.close()
         if cnx:
             cnx.close()
-        return dict()
-
-    if rows_tariffs is None or len(rows_tariffs) == 0:
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
 
-    for row in rows_tariffs:
-        tariff_dict[row[0]] = {'valid_from_datetime_utc': row[1],
-                               'valid_through_datetime_utc': row[2],
-                               'rates': list()}
 
-    try:
-        query_timeofuse_tariffs = (" SELECT tariff_id, start_time_of_day, end_time_of_day, price "
-                                   " FROM tbl_tariffs_timeofuses "
-                                   " WHERE tariff_id IN ( " + ', '.join(map(str, tariff_dict.keys())) + ")"
-                                   " ORDER BY tariff_id, start_time_of_day ")
-        cursor.execute(query_timeofuse_tariffs, )
-        rows_timeofuse_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
+########################################################################################################################
+# Get tariffs by energy category
+# Returns: dict of datetime in the time slots from valid from datetime of every tariff to price
+########################################################################################################################
+def get_energy_category_tariffs(cost_center_id, energy_category_id, start_datetime_utc, end_datetime_utc):
+    compiled_tariff = get_compiled_tariff(cost_center_id, 'energy_category', energy_category_id)
+    return get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc)
 
-    if cursor:
-        cursor.close()
-    if cnx:
-        cnx.close()
 
-    if rows_timeofuse_tariffs is None or len(rows_timeofuse_tariffs) == 0:
-        return dict()
+########################################################################################################################
+# Get tariffs by energy item
+# Returns: dict of datetime in the time slots from valid from datetime of every tariff to price
+########################################################################################################################
+def get_energy_item_tariffs(cost_center_id, energy_item_id, start_datetime_utc, end_datetime_utc):
+    compiled_tariff = get_compiled_tariff(cost_center_id, 'energy_item', energy_item_id)
+    return get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc)
 
-    for row in rows_timeofuse_tariffs:
-        tariff_dict[row[0]]['rates'].append({'start_time_of_day': row[1],
-                                             'end_time_of_day': row[2],
-                                             'price': row[3]})
 
+########################################################################################################################
+# Get the values of the compiled tariff in the time slots between start datetime and end datetime
+# Returns: dict of datetime to value, the time slots of every tariff start from its valid from datetime
+# NOTE: only the time slots in the period are looked up, instead of the whole validity windows of the tariffs
+########################################################################################################################
+def get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc):
     result = dict()
-    for tariff_id, tariff_value in tariff_dict.items():
-        current_datetime_utc = tariff_value['valid_from_datetime_utc']
-        while current_datetime_utc < tariff_value['valid_through_datetime_utc']:
-            for rate in tariff_value['rates']:
-                current_datetime_local = current_datetime_utc + timedelta(minutes=timezone_offset)
-                seconds_since_midnight = (current_datetime_local -
-                                          current_datetime_local.replace(hour=0,
-                                                                         second=0,
-                                                                         microsecond=0,
-                                                                         tzinfo=None)).total_seconds()
-                if rate['start_time_of_day'].total_seconds() <= \
-                        seconds_since_midnight < rate['end_time_of_day'].total_seconds():
-                    result[current_datetime_utc] = rate['price']
-                    break
-
-            # start from the next time slot
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-    return {k: v for k, v in result.items() if start_datetime_utc <= k <= end_datetime_utc}
+    if compiled_tariff is None:
+        return result
+
+    slot = timedelta(minutes=config.minutes_to_count)
+    for window in compiled_tariff['window_list']:
+        # the first time slot of the window in the period
+        current_datetime_utc = window['valid_from_datetime_utc']
+        if current_datetime_utc < start_datetime_utc:
+            current_datetime_utc += slot * -((current_datetime_utc - start_datetime_utc) // slot)
+        while current_datetime_utc < window['valid_through_datetime_utc'] and current_datetime_utc <= end_datetime_utc:
+            datetime_local = current_datetime_utc + timedelta(minutes=compiled_tariff['timezone_offset'])
+            value = window['minute_value_list'][datetime_local.hour * 60 + datetime_local.minute]
+            if value is not None:
+                result[current_datetime_utc] = value
+            current_datetime_utc += slot
+
+    return result
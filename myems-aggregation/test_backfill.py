@@ -0,0 +1,132 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from multiprocessing import Pool
+
+import mysql.connector
+
+import backfill
+import config
+import scheduler
+
+
+# the ids of the meters and the equipment inserted for the test, and deleted after the test
+test_meter_list = [{"id": 990001, "name": "test meter 990001", "energy_category_id": 1},
+                   {"id": 990002, "name": "test meter 990002", "energy_category_id": 2},
+                   {"id": 990003, "name": "test meter 990003", "energy_category_id": 1}]
+test_equipment_id = 990001
+
+# the time window recalculated in chunks, and the rows kept before and after it
+test_start_datetime_utc = datetime(2024, 1, 1)
+test_end_datetime_utc = datetime(2024, 3, 1)
+kept_value = Decimal('-1.000')
+
+
+########################################################################################################################
+# Check the hourly data of the test equipment against the sums of the test meters by energy category and hour
+# Returns: the number of mismatched rows
+########################################################################################################################
+def check_equipment_hourly(cursor):
+    cursor.execute(" SELECT m.meter_id, m.start_datetime_utc, m.actual_value "
+                   " FROM tbl_meter_hourly m "
+                   " WHERE m.meter_id IN (" + ", ".join(["%s"] * len(test_meter_list)) + ") ",
+                   tuple(meter['id'] for meter in test_meter_list))
+    energy_category_id_dict = dict((meter['id'], meter['energy_category_id']) for meter in test_meter_list)
+    expected_dict = dict()
+    for meter_id, start_datetime_utc, actual_value in cursor.fetchall():
+        key = (energy_category_id_dict[meter_id], start_datetime_utc)
+        expected_dict[key] = expected_dict.get(key, Decimal(0)) + actual_value
+    for energy_category_id in set(energy_category_id_dict.values()):
+        expected_dict[(energy_category_id, test_start_datetime_utc - timedelta(hours=1))] = kept_value
+        expected_dict[(energy_category_id, test_end_datetime_utc)] = kept_value
+
+    cursor.execute(" SELECT energy_category_id, start_datetime_utc, actual_value "
+                   " FROM tbl_equipment_input_category_hourly "
+                   " WHERE equipment_id = %s ",
+                   (test_equipment_id, ))
+    actual_dict = dict()
+    mismatch_count = 0
+    for energy_category_id, start_datetime_utc, actual_value in cursor.fetchall():
+        key = (energy_category_id, start_datetime_utc)
+        if key in actual_dict:
+            mismatch_count += 1
+            print('Duplicate row of energy category ' + str(key[0]) + ' at ' + str(key[1]))
+        actual_dict[key] = actual_value
+
+    for key in set(expected_dict.keys()) | set(actual_dict.keys()):
+        if expected_dict.get(key) != actual_dict.get(key):
+            mismatch_count += 1
+            print('Mismatch of energy category ' + str(key[0]) + ' at ' + str(key[1]) +
+                  ': meter sum ' + str(expected_dict.get(key)) + ', equipment ' + str(actual_dict.get(key)))
+    return mismatch_count
+
+
+########################################################################################################################
+# Delete the data of the test meters and the test equipment
+########################################################################################################################
+def delete_test_data(cnx, cursor):
+    cursor.execute(" DELETE FROM tbl_meter_hourly "
+                   " WHERE meter_id IN (" + ", ".join(["%s"] * len(test_meter_list)) + ") ",
+                   tuple(meter['id'] for meter in test_meter_list))
+    cursor.execute(" DELETE FROM tbl_equipment_input_category_hourly "
+                   " WHERE equipment_id = %s ",
+                   (test_equipment_id, ))
+    cnx.commit()
+
+
+def main():
+    """main"""
+    print('Testing backfill of an equipment in chunks of the time window in parallel ...')
+    random.seed(0)
+    logger = logging.getLogger('myems-aggregation')
+    logger.addHandler(logging.StreamHandler())
+    cnx = mysql.connector.connect(**config.myems_energy_db)
+    cursor = cnx.cursor()
+    try:
+        delete_test_data(cnx, cursor)
+
+        # the meters have data of every hour in the time window, and the equipment has data only out of it, as if
+        # backfill had deleted the data in the time window
+        current_datetime_utc = test_start_datetime_utc
+        while current_datetime_utc < test_end_datetime_utc:
+            for meter in test_meter_list:
+                cursor.execute(" INSERT INTO tbl_meter_hourly (meter_id, start_datetime_utc, actual_value) "
+                               " VALUES (%s, %s, %s) ",
+                               (meter['id'], current_datetime_utc, Decimal(random.randint(0, 1000000)).scaleb(-3)))
+            current_datetime_utc += timedelta(hours=1)
+        for energy_category_id in set(meter['energy_category_id'] for meter in test_meter_list):
+            for start_datetime_utc in (test_start_datetime_utc - timedelta(hours=1), test_end_datetime_utc):
+                cursor.execute(" INSERT INTO tbl_equipment_input_category_hourly "
+                               " (equipment_id, energy_category_id, start_datetime_utc, actual_value) "
+                               " VALUES (%s, %s, %s, %s) ",
+                               (test_equipment_id, energy_category_id, start_datetime_utc, kept_value))
+        cnx.commit()
+
+        task_dict = {('equipment', 'input_category', test_equipment_id):
+                     {"priority": (0, 0),
+                      "dependency_set": set(),
+                      "module_name": 'equipment_energy_input_category',
+                      "object": {"id": test_equipment_id,
+                                 "name": "test equipment " + str(test_equipment_id),
+                                 "parent_space_id": None,
+                                 "meter_list": test_meter_list,
+                                 "virtual_meter_list": list(),
+                                 "offline_meter_list": list()}}}
+        chunk_list = backfill.get_chunks(test_start_datetime_utc, test_end_datetime_utc, 7)
+        task_dict = backfill.create_chunked_tasks(task_dict, chunk_list)
+        pool = Pool(processes=config.pool_size)
+        scheduler.run_tasks(logger, pool, task_dict)
+        pool.close()
+        pool.join()
+
+        mismatch_count = check_equipment_hourly(cursor)
+        print('Passed' if mismatch_count == 0 else 'Failed with ' + str(mismatch_count) + ' mismatched row(s)')
+    finally:
+        delete_test_data(cnx, cursor)
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == "__main__":
+    main()
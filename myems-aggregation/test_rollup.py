@@ -0,0 +1,113 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import mysql.connector
+
+import config
+import rollup
+
+
+# the hourly table created in energy database for the test, and dropped with its rollup tables after the test
+test_hourly_table_name = 'tbl_test_rollup_hourly'
+test_key_columns = ('meter_id', )
+
+
+########################################################################################################################
+# Roll up the test hourly table with a new connection, in the same way as rollup.rollup_all
+########################################################################################################################
+def rollup_test_table():
+    cnx = mysql.connector.connect(**config.myems_energy_db)
+    cursor = cnx.cursor()
+    try:
+        error_string = rollup.rollup_hourly_table(cnx, cursor, test_hourly_table_name, test_key_columns)
+        if error_string is not None:
+            print(error_string)
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+########################################################################################################################
+# Check the daily and monthly tables against the sums of the hourly table by local day and local month
+# Returns: the number of mismatched rows
+########################################################################################################################
+def check_rollup_tables(cursor):
+    cursor.execute(" SELECT meter_id, start_datetime_utc, actual_value "
+                   " FROM " + test_hourly_table_name)
+    expected_dict_list = [dict(), dict()]
+    for meter_id, start_datetime_utc, actual_value in cursor.fetchall():
+        for i, period in enumerate(rollup.get_rollup_periods(start_datetime_utc)):
+            key = (meter_id, period[0])
+            expected_dict_list[i][key] = expected_dict_list[i].get(key, Decimal(0)) + actual_value
+
+    mismatch_count = 0
+    for suffix, expected_dict in zip(('_daily', '_monthly'), expected_dict_list):
+        cursor.execute(" SELECT meter_id, start_datetime_utc, actual_value "
+                       " FROM " + test_hourly_table_name[:-len('_hourly')] + suffix)
+        actual_dict = dict(((row[0], row[1]), row[2]) for row in cursor.fetchall())
+        for key in set(expected_dict.keys()) | set(actual_dict.keys()):
+            if expected_dict.get(key) != actual_dict.get(key):
+                mismatch_count += 1
+                print('Mismatch in ' + suffix[1:] + ' table of meter ' + str(key[0]) + ' at ' + str(key[1]) +
+                      ': hourly sum ' + str(expected_dict.get(key)) + ', rollup ' + str(actual_dict.get(key)))
+    return mismatch_count
+
+
+def main():
+    """main"""
+    print('Testing rollup of hourly rows committed out of the order of their ids ...')
+    random.seed(0)
+    cnx = mysql.connector.connect(**config.myems_energy_db)
+    cursor = cnx.cursor()
+    writer_cnx_list = list()
+    try:
+        for suffix in ('_hourly', '_daily', '_monthly'):
+            table_name = test_hourly_table_name[:-len('_hourly')] + suffix
+            cursor.execute(" DROP TABLE IF EXISTS " + table_name)
+            cursor.execute(" CREATE TABLE " + table_name + " ( "
+                           " id BIGINT NOT NULL AUTO_INCREMENT, "
+                           " meter_id BIGINT NOT NULL, "
+                           " start_datetime_utc DATETIME NOT NULL, "
+                           " actual_value DECIMAL(18, 3) NOT NULL, "
+                           " PRIMARY KEY (id)) ")
+        cursor.execute(" DELETE FROM tbl_rollup_watermarks WHERE table_name = %s ", (test_hourly_table_name, ))
+        cnx.commit()
+
+        # the writers insert rows of the hours around the end of a month in local time, and the first writer keeps its
+        # transaction open while the others insert rows of higher ids, commit them, and the rows are rolled up
+        start_datetime_utc = datetime(2024, 1, 30, 16)
+        for _ in range(3):
+            writer_cnx_list.append(mysql.connector.connect(**config.myems_energy_db))
+        for round_index in range(10):
+            for writer_cnx in writer_cnx_list:
+                writer_cursor = writer_cnx.cursor()
+                for _ in range(random.randint(1, 50)):
+                    writer_cursor.execute(" INSERT INTO " + test_hourly_table_name +
+                                          " (meter_id, start_datetime_utc, actual_value) "
+                                          " VALUES (%s, %s, %s) ",
+                                          (random.randint(1, 5),
+                                           start_datetime_utc + timedelta(hours=random.randint(0, 96)),
+                                           Decimal(random.randint(0, 1000000)).scaleb(-3)))
+                writer_cursor.close()
+            for writer_cnx in reversed(writer_cnx_list):
+                writer_cnx.commit()
+                if writer_cnx is not writer_cnx_list[0]:
+                    rollup_test_table()
+            rollup_test_table()
+
+        mismatch_count = check_rollup_tables(cursor)
+        print('Passed' if mismatch_count == 0 else 'Failed with ' + str(mismatch_count) + ' mismatched row(s)')
+    finally:
+        for writer_cnx in writer_cnx_list:
+            writer_cnx.close()
+        for suffix in ('_hourly', '_daily', '_monthly'):
+            cursor.execute(" DROP TABLE IF EXISTS " + test_hourly_table_name[:-len('_hourly')] + suffix)
+        cursor.execute(" DELETE FROM tbl_rollup_watermarks WHERE table_name = %s ", (test_hourly_table_name, ))
+        cnx.commit()
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == "__main__":
+    main()
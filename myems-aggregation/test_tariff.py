@@ -29,6 +29,14 @@ def main():
     for k, v in sorted(tariffs.items()):
         print(k, v)
 
+    print('Testing get_tariff_value ...')
+    cost_center_id = 1
+    energy_category_id = 1
+    compiled_tariff = tariff.get_compiled_tariff(cost_center_id, 'energy_category', energy_category_id)
+    for date_time_utc in ['2020-06-29 16:00:00', '2020-06-30 00:30:00', '2020-06-30 09:15:00']:
+        date_time_utc = datetime.strptime(date_time_utc, '%Y-%m-%d %H:%M:%S')
+        print(date_time_utc, tariff.get_tariff_value(compiled_tariff, date_time_utc))
+
 
 if __name__ == "__main__":
     main()
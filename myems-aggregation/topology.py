@@ -0,0 +1,41 @@
+########################################################################################################################
+# Group the spaces into levels from leaves to root
+# Every space is placed in the level after all of its child spaces, so that the spaces in the same level can be
+# aggregated in parallel and the spaces in the next level can use the aggregated data of their child spaces.
+# space_list: list of dict with keys id, name and parent_space_id
+# Returns: list of levels, each level is a list of spaces, the first level contains the leaf spaces
+# NOTE: the spaces in a cycle of parent_space_id are put into the last level
+########################################################################################################################
+def get_space_levels(space_list):
+    space_dict = dict()
+    for space in space_list:
+        space_dict[space['id']] = space
+
+    # count the child spaces which are not aggregated yet for every space
+    pending_children_dict = dict()
+    for space in space_list:
+        pending_children_dict[space['id']] = 0
+    for space in space_list:
+        parent_space_id = space['parent_space_id']
+        if parent_space_id in space_dict and parent_space_id != space['id']:
+            pending_children_dict[parent_space_id] += 1
+
+    space_levels = list()
+    current_level = [space for space in space_list if pending_children_dict[space['id']] == 0]
+    placed_count = 0
+    while len(current_level) > 0:
+        space_levels.append(current_level)
+        placed_count += len(current_level)
+        next_level = list()
+        for space in current_level:
+            parent_space_id = space['parent_space_id']
+            if parent_space_id in space_dict and parent_space_id != space['id']:
+                pending_children_dict[parent_space_id] -= 1
+                if pending_children_dict[parent_space_id] == 0:
+                    next_level.append(space_dict[parent_space_id])
+        current_level = next_level
+
+    if placed_count < len(space_list):
+        space_levels.append([space for space in space_list if pending_children_dict[space['id']] > 0])
+
+    return space_levels
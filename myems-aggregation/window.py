@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import config
+
+
+# the time window to calculate in UTC, which is set by the tasks of backfill in the worker processes,
+# or None to calculate since config.start_datetime_utc up to now
+start_datetime_utc = None
+end_datetime_utc = None
+
+
+########################################################################################################################
+# Set the time window to calculate, called by scheduler.run_task before running every task in a worker process
+# start_value, end_value: the start and the end of the chunk of a backfill task, or None for the tasks of the scheduler
+########################################################################################################################
+def set_window(start_value, end_value):
+    global start_datetime_utc, end_datetime_utc
+    start_datetime_utc = start_value
+    end_datetime_utc = end_value
+
+
+########################################################################################################################
+# Get the start of the time window to calculate
+# Returns: the start datetime set by backfill, or else config.start_datetime_utc
+# NOTE: the latest start_datetime_utc of every object is searched in the time window, so that the chunks of a backfill
+# are calculated independently from their own start datetimes, and in parallel
+########################################################################################################################
+def get_start_datetime():
+    if start_datetime_utc is not None:
+        return start_datetime_utc
+    return datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S').replace(minute=0, second=0,
+                                                                                    microsecond=0, tzinfo=None)
+
+
+########################################################################################################################
+# Get the end of the time window to calculate
+# Returns: the end datetime set by backfill, or else now in UTC
+# NOTE: the latest start_datetime_utc of every object is searched before the end datetime too, so that the objects are
+# recalculated from the start of the window deleted by backfill, though the data after the window are kept
+########################################################################################################################
+def get_end_datetime():
+    if end_datetime_utc is not None:
+        return end_datetime_utc
+    return datetime.utcnow().replace(second=0, microsecond=0, tzinfo=None)
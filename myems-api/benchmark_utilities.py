@@ -0,0 +1,41 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from core import utilities
+
+
+########################################################################################################################
+# Micro-benchmark of the period aggregation procedures in core.utilities
+# Usage: python3 benchmark_utilities.py
+# Generates synthetic hourly series of 1 year and 5 years and times every period type
+########################################################################################################################
+def generate_rows_hourly(start_datetime_utc, years):
+    rows_hourly = list()
+    current_datetime_utc = start_datetime_utc
+    end_datetime_utc = start_datetime_utc.replace(year=start_datetime_utc.year + years)
+    while current_datetime_utc < end_datetime_utc:
+        rows_hourly.append((current_datetime_utc, Decimal(random.randint(0, 100000)) / Decimal(1000)))
+        current_datetime_utc += timedelta(hours=1)
+    return rows_hourly, end_datetime_utc
+
+
+def main():
+    random.seed(0)
+    start_datetime_utc = datetime(2019, 12, 31, 16, 0, 0)
+    for years in (1, 5):
+        rows_hourly, end_datetime_utc = generate_rows_hourly(start_datetime_utc, years)
+        print('Synthetic series of ' + str(years) + ' year(s), ' + str(len(rows_hourly)) + ' hourly rows')
+        for period_type in ('hourly', 'daily', 'weekly', 'monthly', 'yearly'):
+            for procedure in (utilities.aggregate_hourly_data_by_period,
+                              utilities.averaging_hourly_data_by_period,
+                              utilities.statistics_hourly_data_by_period):
+                start_time = time.perf_counter()
+                procedure(rows_hourly, start_datetime_utc, end_datetime_utc, period_type)
+                elapsed = time.perf_counter() - start_time
+                print('  {:<34} {:<8} {:>10.3f} ms'.format(procedure.__name__, period_type, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    main()
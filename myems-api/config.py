@@ -121,3 +121,14 @@ is_recursive = config('IS_RECURSIVE', default=True, cast=bool)
 # indicates how long in second the user session expires
 # default value is 60 * 60 * 8 = 28800
 session_expires_in_seconds = config('SESSION_EXPIRES_IN_SECONDS', default=28800, cast=int)
+
+# indicates if reports read the daily and monthly rollup tables maintained by myems-aggregation
+# when the reporting period is aligned to local days or months, otherwise reports always read the hourly tables
+# enable it after myems-aggregation has rolled up all existing hourly data
+# NOTE: the rollup tables are rebuilt from the hourly rows appended or inserted again, so don't delete hourly rows
+# without inserting them again except by backfill.py of myems-aggregation, which deletes the rollup rows too
+is_rollup_table_enabled = config('IS_ROLLUP_TABLE_ENABLED', default=False, cast=bool)
+
+# indicates where myems-cleaning archives the historical point data as Parquet files, such as /var/lib/myems/archive
+# the archived months are read from the archive if it is not empty, and it requires pyarrow to be installed
+archive_path = config('ARCHIVE_PATH', default='')
@@ -0,0 +1,177 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import config
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+########################################################################################################################
+# Reader of the archive of historical point data, which is written by myems-cleaning
+#
+# The archive is a directory of Parquet files, one file of every point in every month, such as
+#   ARCHIVE_PATH/tbl_energy_value/2024-01/point_id=1.parquet
+# and every archived month holds a _SUCCESS file, which is written after all files of the month.
+# The months are archived from the oldest one, so all data before the end of the latest archived month are read from
+# the archive, and all data since then are read from database.
+########################################################################################################################
+
+
+########################################################################################################################
+# Get the archived months of a table
+# Returns: ascending list of the start datetimes in UTC of the archived months, or an empty list if the archive is
+#          disabled
+########################################################################################################################
+def get_archived_months(table_name):
+    if len(config.archive_path) == 0:
+        return list()
+
+    table_path = os.path.join(config.archive_path, table_name)
+    if not os.path.isdir(table_path):
+        return list()
+
+    month_list = list()
+    for month in os.listdir(table_path):
+        if len(month) == 7 and os.path.isfile(os.path.join(table_path, month, '_SUCCESS')):
+            month_list.append(datetime.strptime(month, '%Y-%m').replace(tzinfo=timezone.utc))
+    return sorted(month_list)
+
+
+########################################################################################################################
+# Get the datetime before which all data of a table are read from the archive
+# Returns: the start datetime in UTC of the month after the latest archived month, or None if there isn't any
+########################################################################################################################
+def get_archived_until(table_name):
+    month_list = get_archived_months(table_name)
+    if len(month_list) == 0:
+        return None
+    return get_next_month(month_list[-1])
+
+
+########################################################################################################################
+# Get the archived values of points in a time window
+# start_datetime_utc: the start datetime in UTC, included
+# end_datetime_utc: the end datetime in UTC, excluded
+# is_good_only: if True only the values checked good by myems-cleaning are returned, same as is_bad = 0
+# Returns: dict of point id to the list of (utc_date_time, actual_value) ordered by utc_date_time
+########################################################################################################################
+def get_values(table_name, point_id_list, start_datetime_utc, end_datetime_utc, is_good_only):
+    values_dict = dict()
+    for point_id in point_id_list:
+        values_dict[point_id] = list()
+
+    # the date times in the archive are naive in UTC, the same as in database
+    start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
+    end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
+    if len(config.archive_path) == 0 or start_datetime_utc >= end_datetime_utc:
+        return values_dict
+
+    if pq is None:
+        raise Exception("pyarrow is not installed to read the archive in " + config.archive_path)
+
+    filters = [('utc_date_time', '>=', start_datetime_utc), ('utc_date_time', '<', end_datetime_utc)]
+    if is_good_only:
+        filters.append(('is_bad', '=', False))
+
+    month_start_datetime_utc = start_datetime_utc.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month_start_datetime_utc < end_datetime_utc:
+        month_path = os.path.join(config.archive_path, table_name, month_start_datetime_utc.strftime('%Y-%m'))
+        for point_id in point_id_list:
+            file_path = os.path.join(month_path, 'point_id=' + str(point_id) + '.parquet')
+            if not os.path.isfile(file_path):
+                continue
+            table = pq.read_table(file_path, columns=['utc_date_time', 'actual_value'], filters=filters)
+            values_dict[point_id].extend(zip(table['utc_date_time'].to_pylist(), table['actual_value'].to_pylist()))
+        month_start_datetime_utc = get_next_month(month_start_datetime_utc)
+
+    return values_dict
+
+
+########################################################################################################################
+# Split a time window of the reports between the archive and database
+# start_datetime_utc, end_datetime_utc: the time window in UTC, both included, the same as BETWEEN in SQL
+# Returns: (the end datetime of the values read from the archive, excluded, or None if none of them is archived,
+#           the start datetime of the values read from database, included)
+########################################################################################################################
+def split_time_window(table_name, start_datetime_utc, end_datetime_utc):
+    archived_until_datetime_utc = get_archived_until(table_name)
+    if archived_until_datetime_utc is None:
+        return None, start_datetime_utc
+
+    # the reports pass both naive and aware date times in UTC
+    archived_until_datetime_utc = archived_until_datetime_utc.replace(tzinfo=start_datetime_utc.tzinfo)
+    if start_datetime_utc >= archived_until_datetime_utc:
+        return None, start_datetime_utc
+    # the end datetime is included, and the date times are in seconds
+    return min(end_datetime_utc + timedelta(seconds=1), archived_until_datetime_utc), archived_until_datetime_utc
+
+
+########################################################################################################################
+# Get the values of a point in a time window of the reports, from the archive for the archived months and from
+# database for the others, which replaces the query of the historical table in the reports, because the archived rows
+# are deleted from database by myems-cleaning
+# cursor: the cursor of historical database
+# table_name: tbl_energy_value, tbl_analog_value or tbl_digital_value
+# start_datetime_utc, end_datetime_utc: the time window in UTC, both included, the same as BETWEEN in SQL
+# Returns: list of (utc_date_time, actual_value) ordered by utc_date_time
+########################################################################################################################
+def get_point_values(cursor, table_name, point_id, start_datetime_utc, end_datetime_utc):
+    rows = list()
+    archived_end_datetime_utc, query_start_datetime_utc = split_time_window(table_name,
+                                                                            start_datetime_utc,
+                                                                            end_datetime_utc)
+    if archived_end_datetime_utc is not None:
+        rows = get_values(table_name, [point_id], start_datetime_utc, archived_end_datetime_utc, False)[point_id]
+
+    if query_start_datetime_utc <= end_datetime_utc:
+        query = (" SELECT utc_date_time, actual_value "
+                 " FROM " + table_name +
+                 " WHERE point_id = %s "
+                 "       AND utc_date_time BETWEEN %s AND %s "
+                 " ORDER BY utc_date_time ")
+        cursor.execute(query, (point_id, query_start_datetime_utc, end_datetime_utc))
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+########################################################################################################################
+# Get the latest value of some points in a time window of the reports, from database or else from the archive
+# cursor: the cursor of historical database
+# table_name: tbl_energy_value, tbl_analog_value or tbl_digital_value
+# start_datetime_utc, end_datetime_utc: the time window in UTC, both included, the same as BETWEEN in SQL
+# Returns: (utc_date_time, actual_value) of the latest value of any of the points, or None if there isn't any
+########################################################################################################################
+def get_latest_point_value(cursor, table_name, point_id_list, start_datetime_utc, end_datetime_utc):
+    archived_end_datetime_utc, query_start_datetime_utc = split_time_window(table_name,
+                                                                            start_datetime_utc,
+                                                                            end_datetime_utc)
+    if query_start_datetime_utc <= end_datetime_utc:
+        query = (" SELECT utc_date_time, actual_value "
+                 " FROM " + table_name +
+                 " WHERE point_id IN (" + ", ".join(["%s"] * len(point_id_list)) + ") "
+                 "       AND utc_date_time BETWEEN %s AND %s "
+                 " ORDER BY utc_date_time DESC LIMIT 0,1 ")
+        cursor.execute(query, tuple(point_id_list) + (query_start_datetime_utc, end_datetime_utc))
+        row = cursor.fetchone()
+        if row is not None:
+            return row
+
+    if archived_end_datetime_utc is not None:
+        rows = list()
+        for point_rows in get_values(table_name, point_id_list, start_datetime_utc, archived_end_datetime_utc,
+                                     False).values():
+            rows.extend(point_rows)
+        if len(rows) > 0:
+            return max(rows, key=lambda row: row[0])
+    return None
+
+
+########################################################################################################################
+# Get the start datetime of the next month
+########################################################################################################################
+def get_next_month(month_start_datetime_utc):
+    if month_start_datetime_utc.month == 12:
+        return month_start_datetime_utc.replace(year=month_start_datetime_utc.year + 1, month=1)
+    return month_start_datetime_utc.replace(month=month_start_datetime_utc.month + 1)
@@ -1,4 +1,5 @@
-import collections
+import bisect
+import math
 import statistics
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -7,243 +8,322 @@ import config
 import gettext
 
 
-########################################################################################################################
-# Aggregate hourly data by period
-# rows_hourly: list of (start_datetime_utc, actual_value), should belong to one energy_category_id
-# start_datetime_utc: start datetime in utc
-# end_datetime_utc: end datetime in utc
-# period_type: use one of the period types, 'hourly', 'daily', 'weekly', 'monthly' and 'yearly'
-# Note: this procedure doesn't work with multiple energy categories
-########################################################################################################################
-def aggregate_hourly_data_by_period(rows_hourly, start_datetime_utc, end_datetime_utc, period_type):
-    # todo: validate parameters
-    if start_datetime_utc is None or \
-            end_datetime_utc is None or \
-            start_datetime_utc >= end_datetime_utc or \
-            period_type not in ('hourly', 'daily', 'weekly', 'monthly', 'yearly'):
-        return list()
+# the seconds between two checks of the tariff tables in system database for changes of the cached tariffs
+tariff_cache_check_interval = 60
 
-    start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
-    end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
+# the compiled tariffs by (cost center id, energy category id, price or peak_type)
+compiled_tariff_dict = dict()
+# the checksums of the tariff tables when the cached tariffs were compiled, and the last time of checking them
+compiled_tariff_version = None
+compiled_tariff_check_datetime_utc = None
 
+
+########################################################################################################################
+# Get boundaries of periods
+#   start_datetime_utc: start datetime in utc
+#   end_datetime_utc: end datetime in utc
+#   period_type: use one of the period types, 'hourly', 'daily', 'weekly', 'monthly' and 'yearly'
+# Returns: ascending list of start datetimes in utc of all periods, followed by the end datetime of the last period
+#          so the period i covers [boundaries[i], boundaries[i + 1])
+# NOTE: the local days are aligned to the signed timezone offset in minutes, such as -05:00 or +05:30, in the same way
+# as the daily and monthly rollup tables, see get_table_name_by_period
+########################################################################################################################
+def get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type):
+    # todo: add config.working_day_start_time_local
+    # todo: add config.minutes_to_count
+    timezone_offset = get_timezone_offset()
+    boundaries = list()
     if period_type == "hourly":
-        result_rows_hourly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
         current_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
         while current_datetime_utc <= end_datetime_utc:
-            subtotal = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + \
-                        timedelta(minutes=config.minutes_to_count):
-                    subtotal += row[1]
-            result_rows_hourly.append((current_datetime_utc, subtotal))
+            boundaries.append(current_datetime_utc)
             current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-        return result_rows_hourly
+        boundaries.append(current_datetime_utc)
 
     elif period_type == "daily":
-        result_rows_daily = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
         # calculate the start datetime in utc of the first day in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(hour=0) - timedelta(hours=int(config.utc_offset[1:3]))
+        start_datetime_local = start_datetime_utc + timedelta(minutes=timezone_offset)
+        current_datetime_utc = start_datetime_local.replace(hour=0, minute=0, second=0, microsecond=0) - \
+            timedelta(minutes=timezone_offset)
         while current_datetime_utc <= end_datetime_utc:
-            subtotal = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + timedelta(days=1):
-                    subtotal += row[1]
-            result_rows_daily.append((current_datetime_utc, subtotal))
+            boundaries.append(current_datetime_utc)
             current_datetime_utc += timedelta(days=1)
+        boundaries.append(current_datetime_utc)
 
-        return result_rows_daily
-
-    elif period_type == 'weekly':
-        result_rows_weekly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
+    elif period_type == "weekly":
         # calculate the start datetime in utc of the monday in the first week in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
+        start_datetime_local = start_datetime_utc + timedelta(minutes=timezone_offset)
         weekday = start_datetime_local.weekday()
-        current_datetime_utc = \
-            start_datetime_local.replace(hour=0) - timedelta(days=weekday, hours=int(config.utc_offset[1:3]))
+        current_datetime_utc = start_datetime_local.replace(hour=0, minute=0, second=0, microsecond=0) - \
+            timedelta(days=weekday, minutes=timezone_offset)
         while current_datetime_utc <= end_datetime_utc:
-
-            next_datetime_utc = current_datetime_utc + timedelta(days=7)
-            subtotal = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    subtotal += row[1]
-            result_rows_weekly.append((current_datetime_utc, subtotal))
-            current_datetime_utc = next_datetime_utc
-
-        return result_rows_weekly
+            boundaries.append(current_datetime_utc)
+            current_datetime_utc += timedelta(days=7)
+        boundaries.append(current_datetime_utc)
 
     elif period_type == "monthly":
-        result_rows_monthly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        # calculate the start datetime the first day in the first month in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_local = start_datetime_local.replace(day=1, hour=0, minute=0,
-                                                              second=0, microsecond=0)
-        end_datetime_local = end_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
+        # calculate the start datetime of the first day in the first month in local
+        start_datetime_local = start_datetime_utc + timedelta(minutes=timezone_offset)
+        current_datetime_local = start_datetime_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end_datetime_local = end_datetime_utc + timedelta(minutes=timezone_offset)
         while current_datetime_local <= end_datetime_local:
+            boundaries.append(current_datetime_local - timedelta(minutes=timezone_offset))
             # calculate the next datetime in local
             if current_datetime_local.month < 12:
-                next_datetime_local = datetime(year=current_datetime_local.year,
-                                               month=current_datetime_local.month + 1,
-                                               day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
-            elif current_datetime_local.month == 12:
-                next_datetime_local = datetime(year=current_datetime_local.year + 1,
-                                               month=1,
-                                               day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
-            current_datetime_utc = current_datetime_local - timedelta(hours=int(config.utc_offset[1:3]))
-            next_datetime_utc = next_datetime_local - timedelta(hours=int(config.utc_offset[1:3]))
-            subtotal = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    subtotal += row[1]
-
-            result_rows_monthly.append((current_datetime_utc, subtotal))
-            current_datetime_local = next_datetime_local
-
-        return result_rows_monthly
+                current_datetime_local = current_datetime_local.replace(month=current_datetime_local.month + 1)
+            else:
+                current_datetime_local = current_datetime_local.replace(year=current_datetime_local.year + 1,
+                                                                        month=1)
+        boundaries.append(current_datetime_local - timedelta(minutes=timezone_offset))
 
     elif period_type == "yearly":
-        result_rows_yearly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        # calculate the start datetime in utc of the first day in the first year in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(month=1, day=1, hour=0) - timedelta(
-            hours=int(config.utc_offset[1:3]))
+        # calculate the start datetime of the first day in the first year in local
+        start_datetime_local = start_datetime_utc + timedelta(minutes=timezone_offset)
+        current_datetime_local = start_datetime_local.replace(month=1, day=1, hour=0, minute=0, second=0,
+                                                              microsecond=0)
+        end_datetime_local = end_datetime_utc + timedelta(minutes=timezone_offset)
+        while current_datetime_local <= end_datetime_local:
+            boundaries.append(current_datetime_local - timedelta(minutes=timezone_offset))
+            current_datetime_local = current_datetime_local.replace(year=current_datetime_local.year + 1)
+        boundaries.append(current_datetime_local - timedelta(minutes=timezone_offset))
 
-        while current_datetime_utc <= end_datetime_utc:
-            # calculate the next datetime in utc
-            # todo: timedelta of year
-            next_datetime_utc = datetime(year=current_datetime_utc.year + 2,
-                                         month=1,
-                                         day=1,
-                                         hour=current_datetime_utc.hour,
-                                         minute=current_datetime_utc.minute,
-                                         second=current_datetime_utc.second,
-                                         microsecond=current_datetime_utc.microsecond,
-                                         tzinfo=current_datetime_utc.tzinfo) - timedelta(days=1)
-            subtotal = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    subtotal += row[1]
-
-            result_rows_yearly.append((current_datetime_utc, subtotal))
-            current_datetime_utc = next_datetime_utc
-        return result_rows_yearly
-    else:
-        return list()
+    return boundaries
 
 
 ########################################################################################################################
-# Get tariffs by energy category
+# Accumulate hourly data into periods in a single pass
+#   rows_hourly: list of (start_datetime_utc, actual_value), should be sorted by start_datetime_utc
+#   period_boundaries: list returned by get_period_boundaries
+# Returns: lists of subtotal, maximum and counter of each period
+# Note: rows out of order are still placed correctly by binary search, rows outside all periods are ignored
 ########################################################################################################################
-def get_energy_category_tariffs(cost_center_id, energy_category_id, start_datetime_utc, end_datetime_utc):
+def accumulate_hourly_data_by_period(rows_hourly, period_boundaries):
+    period_count = len(period_boundaries) - 1
+    if period_count <= 0:
+        return list(), list(), list()
+
+    subtotals = [Decimal(0.0)] * period_count
+    maximums = [None] * period_count
+    counters = [0] * period_count
+
+    first_datetime_utc = period_boundaries[0]
+    last_datetime_utc = period_boundaries[-1]
+    index = 0
+    lower_datetime_utc = period_boundaries[0]
+    upper_datetime_utc = period_boundaries[1]
+    for row in rows_hourly:
+        if not lower_datetime_utc <= row[0] < upper_datetime_utc:
+            if row[0] < first_datetime_utc or row[0] >= last_datetime_utc:
+                continue
+            # move the boundary to the period which contains the row
+            index = bisect.bisect_right(period_boundaries, row[0]) - 1
+            lower_datetime_utc = period_boundaries[index]
+            upper_datetime_utc = period_boundaries[index + 1]
+
+        subtotals[index] += row[1]
+        if maximums[index] is None or maximums[index] < row[1]:
+            maximums[index] = row[1]
+        counters[index] += 1
+
+    return subtotals, maximums, counters
+
+
+########################################################################################################################
+# Aggregate hourly data by period
+# rows_hourly: list of (start_datetime_utc, actual_value), should belong to one energy_category_id
+# start_datetime_utc: start datetime in utc
+# end_datetime_utc: end datetime in utc
+# period_type: use one of the period types, 'hourly', 'daily', 'weekly', 'monthly' and 'yearly'
+# Note: this procedure doesn't work with multiple energy categories
+########################################################################################################################
+def aggregate_hourly_data_by_period(rows_hourly, start_datetime_utc, end_datetime_utc, period_type):
     # todo: validate parameters
-    if cost_center_id is None:
-        return dict()
+    if start_datetime_utc is None or \
+            end_datetime_utc is None or \
+            start_datetime_utc >= end_datetime_utc or \
+            period_type not in ('hourly', 'daily', 'weekly', 'monthly', 'yearly'):
+        return list()
 
     start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
     end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
 
-    # get timezone offset in minutes, this value will be returned to client
+    period_boundaries = get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type)
+    subtotals, _, _ = accumulate_hourly_data_by_period(rows_hourly, period_boundaries)
+
+    return list(zip(period_boundaries[:-1], subtotals))
+
+
+########################################################################################################################
+# Get timezone offset in minutes
+########################################################################################################################
+def get_timezone_offset():
     timezone_offset = int(config.utc_offset[1:3]) * 60 + int(config.utc_offset[4:6])
     if config.utc_offset[0] == '-':
         timezone_offset = -timezone_offset
+    return timezone_offset
+
+
+########################################################################################################################
+# Compile tariffs into lookup tables
+# rows_tariffs: list of (tariff_id, valid_from_datetime_utc, valid_through_datetime_utc) ordered by valid from
+# rows_timeofuses: list of (tariff_id, start_time_of_day, end_time_of_day, value) ordered by start time of day,
+#                  the value is the price or the peak type
+# Returns: the compiled tariff, dict of
+#   valid_from_list: the sorted valid from datetimes of the validity windows, to search the windows by bisect
+#   window_list: list of dict of valid_from_datetime_utc, valid_through_datetime_utc and minute_value_list,
+#                minute_value_list is the value of every minute of the local day, None if no time of use matches
+#   timezone_offset: timezone offset in minutes
+# NOTE: compile_tariffs, get_tariff_value and get_tariff_slots are the same as in myems-aggregation/tariff.py,
+# keep them the same
+########################################################################################################################
+def compile_tariffs(rows_tariffs, rows_timeofuses):
+    timeofuse_list_dict = dict()
+    for row in rows_timeofuses:
+        timeofuse_list_dict.setdefault(row[0], list()).append(row)
+
+    window_list = list()
+    for row in sorted(rows_tariffs, key=lambda x: x[1]):
+        minute_value_list = [None] * 1440
+        # the first time of use in order of start time of day matches the minute
+        for timeofuse in reversed(timeofuse_list_dict.get(row[0], list())):
+            # the minutes from start time of day inclusive to end time of day exclusive
+            start_minute = math.ceil(timeofuse[1].total_seconds() / 60)
+            end_minute = min(math.ceil(timeofuse[2].total_seconds() / 60), 1440)
+            for minute in range(start_minute, end_minute):
+                minute_value_list[minute] = timeofuse[3]
+        window_list.append({"valid_from_datetime_utc": row[1],
+                            "valid_through_datetime_utc": row[2],
+                            "minute_value_list": minute_value_list})
+
+    return {"valid_from_list": [window['valid_from_datetime_utc'] for window in window_list],
+            "window_list": window_list,
+            "timezone_offset": get_timezone_offset()}
+
+
+########################################################################################################################
+# Get the value of the compiled tariff at the datetime
+# Returns: the value, or None if there isn't any tariff at the datetime
+# NOTE: if the validity windows overlap, the window with the latest valid from datetime takes precedence
+########################################################################################################################
+def get_tariff_value(compiled_tariff, datetime_utc):
+    if compiled_tariff is None:
+        return None
+
+    datetime_local = datetime_utc + timedelta(minutes=compiled_tariff['timezone_offset'])
+    minute = datetime_local.hour * 60 + datetime_local.minute
+    index = bisect.bisect_right(compiled_tariff['valid_from_list'], datetime_utc) - 1
+    while index >= 0:
+        window = compiled_tariff['window_list'][index]
+        if datetime_utc < window['valid_through_datetime_utc'] and window['minute_value_list'][minute] is not None:
+            return window['minute_value_list'][minute]
+        index -= 1
+    return None
+
+
+########################################################################################################################
+# Get the compiled tariff of the cost center by energy category from the cache or system database
+# value_column_name: price or peak_type of tbl_tariffs_timeofuses
+# Returns: the compiled tariff, or None if there isn't any tariff or the system database is not ready
+# NOTE: the cache is cleared when the checksums of the tariff tables are changed,
+# and the tables are checked at most once in tariff_cache_check_interval seconds
+########################################################################################################################
+def get_compiled_tariff(cost_center_id, energy_category_id, value_column_name):
+    global compiled_tariff_version, compiled_tariff_check_datetime_utc
 
-    tariff_dict = collections.OrderedDict()
+    key = (cost_center_id, energy_category_id, value_column_name)
+    is_check_due = compiled_tariff_check_datetime_utc is None or \
+        datetime.utcnow() - compiled_tariff_check_datetime_utc >= timedelta(seconds=tariff_cache_check_interval)
+    if key in compiled_tariff_dict and not is_check_due:
+        return compiled_tariff_dict[key]
 
     cnx = None
     cursor = None
     try:
         cnx = mysql.connector.connect(**config.myems_system_db)
         cursor = cnx.cursor()
+        if is_check_due:
+            cursor.execute(" CHECKSUM TABLE tbl_tariffs, tbl_tariffs_timeofuses, tbl_cost_centers_tariffs ")
+            version = tuple(cursor.fetchall())
+            if version != compiled_tariff_version:
+                compiled_tariff_dict.clear()
+                compiled_tariff_version = version
+            compiled_tariff_check_datetime_utc = datetime.utcnow()
+            if key in compiled_tariff_dict:
+                return compiled_tariff_dict[key]
+
         query_tariffs = (" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
                          " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct "
                          " WHERE t.energy_category_id = %s AND "
                          "       t.id = cct.tariff_id AND "
-                         "       cct.cost_center_id = %s AND "
-                         "       t.valid_through_datetime_utc >= %s AND "
-                         "       t.valid_from_datetime_utc <= %s "
+                         "       cct.cost_center_id = %s "
                          " ORDER BY t.valid_from_datetime_utc ")
-        cursor.execute(query_tariffs, (energy_category_id, cost_center_id, start_datetime_utc, end_datetime_utc,))
+        cursor.execute(query_tariffs, (energy_category_id, cost_center_id,))
         rows_tariffs = cursor.fetchall()
+
+        rows_timeofuses = list()
+        if rows_tariffs is not None and len(rows_tariffs) > 0:
+            query_timeofuse_tariffs = (" SELECT tariff_id, start_time_of_day, end_time_of_day, " +
+                                       value_column_name +
+                                       " FROM tbl_tariffs_timeofuses "
+                                       " WHERE tariff_id IN ( " + ', '.join(str(row[0]) for row in rows_tariffs) + ")"
+                                       " ORDER BY tariff_id, start_time_of_day ")
+            cursor.execute(query_timeofuse_tariffs, )
+            rows_timeofuses = cursor.fetchall()
+
+        if rows_tariffs is None or len(rows_tariffs) == 0 or rows_timeofuses is None or len(rows_timeofuses) == 0:
+            compiled_tariff_dict[key] = None
+        else:
+            compiled_tariff_dict[key] = compile_tariffs(rows_tariffs, rows_timeofuses)
+        return compiled_tariff_dict[key]
     except Exception as e:
         print(str(e))
-        if cnx:
-            cnx.close()
-        if cursor:
-            cursor.close()
-        return dict()
-
-    if rows_tariffs is None or len(rows_tariffs) == 0:
+        return None
+    finally:
         if cursor:
             cursor.close()
         if cnx:
             cnx.close()
-        return dict()
 
-    for row in rows_tariffs:
-        tariff_dict[row[0]] = {'valid_from_datetime_utc': row[1],
-                               'valid_through_datetime_utc': row[2],
-                               'rates': list()}
 
-    try:
-        query_timeofuse_tariffs = (" SELECT tariff_id, start_time_of_day, end_time_of_day, price "
-                                   " FROM tbl_tariffs_timeofuses "
-                                   " WHERE tariff_id IN ( " + ', '.join(map(str, tariff_dict.keys())) + ")"
-                                   " ORDER BY tariff_id, start_time_of_day ")
-        cursor.execute(query_timeofuse_tariffs, )
-        rows_timeofuse_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cnx:
-            cnx.close()
-        if cursor:
-            cursor.close()
-        return dict()
+########################################################################################################################
+# Get the values of the compiled tariff in the time slots between start datetime and end datetime
+# Returns: dict of datetime to value, the time slots of every tariff start from its valid from datetime
+# NOTE: only the time slots in the period are looked up, instead of the whole validity windows of the tariffs
+########################################################################################################################
+def get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc):
+    result = dict()
+    if compiled_tariff is None:
+        return result
 
-    if cursor:
-        cursor.close()
-    if cnx:
-        cnx.close()
+    slot = timedelta(minutes=config.minutes_to_count)
+    for window in compiled_tariff['window_list']:
+        # the first time slot of the window in the period
+        current_datetime_utc = window['valid_from_datetime_utc']
+        if current_datetime_utc < start_datetime_utc:
+            current_datetime_utc += slot * -((current_datetime_utc - start_datetime_utc) // slot)
+        while current_datetime_utc < window['valid_through_datetime_utc'] and current_datetime_utc <= end_datetime_utc:
+            datetime_local = current_datetime_utc + timedelta(minutes=compiled_tariff['timezone_offset'])
+            value = window['minute_value_list'][datetime_local.hour * 60 + datetime_local.minute]
+            if value is not None:
+                result[current_datetime_utc] = value
+            current_datetime_utc += slot
 
-    if rows_timeofuse_tariffs is None or len(rows_timeofuse_tariffs) == 0:
-        return dict()
+    return result
 
-    for row in rows_timeofuse_tariffs:
-        tariff_dict[row[0]]['rates'].append({'start_time_of_day': row[1],
-                                             'end_time_of_day': row[2],
-                                             'price': row[3]})
 
-    result = dict()
-    for tariff_id, tariff_value in tariff_dict.items():
-        current_datetime_utc = tariff_value['valid_from_datetime_utc']
-        while current_datetime_utc < tariff_value['valid_through_datetime_utc']:
-            for rate in tariff_value['rates']:
-                current_datetime_local = current_datetime_utc + timedelta(minutes=timezone_offset)
-                seconds_since_midnight = (current_datetime_local -
-                                          current_datetime_local.replace(hour=0,
-                                                                         second=0,
-                                                                         microsecond=0,
-                                                                         tzinfo=None)).total_seconds()
-                if rate['start_time_of_day'].total_seconds() <= \
-                        seconds_since_midnight < rate['end_time_of_day'].total_seconds():
-                    result[current_datetime_utc] = rate['price']
-                    break
-
-            # start from the next time slot
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
+########################################################################################################################
+# Get tariffs by energy category
+########################################################################################################################
+def get_energy_category_tariffs(cost_center_id, energy_category_id, start_datetime_utc, end_datetime_utc):
+    # todo: validate parameters
+    if cost_center_id is None:
+        return dict()
 
-    return {k: v for k, v in result.items() if start_datetime_utc <= k <= end_datetime_utc}
+    start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
+    end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
+
+    compiled_tariff = get_compiled_tariff(cost_center_id, energy_category_id, 'price')
+    return get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc)
 
 
 ########################################################################################################################
@@ -258,96 +338,8 @@ def get_energy_category_peak_types(cost_center_id, energy_category_id, start_dat
     start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
     end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
 
-    # get timezone offset in minutes, this value will be returned to client
-    timezone_offset = int(config.utc_offset[1:3]) * 60 + int(config.utc_offset[4:6])
-    if config.utc_offset[0] == '-':
-        timezone_offset = -timezone_offset
-
-    tariff_dict = collections.OrderedDict()
-
-    cnx = None
-    cursor = None
-    try:
-        cnx = mysql.connector.connect(**config.myems_system_db)
-        cursor = cnx.cursor()
-        query_tariffs = (" SELECT t.id, t.valid_from_datetime_utc, t.valid_through_datetime_utc "
-                         " FROM tbl_tariffs t, tbl_cost_centers_tariffs cct "
-                         " WHERE t.energy_category_id = %s AND "
-                         "       t.id = cct.tariff_id AND "
-                         "       cct.cost_center_id = %s AND "
-                         "       t.valid_through_datetime_utc >= %s AND "
-                         "       t.valid_from_datetime_utc <= %s "
-                         " ORDER BY t.valid_from_datetime_utc ")
-        cursor.execute(query_tariffs, (energy_category_id, cost_center_id, start_datetime_utc, end_datetime_utc,))
-        rows_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cnx:
-            cnx.close()
-        if cursor:
-            cursor.close()
-        return dict()
-
-    if rows_tariffs is None or len(rows_tariffs) == 0:
-        if cursor:
-            cursor.close()
-        if cnx:
-            cnx.close()
-        return dict()
-
-    for row in rows_tariffs:
-        tariff_dict[row[0]] = {'valid_from_datetime_utc': row[1],
-                               'valid_through_datetime_utc': row[2],
-                               'rates': list()}
-
-    try:
-        query_timeofuse_tariffs = (" SELECT tariff_id, start_time_of_day, end_time_of_day, peak_type "
-                                   " FROM tbl_tariffs_timeofuses "
-                                   " WHERE tariff_id IN ( " + ', '.join(map(str, tariff_dict.keys())) + ")"
-                                   " ORDER BY tariff_id, start_time_of_day ")
-        cursor.execute(query_timeofuse_tariffs, )
-        rows_timeofuse_tariffs = cursor.fetchall()
-    except Exception as e:
-        print(str(e))
-        if cnx:
-            cnx.close()
-        if cursor:
-            cursor.close()
-        return dict()
-
-    if cursor:
-        cursor.close()
-    if cnx:
-        cnx.close()
-
-    if rows_timeofuse_tariffs is None or len(rows_timeofuse_tariffs) == 0:
-        return dict()
-
-    for row in rows_timeofuse_tariffs:
-        tariff_dict[row[0]]['rates'].append({'start_time_of_day': row[1],
-                                             'end_time_of_day': row[2],
-                                             'peak_type': row[3]})
-
-    result = dict()
-    for tariff_id, tariff_value in tariff_dict.items():
-        current_datetime_utc = tariff_value['valid_from_datetime_utc']
-        while current_datetime_utc < tariff_value['valid_through_datetime_utc']:
-            for rate in tariff_value['rates']:
-                current_datetime_local = current_datetime_utc + timedelta(minutes=timezone_offset)
-                seconds_since_midnight = (current_datetime_local -
-                                          current_datetime_local.replace(hour=0,
-                                                                         second=0,
-                                                                         microsecond=0,
-                                                                         tzinfo=None)).total_seconds()
-                if rate['start_time_of_day'].total_seconds() <= \
-                        seconds_since_midnight < rate['end_time_of_day'].total_seconds():
-                    result[current_datetime_utc] = rate['peak_type']
-                    break
-
-            # start from the next time slot
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-    return {k: v for k, v in result.items() if start_datetime_utc <= k <= end_datetime_utc}
+    compiled_tariff = get_compiled_tariff(cost_center_id, energy_category_id, 'peak_type')
+    return get_tariff_slots(compiled_tariff, start_datetime_utc, end_datetime_utc)
 
 
 ########################################################################################################################
@@ -370,275 +362,29 @@ def averaging_hourly_data_by_period(rows_hourly, start_datetime_utc, end_datetim
     start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
     end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
 
-    if period_type == "hourly":
-        result_rows_hourly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        total = Decimal(0.0)
-        maximum = None
-        counter = 0
-        current_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            sub_maximum = None
-            sub_counter = 0
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + \
-                        timedelta(minutes=config.minutes_to_count):
-                    sub_total += row[1]
-                    if sub_maximum is None:
-                        sub_maximum = row[1]
-                    elif sub_maximum < row[1]:
-                        sub_maximum = row[1]
-                    sub_counter += 1
-
-            sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
-            result_rows_hourly.append((current_datetime_utc, sub_average, sub_maximum))
-
-            total += sub_total
-            counter += sub_counter
-            if sub_maximum is None:
-                pass
-            elif maximum is None:
-                maximum = sub_maximum
-            elif maximum < sub_maximum:
-                maximum = sub_maximum
-
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-        average = total / counter if counter > 0 else None
-        return result_rows_hourly, average, maximum
-
-    elif period_type == "daily":
-        result_rows_daily = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        total = Decimal(0.0)
-        maximum = None
-        counter = 0
-        # calculate the start datetime in utc of the first day in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(hour=0) - timedelta(hours=int(config.utc_offset[1:3]))
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            sub_maximum = None
-            sub_counter = 0
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + timedelta(days=1):
-                    sub_total += row[1]
-                    if sub_maximum is None:
-                        sub_maximum = row[1]
-                    elif sub_maximum < row[1]:
-                        sub_maximum = row[1]
-                    sub_counter += 1
-
-            sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
-            result_rows_daily.append((current_datetime_utc, sub_average, sub_maximum))
-            total += sub_total
-            counter += sub_counter
-            if sub_maximum is None:
-                pass
-            elif maximum is None:
-                maximum = sub_maximum
-            elif maximum < sub_maximum:
-                maximum = sub_maximum
-            current_datetime_utc += timedelta(days=1)
-
-        average = total / counter if counter > 0 else None
-        return result_rows_daily, average, maximum
-
-    elif period_type == 'weekly':
-        result_rows_weekly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        total = Decimal(0.0)
-        maximum = None
-        counter = 0
-        # calculate the start datetime in utc of the monday in the first week in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        weekday = start_datetime_local.weekday()
-        current_datetime_utc = \
-            start_datetime_local.replace(hour=0) - timedelta(days=weekday, hours=int(config.utc_offset[1:3]))
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            sub_maximum = None
-            sub_counter = 0
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + timedelta(days=7):
-                    sub_total += row[1]
-                    if sub_maximum is None:
-                        sub_maximum = row[1]
-                    elif sub_maximum < row[1]:
-                        sub_maximum = row[1]
-                    sub_counter += 1
-
-            sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
-            result_rows_weekly.append((current_datetime_utc, sub_average, sub_maximum))
-            total += sub_total
-            counter += sub_counter
-            if sub_maximum is None:
-                pass
-            elif maximum is None:
-                maximum = sub_maximum
-            elif maximum < sub_maximum:
-                maximum = sub_maximum
-            current_datetime_utc += timedelta(days=7)
+    period_boundaries = get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type)
+    subtotals, maximums, counters = accumulate_hourly_data_by_period(rows_hourly, period_boundaries)
 
-        average = total / counter if counter > 0 else None
-        return result_rows_weekly, average, maximum
+    result_rows = list()
+    total = Decimal(0.0)
+    maximum = None
+    counter = 0
+    for current_datetime_utc, sub_total, sub_maximum, sub_counter in \
+            zip(period_boundaries[:-1], subtotals, maximums, counters):
+        sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
+        result_rows.append((current_datetime_utc, sub_average, sub_maximum))
 
-    elif period_type == "monthly":
-        result_rows_monthly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        total = Decimal(0.0)
-        maximum = None
-        counter = 0
-        # calculate the start datetime in utc of the first day in the first month in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = \
-            start_datetime_local.replace(day=1, hour=0) - timedelta(hours=int(config.utc_offset[1:3]))
+        total += sub_total
+        counter += sub_counter
+        if sub_maximum is None:
+            pass
+        elif maximum is None:
+            maximum = sub_maximum
+        elif maximum < sub_maximum:
+            maximum = sub_maximum
 
-        while current_datetime_utc <= end_datetime_utc:
-            # calculate the next datetime in utc
-            if current_datetime_utc.month == 1:
-                temp_day = 28
-                ny = current_datetime_utc.year
-                if (ny % 100 != 0 and ny % 4 == 0) or (ny % 100 == 0 and ny % 400 == 0):
-                    temp_day = 29
-
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=temp_day,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 2:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month in [3, 5, 8, 10]:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=30,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 7:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month in [4, 6, 9, 11]:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 12:
-                next_datetime_utc = datetime(year=current_datetime_utc.year + 1,
-                                             month=1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-
-            sub_total = Decimal(0.0)
-            sub_maximum = None
-            sub_counter = 0
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    sub_total += row[1]
-                    if sub_maximum is None:
-                        sub_maximum = row[1]
-                    elif sub_maximum < row[1]:
-                        sub_maximum = row[1]
-                    sub_counter += 1
-
-            sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
-            result_rows_monthly.append((current_datetime_utc, sub_average, sub_maximum))
-            total += sub_total
-            counter += sub_counter
-            if sub_maximum is None:
-                pass
-            elif maximum is None:
-                maximum = sub_maximum
-            elif maximum < sub_maximum:
-                maximum = sub_maximum
-            current_datetime_utc = next_datetime_utc
-
-        average = total / counter if counter > 0 else None
-        return result_rows_monthly, average, maximum
-
-    elif period_type == "yearly":
-        result_rows_yearly = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        total = Decimal(0.0)
-        maximum = None
-        counter = 0
-        # calculate the start datetime in utc of the first day in the first month in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(month=1, day=1, hour=0) - timedelta(
-            hours=int(config.utc_offset[1:3]))
-
-        while current_datetime_utc <= end_datetime_utc:
-            # calculate the next datetime in utc
-            # todo: timedelta of year
-            next_datetime_utc = datetime(year=current_datetime_utc.year + 2,
-                                         month=1,
-                                         day=1,
-                                         hour=current_datetime_utc.hour,
-                                         minute=current_datetime_utc.minute,
-                                         second=current_datetime_utc.second,
-                                         microsecond=current_datetime_utc.microsecond,
-                                         tzinfo=current_datetime_utc.tzinfo) - timedelta(days=1)
-            sub_total = Decimal(0.0)
-            sub_maximum = None
-            sub_counter = 0
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    sub_total += row[1]
-                    if sub_maximum is None:
-                        sub_maximum = row[1]
-                    elif sub_maximum < row[1]:
-                        sub_maximum = row[1]
-                    sub_counter += 1
-
-            sub_average = (sub_total / sub_counter) if sub_counter > 0 else None
-            result_rows_yearly.append((current_datetime_utc, sub_average, sub_maximum))
-            total += sub_total
-            counter += sub_counter
-            if sub_maximum is None:
-                pass
-            elif maximum is None:
-                maximum = sub_maximum
-            elif maximum < sub_maximum:
-                maximum = sub_maximum
-            current_datetime_utc = next_datetime_utc
-
-        average = total / counter if counter > 0 else None
-        return result_rows_yearly, average, maximum
-    else:
-        return list(), None, None
+    average = total / counter if counter > 0 else None
+    return result_rows, average, maximum
 
 
 ########################################################################################################################
@@ -661,303 +407,64 @@ def statistics_hourly_data_by_period(rows_hourly, start_datetime_utc, end_dateti
     start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
     end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
 
-    if period_type == "hourly":
-        result_rows_hourly = list()
-        sample_data = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        counter = 0
-        mean = None
-        median = None
-        minimum = None
-        maximum = None
-        stdev = None
-        variance = None
-        current_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + \
-                        timedelta(minutes=config.minutes_to_count):
-                    sub_total += row[1]
-
-            result_rows_hourly.append((current_datetime_utc, sub_total))
-            sample_data.append(sub_total)
-
-            counter += 1
-            if minimum is None:
-                minimum = sub_total
-            elif minimum > sub_total:
-                minimum = sub_total
-
-            if maximum is None:
-                maximum = sub_total
-            elif maximum < sub_total:
-                maximum = sub_total
+    period_boundaries = get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type)
+    sample_data, _, _ = accumulate_hourly_data_by_period(rows_hourly, period_boundaries)
 
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-        if len(sample_data) > 1:
-            mean = statistics.mean(sample_data)
-            median = statistics.median(sample_data)
-            stdev = statistics.stdev(sample_data)
-            variance = statistics.variance(sample_data)
+    result_rows = list(zip(period_boundaries[:-1], sample_data))
+    mean = None
+    median = None
+    minimum = min(sample_data) if len(sample_data) > 0 else None
+    maximum = max(sample_data) if len(sample_data) > 0 else None
+    stdev = None
+    variance = None
+    if len(sample_data) > 1:
+        mean = statistics.mean(sample_data)
+        median = statistics.median(sample_data)
+        stdev = statistics.stdev(sample_data)
+        variance = statistics.variance(sample_data)
 
-        return result_rows_hourly, mean, median, minimum, maximum, stdev, variance
-
-    elif period_type == "daily":
-        result_rows_daily = list()
-        sample_data = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        counter = 0
-        mean = None
-        median = None
-        minimum = None
-        maximum = None
-        stdev = None
-        variance = None
-        # calculate the start datetime in utc of the first day in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(hour=0) - timedelta(hours=int(config.utc_offset[1:3]))
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + timedelta(days=1):
-                    sub_total += row[1]
-
-            result_rows_daily.append((current_datetime_utc, sub_total))
-            sample_data.append(sub_total)
-
-            counter += 1
-            if minimum is None:
-                minimum = sub_total
-            elif minimum > sub_total:
-                minimum = sub_total
-
-            if maximum is None:
-                maximum = sub_total
-            elif maximum < sub_total:
-                maximum = sub_total
-            current_datetime_utc += timedelta(days=1)
+    return result_rows, mean, median, minimum, maximum, stdev, variance
 
-        if len(sample_data) > 1:
-            mean = statistics.mean(sample_data)
-            median = statistics.median(sample_data)
-            stdev = statistics.stdev(sample_data)
-            variance = statistics.variance(sample_data)
 
-        return result_rows_daily, mean, median, minimum, maximum, stdev, variance
-
-    elif period_type == "weekly":
-        result_rows_weekly = list()
-        sample_data = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        counter = 0
-        mean = None
-        median = None
-        minimum = None
-        maximum = None
-        stdev = None
-        variance = None
-        # calculate the start datetime in utc of the monday in the first week in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        weekday = start_datetime_local.weekday()
-        current_datetime_utc = \
-            start_datetime_local.replace(hour=0) - timedelta(days=weekday, hours=int(config.utc_offset[1:3]))
-        while current_datetime_utc <= end_datetime_utc:
-            sub_total = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < current_datetime_utc + timedelta(days=7):
-                    sub_total += row[1]
-
-            result_rows_weekly.append((current_datetime_utc, sub_total))
-            sample_data.append(sub_total)
-
-            counter += 1
-            if minimum is None:
-                minimum = sub_total
-            elif minimum > sub_total:
-                minimum = sub_total
-
-            if maximum is None:
-                maximum = sub_total
-            elif maximum < sub_total:
-                maximum = sub_total
-            current_datetime_utc += timedelta(days=7)
-
-        if len(sample_data) > 1:
-            mean = statistics.mean(sample_data)
-            median = statistics.median(sample_data)
-            stdev = statistics.stdev(sample_data)
-            variance = statistics.variance(sample_data)
-
-        return result_rows_weekly, mean, median, minimum, maximum, stdev, variance
+########################################################################################################################
+# Get the coarsest table which satisfies the period type
+#   hourly_table_name: name of the hourly table in energy, billing or carbon database,
+#                      for example tbl_space_input_category_hourly
+#   start_datetime_utc: start datetime in utc, included
+#   end_datetime_utc: end datetime in utc, excluded
+#   period_type: use one of the period types, 'hourly', 'daily', 'weekly', 'monthly' and 'yearly'
+# Returns: name of the daily or monthly rollup table maintained by myems-aggregation, if the period is aligned to
+#          local days or local months so that the rollup rows cover exactly the same hours as the hourly rows,
+#          otherwise returns the hourly table name
+# Note: the rollup rows have the same columns as the hourly rows, start_datetime_utc is the start of the local day or
+#       the local month in utc
+########################################################################################################################
+def get_table_name_by_period(hourly_table_name, start_datetime_utc, end_datetime_utc, period_type):
+    if not config.is_rollup_table_enabled or \
+            start_datetime_utc is None or \
+            end_datetime_utc is None or \
+            period_type not in ('daily', 'weekly', 'monthly', 'yearly'):
+        return hourly_table_name
 
-    elif period_type == "monthly":
-        result_rows_monthly = list()
-        sample_data = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        counter = 0
-        mean = None
-        median = None
-        minimum = None
-        maximum = None
-        stdev = None
-        variance = None
-        # calculate the start datetime in utc of the first day in the first month in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = \
-            start_datetime_local.replace(day=1, hour=0) - timedelta(hours=int(config.utc_offset[1:3]))
+    timezone_offset = get_timezone_offset()
 
-        while current_datetime_utc <= end_datetime_utc:
-            # calculate the next datetime in utc
-            if current_datetime_utc.month == 1:
-                temp_day = 28
-                ny = current_datetime_utc.year
-                if (ny % 100 != 0 and ny % 4 == 0) or (ny % 100 == 0 and ny % 400 == 0):
-                    temp_day = 29
-
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=temp_day,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 2:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month in [3, 5, 8, 10]:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=30,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 7:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month in [4, 6, 9, 11]:
-                next_datetime_utc = datetime(year=current_datetime_utc.year,
-                                             month=current_datetime_utc.month + 1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-            elif current_datetime_utc.month == 12:
-                next_datetime_utc = datetime(year=current_datetime_utc.year + 1,
-                                             month=1,
-                                             day=31,
-                                             hour=current_datetime_utc.hour,
-                                             minute=current_datetime_utc.minute,
-                                             second=0,
-                                             microsecond=0,
-                                             tzinfo=None)
-
-            sub_total = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    sub_total += row[1]
-
-            result_rows_monthly.append((current_datetime_utc, sub_total))
-            sample_data.append(sub_total)
-
-            counter += 1
-            if minimum is None:
-                minimum = sub_total
-            elif minimum > sub_total:
-                minimum = sub_total
-
-            if maximum is None:
-                maximum = sub_total
-            elif maximum < sub_total:
-                maximum = sub_total
-            current_datetime_utc = next_datetime_utc
-
-        if len(sample_data) > 1:
-            mean = statistics.mean(sample_data)
-            median = statistics.median(sample_data)
-            stdev = statistics.stdev(sample_data)
-            variance = statistics.variance(sample_data)
-
-        return result_rows_monthly, mean, median, minimum, maximum, stdev, variance
+    start_datetime_local = start_datetime_utc.replace(tzinfo=None) + timedelta(minutes=timezone_offset)
+    end_datetime_local = end_datetime_utc.replace(tzinfo=None) + timedelta(minutes=timezone_offset)
+    # the hourly rows end with the last time slot starting before end_datetime_utc,
+    # so round the end datetime up to the next time slot
+    slot_minutes = end_datetime_local.minute - end_datetime_local.minute % config.minutes_to_count
+    slot_end_datetime_local = end_datetime_local.replace(minute=slot_minutes, second=0, microsecond=0)
+    if slot_end_datetime_local < end_datetime_local:
+        slot_end_datetime_local += timedelta(minutes=config.minutes_to_count)
 
-    elif period_type == "yearly":
-        result_rows_yearly = list()
-        sample_data = list()
-        # todo: add config.working_day_start_time_local
-        # todo: add config.minutes_to_count
-        mean = None
-        median = None
-        minimum = None
-        maximum = None
-        stdev = None
-        variance = None
-        # calculate the start datetime in utc of the first day in the first month in local
-        start_datetime_local = start_datetime_utc + timedelta(hours=int(config.utc_offset[1:3]))
-        current_datetime_utc = start_datetime_local.replace(month=1, day=1, hour=0) - timedelta(
-            hours=int(config.utc_offset[1:3]))
+    is_day_aligned = start_datetime_local.time() == slot_end_datetime_local.time() == datetime.min.time()
+    if not is_day_aligned:
+        return hourly_table_name
 
-        while current_datetime_utc <= end_datetime_utc:
-            # calculate the next datetime in utc
-            # todo: timedelta of year
-            next_datetime_utc = datetime(year=current_datetime_utc.year + 2,
-                                         month=1,
-                                         day=1,
-                                         hour=current_datetime_utc.hour,
-                                         minute=current_datetime_utc.minute,
-                                         second=current_datetime_utc.second,
-                                         microsecond=current_datetime_utc.microsecond,
-                                         tzinfo=current_datetime_utc.tzinfo) - timedelta(days=1)
-            sub_total = Decimal(0.0)
-            for row in rows_hourly:
-                if current_datetime_utc <= row[0] < next_datetime_utc:
-                    sub_total += row[1]
-
-            result_rows_yearly.append((current_datetime_utc, sub_total))
-            sample_data.append(sub_total)
-
-            if minimum is None:
-                minimum = sub_total
-            elif minimum > sub_total:
-                minimum = sub_total
-            if maximum is None:
-                maximum = sub_total
-            elif maximum < sub_total:
-                maximum = sub_total
-
-            current_datetime_utc = next_datetime_utc
-
-        if len(sample_data) > 1:
-            mean = statistics.mean(sample_data)
-            median = statistics.median(sample_data)
-            stdev = statistics.stdev(sample_data)
-            variance = statistics.variance(sample_data)
-
-        return result_rows_yearly, mean, median, minimum, maximum, stdev, variance
+    if period_type in ('monthly', 'yearly') and start_datetime_local.day == 1 and slot_end_datetime_local.day == 1:
+        return hourly_table_name[:-len('_hourly')] + '_monthly'
 
-    else:
-        return list(), None, None, None, None, None, None
+    return hourly_table_name[:-len('_hourly')] + '_daily'
 
 
 def get_translation(language):
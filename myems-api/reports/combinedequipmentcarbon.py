@@ -7,7 +7,7 @@ import mysql.connector
 import simplejson as json
 import config
 import excelexporters.combinedequipmentcarbon
-from core import utilities
+from core import archive, utilities
 from core.useractivity import access_control, api_key_control
 
 
@@ -322,8 +322,12 @@ class Reporting:
                 base[energy_category_id]['values'] = list()
                 base[energy_category_id]['subtotal'] = Decimal(0.0)
 
+                table_name = utilities.get_table_name_by_period('tbl_combined_equipment_input_category_hourly',
+                                                                base_start_datetime_utc,
+                                                                base_end_datetime_utc,
+                                                                period_type)
                 cursor_carbon.execute(" SELECT start_datetime_utc, actual_value "
-                                      " FROM tbl_combined_equipment_input_category_hourly "
+                                      " FROM " + table_name + " "
                                       " WHERE combined_equipment_id = %s "
                                       "     AND energy_category_id = %s "
                                       "     AND start_datetime_utc >= %s "
@@ -465,15 +469,11 @@ class Reporting:
                 point_values = []
                 point_timestamps = []
                 if point['object_type'] == 'ENERGY_VALUE':
-                    query = (" SELECT utc_date_time, actual_value "
-                             " FROM tbl_energy_value "
-                             " WHERE point_id = %s "
-                             "       AND utc_date_time BETWEEN %s AND %s "
-                             " ORDER BY utc_date_time ")
-                    cursor_historical.execute(query, (point['id'],
-                                                      reporting_start_datetime_utc,
-                                                      reporting_end_datetime_utc))
-                    rows = cursor_historical.fetchall()
+                    rows = archive.get_point_values(cursor_historical,
+                                                    'tbl_energy_value',
+                                                    point['id'],
+                                                    reporting_start_datetime_utc,
+                                                    reporting_end_datetime_utc)
 
                     if rows is not None and len(rows) > 0:
                         for row in rows:
@@ -483,15 +483,11 @@ class Reporting:
                             point_timestamps.append(current_datetime)
                             point_values.append(row[1])
                 elif point['object_type'] == 'ANALOG_VALUE':
-                    query = (" SELECT utc_date_time, actual_value "
-                             " FROM tbl_analog_value "
-                             " WHERE point_id = %s "
-                             "       AND utc_date_time BETWEEN %s AND %s "
-                             " ORDER BY utc_date_time ")
-                    cursor_historical.execute(query, (point['id'],
-                                                      reporting_start_datetime_utc,
-                                                      reporting_end_datetime_utc))
-                    rows = cursor_historical.fetchall()
+                    rows = archive.get_point_values(cursor_historical,
+                                                    'tbl_analog_value',
+                                                    point['id'],
+                                                    reporting_start_datetime_utc,
+                                                    reporting_end_datetime_utc)
 
                     if rows is not None and len(rows) > 0:
                         for row in rows:
@@ -501,15 +497,11 @@ class Reporting:
                             point_timestamps.append(current_datetime)
                             point_values.append(row[1])
                 elif point['object_type'] == 'DIGITAL_VALUE':
-                    query = (" SELECT utc_date_time, actual_value "
-                             " FROM tbl_digital_value "
-                             " WHERE point_id = %s "
-                             "       AND utc_date_time BETWEEN %s AND %s "
-                             " ORDER BY utc_date_time ")
-                    cursor_historical.execute(query, (point['id'],
-                                                      reporting_start_datetime_utc,
-                                                      reporting_end_datetime_utc))
-                    rows = cursor_historical.fetchall()
+                    rows = archive.get_point_values(cursor_historical,
+                                                    'tbl_digital_value',
+                                                    point['id'],
+                                                    reporting_start_datetime_utc,
+                                                    reporting_end_datetime_utc)
 
                     if rows is not None and len(rows) > 0:
                         for row in rows:
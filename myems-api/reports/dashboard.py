@@ -376,8 +376,12 @@ class Reporting:
                 base_input[energy_category_id]['subtotal_in_kgce'] = Decimal(0.0)
                 base_input[energy_category_id]['subtotal_in_kgco2e'] = Decimal(0.0)
 
+                table_name = utilities.get_table_name_by_period('tbl_space_input_category_hourly',
+                                                                base_start_datetime_utc,
+                                                                base_end_datetime_utc,
+                                                                period_type)
                 cursor_energy.execute(" SELECT start_datetime_utc, actual_value "
-                                      " FROM tbl_space_input_category_hourly "
+                                      " FROM " + table_name + " "
                                       " WHERE space_id = %s "
                                       "     AND energy_category_id = %s "
                                       "     AND start_datetime_utc >= %s "
@@ -425,8 +429,12 @@ class Reporting:
                 base_cost[energy_category_id]['values'] = list()
                 base_cost[energy_category_id]['subtotal'] = Decimal(0.0)
 
+                table_name = utilities.get_table_name_by_period('tbl_space_input_category_hourly',
+                                                                base_start_datetime_utc,
+                                                                base_end_datetime_utc,
+                                                                period_type)
                 cursor_billing.execute(" SELECT start_datetime_utc, actual_value "
-                                       " FROM tbl_space_input_category_hourly "
+                                       " FROM " + table_name + " "
                                        " WHERE space_id = %s "
                                        "     AND energy_category_id = %s "
                                        "     AND start_datetime_utc >= %s "
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 import falcon
 import mysql.connector
 import simplejson as json
+from core import archive
 from core.useractivity import access_control, api_key_control
 import config
 from core.utilities import int16_to_hhmm
@@ -459,15 +460,11 @@ class Reporting:
             point_values = []
             point_timestamps = []
             if point['object_type'] == 'ENERGY_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_energy_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
+                rows = archive.get_point_values(cursor_historical,
+                                                'tbl_energy_value',
+                                                point['id'],
+                                                reporting_start_datetime_utc,
+                                                reporting_end_datetime_utc)
 
                 if rows is not None and len(rows) > 0:
                     for row in rows:
@@ -477,15 +474,11 @@ class Reporting:
                         point_timestamps.append(current_datetime)
                         point_values.append(row[1])
             elif point['object_type'] == 'ANALOG_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_analog_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
+                rows = archive.get_point_values(cursor_historical,
+                                                'tbl_analog_value',
+                                                point['id'],
+                                                reporting_start_datetime_utc,
+                                                reporting_end_datetime_utc)
 
                 if rows is not None and len(rows) > 0:
                     for row in rows:
@@ -495,15 +488,11 @@ class Reporting:
                         point_timestamps.append(current_datetime)
                         point_values.append(row[1])
             elif point['object_type'] == 'DIGITAL_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_digital_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
+                rows = archive.get_point_values(cursor_historical,
+                                                'tbl_digital_value',
+                                                point['id'],
+                                                reporting_start_datetime_utc,
+                                                reporting_end_datetime_utc)
 
                 if rows is not None and len(rows) > 0:
                     for row in rows:
@@ -6,6 +6,7 @@ import simplejson as json
 from anytree import AnyNode, LevelOrderIter
 import config
 import excelexporters.metertracking
+from core import archive
 from core.useractivity import access_control, api_key_control
 
 
@@ -236,34 +237,25 @@ class Reporting:
             is_integral_start_value = False
 
             if rows_points_id is not None and len(rows_points_id) > 0:
-                query_start_value = (" SELECT actual_value "
-                                     " FROM tbl_energy_value "
-                                     " where point_id in ("
-                                     + ', '.join(map(lambda x: str(x[0]), rows_points_id)) + ") "
-                                     " AND utc_date_time BETWEEN %s AND %s "
-                                     " ORDER BY utc_date_time DESC LIMIT 0,1")
-                query_end_value = (" SELECT actual_value "
-                                   " FROM tbl_energy_value "
-                                   " where point_id in ("
-                                   + ', '.join(map(lambda x: str(x[0]), rows_points_id)) + ") "
-                                   " AND utc_date_time BETWEEN %s AND %s "
-                                   " ORDER BY utc_date_time DESC LIMIT 0,1")
-                cursor_historical.execute(query_start_value,
-                                          (reporting_start_datetime_utc - timedelta(minutes=15),
-                                           reporting_start_datetime_utc, ))
-                row_start_value = cursor_historical.fetchone()
+                point_id_list = [row[0] for row in rows_points_id]
+                row_start_value = archive.get_latest_point_value(cursor_historical,
+                                                                 'tbl_energy_value',
+                                                                 point_id_list,
+                                                                 reporting_start_datetime_utc - timedelta(minutes=15),
+                                                                 reporting_start_datetime_utc)
                 if row_start_value is not None:
-                    start_value = row_start_value[0]
+                    start_value = row_start_value[1]
                     integral_start_count += int(1)
                     is_integral_start_value = True
 
-                cursor_historical.execute(query_end_value,
-                                          ((reporting_end_datetime_utc - timedelta(minutes=15)),
-                                           reporting_end_datetime_utc, ))
-                row_end_value = cursor_historical.fetchone()
+                row_end_value = archive.get_latest_point_value(cursor_historical,
+                                                               'tbl_energy_value',
+                                                               point_id_list,
+                                                               reporting_end_datetime_utc - timedelta(minutes=15),
+                                                               reporting_end_datetime_utc)
 
                 if row_end_value is not None:
-                    end_value = row_end_value[0]
+                    end_value = row_end_value[1]
                     integral_end_count += int(1)
                     if is_integral_start_value:
                         integral_full_count += int(1)
@@ -5,7 +5,7 @@ import mysql.connector
 import simplejson as json
 import config
 import excelexporters.metertrend
-from core import utilities
+from core import archive, utilities
 from core.useractivity import access_control, api_key_control
 
 
@@ -184,60 +184,28 @@ class Reporting:
 
             point_value_list = list()
             point_timestamp_list = list()
+            table_name = None
             if point['object_type'] == 'ENERGY_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_energy_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
-
-                if rows is not None and len(rows) > 0:
-                    for row in rows:
-                        current_datetime_local = row[0].replace(tzinfo=timezone.utc) + \
-                                                 timedelta(minutes=timezone_offset)
-                        current_datetime = current_datetime_local.strftime('%Y-%m-%dT%H:%M:%S')
-                        point_timestamp_list.append(current_datetime)
-                        point_value_list.append(row[1])
+                table_name = 'tbl_energy_value'
             elif point['object_type'] == 'ANALOG_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_analog_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
-
-                if rows is not None and len(rows) > 0:
-                    for row in rows:
-                        current_datetime_local = row[0].replace(tzinfo=timezone.utc) + \
-                                                 timedelta(minutes=timezone_offset)
-                        current_datetime = current_datetime_local.strftime('%Y-%m-%dT%H:%M:%S')
-                        point_timestamp_list.append(current_datetime)
-                        point_value_list.append(row[1])
+                table_name = 'tbl_analog_value'
             elif point['object_type'] == 'DIGITAL_VALUE':
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_digital_value "
-                         " WHERE point_id = %s "
-                         "       AND utc_date_time BETWEEN %s AND %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical.execute(query, (point['id'],
-                                                  reporting_start_datetime_utc,
-                                                  reporting_end_datetime_utc))
-                rows = cursor_historical.fetchall()
+                table_name = 'tbl_digital_value'
+
+            if table_name is not None:
+                # the trends of the months archived by myems-cleaning are read from the archive
+                rows = archive.get_point_values(cursor_historical,
+                                                table_name,
+                                                point['id'],
+                                                reporting_start_datetime_utc,
+                                                reporting_end_datetime_utc)
 
-                if rows is not None and len(rows) > 0:
-                    for row in rows:
-                        current_datetime_local = row[0].replace(tzinfo=timezone.utc) + \
-                                                 timedelta(minutes=timezone_offset)
-                        current_datetime = current_datetime_local.strftime('%Y-%m-%dT%H:%M:%S')
-                        point_timestamp_list.append(current_datetime)
-                        point_value_list.append(row[1])
+                for row in rows:
+                    current_datetime_local = row[0].replace(tzinfo=timezone.utc) + \
+                                             timedelta(minutes=timezone_offset)
+                    current_datetime = current_datetime_local.strftime('%Y-%m-%dT%H:%M:%S')
+                    point_timestamp_list.append(current_datetime)
+                    point_value_list.append(row[1])
 
             reporting['names'].append(point['name'] + ' (' + point['units'] + ')')
             reporting['timestamps'].append(point_timestamp_list)
@@ -80,18 +80,18 @@ class Reporting:
                 actual_value = \
                     round(daily_value / (Decimal(24) * Decimal(60) / Decimal(config.minutes_to_count)), 3)
 
-                cursor_energy.execute("DELETE FROM tbl_offline_meter_hourly WHERE offline_meter_id = %s "
-                                      "AND start_datetime_utc >= %s AND start_datetime_utc < %s ",
-                                      (offline_meter_id, start_datetime_utc.isoformat()[0:19],
-                                       end_datetime_utc.isoformat()[0:19]))
-
-                cnx_energy.commit()
-                # check with hourly low limit and hourly high limit
+                # check with hourly low limit and hourly high limit before deleting the hourly rows, so that the
+                # hourly rows are never deleted without inserting them again, which leaves stale rollup rows
                 if actual_value < hourly_low_limit \
                         or actual_value > hourly_high_limit:
                     raise falcon.HTTPError(status=falcon.HTTP_400, title='API.BAD_REQUEST',
                                            description='API.INVALID_OFFLINE_METER_VALUE')
 
+                cursor_energy.execute("DELETE FROM tbl_offline_meter_hourly WHERE offline_meter_id = %s "
+                                      "AND start_datetime_utc >= %s AND start_datetime_utc < %s ",
+                                      (offline_meter_id, start_datetime_utc.isoformat()[0:19],
+                                       end_datetime_utc.isoformat()[0:19]))
+
                 add_values = (" INSERT INTO tbl_offline_meter_hourly "
                               "             (offline_meter_id, start_datetime_utc, actual_value) "
                               " VALUES  ")
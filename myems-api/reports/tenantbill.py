@@ -228,8 +228,12 @@ class Reporting:
                 reporting_input[energy_category_id]['values'] = list()
                 reporting_input[energy_category_id]['subtotal'] = Decimal(0.0)
 
+                table_name = utilities.get_table_name_by_period('tbl_tenant_input_category_hourly',
+                                                                reporting_start_datetime_utc,
+                                                                reporting_end_datetime_utc,
+                                                                period_type)
                 cursor_energy.execute(" SELECT start_datetime_utc, actual_value "
-                                      " FROM tbl_tenant_input_category_hourly "
+                                      " FROM " + table_name + " "
                                       " WHERE tenant_id = %s "
                                       "     AND energy_category_id = %s "
                                       "     AND start_datetime_utc >= %s "
@@ -275,8 +279,12 @@ class Reporting:
                 reporting_cost[energy_category_id]['values'] = list()
                 reporting_cost[energy_category_id]['subtotal'] = Decimal(0.0)
 
+                table_name = utilities.get_table_name_by_period('tbl_tenant_input_category_hourly',
+                                                                reporting_start_datetime_utc,
+                                                                reporting_end_datetime_utc,
+                                                                period_type)
                 cursor_billing.execute(" SELECT start_datetime_utc, actual_value "
-                                       " FROM tbl_tenant_input_category_hourly "
+                                       " FROM " + table_name + " "
                                        " WHERE tenant_id = %s "
                                        "     AND energy_category_id = %s "
                                        "     AND start_datetime_utc >= %s "
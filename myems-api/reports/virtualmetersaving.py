@@ -268,8 +268,12 @@ class Reporting:
             base['total_in_kgco2e_baseline'] += actual_value * virtual_meter['kgco2e']
 
         # query base period actual
+        table_name = utilities.get_table_name_by_period('tbl_virtual_meter_hourly',
+                                                        base_start_datetime_utc,
+                                                        base_end_datetime_utc,
+                                                        period_type)
         cursor_energy.execute(" SELECT start_datetime_utc, actual_value "
-                              " FROM tbl_virtual_meter_hourly "
+                              " FROM " + table_name + " "
                               " WHERE virtual_meter_id = %s "
                               " AND start_datetime_utc >= %s "
                               " AND start_datetime_utc < %s "
@@ -373,8 +377,12 @@ class Reporting:
             reporting['total_in_kgco2e_baseline'] += actual_value * virtual_meter['kgco2e']
 
         # query reporting period actual
+        table_name = utilities.get_table_name_by_period('tbl_virtual_meter_hourly',
+                                                        reporting_start_datetime_utc,
+                                                        reporting_end_datetime_utc,
+                                                        period_type)
         cursor_energy.execute(" SELECT start_datetime_utc, actual_value "
-                              " FROM tbl_virtual_meter_hourly "
+                              " FROM " + table_name + " "
                               " WHERE virtual_meter_id = %s "
                               " AND start_datetime_utc >= %s "
                               " AND start_datetime_utc < %s "
@@ -0,0 +1,94 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import config
+from core import utilities
+
+
+########################################################################################################################
+# Reference test of the period aggregation procedures in core.utilities
+# Usage: python3 test_utilities.py
+# Compares the single-pass bucketing over random, gappy and shuffled hourly series with a plain scan of the rows of
+# every period
+########################################################################################################################
+def generate_rows_hourly(start_datetime_utc, end_datetime_utc, decimal_places):
+    rows_hourly = list()
+    current_datetime_utc = start_datetime_utc - timedelta(hours=48)
+    while current_datetime_utc < end_datetime_utc + timedelta(hours=48):
+        # leave gaps like missing hours in energy tables
+        if random.random() < 0.9:
+            rows_hourly.append((current_datetime_utc,
+                                Decimal(random.randint(-1000, 100000000)).scaleb(-random.randint(0, decimal_places))))
+        current_datetime_utc += timedelta(hours=1)
+    return rows_hourly
+
+
+########################################################################################################################
+# Accumulate hourly data into periods by scanning all rows for every period
+########################################################################################################################
+def accumulate_by_scan(rows_hourly, period_boundaries):
+    subtotals = list()
+    maximums = list()
+    counters = list()
+    for lower_datetime_utc, upper_datetime_utc in zip(period_boundaries[:-1], period_boundaries[1:]):
+        value_list = [row[1] for row in rows_hourly if lower_datetime_utc <= row[0] < upper_datetime_utc]
+        subtotals.append(sum(value_list, Decimal(0.0)))
+        maximums.append(max(value_list) if len(value_list) > 0 else None)
+        counters.append(len(value_list))
+    return subtotals, maximums, counters
+
+
+########################################################################################################################
+# Check the periods are aligned to the local days and months of the signed timezone offset in minutes, the same as the
+# rollup tables, so that the reports read the rollup tables for the periods
+# Returns: the number of failures
+########################################################################################################################
+def check_timezone_offsets():
+    failures = 0
+    is_rollup_table_enabled = config.is_rollup_table_enabled
+    utc_offset = config.utc_offset
+    config.is_rollup_table_enabled = True
+    for config.utc_offset in ('+08:00', '-05:00', '+05:30', '-03:30', '+00:00'):
+        timezone_offset = timedelta(minutes=utilities.get_timezone_offset())
+        start_datetime_utc = datetime(2024, 1, 10, 7, 0) - timezone_offset
+        end_datetime_utc = datetime(2024, 5, 1) - timezone_offset
+        for period_type, table_name in (('daily', 'tbl_meter_daily'), ('weekly', 'tbl_meter_daily'),
+                                        ('monthly', 'tbl_meter_monthly'), ('yearly', 'tbl_meter_monthly')):
+            period_boundaries = utilities.get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type)
+            is_aligned = all((boundary + timezone_offset).time() == datetime.min.time() and
+                             (period_type not in ('monthly', 'yearly') or (boundary + timezone_offset).day == 1)
+                             for boundary in period_boundaries)
+            is_rollup_table_read = utilities.get_table_name_by_period('tbl_meter_hourly',
+                                                                      period_boundaries[0],
+                                                                      period_boundaries[-1],
+                                                                      period_type) == table_name
+            if not is_aligned or not is_rollup_table_read:
+                failures += 1
+                print('FAILED: ' + period_type + ' periods at UTC offset ' + config.utc_offset)
+    config.is_rollup_table_enabled = is_rollup_table_enabled
+    config.utc_offset = utc_offset
+    return failures
+
+
+def main():
+    random.seed(0)
+    failures = check_timezone_offsets()
+    for trial in range(20):
+        start_datetime_utc = datetime(2019, 12, 31, 16) + timedelta(hours=random.randint(0, 24 * 365 * 3))
+        end_datetime_utc = start_datetime_utc + timedelta(hours=random.randint(1, 24 * 365 * 2))
+        rows_hourly = generate_rows_hourly(start_datetime_utc, end_datetime_utc, 5 if trial % 5 == 4 else 3)
+        if trial % 4 == 3:
+            random.shuffle(rows_hourly)
+        for period_type in ('daily', 'weekly', 'monthly', 'yearly'):
+            period_boundaries = utilities.get_period_boundaries(start_datetime_utc, end_datetime_utc, period_type)
+            if utilities.accumulate_hourly_data_by_period(rows_hourly, period_boundaries) != \
+                    accumulate_by_scan(rows_hourly, period_boundaries):
+                failures += 1
+                print('FAILED: ' + period_type + ' from ' + str(start_datetime_utc) + ' to ' + str(end_datetime_utc))
+
+    print('Passed' if failures == 0 else 'Failed ' + str(failures) + ' case(s)')
+
+
+if __name__ == "__main__":
+    main()
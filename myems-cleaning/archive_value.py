@@ -0,0 +1,242 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+import schedule
+
+import config
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    pq = None
+
+
+# the tables of historical point data to archive
+table_name_list = ['tbl_energy_value', 'tbl_analog_value', 'tbl_digital_value']
+
+# the maximum number of rows deleted from database in one statement
+delete_batch_size = 10000
+
+
+########################################################################################################################
+# This procedure moves the closed months of historical point data from database to the archive.
+#
+# The archive is a directory of Parquet files, one file of every point in every month, such as
+#   ARCHIVE_PATH/tbl_energy_value/2024-01/point_id=1.parquet
+# and every archived month holds a _SUCCESS file, which is written after all files of the month.
+# myems-normalization and myems-api read all data before the end of the latest archived month from the archive,
+# and all data since then from database.
+#
+# Step 1: get the oldest month with data in database of every table.
+# Step 2: export the rows of every point of every closed month older than archive_after_days to the Parquet file,
+#         merged with the archived rows of the point if the month was archived before.
+# Step 3: write the _SUCCESS file of the month.
+# Step 4: drop the partition of the month if the table is partitioned by partition_manager, or else delete the
+#         archived rows of the month from database in batches.
+#
+# NOTE: the rows inserted into an archived month later, such as the repaired data, are merged into the archive in the
+# next run, and they replace the archived rows at the same date times
+########################################################################################################################
+
+def job(logger):
+    if len(config.archive_path) == 0:
+        return
+
+    if pq is None:
+        logger.error("Error in archive value process, pyarrow is not installed")
+        return
+
+    cnx_historical = None
+    cursor_historical = None
+    try:
+        cnx_historical = mysql.connector.connect(**config.myems_historical_db)
+        cursor_historical = cnx_historical.cursor()
+    except Exception as e:
+        logger.error("Error in archive value process " + str(e))
+        if cursor_historical:
+            cursor_historical.close()
+        if cnx_historical:
+            cnx_historical.close()
+        return
+
+    # only the closed months before the month containing the expired date time are archived
+    archive_before_datetime_utc = (datetime.utcnow() - timedelta(days=config.archive_after_days)).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0)
+    try:
+        for table_name in table_name_list:
+            ############################################################################################################
+            # Step 1: get the oldest month with data in database of every table.
+            ############################################################################################################
+            cursor_historical.execute(" SELECT MIN(utc_date_time) "
+                                      " FROM " + table_name +
+                                      " WHERE utc_date_time < %s ", (archive_before_datetime_utc,))
+            row = cursor_historical.fetchone()
+            if row is None or not isinstance(row[0], datetime):
+                continue
+
+            month_start_datetime_utc = row[0].replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            while month_start_datetime_utc < archive_before_datetime_utc:
+                month_end_datetime_utc = get_next_month(month_start_datetime_utc)
+                archive_month(cnx_historical, cursor_historical, table_name,
+                              month_start_datetime_utc, month_end_datetime_utc)
+                month_start_datetime_utc = month_end_datetime_utc
+    except Exception as e:
+        logger.error("Error in archive value process " + str(e))
+    finally:
+        if cursor_historical:
+            cursor_historical.close()
+        if cnx_historical:
+            cnx_historical.close()
+
+    logger.info("Archived values before date time in UTC: " + archive_before_datetime_utc.isoformat()[0:19])
+
+
+########################################################################################################################
+# Move the rows of one month of one table from database to the archive
+########################################################################################################################
+def archive_month(cnx_historical, cursor_historical, table_name, month_start_datetime_utc, month_end_datetime_utc):
+    # the rows inserted while archiving are left in database to the next run
+    cursor_historical.execute(" SELECT MAX(id) "
+                              " FROM " + table_name +
+                              " WHERE utc_date_time >= %s AND utc_date_time < %s ",
+                              (month_start_datetime_utc, month_end_datetime_utc))
+    row = cursor_historical.fetchone()
+    if row is None or row[0] is None:
+        return
+    max_id = row[0]
+
+    month_path = os.path.join(config.archive_path, table_name, month_start_datetime_utc.strftime('%Y-%m'))
+    os.makedirs(month_path, exist_ok=True)
+
+    ####################################################################################################################
+    # Step 2: export the rows of every point of the month to the Parquet file.
+    ####################################################################################################################
+    cursor_historical.execute(" SELECT DISTINCT point_id "
+                              " FROM " + table_name +
+                              " WHERE utc_date_time >= %s AND utc_date_time < %s AND id <= %s ",
+                              (month_start_datetime_utc, month_end_datetime_utc, max_id))
+    point_id_list = sorted(row[0] for row in cursor_historical.fetchall())
+
+    row_count = 0
+    for point_id in point_id_list:
+        cursor_historical.execute(" SELECT utc_date_time, actual_value, is_bad "
+                                  " FROM " + table_name +
+                                  " WHERE point_id = %s "
+                                  "       AND utc_date_time >= %s AND utc_date_time < %s AND id <= %s "
+                                  " ORDER BY utc_date_time ",
+                                  (point_id, month_start_datetime_utc, month_end_datetime_utc, max_id))
+        rows = cursor_historical.fetchall()
+        table = pa.table([pa.array([row[0] for row in rows], type=pa.timestamp('s')),
+                          pa.array([row[1] for row in rows],
+                                   type=pa.int32() if table_name == 'tbl_digital_value' else pa.decimal128(18, 3)),
+                          pa.array([None if row[2] is None else bool(row[2]) for row in rows], type=pa.bool_())],
+                         names=['utc_date_time', 'actual_value', 'is_bad'])
+
+        file_path = os.path.join(month_path, 'point_id=' + str(point_id) + '.parquet')
+        if os.path.isfile(file_path):
+            # merge the archived rows, which are replaced by the rows at the same date times in database
+            # the timestamps in seconds are read back in milliseconds from Parquet files
+            archived_table = pq.read_table(file_path).cast(table.schema)
+            archived_table = archived_table.filter(pc.invert(pc.is_in(archived_table['utc_date_time'],
+                                                                      value_set=table['utc_date_time'])))
+            table = pa.concat_tables([archived_table, table]).sort_by('utc_date_time')
+
+        # write to a temporary file and then rename it, so the readers never see a partial file
+        pq.write_table(table, file_path + '.tmp', compression='zstd')
+        os.replace(file_path + '.tmp', file_path)
+        row_count += len(rows)
+
+    ####################################################################################################################
+    # Step 3: write the _SUCCESS file of the month.
+    ####################################################################################################################
+    with open(os.path.join(month_path, '_SUCCESS.tmp'), 'w') as f:
+        f.write(datetime.utcnow().isoformat()[0:19] + '\n')
+    os.replace(os.path.join(month_path, '_SUCCESS.tmp'), os.path.join(month_path, '_SUCCESS'))
+
+    ####################################################################################################################
+    # Step 4: drop the partition of the month, or else delete the archived rows of the month from database in batches.
+    ####################################################################################################################
+    if drop_month_partition(cursor_historical, table_name, month_start_datetime_utc, max_id):
+        print("Dropped partition of " + table_name + " in " + month_start_datetime_utc.strftime('%Y-%m'))
+    else:
+        while True:
+            cursor_historical.execute(" DELETE FROM " + table_name +
+                                      " WHERE utc_date_time >= %s AND utc_date_time < %s AND id <= %s "
+                                      " LIMIT %s ",
+                                      (month_start_datetime_utc, month_end_datetime_utc, max_id, delete_batch_size))
+            deleted_row_count = cursor_historical.rowcount
+            cnx_historical.commit()
+            if deleted_row_count < delete_batch_size:
+                break
+
+    print("Archived " + str(row_count) + " rows of " + str(len(point_id_list)) + " points of " + table_name +
+          " in " + month_start_datetime_utc.strftime('%Y-%m'))
+
+
+########################################################################################################################
+# Drop the monthly partition of a month, such as p202401, created by partition_manager
+# The table is locked while checking and dropping the partition, and the partition is only dropped if it holds just
+# the archived rows of the month. It isn't dropped if it holds the rows inserted after max_id, or the rows of the
+# months before, which are moved to the partition of the next month when the partition of their month is dropped.
+# Returns: True if the partition is dropped, or False if the rows are to be deleted instead
+########################################################################################################################
+def drop_month_partition(cursor_historical, table_name, month_start_datetime_utc, max_id):
+    partition_name = 'p' + month_start_datetime_utc.strftime('%Y%m')
+    cursor_historical.execute(" SELECT COUNT(*) "
+                              " FROM information_schema.PARTITIONS "
+                              " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME = %s ",
+                              (table_name, partition_name))
+    if cursor_historical.fetchone()[0] == 0:
+        return False
+
+    cursor_historical.execute(" LOCK TABLES " + table_name + " WRITE ")
+    try:
+        cursor_historical.execute(" SELECT 1 "
+                                  " FROM " + table_name + " PARTITION (" + partition_name + ") "
+                                  " WHERE id > %s OR utc_date_time < %s "
+                                  " LIMIT 1 ",
+                                  (max_id, month_start_datetime_utc))
+        if cursor_historical.fetchone() is not None:
+            return False
+        cursor_historical.execute(" ALTER TABLE " + table_name + " DROP PARTITION " + partition_name)
+        return True
+    finally:
+        cursor_historical.execute(" UNLOCK TABLES ")
+
+
+########################################################################################################################
+# Check if a month of a table is archived, which means the _SUCCESS file of the month is written
+########################################################################################################################
+def is_archived(table_name, month_start_datetime_utc):
+    if len(config.archive_path) == 0:
+        return False
+    return os.path.isfile(os.path.join(config.archive_path, table_name, month_start_datetime_utc.strftime('%Y-%m'),
+                                       '_SUCCESS'))
+
+
+########################################################################################################################
+# Get the start datetime of the next month
+########################################################################################################################
+def get_next_month(month_start_datetime_utc):
+    if month_start_datetime_utc.month == 12:
+        return month_start_datetime_utc.replace(year=month_start_datetime_utc.year + 1, month=1)
+    return month_start_datetime_utc.replace(month=month_start_datetime_utc.month + 1)
+
+
+def process(logger):
+
+    if config.is_debug:
+        # run the job immediately
+        job(logger)
+        return
+
+    schedule.every(1).days.do(job, logger)
+
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
@@ -0,0 +1,74 @@
+import random
+import sys
+import time
+
+import config
+import clean_energy_value
+
+
+########################################################################################################################
+# Micro-benchmark of finding the concave values in clean_energy_value
+# Usage: python3 benchmark_clean_energy_value.py [NUMBER_OF_READINGS]
+# Generates synthetic cumulative energy values of points with 1000 readings per point, 10000000 readings by default,
+# containing concave dips and meter resets, and times every available backend and checks they find the same values
+########################################################################################################################
+readings_per_point = 1000
+
+
+# the actual values are integers in thousandths, as they are read in clean_energy_value
+def generate_actual_values(count):
+    actual_values = list()
+    actual_value = random.randint(0, 1000000)
+    dip_count = 0
+    for _ in range(count):
+        actual_value += random.randint(0, 5000)
+        if dip_count > 0:
+            # the meter reads a value less than the base value for a while, and then recovers
+            dip_count -= 1
+            actual_values.append(actual_value - random.randint(1, 100000))
+            continue
+        r = random.random()
+        if r < 0.005:
+            dip_count = random.randint(1, 20)
+        elif r < 0.006:
+            # the meter is reset or replaced, and all later values are less than the base value
+            actual_value = random.randint(0, 1000)
+        actual_values.append(actual_value)
+    return actual_values
+
+
+def main():
+    random.seed(0)
+    reading_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    backends = ('python', 'numpy') if clean_energy_value.np is not None else ('python', )
+    elapsed_dict = dict()
+    concave_count_dict = dict()
+    for backend in backends:
+        elapsed_dict[backend] = 0.0
+        concave_count_dict[backend] = 0
+
+    generated_count = 0
+    while generated_count < reading_count:
+        actual_values = generate_actual_values(min(readings_per_point, reading_count - generated_count))
+        generated_count += len(actual_values)
+        concave_index_list_dict = dict()
+        for backend in backends:
+            config.cleaning_backend = backend
+            start_time = time.perf_counter()
+            concave_index_list_dict[backend] = clean_energy_value.find_concave_values_by_backend(actual_values)
+            elapsed_dict[backend] += time.perf_counter() - start_time
+            concave_count_dict[backend] += len(concave_index_list_dict[backend])
+        for backend in backends:
+            if concave_index_list_dict[backend] != concave_index_list_dict[backends[0]]:
+                print('Mismatch of ' + backend + ' and ' + backends[0] + ' backends')
+                return
+
+    print('Synthetic energy values of ' + str(generated_count) + ' readings, ' +
+          str(readings_per_point) + ' readings per point')
+    for backend in backends:
+        print('  {:<6} {:>10} concave values {:>10.3f} s'.format(backend, concave_count_dict[backend],
+                                                                 elapsed_dict[backend]))
+
+
+if __name__ == "__main__":
+    main()
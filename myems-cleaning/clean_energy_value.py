@@ -1,18 +1,37 @@
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
+from itertools import groupby
 
 import mysql.connector
 
 import config
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the maximum number of points in the IN clause of one query
+id_chunk_size = 500
+
+# the maximum number of energy values tagged in one statement
+update_chunk_size = 1000
 
 
 ########################################################################################################################
 # This procedure will find and tag the bad energy values.
 #
-# Step 1: get the time slot to clean.
-# Step 2: check bad case class 1 with high limits and low limits.
-# Step 3: check bad case class 2 which is in concave shape model.
-# Step 4: tag the is_bad property of energy values.
+# Step 1: get all energy value points, and the cleaning watermarks of the points.
+# Step 2: stream the energy values of every batch of points since the watermark minus the look-back of every point.
+# Step 3: check bad case class 1 with high limits and low limits.
+# Step 4: check bad case class 2 which is in concave shape model.
+# Step 5: tag the is_bad property of energy values, and save the watermarks of the points.
+#
+# NOTE: the cleaning watermark of a point is the date time of its latest checked energy value, so every pass checks
+# only the newly arrived energy values of every point, and the energy values in the look-back of clean_look_back_minutes
+# before the watermark to confirm the concave values and to catch the values arriving late
+# NOTE: the energy values checked at ingest by myems-modbus-tcp with inline cleaning are inserted with is_bad set, the
+# good ones are read again here only as the context of the unchecked ones
 ########################################################################################################################
 
 def process(logger):
@@ -21,15 +40,17 @@ def process(logger):
         # the outermost loop to reconnect server if there is a connection error
         cnx_historical = None
         cursor_historical = None
+        cnx_historical_update = None
+        cursor_historical_update = None
         try:
             cnx_historical = mysql.connector.connect(**config.myems_historical_db)
             cursor_historical = cnx_historical.cursor()
+            # the energy values are streamed from one connection and tagged by the other one
+            cnx_historical_update = mysql.connector.connect(**config.myems_historical_db)
+            cursor_historical_update = cnx_historical_update.cursor()
         except Exception as e:
             logger.error("Error at the begin of clean_energy_value.process " + str(e))
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
+            close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update)
             time.sleep(60)
             continue
 
@@ -39,161 +60,8 @@ def process(logger):
         # else if a value is checked and the result is good then is_bad would be set to 0
 
         ################################################################################################################
-        # Step 1: get the time slot to clean.
-        ################################################################################################################
-
-        min_datetime = None
-        max_datetime = None
-        try:
-            query = (" SELECT MAX(utc_date_time) "
-                     " FROM tbl_energy_value "
-                     " WHERE is_bad IS NOT NULL ")
-            cursor_historical.execute(query, ())
-            row_datetime = cursor_historical.fetchone()
-            if row_datetime is not None and len(row_datetime) == 1 and isinstance(row_datetime[0], datetime):
-                # NOTE: To avoid omission mistakes, we start one hour early
-                min_datetime = row_datetime[0] - timedelta(hours=1)
-            else:
-                # all is_bad properties are null
-                min_datetime = datetime.strptime(config.start_datetime_utc,
-                                                 '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-
-            query = (" SELECT MAX(utc_date_time) "
-                     " FROM tbl_energy_value "
-                     " WHERE is_bad IS NULL ")
-            cursor_historical.execute(query, ())
-            row_datetime = cursor_historical.fetchone()
-            if row_datetime is not None and len(row_datetime) == 1 and isinstance(row_datetime[0], datetime):
-                max_datetime = row_datetime[0]
-
-        except Exception as e:
-            print("Error in Step 1 of clean_energy_value.process " + str(e))
-            logger.error("Error in Step 1 of clean_energy_value.process " + str(e))
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
-            time.sleep(60)
-            continue
-
-        if min_datetime is None or max_datetime is None:
-            print("min_datetime or max_datetime is None")
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
-            time.sleep(60)
-            continue
-        else:
-            print("min_datetime: " + min_datetime.isoformat()[0:19])
-            print("max_datetime: " + max_datetime.isoformat()[0:19])
-
-        ################################################################################################################
-        # Step 2: check bad case class 1 with high limits and low limits.
-        ################################################################################################################
-
-        ################################################################################################################
-        # bad case 1.1
-        # id          point_id utc_date_time        actual_value          is_bad (expected)
-        # 104814811	  3333     2018-01-31 16:45:04	115603.0078125        good
-        # 104814588	  3333     2018-01-31 16:44:00	115603.0078125        good
-        # 104815007	  3333     2018-01-31 16:46:09	1.832278249396618e21  bad
-        # 104815226	  3333     2018-01-31 16:47:13	1.832278249396618e21  bad
-        # 104815423	  3333     2018-01-31 16:48:17	1.832278249396618e21  bad
-        # 104815643	  3333     2018-01-31 16:49:22	1.832278249396618e21  bad
-        # 104815820	  3333     2018-01-31 16:50:26	1.832278249396618e21  bad
-        # 104816012	  3333     2018-01-31 16:51:30	1.832278249396618e21  bad
-        # 104816252	  3333     2018-01-31 16:52:34	1.832278249396618e21  bad
-        # 104816446	  3333     2018-01-31 16:53:38	1.832278249396618e21  bad
-        # 104816667	  3333     2018-01-31 16:54:43	1.832278249396618e21  bad
-        # 104816860	  3333     2018-01-31 16:55:47	1.832278249396618e21  bad
-        # 104817065	  3333     2018-01-31 16:56:51	1.832278249396618e21  bad
-        # 104817284	  3333     2018-01-31 16:57:55	1.832278249396618e21  bad
-        # 104817482	  3333     2018-01-31 16:58:59	1.832278249396618e21  bad
-        # 104817723	  3333     2018-01-31 17:00:04	1.832278249396618e21  bad
-        # 104817940	  3333     2018-01-31 17:01:08	115749.0078125        good
-        # 104818142	  3333     2018-01-31 17:02:11	115749.0078125        good
-        # 104818380	  3333     2018-01-31 17:03:16	115749.0078125        good
-        # 104818596	  3333     2018-01-31 17:04:20	115749.0078125        good
-        ################################################################################################################
-
-        ################################################################################################################
-        # bad case 1.2:
-        # id    point_id  utc_date_time          actual_value           is_bad (expected)
-        #       3333      2018-01-31 17:27:53    115823.0078125         good
-        #       3333      2018-01-31 17:28:57    115823.0078125         good
-        #       3333      2018-01-31 17:30:02    115823.0078125         good
-        #       3333      2018-01-31 17:31:06    115823.0078125         good
-        #       3333      2018-01-31 17:32:11    0                      bad
-        #       3333      2018-01-31 17:33:15    0                      bad
-        #       3333      2018-01-31 17:34:19    0                      bad
-        #       3333      2018-01-31 17:35:24    0                      bad
-        #       3333      2018-01-31 17:36:28    0                      bad
-        #       3333      2018-01-31 17:37:32    0                      bad
-        #       3333      2018-01-31 17:38:36    0                      bad
-        #       3333      2018-01-31 17:39:41    0                      bad
-        #       3333      2018-01-31 17:40:44    0                      bad
-        #       3333      2018-01-31 17:41:49    0                      bad
-        #       3333      2018-01-31 17:43:57    0                      bad
-        #       3333      2018-01-31 17:42:53    0                      bad
-        #       3333      2018-01-31 17:45:01    0                      bad
-        #       3333      2018-01-31 17:46:06    0                      bad
-        #       3333      2018-01-31 17:47:10    0                      bad
-        #       3333      2018-01-31 17:48:14    115969.0078125         good
-        #       3333      2018-01-31 17:49:18    115969.0078125         good
-        #       3333      2018-01-31 17:50:22    115969.0078125         good
+        # Step 1: get all energy value points, and the cleaning watermarks of the points.
         ################################################################################################################
-
-        ################################################################################################################
-        # bad case 1.3:
-        # id    point_id  utc_date_time          actual_value           is_bad (expected)
-        #       3333      2018-02-04 07:00:38    139968                  good
-        #       3333      2018-02-04 07:01:42    139968                  good
-        #       3333      2018-02-04 07:03:54    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:04:58    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:06:03    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:07:06    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:08:10    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:09:13    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:10:17    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:11:21    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:12:25    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:13:29    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:14:33    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:15:37    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:16:41    -7.068193740872921e-3   bad
-        #       3333      2018-02-04 07:17:45    140114                  good
-        #       3333      2018-02-04 07:18:49    140114                  good
-        #       3333      2018-02-04 07:19:53    140114                  good
-        ################################################################################################################
-
-        ################################################################################################################
-        # bad case 1.4:
-        # id    point_id  utc_date_time          actual_value           is_bad (expected)
-        #       3333      2018-02-08 01:16:38    165746.015625          good
-        #       3333      2018-02-08 01:15:34    165746.015625          good
-        #       3333      2018-02-08 01:14:30    165746.015625          good
-        #       3333      2018-02-08 01:13:27    0.00303281145170331    bad
-        #       3333      2018-02-08 01:12:22    0.00303281145170331    bad
-        #       3333      2018-02-08 01:11:19    0.00303281145170331    bad
-        #       3333      2018-02-08 01:10:15    0.00303281145170331    bad
-        #       3333      2018-02-08 01:09:11    0.00303281145170331    bad
-        #       3333      2018-02-08 01:08:06    0.00303281145170331    bad
-        #       3333      2018-02-08 01:07:02    0.00303281145170331    bad
-        #       3333      2018-02-08 01:05:58    0.00303281145170331    bad
-        #       3333      2018-02-08 01:04:54    0.00303281145170331    bad
-        #       3333      2018-02-08 01:03:50    0.00303281145170331    bad
-        #       3333      2018-02-08 01:02:46    0.00303281145170331    bad
-        #       3333      2018-02-08 01:01:42    0.00303281145170331    bad
-        #       3333      2018-02-08 01:00:39    0.00303281145170331    bad
-        #       3333      2018-02-08 00:59:34    0.00303281145170331    bad
-        #       3333      2018-02-08 00:58:31    0.00303281145170331    bad
-        #       3333      2018-02-08 00:57:27    165599.015625          good
-        #       3333      2018-02-08 00:56:23    165599.015625          good
-        #       3333      2018-02-08 00:55:20    165599.015625          good
-        #       3333      2018-02-08 00:54:16    165599.015625          good
-        ################################################################################################################
-        print("Step 2: Processing bad case 1.x")
         cnx_system = None
         cursor_system = None
         point_dict = dict()
@@ -207,12 +75,14 @@ def process(logger):
             cursor_system.execute(query)
             rows_points = cursor_system.fetchall()
 
+            # the limits are compared with the energy values in thousandths
             if rows_points is not None and len(rows_points) > 0:
                 for row in rows_points:
-                    point_dict[row[0]] = {"high_limit": row[1],
-                                          "low_limit": row[2]}
+                    point_dict[row[0]] = {"high_limit": row[1] * 1000,
+                                          "low_limit": row[2] * 1000}
         except Exception as e:
-            logger.error("Error in step 2.1 of clean_energy_value.process " + str(e))
+            logger.error("Error in step 1.1 of clean_energy_value.process " + str(e))
+            close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update)
             time.sleep(60)
             continue
         finally:
@@ -221,371 +91,565 @@ def process(logger):
             if cnx_system:
                 cnx_system.close()
 
+        # the energy values arriving after the pass starts are left to the next pass
+        end_datetime_utc = datetime.utcnow().replace(microsecond=0)
         try:
-            query = (" SELECT id, point_id, actual_value "
-                     " FROM tbl_energy_value "
-                     " WHERE utc_date_time >= %s AND utc_date_time <= %s AND (is_bad = 0 OR is_bad IS NULL) ")
-            cursor_historical.execute(query, (min_datetime, max_datetime,))
-            rows_energy_values = cursor_historical.fetchall()
+            watermark_dict = get_watermarks(cnx_historical, cursor_historical, list(point_dict.keys()))
         except Exception as e:
-            logger.error("Error in step 2.2 of clean_energy_value.process " + str(e))
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
+            logger.error("Error in step 1.2 of clean_energy_value.process " + str(e))
+            close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update)
             time.sleep(60)
             continue
 
-        # initialize bad list
-        bad_list = list()
-
-        if rows_energy_values is not None and len(rows_energy_values) > 0:
-            for row_energy_value in rows_energy_values:
-                point_id = row_energy_value[1]
-                actual_value = row_energy_value[2]
-                point = point_dict.get(point_id, None)
-                if point is None or actual_value > point['high_limit'] or actual_value < point['low_limit']:
-                    bad_list.append(row_energy_value[0])
-
-        print('bad list: ' + str(bad_list))
-        while len(bad_list) > 0:
-            update_100 = bad_list[:100]
-            bad_list = bad_list[100:]
-            try:
-                update = (" UPDATE tbl_energy_value "
-                          " SET is_bad = 1 "
-                          " WHERE id IN (" + ', '.join(map(str, update_100)) + ")")
-                cursor_historical.execute(update, )
-                cnx_historical.commit()
-            except Exception as e:
-                logger.error("Error in step 2.3 of clean_energy_value.process " + str(e))
-                if cursor_historical:
-                    cursor_historical.close()
-                if cnx_historical:
-                    cnx_historical.close()
-                time.sleep(60)
-                continue
+        # the points are sorted by the start datetimes, so the points in a batch share almost the same time window
+        start_datetime_dict = dict()
+        for point_id, watermark_datetime_utc in watermark_dict.items():
+            start_datetime_dict[point_id] = watermark_datetime_utc - timedelta(minutes=config.clean_look_back_minutes)
+        point_id_list = sorted(point_dict.keys(), key=lambda x: (start_datetime_dict[x], x))
+        print("Step 1: got " + str(len(point_id_list)) + " points")
 
-        ################################################################################################################
-        # Step 3: check bad case class 2 which is in concave shape model.
-        ################################################################################################################
-        print("Step 3: Processing bad case 2.x")
-        ################################################################################################################
-        # bad case 2.1
-        # id    point_id  utc_date_time          actual_value       is_bad (expected)
-        #       3333      2018-02-05 04:55:45    146129.015         good
-        #       3333      2018-02-05 04:56:49    146129.015         good
-        #       3333      2018-02-05 04:57:54    146129.015         good
-        #       3333      2018-02-05 05:22:52    145693.015         bad
-        #       3333      2018-02-05 05:25:01    146274             good
-        #       3333      2018-02-05 05:26:03    146274             good
-        #       3333      2018-02-05 05:27:05    146274             good
-        #       3333      2018-02-05 05:29:30    146274             good
-        ################################################################################################################
+        bad_count = 0
+        good_count = 0
+        try:
+            while len(point_id_list) > 0:
+                batch_point_id_list = sorted(point_id_list[:id_chunk_size])
+                point_id_list = point_id_list[id_chunk_size:]
+
+                ########################################################################################################
+                # Step 2: stream the energy values of the batch of points since the watermark minus the look-back.
+                ########################################################################################################
+                # the actual values of DECIMAL(18, 3) are read as integers in thousandths, which are exact and
+                # compared faster than Decimal objects
+                query = (" SELECT point_id, id, utc_date_time, CAST(actual_value * 1000 AS SIGNED), is_bad "
+                         " FROM tbl_energy_value "
+                         " WHERE point_id IN (" + ", ".join(["%s"] * len(batch_point_id_list)) + ") "
+                         "       AND utc_date_time >= %s AND utc_date_time <= %s "
+                         "       AND (is_bad = 0 OR is_bad IS NULL) "
+                         " ORDER BY point_id, utc_date_time ")
+                cursor_historical.execute(query, tuple(batch_point_id_list) +
+                                          (min(start_datetime_dict[point_id] for point_id in batch_point_id_list),
+                                           end_datetime_utc))
+
+                bad_list = list()
+                good_list = list()
+                latest_datetime_dict = dict()
+                for point_id, rows in groupby(cursor_historical, key=lambda row: row[0]):
+                    # the energy values before the start datetime of the point were checked in the previous passes
+                    rows_energy_values = [row[1:] for row in rows if row[2] >= start_datetime_dict[point_id]]
+                    if len(rows_energy_values) == 0:
+                        continue
+
+                    check_energy_values(point_dict[point_id], rows_energy_values, bad_list, good_list)
+                    latest_datetime_dict[point_id] = rows_energy_values[-1][1]
+
+                    if len(bad_list) + len(good_list) >= update_chunk_size:
+                        bad_count += len(bad_list)
+                        good_count += len(good_list)
+                        tag_energy_values(cnx_historical_update, cursor_historical_update, bad_list, good_list)
+
+                ########################################################################################################
+                # Step 5: tag the is_bad property of energy values, and save the watermarks of the points.
+                ########################################################################################################
+                # NOTE: the watermarks are saved after the energy values are tagged,
+                # so the energy values are checked again if there is an error before
+                bad_count += len(bad_list)
+                good_count += len(good_list)
+                tag_energy_values(cnx_historical_update, cursor_historical_update, bad_list, good_list)
+                save_watermarks(cnx_historical_update, cursor_historical_update, latest_datetime_dict)
+        except Exception as e:
+            logger.error("Error in step 2 of clean_energy_value.process " + str(e))
+            close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update)
+            time.sleep(60)
+            continue
 
-        ################################################################################################################
-        # bad case 2.2
-        # id    point_id	utc_date_time	    actual_value	is_bad (expected)
-        #       3321	    2018-05-15 15:09:54	33934040         good
-        #       3321	    2018-05-15 15:08:51	33934040         good
-        #       3321	    2018-05-15 15:07:47	33934040         good
-        #       3321	    2018-05-15 15:06:44	33934040         good
-        #       3321	    2018-05-15 15:05:40	33934040         good
-        #       3321	    2018-05-15 15:04:36	33934040         good
-        #       3321	    2018-05-15 09:09:00	33928880	     bad
-        #       3321	    2018-05-15 09:05:23	33933568         good
-        #       3321	    2018-05-15 09:04:20	33933568         good
-        #       3321	    2018-05-15 09:03:16	33933568         good
-        #       3321	    2018-05-15 09:02:13	33933560         good
-        #       3321	    2018-05-15 09:01:09	33933560         good
-        #       3321	    2018-05-15 09:00:04	33933560         good
-        ################################################################################################################
+        print("Step 5: tagged " + str(bad_count) + " bad values and " + str(good_count) + " good values")
+        close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update)
 
-        ################################################################################################################
-        # bad case 2.3
-        # id    point_id	utc_date_time	    actual_value	is_bad (expected)
-        #       554	        2018-05-19 15:32:52	24001            good
-        #       554	        2018-05-19 15:30:45	24001            good
-        #       554	        2018-05-19 15:28:39	24001            good
-        #       554	        2018-05-19 15:26:32	24001            good
-        #       554	        2018-05-19 15:24:25	24001            good
-        #       554	        2018-05-19 15:22:18	24001            good
-        #       554	        2018-05-19 15:20:10	24001            good
-        #       554	        2018-05-19 15:18:04	24001            good
-        #       554	        2018-05-19 15:15:58	24001            good
-        #       554	        2018-05-19 15:13:51	24001            good
-        #       554	        2018-05-19 15:11:43	24001            good
-        #       554	        2018-05-19 15:09:37	24001            good
-        #       554	        2018-05-19 15:07:29	24000            good
-        #       554	        2018-05-19 15:05:22	23000	         bad
-        #       554	        2018-05-19 15:03:14	23999            good
-        #       554	        2018-05-19 15:01:06	23999            good
-        #       554	        2018-05-19 14:58:59	23999            good
-        #       554	        2018-05-19 14:56:52	23998            good
-        #       554	        2018-05-19 14:54:45	23998            good
-        #       554	        2018-05-19 14:52:39	23998            good
-        ################################################################################################################
-        # todo bad case 2.3.1
-        # "id", "point_id", "utc_date_time", "actual_value", "is_bad" (actual)
-        # 68504700, 2, "2021-01-09 03:40:12.0", 40454414.063, 0
-        # 68507243, 2, "2021-01-09 03:43:12.0", 40454476.563, 0
-        # 68510030, 2, "2021-01-09 03:47:17.0", 40428074.219, 0 ?
-        # 68512573, 2, "2021-01-09 03:50:18.0", 40454621.094, 0
-        # 68515421, 2, "2021-01-09 03:54:23.0", 40454703.125, 0
-        # 68517964, 2, "2021-01-09 03:57:23.0", 40454761.719, 0
+        time.sleep(config.clean_interval_seconds)
 
-        ################################################################################################################
-        # bad case 2.4
-        # id       point_id utc_date_time          actual_value    is_bad (expected)
-        # 104373141 3336    2018-01-30 03:04:12    216463.015625   good
-        # 104373337 3336    2018-01-30 03:05:15    216463.015625   good
-        # 104373555 3336    2018-01-30 03:06:20    216463.015625   good
-        # 104373750 3336    2018-01-30 03:07:25    192368.015625   bad
-        # 104373957 3336    2018-01-30 03:08:29    192368.015625   bad
-        # 104374175 3336    2018-01-30 03:09:33    192368.015625   bad
-        # 104374382 3336    2018-01-30 03:10:38    192368.015625   bad
-        # 104374604 3336    2018-01-30 03:11:42    192368.015625   bad
-        # 104374792 3336    2018-01-30 03:12:47    192368.015625   bad
-        # 104375010 3336    2018-01-30 03:13:51    192368.015625   bad
-        # 104375200 3336    2018-01-30 03:14:55    192368.015625   bad
-        # 104375418 3336    2018-01-30 03:16:00    192368.015625   bad
-        # 104375617 3336    2018-01-30 03:17:04    192368.015625   bad
-        # 104375837 3336    2018-01-30 03:18:08    192368.015625   bad
-        # 104376023 3336    2018-01-30 03:19:12    192368.015625   bad
-        # 104376216 3336    2018-01-30 03:20:16    192368.015625   bad
-        # 104376435 3336    2018-01-30 03:21:21    192368.015625   bad
-        # 104376634 3336    2018-01-30 03:22:25    192368.015625   bad
-        # 104376853 3336    2018-01-30 03:23:30    192368.015625   bad
-        # 104377071 3336    2018-01-30 03:24:34    192368.015625   bad
-        # 104377274 3336    2018-01-30 03:25:38    192368.015625   bad
-        # 104377501 3336    2018-01-30 03:26:42    216574.015625   good
-        # 104377714 3336    2018-01-30 03:27:47    216574.015625   good
-        ################################################################################################################
 
-        ################################################################################################################
-        # bad case 2.5
-        # id       point_id utc_date_time          actual_value  is_bad (expected)
-        # 104370839 3334    2018-01-30 02:52:23    844966.0625   good
-        # 104371064 3334    2018-01-30 02:53:27    844966.0625   good
-        # 104371261 3334    2018-01-30 02:54:32    844966.0625   good
-        # 104371479 3334    2018-01-30 02:55:36    826142.0625   bad
-        # 104371672 3334    2018-01-30 02:56:41    826142.0625   bad
-        # 104371884 3334    2018-01-30 02:57:45    826142.0625   bad
-        # 104372110 3334    2018-01-30 02:58:49    826142.0625   bad
-        # 104372278 3334    2018-01-30 02:59:54    845019.0625   good
-        # 104372512 3334    2018-01-30 03:00:58    845019.0625   good
-        # 104372704 3334    2018-01-30 03:02:03    845019.0625   good
-        ################################################################################################################
+########################################################################################################################
+# Check the energy values of a point
+# rows_energy_values: list of (id, utc_date_time, actual_value in thousandths, is_bad) of the point ordered by
+#                     utc_date_time
+# Returns: (id, utc_date_time) of the bad values are appended to bad_list,
+#          and those of the unchecked good values are appended to good_list
+########################################################################################################################
+def check_energy_values(point, rows_energy_values, bad_list, good_list):
+
+    ####################################################################################################################
+    # Step 3: check bad case class 1 with high limits and low limits.
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 1.1
+    # id          point_id utc_date_time        actual_value          is_bad (expected)
+    # 104814811	  3333     2018-01-31 16:45:04	115603.0078125        good
+    # 104814588	  3333     2018-01-31 16:44:00	115603.0078125        good
+    # 104815007	  3333     2018-01-31 16:46:09	1.832278249396618e21  bad
+    # 104815226	  3333     2018-01-31 16:47:13	1.832278249396618e21  bad
+    # 104815423	  3333     2018-01-31 16:48:17	1.832278249396618e21  bad
+    # 104815643	  3333     2018-01-31 16:49:22	1.832278249396618e21  bad
+    # 104815820	  3333     2018-01-31 16:50:26	1.832278249396618e21  bad
+    # 104816012	  3333     2018-01-31 16:51:30	1.832278249396618e21  bad
+    # 104816252	  3333     2018-01-31 16:52:34	1.832278249396618e21  bad
+    # 104816446	  3333     2018-01-31 16:53:38	1.832278249396618e21  bad
+    # 104816667	  3333     2018-01-31 16:54:43	1.832278249396618e21  bad
+    # 104816860	  3333     2018-01-31 16:55:47	1.832278249396618e21  bad
+    # 104817065	  3333     2018-01-31 16:56:51	1.832278249396618e21  bad
+    # 104817284	  3333     2018-01-31 16:57:55	1.832278249396618e21  bad
+    # 104817482	  3333     2018-01-31 16:58:59	1.832278249396618e21  bad
+    # 104817723	  3333     2018-01-31 17:00:04	1.832278249396618e21  bad
+    # 104817940	  3333     2018-01-31 17:01:08	115749.0078125        good
+    # 104818142	  3333     2018-01-31 17:02:11	115749.0078125        good
+    # 104818380	  3333     2018-01-31 17:03:16	115749.0078125        good
+    # 104818596	  3333     2018-01-31 17:04:20	115749.0078125        good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 1.2:
+    # id    point_id  utc_date_time          actual_value           is_bad (expected)
+    #       3333      2018-01-31 17:27:53    115823.0078125         good
+    #       3333      2018-01-31 17:28:57    115823.0078125         good
+    #       3333      2018-01-31 17:30:02    115823.0078125         good
+    #       3333      2018-01-31 17:31:06    115823.0078125         good
+    #       3333      2018-01-31 17:32:11    0                      bad
+    #       3333      2018-01-31 17:33:15    0                      bad
+    #       3333      2018-01-31 17:34:19    0                      bad
+    #       3333      2018-01-31 17:35:24    0                      bad
+    #       3333      2018-01-31 17:36:28    0                      bad
+    #       3333      2018-01-31 17:37:32    0                      bad
+    #       3333      2018-01-31 17:38:36    0                      bad
+    #       3333      2018-01-31 17:39:41    0                      bad
+    #       3333      2018-01-31 17:40:44    0                      bad
+    #       3333      2018-01-31 17:41:49    0                      bad
+    #       3333      2018-01-31 17:43:57    0                      bad
+    #       3333      2018-01-31 17:42:53    0                      bad
+    #       3333      2018-01-31 17:45:01    0                      bad
+    #       3333      2018-01-31 17:46:06    0                      bad
+    #       3333      2018-01-31 17:47:10    0                      bad
+    #       3333      2018-01-31 17:48:14    115969.0078125         good
+    #       3333      2018-01-31 17:49:18    115969.0078125         good
+    #       3333      2018-01-31 17:50:22    115969.0078125         good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 1.3:
+    # id    point_id  utc_date_time          actual_value           is_bad (expected)
+    #       3333      2018-02-04 07:00:38    139968                  good
+    #       3333      2018-02-04 07:01:42    139968                  good
+    #       3333      2018-02-04 07:03:54    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:04:58    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:06:03    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:07:06    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:08:10    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:09:13    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:10:17    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:11:21    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:12:25    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:13:29    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:14:33    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:15:37    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:16:41    -7.068193740872921e-3   bad
+    #       3333      2018-02-04 07:17:45    140114                  good
+    #       3333      2018-02-04 07:18:49    140114                  good
+    #       3333      2018-02-04 07:19:53    140114                  good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 1.4:
+    # id    point_id  utc_date_time          actual_value           is_bad (expected)
+    #       3333      2018-02-08 01:16:38    165746.015625          good
+    #       3333      2018-02-08 01:15:34    165746.015625          good
+    #       3333      2018-02-08 01:14:30    165746.015625          good
+    #       3333      2018-02-08 01:13:27    0.00303281145170331    bad
+    #       3333      2018-02-08 01:12:22    0.00303281145170331    bad
+    #       3333      2018-02-08 01:11:19    0.00303281145170331    bad
+    #       3333      2018-02-08 01:10:15    0.00303281145170331    bad
+    #       3333      2018-02-08 01:09:11    0.00303281145170331    bad
+    #       3333      2018-02-08 01:08:06    0.00303281145170331    bad
+    #       3333      2018-02-08 01:07:02    0.00303281145170331    bad
+    #       3333      2018-02-08 01:05:58    0.00303281145170331    bad
+    #       3333      2018-02-08 01:04:54    0.00303281145170331    bad
+    #       3333      2018-02-08 01:03:50    0.00303281145170331    bad
+    #       3333      2018-02-08 01:02:46    0.00303281145170331    bad
+    #       3333      2018-02-08 01:01:42    0.00303281145170331    bad
+    #       3333      2018-02-08 01:00:39    0.00303281145170331    bad
+    #       3333      2018-02-08 00:59:34    0.00303281145170331    bad
+    #       3333      2018-02-08 00:58:31    0.00303281145170331    bad
+    #       3333      2018-02-08 00:57:27    165599.015625          good
+    #       3333      2018-02-08 00:56:23    165599.015625          good
+    #       3333      2018-02-08 00:55:20    165599.015625          good
+    #       3333      2018-02-08 00:54:16    165599.015625          good
+    ####################################################################################################################
+    rows_in_limits = list()
+    for row in rows_energy_values:
+        if row[2] > point['high_limit'] or row[2] < point['low_limit']:
+            bad_list.append((row[0], row[1]))
+        else:
+            rows_in_limits.append(row)
+
+    ####################################################################################################################
+    # Step 4: check bad case class 2 which is in concave shape model.
+    ####################################################################################################################
+    ####################################################################################################################
+    # bad case 2.1
+    # id    point_id  utc_date_time          actual_value       is_bad (expected)
+    #       3333      2018-02-05 04:55:45    146129.015         good
+    #       3333      2018-02-05 04:56:49    146129.015         good
+    #       3333      2018-02-05 04:57:54    146129.015         good
+    #       3333      2018-02-05 05:22:52    145693.015         bad
+    #       3333      2018-02-05 05:25:01    146274             good
+    #       3333      2018-02-05 05:26:03    146274             good
+    #       3333      2018-02-05 05:27:05    146274             good
+    #       3333      2018-02-05 05:29:30    146274             good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 2.2
+    # id    point_id	utc_date_time	    actual_value	is_bad (expected)
+    #       3321	    2018-05-15 15:09:54	33934040         good
+    #       3321	    2018-05-15 15:08:51	33934040         good
+    #       3321	    2018-05-15 15:07:47	33934040         good
+    #       3321	    2018-05-15 15:06:44	33934040         good
+    #       3321	    2018-05-15 15:05:40	33934040         good
+    #       3321	    2018-05-15 15:04:36	33934040         good
+    #       3321	    2018-05-15 09:09:00	33928880	     bad
+    #       3321	    2018-05-15 09:05:23	33933568         good
+    #       3321	    2018-05-15 09:04:20	33933568         good
+    #       3321	    2018-05-15 09:03:16	33933568         good
+    #       3321	    2018-05-15 09:02:13	33933560         good
+    #       3321	    2018-05-15 09:01:09	33933560         good
+    #       3321	    2018-05-15 09:00:04	33933560         good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 2.3
+    # id    point_id	utc_date_time	    actual_value	is_bad (expected)
+    #       554	        2018-05-19 15:32:52	24001            good
+    #       554	        2018-05-19 15:30:45	24001            good
+    #       554	        2018-05-19 15:28:39	24001            good
+    #       554	        2018-05-19 15:26:32	24001            good
+    #       554	        2018-05-19 15:24:25	24001            good
+    #       554	        2018-05-19 15:22:18	24001            good
+    #       554	        2018-05-19 15:20:10	24001            good
+    #       554	        2018-05-19 15:18:04	24001            good
+    #       554	        2018-05-19 15:15:58	24001            good
+    #       554	        2018-05-19 15:13:51	24001            good
+    #       554	        2018-05-19 15:11:43	24001            good
+    #       554	        2018-05-19 15:09:37	24001            good
+    #       554	        2018-05-19 15:07:29	24000            good
+    #       554	        2018-05-19 15:05:22	23000	         bad
+    #       554	        2018-05-19 15:03:14	23999            good
+    #       554	        2018-05-19 15:01:06	23999            good
+    #       554	        2018-05-19 14:58:59	23999            good
+    #       554	        2018-05-19 14:56:52	23998            good
+    #       554	        2018-05-19 14:54:45	23998            good
+    #       554	        2018-05-19 14:52:39	23998            good
+    ####################################################################################################################
+    # todo bad case 2.3.1
+    # "id", "point_id", "utc_date_time", "actual_value", "is_bad" (actual)
+    # 68504700, 2, "2021-01-09 03:40:12.0", 40454414.063, 0
+    # 68507243, 2, "2021-01-09 03:43:12.0", 40454476.563, 0
+    # 68510030, 2, "2021-01-09 03:47:17.0", 40428074.219, 0 ?
+    # 68512573, 2, "2021-01-09 03:50:18.0", 40454621.094, 0
+    # 68515421, 2, "2021-01-09 03:54:23.0", 40454703.125, 0
+    # 68517964, 2, "2021-01-09 03:57:23.0", 40454761.719, 0
+
+    ####################################################################################################################
+    # bad case 2.4
+    # id       point_id utc_date_time          actual_value    is_bad (expected)
+    # 104373141 3336    2018-01-30 03:04:12    216463.015625   good
+    # 104373337 3336    2018-01-30 03:05:15    216463.015625   good
+    # 104373555 3336    2018-01-30 03:06:20    216463.015625   good
+    # 104373750 3336    2018-01-30 03:07:25    192368.015625   bad
+    # 104373957 3336    2018-01-30 03:08:29    192368.015625   bad
+    # 104374175 3336    2018-01-30 03:09:33    192368.015625   bad
+    # 104374382 3336    2018-01-30 03:10:38    192368.015625   bad
+    # 104374604 3336    2018-01-30 03:11:42    192368.015625   bad
+    # 104374792 3336    2018-01-30 03:12:47    192368.015625   bad
+    # 104375010 3336    2018-01-30 03:13:51    192368.015625   bad
+    # 104375200 3336    2018-01-30 03:14:55    192368.015625   bad
+    # 104375418 3336    2018-01-30 03:16:00    192368.015625   bad
+    # 104375617 3336    2018-01-30 03:17:04    192368.015625   bad
+    # 104375837 3336    2018-01-30 03:18:08    192368.015625   bad
+    # 104376023 3336    2018-01-30 03:19:12    192368.015625   bad
+    # 104376216 3336    2018-01-30 03:20:16    192368.015625   bad
+    # 104376435 3336    2018-01-30 03:21:21    192368.015625   bad
+    # 104376634 3336    2018-01-30 03:22:25    192368.015625   bad
+    # 104376853 3336    2018-01-30 03:23:30    192368.015625   bad
+    # 104377071 3336    2018-01-30 03:24:34    192368.015625   bad
+    # 104377274 3336    2018-01-30 03:25:38    192368.015625   bad
+    # 104377501 3336    2018-01-30 03:26:42    216574.015625   good
+    # 104377714 3336    2018-01-30 03:27:47    216574.015625   good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 2.5
+    # id       point_id utc_date_time          actual_value  is_bad (expected)
+    # 104370839 3334    2018-01-30 02:52:23    844966.0625   good
+    # 104371064 3334    2018-01-30 02:53:27    844966.0625   good
+    # 104371261 3334    2018-01-30 02:54:32    844966.0625   good
+    # 104371479 3334    2018-01-30 02:55:36    826142.0625   bad
+    # 104371672 3334    2018-01-30 02:56:41    826142.0625   bad
+    # 104371884 3334    2018-01-30 02:57:45    826142.0625   bad
+    # 104372110 3334    2018-01-30 02:58:49    826142.0625   bad
+    # 104372278 3334    2018-01-30 02:59:54    845019.0625   good
+    # 104372512 3334    2018-01-30 03:00:58    845019.0625   good
+    # 104372704 3334    2018-01-30 03:02:03    845019.0625   good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 2.6
+    # 394084273	1001444	2019-08-22 03:39:44	   38969028      good
+    # 394083709	1001444	2019-08-22 03:38:43    38968876	     good
+    # 394083145	1001444	2019-08-22 03:37:43    28371884      bad
+    # 394082019	1001444	2019-08-22 03:35:42    28371884      bad
+    # 394081456	1001444	2019-08-22 03:34:42    28371884      bad
+    # 394080892	1001444	2019-08-22 03:33:42    28371884      bad
+    # 394079200	1001444	2019-08-22 03:30:38    28371884      bad
+    # 394077511	1001444	2019-08-22 03:27:37    38968408	     good
+    # 394076947	1001444	2019-08-22 03:26:37    38968236	     good
+    # 394076384	1001444	2019-08-22 03:25:37    38968060	     good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # bad case 2.7
+    # id       point_id utc_date_time          actual_value   is_bad (expected)
+    # 17303260 11       2020-3-15 05:43:52     33600          good
+    # 17303399 11       2020-3-15 05:44:58     33600          good
+    # 17303538 11       2020-3-15 05:46:04     33600          good
+    # 17303677 11       2020-3-15 05:47:10     33500          bad
+    # 17303816 11       2020-3-15 05:48:15     33500          bad
+    # 17303955 11       2020-3-15 05:49:21     33600          good
+    # 17304094 11       2020-3-15 05:50:27     33600          good
+    # 17304233 11       2020-3-15 05:51:33     33600          good
+    ####################################################################################################################
+    concave_index_set = set()
+    if len(rows_in_limits) == 2:
+        if rows_in_limits[1][2] < rows_in_limits[0][2]:
+            concave_index_set.add(1)
+    elif len(rows_in_limits) > 2:
+        concave_index_set.update(find_concave_values_by_backend([row[2] for row in rows_in_limits]))
+
+    # the candidate concave values at the end are tagged good, and they are checked again in the look-back of the next
+    # passes, in which they are tagged bad if they are confirmed
+    for i, row in enumerate(rows_in_limits):
+        if i in concave_index_set:
+            bad_list.append((row[0], row[1]))
+        elif row[3] is None:
+            good_list.append((row[0], row[1]))
+
+    ####################################################################################################################
+    # TODO: bad case 2.8
+    # id          point_id utc_date_time          actual_value is_bad (expected)
+    # 105752070    3333    2018-02-04 00:27:15    138144       good
+    # 105752305    3333    2018-02-04 00:28:19    138144       good
+    # 105752523    3333    2018-02-04 00:29:22    138144       good
+    # 105752704    3333    2018-02-04 00:30:26    138144       good
+    # 105752924    3333    2018-02-04 00:31:30    138144       good
+    # 105753138    3333    2018-02-04 00:32:34    138144       good
+    # 105753351    3333    2018-02-04 00:33:38    138144       good
+    # 105753577    3333    2018-02-04 00:34:42    52776558592  bad?
+    # 105753794    3333    2018-02-04 00:35:46    52776558592  bad?
+    # 105753999    3333    2018-02-04 00:36:50    52776558592  bad?
+    # 105754231    3333    2018-02-04 00:37:54    52776558592  bad?
+    # 105754443    3333    2018-02-04 00:38:58    52776558592  bad?
+    # 105754655    3333    2018-02-04 00:40:01    52776558592  bad?
+    # 105754878    3333    2018-02-04 00:41:06    52776558592  bad?
+    # 105755092    3333    2018-02-04 00:42:09    52776558592  bad?
+    # 105755273    3333    2018-02-04 00:43:14    52776558592  bad?
+    # 105755495    3333    2018-02-04 00:44:17    52776558592  bad?
+    # 105755655    3333    2018-02-04 00:45:21    52776558592  bad?
+    # 105755854    3333    2018-02-04 00:46:25    52776558592  bad?
+    # 105756073    3333    2018-02-04 00:47:29    52776558592  bad?
+    # 105756272    3333    2018-02-04 00:48:34    52776558592  bad?
+    # 105756489    3333    2018-02-04 00:49:38    52776558592  bad?
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # TODO: bad case 2.10
+    # id       point_id utc_date_time          actual_value   is_bad (expected)
+    # 106363135 3336    2018-02-06 04:45:57    253079.015625  good
+    # 106363776 3336    2018-02-06 04:49:09    253079.015625  good
+    # 106364381 3336    2018-02-06 04:52:21    253079.015625  good
+    # 106364603 3336    2018-02-06 04:53:25    253079.015625  good
+    # 106365213 3336    2018-02-06 04:56:37    253079.015625  good
+    # 106365634 3336    2018-02-06 04:58:45    253079.015625  good
+    # 106366055 3336    2018-02-06 05:00:53    253079.015625  good
+    # 106367097 3336    2018-02-06 05:06:12    259783.015625  bad?
+    # 106367507 3336    2018-02-06 05:08:21    259783.015625  bad?
+    # 106368318 3336    2018-02-06 05:12:37    259783.015625  bad?
+    # 106368732 3336    2018-02-06 05:14:44    259783.015625  bad?
+    # 106368952 3336    2018-02-06 05:15:48    259783.015625  bad?
+    # 106369145 3336    2018-02-06 05:16:52    259783.015625  bad?
+    # 106369353 3336    2018-02-06 05:17:56    259783.015625  bad?
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # TODO: bad case 2.11
+    # id       point_id utc_date_time          actual_value   is_bad (expected)
+    # 14784589 21	    2020-03-05 07:22:22    17990           good
+    # 14784450 21	    2020-03-05 07:21:17    17990           good
+    # 14784311 21	    2020-03-05 07:20:10    17990           good
+    # 14784172 21	    2020-03-05 07:19:04    17990           good
+    # 14784033 21	    2020-03-05 07:17:58    18990           bad
+    # 14783894 21	    2020-03-05 07:16:52    17990           good
+    # 14783755 21	    2020-03-05 07:15:46    17990           good
+    # 14783616 21	    2020-03-05 07:14:40    17990           good
+    # 14783477 21	    2020-03-05 07:13:34    17990           good
+    # 14783338 21	    2020-03-05 07:12:28    17990           good
+    # 14783199 21	    2020-03-05 07:11:22    17990           good
+    ####################################################################################################################
+
+    ####################################################################################################################
+    # TODO: bad case 2.12
+    # id       point_id utc_date_time          actual_value   is_bad (expected)
+    # 3337308  21       2020-01-07 09:02:18    7990           good
+    # 3337174  21       2020-01-07 09:01:13    7990	          good
+    # 3337040  21       2020-01-07 09:00:08    7990	          good
+    # 3336906  21       2020-01-07 08:59:04    7990	          good
+    # 3336772  21       2020-01-07 08:57:59    7990	          good
+    # 3336638  21       2020-01-07 08:56:54    8990	          bad
+    # 3336504  21       2020-01-07 08:55:49    7990	          good
+    # 3336370  21       2020-01-07 08:54:44    7990	          good
+    # 3336236  21       2020-01-07 08:53:39    7990	          good
+    # 3336102  21       2020-01-07 08:52:34    7990	          good
+    # 3335968  21       2020-01-07 08:51:30    7990	          good
+    ####################################################################################################################
 
-        ################################################################################################################
-        # bad case 2.6
-        # 394084273	1001444	2019-08-22 03:39:44	   38969028      good
-        # 394083709	1001444	2019-08-22 03:38:43    38968876	     good
-        # 394083145	1001444	2019-08-22 03:37:43    28371884      bad
-        # 394082019	1001444	2019-08-22 03:35:42    28371884      bad
-        # 394081456	1001444	2019-08-22 03:34:42    28371884      bad
-        # 394080892	1001444	2019-08-22 03:33:42    28371884      bad
-        # 394079200	1001444	2019-08-22 03:30:38    28371884      bad
-        # 394077511	1001444	2019-08-22 03:27:37    38968408	     good
-        # 394076947	1001444	2019-08-22 03:26:37    38968236	     good
-        # 394076384	1001444	2019-08-22 03:25:37    38968060	     good
-        ################################################################################################################
 
-        ################################################################################################################
-        # bad case 2.7
-        # id       point_id utc_date_time          actual_value   is_bad (expected)
-        # 17303260 11       2020-3-15 05:43:52     33600          good
-        # 17303399 11       2020-3-15 05:44:58     33600          good
-        # 17303538 11       2020-3-15 05:46:04     33600          good
-        # 17303677 11       2020-3-15 05:47:10     33500          bad
-        # 17303816 11       2020-3-15 05:48:15     33500          bad
-        # 17303955 11       2020-3-15 05:49:21     33600          good
-        # 17304094 11       2020-3-15 05:50:27     33600          good
-        # 17304233 11       2020-3-15 05:51:33     33600          good
-        ################################################################################################################
+########################################################################################################################
+# Find the concave values of a point
+# actual_values: list of the actual values in thousandths of the point ordered by utc_date_time
+# Returns: ascending list of the indexes of the concave values
+########################################################################################################################
+def find_concave_values(actual_values):
+    concave_index_list = list()
+    base_actual_value = actual_values[0]
+    candidate_index_list = list()
+    for i in range(len(actual_values)):
+        if actual_values[i] < base_actual_value:
+            # candidate concave value found
+            candidate_index_list.append(i)
+        else:
+            # normal value found
+            if len(candidate_index_list) > 0:
+                # save confirmed concave value(s) to bad value(s)
+                concave_index_list.extend(candidate_index_list)
 
-        try:
-            query = (" SELECT point_id, id, utc_date_time, actual_value "
-                     " FROM tbl_energy_value "
-                     " WHERE utc_date_time >= %s AND utc_date_time <= %s AND (is_bad = 0 OR is_bad IS NULL) "
-                     " ORDER BY point_id, utc_date_time ")
-            cursor_historical.execute(query, (min_datetime, max_datetime,))
-            rows_energy_values = cursor_historical.fetchall()
-        except Exception as e:
-            logger.error("Error in step 3.1 of clean_energy_value.process " + str(e))
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
-            time.sleep(60)
-            continue
+            # prepare for next candidate concave value list
+            base_actual_value = actual_values[i]
+            candidate_index_list.clear()
+    return concave_index_list
 
-        point_value_dict = dict()
-        current_point_value_list = list()
-        current_point_id = 0
-
-        if rows_energy_values is not None and len(rows_energy_values) > 0:
-            for row_energy_value in rows_energy_values:
-                previous_point_id = current_point_id
-                current_point_id = row_energy_value[0]
-                if current_point_id not in point_value_dict.keys():
-                    # new point id found
-                    # save previous point values
-                    if len(current_point_value_list) > 0:
-                        point_value_dict[previous_point_id] = current_point_value_list
-                        current_point_value_list = list()
-
-                    current_point_value_list.append({'id': row_energy_value[1],
-                                                     'actual_value': row_energy_value[3]})
-                else:
-                    current_point_value_list.append({'id': row_energy_value[1],
-                                                     'actual_value': row_energy_value[3]})
-            # end of for loop
-            # save rest point values
-            if len(current_point_value_list) > 0:
-                point_value_dict[current_point_id] = current_point_value_list
-
-        # reinitialize bad list
-        bad_list = list()
-
-        for point_id, point_value_list in point_value_dict.items():
-            if len(point_value_list) <= 1:
-                continue
-            elif len(point_value_list) == 2:
-                if point_value_list[1]['actual_value'] < point_value_list[0]['actual_value']:
-                    bad_list.append(point_value_list[1]['id'])
-                continue
-            else:
-                base_point_value = point_value_list[0]['actual_value']
-                concave_point_value_list = list()
-                for i in range(len(point_value_list)):
-                    if point_value_list[i]['actual_value'] < base_point_value:
-                        # candidate concave value found
-                        concave_point_value_list.append(point_value_list[i]['id'])
-                    else:
-                        # normal value found
-                        if len(concave_point_value_list) > 0:
-                            # save confirmed concave value(s) to bad value(s)
-                            bad_list.extend(concave_point_value_list)
-
-                        # prepare for next candidate concave value list
-                        base_point_value = point_value_list[i]['actual_value']
-                        concave_point_value_list.clear()
-                continue
-
-        print('bad list: ' + str(bad_list))
-        while len(bad_list) > 0:
-            update_100 = bad_list[:100]
-            bad_list = bad_list[100:]
-            try:
-                update = (" UPDATE tbl_energy_value "
-                          " SET is_bad = 1 "
-                          " WHERE id IN (" + ', '.join(map(str, update_100)) + ")")
-                cursor_historical.execute(update, )
-                cnx_historical.commit()
-            except Exception as e:
-                logger.error("Error in step 3.2 of clean_energy_value.process " + str(e))
-                if cursor_historical:
-                    cursor_historical.close()
-                if cnx_historical:
-                    cnx_historical.close()
-                time.sleep(60)
-                continue
 
-        ################################################################################################################
-        # TODO: bad case 2.8
-        # id          point_id utc_date_time          actual_value is_bad (expected)
-        # 105752070    3333    2018-02-04 00:27:15    138144       good
-        # 105752305    3333    2018-02-04 00:28:19    138144       good
-        # 105752523    3333    2018-02-04 00:29:22    138144       good
-        # 105752704    3333    2018-02-04 00:30:26    138144       good
-        # 105752924    3333    2018-02-04 00:31:30    138144       good
-        # 105753138    3333    2018-02-04 00:32:34    138144       good
-        # 105753351    3333    2018-02-04 00:33:38    138144       good
-        # 105753577    3333    2018-02-04 00:34:42    52776558592  bad?
-        # 105753794    3333    2018-02-04 00:35:46    52776558592  bad?
-        # 105753999    3333    2018-02-04 00:36:50    52776558592  bad?
-        # 105754231    3333    2018-02-04 00:37:54    52776558592  bad?
-        # 105754443    3333    2018-02-04 00:38:58    52776558592  bad?
-        # 105754655    3333    2018-02-04 00:40:01    52776558592  bad?
-        # 105754878    3333    2018-02-04 00:41:06    52776558592  bad?
-        # 105755092    3333    2018-02-04 00:42:09    52776558592  bad?
-        # 105755273    3333    2018-02-04 00:43:14    52776558592  bad?
-        # 105755495    3333    2018-02-04 00:44:17    52776558592  bad?
-        # 105755655    3333    2018-02-04 00:45:21    52776558592  bad?
-        # 105755854    3333    2018-02-04 00:46:25    52776558592  bad?
-        # 105756073    3333    2018-02-04 00:47:29    52776558592  bad?
-        # 105756272    3333    2018-02-04 00:48:34    52776558592  bad?
-        # 105756489    3333    2018-02-04 00:49:38    52776558592  bad?
-        ################################################################################################################
+########################################################################################################################
+# Find the concave values of a point with NumPy
+# Returns: the same as find_concave_values
+# NOTE: the base value is replaced only by a value not less than it, so it is the running maximum of the values, and the
+# candidate concave values are the values less than the running maximum. All candidates before the last normal value
+# are confirmed, and the candidates after it are left to the next passes
+########################################################################################################################
+def find_concave_values_numpy(actual_values):
+    values = np.fromiter(actual_values, dtype=np.int64, count=len(actual_values))
+    is_candidate = values < np.maximum.accumulate(values)
+    # the first value is never a candidate, so there is always a normal value
+    last_normal_index = np.flatnonzero(~is_candidate)[-1]
+    return np.flatnonzero(is_candidate[:last_normal_index]).tolist()
 
-        ################################################################################################################
-        # TODO: bad case 2.10
-        # id       point_id utc_date_time          actual_value   is_bad (expected)
-        # 106363135 3336    2018-02-06 04:45:57    253079.015625  good
-        # 106363776 3336    2018-02-06 04:49:09    253079.015625  good
-        # 106364381 3336    2018-02-06 04:52:21    253079.015625  good
-        # 106364603 3336    2018-02-06 04:53:25    253079.015625  good
-        # 106365213 3336    2018-02-06 04:56:37    253079.015625  good
-        # 106365634 3336    2018-02-06 04:58:45    253079.015625  good
-        # 106366055 3336    2018-02-06 05:00:53    253079.015625  good
-        # 106367097 3336    2018-02-06 05:06:12    259783.015625  bad?
-        # 106367507 3336    2018-02-06 05:08:21    259783.015625  bad?
-        # 106368318 3336    2018-02-06 05:12:37    259783.015625  bad?
-        # 106368732 3336    2018-02-06 05:14:44    259783.015625  bad?
-        # 106368952 3336    2018-02-06 05:15:48    259783.015625  bad?
-        # 106369145 3336    2018-02-06 05:16:52    259783.015625  bad?
-        # 106369353 3336    2018-02-06 05:17:56    259783.015625  bad?
-        ################################################################################################################
 
-        ################################################################################################################
-        # TODO: bad case 2.11
-        # id       point_id utc_date_time          actual_value   is_bad (expected)
-        # 14784589 21	    2020-03-05 07:22:22    17990           good
-        # 14784450 21	    2020-03-05 07:21:17    17990           good
-        # 14784311 21	    2020-03-05 07:20:10    17990           good
-        # 14784172 21	    2020-03-05 07:19:04    17990           good
-        # 14784033 21	    2020-03-05 07:17:58    18990           bad
-        # 14783894 21	    2020-03-05 07:16:52    17990           good
-        # 14783755 21	    2020-03-05 07:15:46    17990           good
-        # 14783616 21	    2020-03-05 07:14:40    17990           good
-        # 14783477 21	    2020-03-05 07:13:34    17990           good
-        # 14783338 21	    2020-03-05 07:12:28    17990           good
-        # 14783199 21	    2020-03-05 07:11:22    17990           good
-        ################################################################################################################
+########################################################################################################################
+# Find the concave values of a point by the backend selected in config.cleaning_backend
+# Falls back to the pure Python procedure if NumPy is not installed
+########################################################################################################################
+def find_concave_values_by_backend(actual_values):
+    if config.cleaning_backend == 'numpy' and np is not None:
+        return find_concave_values_numpy(actual_values)
+    return find_concave_values(actual_values)
 
-        ################################################################################################################
-        # TODO: bad case 2.12
-        # id       point_id utc_date_time          actual_value   is_bad (expected)
-        # 3337308  21       2020-01-07 09:02:18    7990           good
-        # 3337174  21       2020-01-07 09:01:13    7990	          good
-        # 3337040  21       2020-01-07 09:00:08    7990	          good
-        # 3336906  21       2020-01-07 08:59:04    7990	          good
-        # 3336772  21       2020-01-07 08:57:59    7990	          good
-        # 3336638  21       2020-01-07 08:56:54    8990	          bad
-        # 3336504  21       2020-01-07 08:55:49    7990	          good
-        # 3336370  21       2020-01-07 08:54:44    7990	          good
-        # 3336236  21       2020-01-07 08:53:39    7990	          good
-        # 3336102  21       2020-01-07 08:52:34    7990	          good
-        # 3335968  21       2020-01-07 08:51:30    7990	          good
-        ################################################################################################################
-        # Step 4: tag the is_bad property of energy values.
-        ################################################################################################################
-        try:
+
+########################################################################################################################
+# Get the cleaning watermarks of the points
+# Returns: dict of point id to the date time of the latest checked energy value of the point
+# NOTE: the watermark of a point without watermark, such as a new point or a point cleaned before the watermarks were
+# introduced, is the date time of the latest checked energy value of the point in tbl_energy_value, or the start
+# datetime in config file if there isn't any, and it is saved at once so it is looked up only once
+########################################################################################################################
+def get_watermarks(cnx_historical, cursor_historical, point_id_list):
+    watermark_dict = dict()
+    cursor_historical.execute(" SELECT point_id, last_utc_date_time "
+                              " FROM tbl_energy_value_cleaning_watermarks ")
+    for row in cursor_historical.fetchall():
+        watermark_dict[row[0]] = row[1]
+
+    new_watermark_dict = dict()
+    new_point_id_list = sorted(point_id for point_id in point_id_list if point_id not in watermark_dict)
+    while len(new_point_id_list) > 0:
+        query_point_id_list = new_point_id_list[:id_chunk_size]
+        new_point_id_list = new_point_id_list[id_chunk_size:]
+        cursor_historical.execute(" SELECT point_id, MAX(utc_date_time) "
+                                  " FROM tbl_energy_value "
+                                  " WHERE point_id IN (" + ", ".join(["%s"] * len(query_point_id_list)) + ") "
+                                  "       AND is_bad IS NOT NULL "
+                                  " GROUP BY point_id ",
+                                  tuple(query_point_id_list))
+        for row in cursor_historical.fetchall():
+            if isinstance(row[1], datetime):
+                new_watermark_dict[row[0]] = row[1]
+
+    start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
+    for point_id in point_id_list:
+        if point_id not in watermark_dict and point_id not in new_watermark_dict:
+            new_watermark_dict[point_id] = start_datetime_utc
+
+    save_watermarks(cnx_historical, cursor_historical, new_watermark_dict)
+    watermark_dict.update(new_watermark_dict)
+    return watermark_dict
+
+
+########################################################################################################################
+# Save the cleaning watermarks of the points
+########################################################################################################################
+def save_watermarks(cnx_historical, cursor_historical, watermark_dict):
+    if len(watermark_dict) == 0:
+        return
+    cursor_historical.executemany(" INSERT INTO tbl_energy_value_cleaning_watermarks (point_id, last_utc_date_time) "
+                                  " VALUES (%s, %s) "
+                                  " ON DUPLICATE KEY UPDATE last_utc_date_time = VALUES(last_utc_date_time) ",
+                                  sorted(watermark_dict.items()))
+    cnx_historical.commit()
+
+
+########################################################################################################################
+# Tag the is_bad property of energy values
+# bad_list, good_list: list of (id, utc_date_time) of energy values, which are emptied after tagged
+# NOTE: the date times bound the updates to the partitions of the energy values
+########################################################################################################################
+def tag_energy_values(cnx_historical, cursor_historical, bad_list, good_list):
+    for is_bad, value_list in ((1, bad_list), (0, good_list)):
+        while len(value_list) > 0:
+            update_list = value_list[:update_chunk_size]
+            del value_list[:update_chunk_size]
             update = (" UPDATE tbl_energy_value "
-                      " SET is_bad = 0 "
-                      " WHERE utc_date_time >= %s AND utc_date_time < %s AND is_bad IS NULL ")
-            # NOTE: use '<' instead of '<=' in WHERE statement because there may be some new inserted values
-            cursor_historical.execute(update, (min_datetime, max_datetime,))
-            cnx_historical.commit()
-        except Exception as e:
-            logger.error("Error in step 4 of clean_energy_value.process " + str(e))
-            time.sleep(60)
-            continue
-        finally:
-            if cursor_historical:
-                cursor_historical.close()
-            if cnx_historical:
-                cnx_historical.close()
+                      " SET is_bad = %s "
+                      " WHERE id IN (" + ", ".join(["%s"] * len(update_list)) + ") "
+                      "       AND utc_date_time >= %s AND utc_date_time <= %s ")
+            cursor_historical.execute(update, (is_bad, ) + tuple(value[0] for value in update_list) +
+                                      (min(value[1] for value in update_list),
+                                       max(value[1] for value in update_list)))
+    cnx_historical.commit()
+
 
-        time.sleep(900)
+########################################################################################################################
+# Close the connections to the historical database
+########################################################################################################################
+def close_connections(cnx_historical, cursor_historical, cnx_historical_update, cursor_historical_update):
+    if cursor_historical:
+        cursor_historical.close()
+    if cnx_historical:
+        cnx_historical.close()
+    if cursor_historical_update:
+        cursor_historical_update.close()
+    if cnx_historical_update:
+        cnx_historical_update.close()
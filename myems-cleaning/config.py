@@ -17,12 +17,62 @@ myems_historical_db = {
     'password': config('MYEMS_HISTORICAL_DB_PASSWORD', default='!MyEMS1'),
 }
 
+myems_energy_db = {
+    'host': config('MYEMS_ENERGY_DB_HOST', default='127.0.0.1'),
+    'port': config('MYEMS_ENERGY_DB_PORT', default=3306, cast=int),
+    'database': config('MYEMS_ENERGY_DB_DATABASE', default='myems_energy_db'),
+    'user': config('MYEMS_ENERGY_DB_USER', default='root'),
+    'password': config('MYEMS_ENERGY_DB_PASSWORD', default='!MyEMS1'),
+}
+
+myems_billing_db = {
+    'host': config('MYEMS_BILLING_DB_HOST', default='127.0.0.1'),
+    'port': config('MYEMS_BILLING_DB_PORT', default=3306, cast=int),
+    'database': config('MYEMS_BILLING_DB_DATABASE', default='myems_billing_db'),
+    'user': config('MYEMS_BILLING_DB_USER', default='root'),
+    'password': config('MYEMS_BILLING_DB_PASSWORD', default='!MyEMS1'),
+}
+
+myems_carbon_db = {
+    'host': config('MYEMS_CARBON_DB_HOST', default='127.0.0.1'),
+    'port': config('MYEMS_CARBON_DB_PORT', default=3306, cast=int),
+    'database': config('MYEMS_CARBON_DB_DATABASE', default='myems_carbon_db'),
+    'user': config('MYEMS_CARBON_DB_USER', default='root'),
+    'password': config('MYEMS_CARBON_DB_PASSWORD', default='!MyEMS1'),
+}
+
 # indicates how long analog values and digital values will be kept in database
 # the longer days the more memory and disc space needed.
 # NOTE: By default, energy values in historical db will never be deleted automatically.
 live_in_days = config('LIVE_IN_DAYS', default=365, cast=int)
 
-# indicates from when (in UTC timezone) to clean if all is_bad properties are null
+# indicates where to archive the historical point data as Parquet files, such as /var/lib/myems/archive
+# the archive is disabled if it is empty, and it requires pyarrow to be installed
+# NOTE: the archive path should be shared with myems-normalization and myems-api, which read the archived data
+archive_path = config('ARCHIVE_PATH', default='')
+
+# indicates after how many days the closed months of energy values, analog values and digital values are moved from
+# database to the archive
+# NOTE: it should be less than live_in_days, otherwise analog values and digital values are deleted before archived
+archive_after_days = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# indicates how many months of partitions are created in advance of the current month on the partitioned tables
+# the historical tables and the hourly tables are partitioned by month, see partition_manager.py
+partition_months_ahead = config('PARTITION_MONTHS_AHEAD', default=3, cast=int)
+
+# indicates how many minutes of energy values before the cleaning watermark of every point are checked again
+# the concave values are confirmed in the look-back, and the energy values arriving later than it are never checked
+clean_look_back_minutes = config('CLEAN_LOOK_BACK_MINUTES', default=60, cast=int)
+
+# indicates how many seconds to wait between the passes of cleaning energy values
+clean_interval_seconds = config('CLEAN_INTERVAL_SECONDS', default=60, cast=int)
+
+# indicates which backend finds the concave values in cleaning energy values
+# python for the pure Python implementation
+# numpy for the vectorized implementation, requires numpy to be installed, otherwise falls back to python
+cleaning_backend = config('CLEANING_BACKEND', default='python')
+
+# indicates from when (in UTC timezone) to clean the points which have never been cleaned
 # format string: "%Y-%m-%d %H:%M:%S"
 start_datetime_utc = config('START_DATETIME_UTC', default='2021-12-31 16:00:00')
 
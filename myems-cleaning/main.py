@@ -2,9 +2,11 @@ import logging
 from logging.handlers import RotatingFileHandler
 from multiprocessing import Process
 
+import archive_value
 import clean_analog_value
 import clean_digital_value
 import clean_energy_value
+import partition_manager
 
 
 def main():
@@ -32,6 +34,10 @@ def main():
     Process(target=clean_digital_value.process, args=(logger,)).start()
     # clean energy values
     Process(target=clean_energy_value.process, args=(logger,)).start()
+    # archive closed months of energy values, analog values and digital values
+    Process(target=archive_value.process, args=(logger,)).start()
+    # maintain monthly partitions of historical tables and hourly tables
+    Process(target=partition_manager.process, args=(logger,)).start()
 
 
 if __name__ == '__main__':
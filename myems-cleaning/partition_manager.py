@@ -0,0 +1,389 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+import schedule
+
+import archive_value
+import config
+
+
+# the historical tables partitioned by utc_date_time,
+# and the hourly tables in energy, billing and carbon databases are partitioned by start_datetime_utc
+historical_table_name_list = ['tbl_energy_value', 'tbl_analog_value', 'tbl_digital_value']
+
+# the tables of analog values and digital values expire after live_in_days
+expiring_table_name_list = ['tbl_analog_value', 'tbl_digital_value']
+
+# the maximum number of ids copied in one statement when converting a table
+copy_batch_size = 100000
+
+# the ids reserved for the rows inserted into the old table while it is renamed when converting a table
+auto_increment_gap = 1000000
+
+# the maximum number of rows in pmax reorganized by the scheduled job, such as the rows inserted into a new table
+# before the first run, because the rows in pmax are copied while REORGANIZE PARTITION locks the table
+max_pmax_row_count = 10000
+
+
+########################################################################################################################
+# This procedure maintains the monthly RANGE partitions of the historical tables and the hourly tables.
+#
+# Every partitioned table has a partition of every month, such as p202401 holding the rows before 2024-02-01,
+# and the last partition pmax holding the rows after all months.
+#
+# Step 1: get the partitioned tables of every database, the tables not partitioned are skipped.
+# Step 2: create the partitions of the months up to partition_months_ahead months after the current month by
+#         reorganizing pmax. REORGANIZE PARTITION copies the rows of pmax into the new partitions, and the table is
+#         locked meanwhile. pmax is empty in the tables converted by this procedure as long as the job runs every
+#         month, but it holds all rows of a new table before the first run, or the rows after the last month if the
+#         job stopped for months. So pmax is reorganized by the job only if it holds no more than max_pmax_row_count
+#         rows, or else an error is logged and the table is left to
+#           python3 partition_manager.py DATABASE_NAME --reorganize
+#         run with the services writing the table stopped.
+# Step 3: drop the partitions of the historical tables, in which all rows expired after live_in_days, or all rows
+#         were moved to the archive by archive_value.
+#
+# NOTE: the existing tables are converted to partitioned tables online by
+#   python3 partition_manager.py historical
+#   python3 partition_manager.py energy
+#   python3 partition_manager.py billing
+#   python3 partition_manager.py carbon
+########################################################################################################################
+
+def job(logger):
+    for database_name, database in (('historical', config.myems_historical_db),
+                                    ('energy', config.myems_energy_db),
+                                    ('billing', config.myems_billing_db),
+                                    ('carbon', config.myems_carbon_db)):
+        cnx = None
+        cursor = None
+        try:
+            cnx = mysql.connector.connect(**database)
+            cursor = cnx.cursor()
+
+            ############################################################################################################
+            # Step 1: get the partitioned tables of every database.
+            ############################################################################################################
+            for table_name, column_name in get_table_list(cursor, database_name):
+                partition_list = get_partitions(cursor, database['database'], table_name)
+                if len(partition_list) == 0:
+                    continue
+
+                ########################################################################################################
+                # Step 2: create the partitions of the months up to partition_months_ahead months after the current
+                # month.
+                ########################################################################################################
+                error_string = add_partitions(cursor, database_name, table_name, column_name, partition_list, False)
+                if error_string is not None:
+                    logger.error(error_string)
+
+                ########################################################################################################
+                # Step 3: drop the partitions of the historical tables, in which all rows expired or were archived.
+                ########################################################################################################
+                if database_name == 'historical':
+                    drop_partitions(cursor, table_name, partition_list)
+        except Exception as e:
+            logger.error("Error in partition manager process " + database_name + " " + str(e))
+        finally:
+            if cursor:
+                cursor.close()
+            if cnx:
+                cnx.close()
+
+
+########################################################################################################################
+# Get the tables to partition of a database
+# Returns: list of (table name, name of the column partitioned by)
+########################################################################################################################
+def get_table_list(cursor, database_name):
+    if database_name == 'historical':
+        return [(table_name, 'utc_date_time') for table_name in historical_table_name_list]
+
+    cursor.execute(" SELECT TABLE_NAME "
+                   " FROM information_schema.TABLES "
+                   " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME LIKE %s "
+                   " ORDER BY TABLE_NAME ", ('tbl\\_%\\_hourly', ))
+    return [(row[0], 'start_datetime_utc') for row in cursor.fetchall()]
+
+
+########################################################################################################################
+# Get the partitions of a table
+# Returns: list of (partition name, the datetime the rows of the partition are less than, or None for pmax) in order,
+#          or an empty list if the table isn't partitioned
+########################################################################################################################
+def get_partitions(cursor, schema_name, table_name):
+    cursor.execute(" SELECT PARTITION_NAME, PARTITION_DESCRIPTION "
+                   " FROM information_schema.PARTITIONS "
+                   " WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+                   " ORDER BY PARTITION_ORDINAL_POSITION ", (schema_name, table_name))
+    partition_list = list()
+    for row in cursor.fetchall():
+        if row[1] == 'MAXVALUE':
+            partition_list.append((row[0], None))
+        else:
+            partition_list.append((row[0], datetime.strptime(row[1].strip("'"), '%Y-%m-%d %H:%M:%S')))
+    return partition_list
+
+
+########################################################################################################################
+# Get the definitions of the monthly partitions
+# month_start_datetime_utc: the start datetime of the first month
+# end_datetime_utc: the datetime the rows of the last partition are less than
+# Returns: the definitions of the partitions separated by comma, followed by pmax
+########################################################################################################################
+def get_partition_definitions(month_start_datetime_utc, end_datetime_utc):
+    definition_list = list()
+    while month_start_datetime_utc < end_datetime_utc:
+        month_end_datetime_utc = archive_value.get_next_month(month_start_datetime_utc)
+        definition_list.append("PARTITION p" + month_start_datetime_utc.strftime('%Y%m') +
+                               " VALUES LESS THAN ('" + month_end_datetime_utc.isoformat(' ') + "')")
+        month_start_datetime_utc = month_end_datetime_utc
+    definition_list.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ", ".join(definition_list)
+
+
+########################################################################################################################
+# Get the datetime the rows of the last partition are less than, partition_months_ahead months after the current month
+########################################################################################################################
+def get_partitions_end_datetime():
+    end_datetime_utc = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(config.partition_months_ahead + 1):
+        end_datetime_utc = archive_value.get_next_month(end_datetime_utc)
+    return end_datetime_utc
+
+
+########################################################################################################################
+# Create the partitions of the months after the last monthly partition by reorganizing pmax
+# is_forced: reorganize pmax even if it holds more than max_pmax_row_count rows
+# Returns: None or the error string
+########################################################################################################################
+def add_partitions(cursor, database_name, table_name, column_name, partition_list, is_forced):
+    end_datetime_utc = get_partitions_end_datetime()
+    bound_list = [bound for _, bound in partition_list if bound is not None]
+    if len(bound_list) > 0:
+        month_start_datetime_utc = max(bound_list)
+    else:
+        # all rows are in pmax, such as in a new table
+        cursor.execute(" SELECT MIN(" + column_name + ") FROM " + table_name)
+        row = cursor.fetchone()
+        month_start_datetime_utc = row[0] if row is not None and isinstance(row[0], datetime) else datetime.utcnow()
+        month_start_datetime_utc = month_start_datetime_utc.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    if month_start_datetime_utc >= end_datetime_utc:
+        return None
+
+    # the rows in pmax are copied while the table is locked, so a large pmax is only reorganized with is_forced
+    cursor.execute(" SELECT COUNT(*) "
+                   " FROM (SELECT 1 FROM " + table_name + " PARTITION (pmax) LIMIT %s) t ",
+                   (max_pmax_row_count + 1, ))
+    if cursor.fetchone()[0] > max_pmax_row_count and not is_forced:
+        return ("Error in partition manager add_partitions, more than " + str(max_pmax_row_count) + " rows are in "
+                "pmax of " + table_name + ", stop the services writing the table and run "
+                "python3 partition_manager.py " + database_name + " " + table_name + " --reorganize")
+
+    cursor.execute(" ALTER TABLE " + table_name + " REORGANIZE PARTITION pmax INTO (" +
+                   get_partition_definitions(month_start_datetime_utc, end_datetime_utc) + ") ")
+    print("Created partitions of " + table_name + " from " + month_start_datetime_utc.strftime('%Y-%m') +
+          " to " + end_datetime_utc.strftime('%Y-%m'))
+    return None
+
+
+########################################################################################################################
+# Drop the monthly partitions of a historical table, in which all rows expired after live_in_days, or all rows were
+# moved to the archive by archive_value
+########################################################################################################################
+def drop_partitions(cursor, table_name, partition_list):
+    expired_datetime_utc = datetime.utcnow() - timedelta(days=config.live_in_days)
+    current_month_start_datetime_utc = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for partition_name, bound in partition_list:
+        # the current month and the months after it are never dropped
+        if bound is None or bound > current_month_start_datetime_utc:
+            continue
+
+        if table_name in expiring_table_name_list and bound <= expired_datetime_utc:
+            is_dropped = True
+        else:
+            month_start_datetime_utc = datetime.strptime(partition_name[1:], '%Y%m')
+            if not archive_value.is_archived(table_name, month_start_datetime_utc):
+                continue
+            # the rows inserted after the month was archived are kept to the next run of archive_value
+            cursor.execute(" SELECT 1 FROM " + table_name + " PARTITION (" + partition_name + ") LIMIT 1 ")
+            is_dropped = cursor.fetchone() is None
+
+        if is_dropped:
+            cursor.execute(" ALTER TABLE " + table_name + " DROP PARTITION " + partition_name)
+            print("Dropped partition " + partition_name + " of " + table_name)
+
+
+########################################################################################################################
+# Convert a table to a partitioned table online
+#
+# Step 1: create the partitioned table <table name>_partitioned with the primary key including the column partitioned
+#         by, and the monthly partitions from the month of the oldest row.
+# Step 2: copy the rows of the table into the partitioned table in batches, from the oldest to the latest, and then
+#         the rows inserted meanwhile, until less than copy_batch_size rows are left to copy.
+# Step 3: reserve the ids after the ids of the table, and swap the partitioned table and the table in one RENAME TABLE
+#         statement, after which the new rows are inserted into the partitioned table.
+# Step 4: copy the rows inserted into the old table between step 2 and step 3.
+#
+# NOTE: the readers of the table, such as the reports, read all rows during the conversion, except the rows inserted
+# in the last seconds before the swap, which are missing until step 4.
+# NOTE: the conversion resumes from the copied rows if it is interrupted, and the old table is renamed to
+# <table name>_unpartitioned, which is to be dropped after checking the converted table.
+# NOTE: the rows updated or deleted after they are copied are not converted, stop the services updating or deleting
+# the rows of the table during the conversion, such as myems-cleaning and the data repair files for historical tables,
+# and the offline meter files and backfill of myems-aggregation for hourly tables.
+########################################################################################################################
+def convert_table(cnx, cursor, schema_name, table_name, column_name):
+    new_table_name = table_name + '_partitioned'
+    old_table_name = table_name + '_unpartitioned'
+    if not is_table_existing(cursor, schema_name, old_table_name):
+        if not is_table_existing(cursor, schema_name, new_table_name):
+            if len(get_partitions(cursor, schema_name, table_name)) > 0:
+                print(table_name + " is partitioned")
+                return
+
+            ############################################################################################################
+            # Step 1: create the partitioned table.
+            ############################################################################################################
+            cursor.execute(" SELECT MIN(" + column_name + ") FROM " + table_name)
+            row = cursor.fetchone()
+            month_start_datetime_utc = row[0] if isinstance(row[0], datetime) else datetime.utcnow()
+            month_start_datetime_utc = month_start_datetime_utc.replace(day=1, hour=0, minute=0, second=0,
+                                                                        microsecond=0)
+
+            cursor.execute(" CREATE TABLE " + new_table_name + " LIKE " + table_name)
+            cursor.execute(" ALTER TABLE " + new_table_name +
+                           " DROP PRIMARY KEY, ADD PRIMARY KEY (id, " + column_name + ") ")
+            cursor.execute(" ALTER TABLE " + new_table_name +
+                           " PARTITION BY RANGE COLUMNS(" + column_name + ") (" +
+                           get_partition_definitions(month_start_datetime_utc, get_partitions_end_datetime()) + ") ")
+            print("Created " + new_table_name)
+
+        ################################################################################################################
+        # Step 2: copy the rows of the table into the partitioned table, and then the rows inserted meanwhile.
+        ################################################################################################################
+        while True:
+            cursor.execute(" SELECT MAX(id) FROM " + table_name)
+            max_id = cursor.fetchone()[0]
+            if max_id is None or max_id - get_copied_max_id(cursor, new_table_name, max_id) < copy_batch_size:
+                break
+            copy_rows(cnx, cursor, table_name, new_table_name, max_id)
+
+        ################################################################################################################
+        # Step 3: swap the partitioned table and the table.
+        ################################################################################################################
+        cursor.execute(" SELECT MAX(id) FROM " + table_name)
+        max_id = cursor.fetchone()[0]
+        cursor.execute(" ALTER TABLE " + new_table_name +
+                       " AUTO_INCREMENT = " + str((max_id if max_id is not None else 0) + auto_increment_gap))
+        cursor.execute(" RENAME TABLE " + table_name + " TO " + old_table_name + ", " +
+                       new_table_name + " TO " + table_name)
+        print("Renamed " + table_name + " to " + old_table_name)
+
+    ####################################################################################################################
+    # Step 4: copy the rows inserted into the old table between step 2 and step 3.
+    ####################################################################################################################
+    cursor.execute(" SELECT MAX(id) FROM " + old_table_name)
+    max_id = cursor.fetchone()[0]
+    if max_id is not None:
+        copy_rows(cnx, cursor, old_table_name, table_name, max_id)
+
+    print("Converted " + table_name + ", drop " + old_table_name + " after checking " + table_name)
+
+
+########################################################################################################################
+# Check if a table exists
+########################################################################################################################
+def is_table_existing(cursor, schema_name, table_name):
+    cursor.execute(" SELECT COUNT(*) "
+                   " FROM information_schema.TABLES "
+                   " WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ", (schema_name, table_name))
+    return cursor.fetchone()[0] > 0
+
+
+########################################################################################################################
+# Get the latest id copied into the target table up to max_id, the ids after max_id are of the rows inserted into the
+# target table after the swap
+# Returns: the latest id copied, or 0 if no row is copied
+########################################################################################################################
+def get_copied_max_id(cursor, target_table_name, max_id):
+    cursor.execute(" SELECT MAX(id) FROM " + target_table_name + " WHERE id <= %s ", (max_id, ))
+    row = cursor.fetchone()
+    return row[0] if row is not None and row[0] is not None else 0
+
+
+########################################################################################################################
+# Copy the rows of the source table up to max_id into the target table in batches of ids, from the oldest to the
+# latest, resuming from the latest copied row
+########################################################################################################################
+def copy_rows(cnx, cursor, source_table_name, target_table_name, max_id):
+    lower_id = get_copied_max_id(cursor, target_table_name, max_id) + 1
+    cursor.execute(" SELECT MIN(id) FROM " + source_table_name + " WHERE id >= %s ", (lower_id, ))
+    row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return
+    lower_id = row[0]
+
+    while lower_id <= max_id:
+        upper_id = min(max_id, lower_id + copy_batch_size - 1)
+        cursor.execute(" INSERT INTO " + target_table_name +
+                       " SELECT * FROM " + source_table_name + " WHERE id >= %s AND id <= %s ", (lower_id, upper_id))
+        cnx.commit()
+        print("Copied rows of " + source_table_name + " from id " + str(lower_id) + " to " + str(upper_id))
+        lower_id = upper_id + 1
+
+
+def process(logger):
+
+    if config.is_debug:
+        # run the job immediately
+        job(logger)
+        return
+
+    # create the partitions of the new tables at once
+    job(logger)
+    schedule.every(1).days.do(job, logger)
+
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the historical tables or the hourly tables of a database to '
+                                                 'monthly partitioned tables online')
+    parser.add_argument('database_name', choices=['historical', 'energy', 'billing', 'carbon'])
+    parser.add_argument('table_names', nargs='*', help='the tables to convert, all tables if not specified')
+    parser.add_argument('--reorganize', action='store_true',
+                        help='create the partitions of the partitioned tables by reorganizing pmax instead, even if '
+                             'it holds many rows, with the services writing the tables stopped')
+    args = parser.parse_args()
+
+    database = {'historical': config.myems_historical_db,
+                'energy': config.myems_energy_db,
+                'billing': config.myems_billing_db,
+                'carbon': config.myems_carbon_db}[args.database_name]
+    cnx = mysql.connector.connect(**database)
+    cursor = cnx.cursor()
+    try:
+        for table_name, column_name in get_table_list(cursor, args.database_name):
+            if len(args.table_names) > 0 and table_name not in args.table_names:
+                continue
+            if args.reorganize:
+                partition_list = get_partitions(cursor, database['database'], table_name)
+                if len(partition_list) == 0:
+                    print(table_name + " isn't partitioned")
+                    continue
+                add_partitions(cursor, args.database_name, table_name, column_name, partition_list, True)
+            else:
+                convert_table(cnx, cursor, database['database'], table_name, column_name)
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == '__main__':
+    main()
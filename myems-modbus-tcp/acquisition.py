@@ -4,11 +4,11 @@ import telnetlib3
 import asyncio
 import time
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 import mysql.connector
-from modbus_tk import modbus_tcp
 import config
-from byte_swap import byte_swap_32_bit, byte_swap_64_bit
+import modbus_engine
+import planner
 
 
 ########################################################################################################################
@@ -19,12 +19,64 @@ async def check_connectivity(host, port):
     # Close the connection
     writer.close()
 
+
+########################################################################################################################
+# Load the base values of energy value points for inline cleaning
+# The base value of a point is its latest good value, and it is updated with the values checked good at ingest
+# NOTE: the points are loaded in one query of every 100 points, in which every point is a subquery of its latest good
+# value, so that the index of point_id and utc_date_time is scanned backward from the latest value of every point
+# instead of scanning all values of the points for MAX(utc_date_time) of the good values
+########################################################################################################################
+def load_base_values(cursor_historical_db, point_list):
+    energy_point_list = list()
+    for point in point_list:
+        if point['object_type'] != 'ENERGY_VALUE' or not point['is_trend']:
+            continue
+        point['base_value'] = None
+        energy_point_list.append(point)
+
+    while len(energy_point_list) > 0:
+        energy_point_list_100 = energy_point_list[:100]
+        energy_point_list = energy_point_list[100:]
+        query = " UNION ALL ".join(["(SELECT point_id, actual_value "
+                                    " FROM tbl_energy_value "
+                                    " WHERE point_id = %s AND is_bad = 0 "
+                                    " ORDER BY utc_date_time DESC "
+                                    " LIMIT 1)"] * len(energy_point_list_100))
+        cursor_historical_db.execute(query, tuple(point['id'] for point in energy_point_list_100))
+        base_value_dict = dict(cursor_historical_db.fetchall())
+        for point in energy_point_list_100:
+            point['base_value'] = base_value_dict.get(point['id'])
+
+
+########################################################################################################################
+# Check an energy value at ingest with the same rules as clean_energy_value of myems-cleaning
+# Returns: 1 if the value is out of the high limit and the low limit of the point,
+#          0 if the value is not less than the base value of the point, which becomes the new base value,
+#          or None if the value is less than the base value, which is a candidate concave value,
+#          and it is left to myems-cleaning to confirm it bad with the next values
+# NOTE: the value is rounded as it is stored in database, so it is compared in the same way as in myems-cleaning
+########################################################################################################################
+def check_energy_value(point, actual_value):
+    actual_value = actual_value.quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)
+    if actual_value > point['high_limit'] or actual_value < point['low_limit']:
+        return 1
+    if point['base_value'] is not None and actual_value < point['base_value']:
+        return None
+    point['base_value'] = actual_value
+    return 0
+
+
 ########################################################################################################################
 # Acquisition Procedures
 # Step 1: Check connectivity to the host and port
-# Step 2: Get point list
-# Step 3: Read point values from Modbus slaves
+# Step 2: Get point list, and parse the addresses of the points
+# Step 3: Read point values from Modbus slaves concurrently, and check energy values if inline cleaning is enabled
 # Step 4: Bulk insert point values and update latest values in historical database
+#
+# NOTE: if inline cleaning is enabled, the is_bad properties of energy values are set at ingest with the same rules as
+# clean_energy_value of myems-cleaning, which then only tags the values left unchecked, such as the candidate concave
+# values and the values inserted late by other services, instead of updating all energy values
 ########################################################################################################################
 
 
@@ -45,7 +97,7 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             continue
 
         ################################################################################################################
-        # Step 2: Get point list
+        # Step 2: Get point list, and parse the addresses of the points
         ################################################################################################################
         cnx_system_db = None
         cursor_system_db = None
@@ -63,7 +115,7 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             continue
 
         try:
-            query = (" SELECT id, name, object_type, is_trend, ratio, address "
+            query = (" SELECT id, name, object_type, is_trend, ratio, address, high_limit, low_limit "
                      " FROM tbl_points "
                      " WHERE data_source_id = %s AND is_virtual = 0 "
                      " ORDER BY id ")
@@ -91,17 +143,46 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             continue
 
         # There are points for this data source
+        # the addresses are parsed once, and the points with invalid addresses are ignored
         point_list = list()
         for row_point in rows_point:
+            try:
+                address = json.loads(row_point[5])
+            except Exception as e:
+                logger.error("Error in step 2.3 of acquisition process: Invalid point address in JSON " + str(e))
+                continue
+
+            if 'slave_id' not in address.keys() \
+                    or 'function_code' not in address.keys() \
+                    or 'offset' not in address.keys() \
+                    or 'number_of_registers' not in address.keys() \
+                    or 'format' not in address.keys() \
+                    or 'byte_swap' not in address.keys() \
+                    or address['slave_id'] < 1 \
+                    or address['function_code'] not in (1, 2, 3, 4) \
+                    or address['offset'] < 0 \
+                    or address['number_of_registers'] < 0 \
+                    or len(address['format']) < 1 \
+                    or not isinstance(address['byte_swap'], bool):
+                logger.error('Data Source(ID=%s), Point(ID=%s) Invalid address data.',
+                             data_source_id, row_point[0])
+                # invalid point is found
+                # go to begin of foreach point loop to process next point
+                continue
+
             point_list.append({"id": row_point[0],
                                "name": row_point[1],
                                "object_type": row_point[2],
                                "is_trend": row_point[3],
                                "ratio": row_point[4],
-                               "address": row_point[5]})
+                               "address": address,
+                               "high_limit": row_point[6],
+                               "low_limit": row_point[7],
+                               "base_value": None})
 
         ################################################################################################################
-        # Step 3: Read point values from Modbus slaves
+        # Step 3: Read point values from Modbus slaves concurrently, and check energy values if inline cleaning is
+        # enabled
         ################################################################################################################
         # connect to historical database
         cnx_historical_db = None
@@ -124,9 +205,54 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             time.sleep(60)
             continue
 
+        if config.is_inline_cleaning:
+            try:
+                load_base_values(cursor_historical_db, point_list)
+            except Exception as e:
+                logger.error("Error in step 3.1.2 of acquisition process " + str(e))
+                if cursor_historical_db:
+                    cursor_historical_db.close()
+                if cnx_historical_db:
+                    cnx_historical_db.close()
+
+                if cursor_system_db:
+                    cursor_system_db.close()
+                if cnx_system_db:
+                    cnx_system_db.close()
+                # go to begin of the outermost while loop
+                time.sleep(60)
+                continue
+
+        # plan the block reads of the points once, and report the reduction in request count
+        # the points failed with exceptions in single-point requests, and the points of the blocks failed with
+        # exceptions though their single-point requests are answered, are kept out of the blocks planned again
+        single_point_id_set = set()
+        request_list = planner.plan_requests(point_list, config.max_gap_registers, config.max_registers_per_request)
+        print("Planned %s block reads for %s points of data source (ID = %s), %s fewer requests than single reads " %
+              (len(request_list), len(point_list), data_source_id, len(point_list) - len(request_list)))
+
         # connect to the Modbus data source
-        master = modbus_tcp.TcpMaster(host=host, port=port, timeout_in_sec=5.0)
-        master.set_timeout(5.0)
+        event_loop = asyncio.new_event_loop()
+        client = modbus_engine.ModbusTcpClient(host, port, 5.0,
+                                              config.max_requests_per_slave,
+                                              config.max_requests_per_connection)
+        try:
+            event_loop.run_until_complete(client.connect())
+        except Exception as e:
+            logger.error("Error in step 3.2 of acquisition process: Failed to connect %s:%s %s ", host, port, str(e))
+            event_loop.close()
+            if cursor_historical_db:
+                cursor_historical_db.close()
+            if cnx_historical_db:
+                cnx_historical_db.close()
+
+            if cursor_system_db:
+                cursor_system_db.close()
+            if cnx_system_db:
+                cnx_system_db.close()
+            # go to begin of the outermost while loop
+            time.sleep(60)
+            continue
         print("Ready to connect to %s:%s ", host, port)
 
         # inner while loop to read all point values periodically
@@ -138,42 +264,48 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             digital_value_list = list()
 
             # TODO: update point list in another thread
-            # foreach point loop
-            for point in point_list:
-                # begin of foreach point loop
-                try:
-                    address = json.loads(point['address'])
-                except Exception as e:
-                    logger.error("Error in step 3.2 of acquisition process: Invalid point address in JSON " + str(e))
-                    continue
-
-                if 'slave_id' not in address.keys() \
-                        or 'function_code' not in address.keys() \
-                        or 'offset' not in address.keys() \
-                        or 'number_of_registers' not in address.keys() \
-                        or 'format' not in address.keys() \
-                        or 'byte_swap' not in address.keys() \
-                        or address['slave_id'] < 1 \
-                        or address['function_code'] not in (1, 2, 3, 4) \
-                        or address['offset'] < 0 \
-                        or address['number_of_registers'] < 0 \
-                        or len(address['format']) < 1 \
-                        or not isinstance(address['byte_swap'], bool):
-                    logger.error('Data Source(ID=%s), Point(ID=%s) Invalid address data.',
-                                 data_source_id, point['id'])
-                    # invalid point is found
-                    # go to begin of foreach point loop to process next point
+            # send all requests concurrently, and decode the values of the points from the responses
+            # the points of the blocks failed with exception code 02 or 03 are read again with single-point requests
+            point_result_list = list()
+            request_result_list = event_loop.run_until_complete(modbus_engine.read_requests(client, request_list))
+            timed_out_request_count = 0
+            for request, data in request_result_list:
+                if isinstance(data, Exception):
+                    logger.error(str(data) +
+                                 " host:" + host + " port:" + str(port) +
+                                 " slave_id:" + str(request['slave_id']) +
+                                 " function_code:" + str(request['function_code']) +
+                                 " starting_address:" + str(request['starting_address']) +
+                                 " quantity_of_x:" + str(request['quantity']))
+                    if 'timed out' in str(data):
+                        timed_out_request_count += 1
+                    # exception occurred when read register values,
+                    # go to begin of foreach request loop to process next request
                     continue
+                point_result_list.extend(planner.decode_values(request, data))
+
+            # the connection is lost or all slaves don't respond
+            if client.connection_error is not None or \
+                    (len(request_result_list) > 0 and timed_out_request_count == len(request_result_list)):
+                is_modbus_tcp_timed_out = True
+
+            new_single_point_id_set = modbus_engine.get_single_point_id_set(request_result_list)
+            if not new_single_point_id_set.issubset(single_point_id_set):
+                single_point_id_set.update(new_single_point_id_set)
+                request_list = planner.plan_requests(point_list,
+                                                     config.max_gap_registers,
+                                                     config.max_registers_per_request,
+                                                     single_point_id_set)
+                print("Planned %s requests for %s points of data source (ID = %s), %s points are read with "
+                      "single-point requests after exceptions" %
+                      (len(request_list), len(point_list), data_source_id, len(single_point_id_set)))
 
-                # read point value
-                try:
-                    result = master.execute(slave=address['slave_id'],
-                                            function_code=address['function_code'],
-                                            starting_address=address['offset'],
-                                            quantity_of_x=address['number_of_registers'],
-                                            data_format=address['format'])
-                except Exception as e:
-                    logger.error(str(e) +
+            # foreach point loop
+            for point, result in point_result_list:
+                # begin of foreach point loop
+                address = point['address']
+                if isinstance(result, Exception):
+                    logger.error(str(result) +
                                  " host:" + host + " port:" + str(port) +
                                  " slave_id:" + str(address['slave_id']) +
                                  " function_code:" + str(address['function_code']) +
@@ -181,16 +313,9 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
                                  " quantity_of_x:" + str(address['number_of_registers']) +
                                  " data_format:" + str(address['format']) +
                                  " byte_swap:" + str(address['byte_swap']))
-
-                    if 'timed out' in str(e):
-                        is_modbus_tcp_timed_out = True
-                        # timeout error
-                        # break the foreach point loop
-                        break
-                    else:
-                        # exception occurred when read register value,
-                        # go to begin of foreach point loop to process next point
-                        continue
+                    # exception occurred when decode register value,
+                    # go to begin of foreach point loop to process next point
+                    continue
 
                 if result is None or not isinstance(result, tuple) or len(result) == 0:
                     logger.error("Error in step 3.3 of acquisition process: \n"
@@ -208,24 +333,24 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
                     # go to begin of foreach point loop to process next point
                     continue
 
-                if address['byte_swap']:
-                    if address['number_of_registers'] == 2:
-                        value = byte_swap_32_bit(result[0])
-                    elif address['number_of_registers'] == 4:
-                        value = byte_swap_64_bit(result[0])
-                    else:
-                        value = result[0]
-                else:
-                    value = result[0]
+                # the value is already byte swapped by the planner if byte_swap of the point is true
+                value = result[0]
 
                 if point['object_type'] == 'ANALOG_VALUE':
                     analog_value_list.append({'point_id': point['id'],
                                               'is_trend': point['is_trend'],
                                               'value': Decimal(value) * point['ratio']})
                 elif point['object_type'] == 'ENERGY_VALUE':
+                    actual_value = Decimal(value) * point['ratio']
+                    # the values of trend points are checked at ingest if inline cleaning is enabled,
+                    # or else they are checked by myems-cleaning later
+                    is_bad = None
+                    if config.is_inline_cleaning and point['is_trend']:
+                        is_bad = check_energy_value(point, actual_value)
                     energy_value_list.append({'point_id': point['id'],
                                               'is_trend': point['is_trend'],
-                                              'value': Decimal(value) * point['ratio']})
+                                              'value': actual_value,
+                                              'is_bad': is_bad})
                 elif point['object_type'] == 'DIGITAL_VALUE':
                     digital_value_list.append({'point_id': point['id'],
                                                'is_trend': point['is_trend'],
@@ -236,8 +361,9 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
             if is_modbus_tcp_timed_out:
                 # Modbus TCP connection timeout
 
-                # destroy the Modbus master
-                del master
+                # close the connection to the Modbus data source
+                event_loop.run_until_complete(client.close())
+                event_loop.close()
 
                 # close the connection to database
                 if cursor_historical_db:
@@ -348,7 +474,7 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
                 energy_value_list_100 = energy_value_list[:100]
                 energy_value_list = energy_value_list[100:]
 
-                add_values = (" INSERT INTO tbl_energy_value (point_id, utc_date_time, actual_value) "
+                add_values = (" INSERT INTO tbl_energy_value (point_id, utc_date_time, actual_value, is_bad) "
                               " VALUES  ")
                 trend_value_count = 0
 
@@ -356,7 +482,8 @@ def process(logger, data_source_id, host, port, interval_in_seconds):
                     if point_value['is_trend']:
                         add_values += " (" + str(point_value['point_id']) + ","
                         add_values += "'" + current_datetime_utc.isoformat() + "',"
-                        add_values += str(point_value['value']) + "), "
+                        add_values += str(point_value['value']) + ","
+                        add_values += ("NULL" if point_value['is_bad'] is None else str(point_value['is_bad'])) + "), "
                         trend_value_count += 1
 
                 if trend_value_count > 0:
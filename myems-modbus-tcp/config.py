@@ -21,6 +21,26 @@ myems_historical_db = {
 # Indicates how long the process waits between readings
 interval_in_seconds = config('INTERVAL_IN_SECONDS', default=600, cast=int)
 
+# Indicates if the energy values are checked at ingest with the same rules as myems-cleaning,
+# then myems-cleaning only checks the energy values left unchecked instead of updating all energy values
+is_inline_cleaning = config('IS_INLINE_CLEANING', default=False, cast=bool)
+
+# Indicates how many requests are sent to a slave at a time, the requests to different slaves are sent concurrently
+# Set it to 1 for the devices and the gateways to Modbus RTU which process one request at a time
+max_requests_per_slave = config('MAX_REQUESTS_PER_SLAVE', default=1, cast=int)
+
+# Indicates how many requests are sent on the connection to a data source at a time, the timeout of a request starts
+# when it is sent. Keep it 1 for the gateways to Modbus RTU which queue the requests to all slaves on one serial line,
+# raise it for the devices and the gateways which answer the requests to different slaves concurrently
+max_requests_per_connection = config('MAX_REQUESTS_PER_CONNECTION', default=1, cast=int)
+
+# Indicates the maximum number of unused registers between two points read in one block
+# Set it to 0 for the slaves that raise exceptions when the registers not mapped are read
+max_gap_registers = config('MAX_GAP_REGISTERS', default=0, cast=int)
+
+# Indicates the maximum number of registers read in one block, which is limited to 125 by the protocol
+max_registers_per_request = config('MAX_REGISTERS_PER_REQUEST', default=125, cast=int)
+
 # Get the gateway ID and token from MyEMS Admin
 # This is used for getting data sources associated with the gateway
 gateway = {
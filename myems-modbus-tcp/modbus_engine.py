@@ -0,0 +1,183 @@
+import asyncio
+import struct
+
+import planner
+
+
+########################################################################################################################
+# Asyncio Modbus TCP Engine
+#
+# The points of a data source are planned into block reads once by the planner.
+# All requests of a sweep are sent concurrently on one connection and matched with the responses by the transaction
+# identifiers, with at most max_requests_per_slave requests in flight to every slave and at most
+# max_requests_per_connection requests in flight on the connection, so a sweep takes about the response time of the
+# slowest slave instead of the sum of the response times of all points when the device answers concurrently.
+# A request waiting for a free slot is not sent yet, and its timeout starts when it is sent, so the requests queued by
+# a Modbus RTU gateway behind the connection don't time out spuriously.
+# The points of a block answered with the exception code 02 (illegal data address) or 03 (illegal data value) are
+# read again with single-point requests, so that one point not mapped by the slave doesn't fail the other points.
+# The points of a block whose single-point requests are all answered, such as a block including a gap not mapped or
+# longer than the slave accepts, are read with single-point requests afterwards too, see get_single_point_id_set.
+########################################################################################################################
+
+# the exception codes of the blocks whose points are read again with single-point requests
+retry_exception_code_list = (2, 3)
+
+
+########################################################################################################################
+# The exception raised when a slave answers a request with an exception response
+########################################################################################################################
+class ModbusException(Exception):
+    def __init__(self, exception_code):
+        super().__init__('Modbus exception code ' + str(exception_code))
+        self.exception_code = exception_code
+
+
+class ModbusTcpClient:
+    def __init__(self, host, port, timeout_in_seconds, max_requests_per_slave, max_requests_per_connection):
+        self.host = host
+        self.port = port
+        self.timeout_in_seconds = timeout_in_seconds
+        self.max_requests_per_slave = max_requests_per_slave
+        self.reader = None
+        self.writer = None
+        self.receive_task = None
+        self.connection_error = None
+        self.transaction_id = 0
+        # the futures of the requests in flight by transaction identifier
+        self.pending_dict = dict()
+        # the semaphores limiting the requests in flight by slave id
+        self.semaphore_dict = dict()
+        # the semaphore limiting the requests in flight on the connection
+        self.connection_semaphore = asyncio.Semaphore(max_requests_per_connection)
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                          self.timeout_in_seconds)
+        self.connection_error = None
+        self.receive_task = asyncio.get_running_loop().create_task(self.receive())
+
+    async def close(self):
+        if self.receive_task is not None:
+            self.receive_task.cancel()
+            try:
+                await self.receive_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.receive_task = None
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+            self.writer = None
+        self.fail_pending_requests(ConnectionError('connection closed'))
+
+    ####################################################################################################################
+    # Receive the responses and resolve the futures of the requests with the PDUs
+    ####################################################################################################################
+    async def receive(self):
+        try:
+            while True:
+                header = await self.reader.readexactly(7)
+                transaction_id, protocol_id, length, unit_id = struct.unpack('>HHHB', header)
+                pdu = await self.reader.readexactly(length - 1)
+                future = self.pending_dict.pop(transaction_id, None)
+                # the responses of the requests timed out are dropped
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+        except Exception as e:
+            self.fail_pending_requests(ConnectionError('connection lost ' + str(e)))
+
+    def fail_pending_requests(self, error):
+        self.connection_error = error
+        for future in self.pending_dict.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending_dict.clear()
+
+    def get_next_transaction_id(self):
+        while True:
+            self.transaction_id = (self.transaction_id + 1) % 65536
+            if self.transaction_id not in self.pending_dict:
+                return self.transaction_id
+
+    ####################################################################################################################
+    # Read coils, discrete inputs, holding registers or input registers
+    # Returns: the data bytes of the response
+    ####################################################################################################################
+    async def read(self, slave_id, function_code, starting_address, quantity):
+        if slave_id not in self.semaphore_dict:
+            self.semaphore_dict[slave_id] = asyncio.Semaphore(self.max_requests_per_slave)
+
+        # the slot of the slave is taken first, so that the requests to a busy slave don't hold the slots of the
+        # connection, and the timeout starts when the request is sent
+        async with self.semaphore_dict[slave_id], self.connection_semaphore:
+            if self.connection_error is not None:
+                raise self.connection_error
+            transaction_id = self.get_next_transaction_id()
+            future = asyncio.get_running_loop().create_future()
+            self.pending_dict[transaction_id] = future
+            try:
+                self.writer.write(struct.pack('>HHHBBHH', transaction_id, 0, 6, slave_id,
+                                              function_code, starting_address, quantity))
+                await self.writer.drain()
+                pdu = await asyncio.wait_for(future, self.timeout_in_seconds)
+            except asyncio.TimeoutError:
+                raise TimeoutError('timed out')
+            finally:
+                self.pending_dict.pop(transaction_id, None)
+
+        if len(pdu) == 2 and pdu[0] == function_code | 0x80:
+            raise ModbusException(pdu[1])
+        if len(pdu) < 2 or pdu[0] != function_code or pdu[1] != len(pdu) - 2:
+            raise Exception('Invalid response ' + pdu.hex())
+        return pdu[2:]
+
+
+########################################################################################################################
+# Send all requests concurrently, and then the single-point requests of the points of the blocks failed with the
+# exception codes in retry_exception_code_list
+# Returns: list of (request, data bytes of the response or the exception raised) in the order of the requests,
+#          followed by the single-point requests sent again
+########################################################################################################################
+async def read_requests(client, request_list):
+    result_list = await asyncio.gather(*[client.read(request['slave_id'],
+                                                     request['function_code'],
+                                                     request['starting_address'],
+                                                     request['quantity']) for request in request_list],
+                                       return_exceptions=True)
+    request_result_list = list(zip(request_list, result_list))
+
+    retry_request_list = list()
+    for request, result in request_result_list:
+        if isinstance(result, ModbusException) and result.exception_code in retry_exception_code_list and \
+                len(request['point_list']) > 1:
+            retry_request_list.extend(planner.plan_single_requests(request['point_list']))
+    if len(retry_request_list) > 0:
+        request_result_list.extend(await read_requests(client, retry_request_list))
+    return request_result_list
+
+
+########################################################################################################################
+# Get the ids of the points to read with single-point requests from the results of read_requests
+# Returns: the ids of the points whose single-point requests failed with the exception codes in
+#          retry_exception_code_list, and the ids of all points of the blocks failed with these exception codes whose
+#          single-point requests didn't, since the blocks fail again if they are planned again
+########################################################################################################################
+def get_single_point_id_set(request_result_list):
+    single_point_id_set = set()
+    failed_block_list = list()
+    for request, result in request_result_list:
+        if isinstance(result, ModbusException) and result.exception_code in retry_exception_code_list:
+            if len(request['point_list']) == 1:
+                single_point_id_set.add(request['point_list'][0]['id'])
+            elif len(request['point_list']) > 1:
+                failed_block_list.append(request)
+
+    for request in failed_block_list:
+        point_id_set = set(point['id'] for point in request['point_list'])
+        if point_id_set.isdisjoint(single_point_id_set):
+            single_point_id_set.update(point_id_set)
+    return single_point_id_set
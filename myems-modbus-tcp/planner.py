@@ -0,0 +1,145 @@
+import struct
+from byte_swap import byte_swap_32_bit, byte_swap_64_bit
+
+
+# the function codes of reading holding registers and input registers
+register_function_code_list = (3, 4)
+
+# the maximum number of registers in one request of reading holding registers or input registers
+max_registers_per_request = 125
+
+# the maximum number of bits in one request of reading coils or discrete inputs
+max_bits_per_request = 2000
+
+
+########################################################################################################################
+# Register Block Read Planner
+#
+# The points of a data source are planned into block reads once, independent of the transport:
+#   the points of the same slave and the same function code are sorted by offset, and a point is merged into the
+#   current block if the gap between them is not more than max_gap registers (or bits of coils and discrete inputs),
+#   and the block is not longer than max_block_size, which is limited to 125 registers or 2000 bits by the protocol.
+# The registers in the gaps are read and ignored, so set max_gap to 0 for the slaves that raise exceptions when the
+# registers not mapped are read.
+# The points failed with exceptions in single-point requests, such as the points not mapped by the slaves, are kept out
+# of the blocks and read with single-point requests, so that they don't fail the other points.
+# The value of every point is sliced from the data bytes of the block with struct.unpack_from on a memoryview, and
+# decoded in the same way as a single read of the point with modbus_tk, the byte swap of the point applied.
+########################################################################################################################
+
+
+########################################################################################################################
+# Plan the block reads of the points
+# point_list: list of points with the parsed addresses
+# max_gap: the maximum number of unused registers or bits between two points in one block
+# max_block_size: the maximum number of registers or bits in one block
+# single_point_id_set: the ids of the points read with single-point requests instead of blocks, or None
+# Returns: list of requests, every request is a dict of slave_id, function_code, starting_address, quantity and the
+#          list of the points read by it
+########################################################################################################################
+def plan_requests(point_list, max_gap, max_block_size, single_point_id_set=None):
+    if single_point_id_set is not None and len(single_point_id_set) > 0:
+        single_point_list = [point for point in point_list if point['id'] in single_point_id_set]
+        point_list = [point for point in point_list if point['id'] not in single_point_id_set]
+    else:
+        single_point_list = list()
+
+    block_point_list_dict = dict()
+    for point in point_list:
+        key = (point['address']['slave_id'], point['address']['function_code'])
+        if key not in block_point_list_dict:
+            block_point_list_dict[key] = list()
+        block_point_list_dict[key].append(point)
+
+    request_list = list()
+    for (slave_id, function_code), block_point_list in sorted(block_point_list_dict.items()):
+        if function_code in register_function_code_list:
+            block_size = min(max_block_size, max_registers_per_request)
+        else:
+            block_size = min(max_block_size, max_bits_per_request)
+
+        request = None
+        for point in sorted(block_point_list, key=lambda x: (x['address']['offset'], x['id'])):
+            address = point['address']
+            end_address = address['offset'] + address['number_of_registers']
+            if request is not None \
+                    and address['offset'] <= request['starting_address'] + request['quantity'] + max_gap \
+                    and end_address - request['starting_address'] <= block_size:
+                # the point is adjacent to, overlaps or is close enough to the block
+                request['quantity'] = max(request['quantity'], end_address - request['starting_address'])
+                request['point_list'].append(point)
+            else:
+                request = {'slave_id': slave_id,
+                           'function_code': function_code,
+                           'starting_address': address['offset'],
+                           'quantity': address['number_of_registers'],
+                           'point_list': [point]}
+                request_list.append(request)
+
+    request_list.extend(plan_single_requests(single_point_list))
+    return request_list
+
+
+########################################################################################################################
+# Plan a single-point request of every point
+# Returns: list of requests in the same format as plan_requests
+########################################################################################################################
+def plan_single_requests(point_list):
+    return [{'slave_id': point['address']['slave_id'],
+             'function_code': point['address']['function_code'],
+             'starting_address': point['address']['offset'],
+             'quantity': point['address']['number_of_registers'],
+             'point_list': [point]} for point in point_list]
+
+
+########################################################################################################################
+# Decode the values of the points of a request from the data bytes of the response
+# Returns: list of (point, tuple unpacked with the format of the point or the exception raised)
+# NOTE: the first value of the tuple is byte swapped if byte_swap of the point is true, and the values of coils and
+# discrete inputs are expanded to bits, the same as a single read of the point with modbus_tk
+########################################################################################################################
+def decode_values(request, data):
+    value_list = list()
+    data_view = memoryview(data)
+    for point in request['point_list']:
+        try:
+            value_list.append((point, decode_value(request, data_view, point)))
+        except Exception as e:
+            value_list.append((point, e))
+    return value_list
+
+
+########################################################################################################################
+# Decode the value of a point from the memoryview of the data bytes of the response
+########################################################################################################################
+def decode_value(request, data_view, point):
+    address = point['address']
+    point_struct = struct.Struct(address['format'])
+    if request['function_code'] in register_function_code_list:
+        if point_struct.size != address['number_of_registers'] * 2:
+            raise struct.error('unpack requires a buffer of ' + str(point_struct.size) + ' bytes')
+        result = point_struct.unpack_from(data_view, (address['offset'] - request['starting_address']) * 2)
+    else:
+        # the bits of the point are packed into bytes as the response of a single read of the point
+        start_bit = address['offset'] - request['starting_address']
+        point_bytes = bytearray((address['number_of_registers'] + 7) // 8)
+        for i in range(address['number_of_registers']):
+            if data_view[(start_bit + i) // 8] >> ((start_bit + i) % 8) & 1:
+                point_bytes[i // 8] |= 1 << (i % 8)
+        if point_struct.size != len(point_bytes):
+            raise struct.error('unpack requires a buffer of ' + str(point_struct.size) + ' bytes')
+        digits = list()
+        for byte_value in point_struct.unpack_from(point_bytes):
+            for i in range(8):
+                if len(digits) >= address['number_of_registers']:
+                    break
+                digits.append(byte_value % 2)
+                byte_value = byte_value >> 1
+        result = tuple(digits)
+
+    if address['byte_swap'] and len(result) > 0:
+        if address['number_of_registers'] == 2:
+            result = (byte_swap_32_bit(result[0]), ) + result[1:]
+        elif address['number_of_registers'] == 4:
+            result = (byte_swap_64_bit(result[0]), ) + result[1:]
+    return result
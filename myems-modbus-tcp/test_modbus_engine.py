@@ -0,0 +1,367 @@
+import asyncio
+import random
+import struct
+
+import modbus_engine
+import planner
+
+
+# the slave answering every request after a random delay, so the responses are out of the order of the requests
+delayed_slave_id = 1
+# the slave never answering, so its requests time out
+silent_slave_id = 2
+# the slave answering after the requests timed out, so the late responses are dropped
+late_slave_id = 3
+# the slave closing the connection when it is requested, so the requests in flight fail
+closing_slave_id = 9
+
+# the registers not mapped by the slaves, which are answered with the exception code 02
+unmapped_address_set = {100, 205, 1001}
+
+# the timeout of the client in seconds
+timeout_in_seconds = 0.2
+
+
+########################################################################################################################
+# The value of a register or a coil of a slave
+########################################################################################################################
+def get_register_value(slave_id, address):
+    return (slave_id * 1000 + address) % 65536
+
+
+########################################################################################################################
+# Local asyncio Modbus TCP server stub of the slaves
+# It answers reading holding registers, input registers and coils, and counts the requests in flight of every slave
+# and of all slaves
+########################################################################################################################
+class ModbusServerStub:
+    def __init__(self):
+        self.server = None
+        self.port = None
+        self.writer_list = list()
+        self.handler_task_list = list()
+        # the requests received and not answered by slave id, and the maximum of them
+        self.in_flight_count_dict = dict()
+        self.max_in_flight_count_dict = dict()
+        self.in_flight_count = 0
+        self.max_in_flight_count = 0
+        # the transaction identifiers in the order of the requests received and in the order of the responses sent
+        self.received_transaction_id_list = list()
+        self.sent_transaction_id_list = list()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in self.writer_list:
+            writer.close()
+        # the handlers exit when their connections are closed
+        await asyncio.gather(*self.handler_task_list, return_exceptions=True)
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        self.writer_list.append(writer)
+        self.handler_task_list.append(asyncio.current_task())
+        task_set = set()
+        try:
+            while True:
+                request = await reader.readexactly(12)
+                transaction_id, _, _, slave_id, function_code, starting_address, quantity = \
+                    struct.unpack('>HHHBBHH', request)
+                self.received_transaction_id_list.append(transaction_id)
+                if slave_id == closing_slave_id:
+                    writer.close()
+                    return
+                self.in_flight_count_dict[slave_id] = self.in_flight_count_dict.get(slave_id, 0) + 1
+                self.max_in_flight_count_dict[slave_id] = max(self.max_in_flight_count_dict.get(slave_id, 0),
+                                                              self.in_flight_count_dict[slave_id])
+                self.in_flight_count += 1
+                self.max_in_flight_count = max(self.max_in_flight_count, self.in_flight_count)
+                task = asyncio.get_running_loop().create_task(
+                    self.respond(writer, transaction_id, slave_id, function_code, starting_address, quantity))
+                task_set.add(task)
+                task.add_done_callback(task_set.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def respond(self, writer, transaction_id, slave_id, function_code, starting_address, quantity):
+        if slave_id == silent_slave_id:
+            self.in_flight_count -= 1
+            return
+        if slave_id == late_slave_id:
+            await asyncio.sleep(timeout_in_seconds * 2)
+        else:
+            await asyncio.sleep(random.random() * 0.02)
+        self.in_flight_count_dict[slave_id] -= 1
+        self.in_flight_count -= 1
+
+        address_set = set(range(starting_address, starting_address + quantity))
+        if not address_set.isdisjoint(unmapped_address_set):
+            pdu = struct.pack('>BB', function_code | 0x80, 2)
+        elif function_code in planner.register_function_code_list:
+            pdu = struct.pack('>BB', function_code, quantity * 2) + \
+                b''.join(struct.pack('>H', get_register_value(slave_id, address))
+                         for address in range(starting_address, starting_address + quantity))
+        else:
+            data = bytearray((quantity + 7) // 8)
+            for i in range(quantity):
+                if get_register_value(slave_id, starting_address + i) % 2:
+                    data[i // 8] |= 1 << (i % 8)
+            pdu = struct.pack('>BB', function_code, len(data)) + bytes(data)
+
+        if not writer.is_closing():
+            writer.write(struct.pack('>HHHB', transaction_id, 0, len(pdu) + 1, slave_id) + pdu)
+            self.sent_transaction_id_list.append(transaction_id)
+
+
+########################################################################################################################
+# Get the points of the delayed slave at the offsets, with one register each
+########################################################################################################################
+def get_point_list(offset_list, slave_id=delayed_slave_id):
+    return [{'id': offset,
+             'address': {'slave_id': slave_id,
+                         'function_code': 3,
+                         'offset': offset,
+                         'number_of_registers': 1,
+                         'format': '>H',
+                         'byte_swap': False}} for offset in offset_list]
+
+
+def check(is_passed, description):
+    print(('Passed: ' if is_passed else 'Failed: ') + description)
+    return is_passed
+
+
+########################################################################################################################
+# Test transaction identifier matching, out-of-order responses and the semaphore of every slave
+########################################################################################################################
+async def test_concurrent_requests(server, max_requests_per_slave):
+    client = modbus_engine.ModbusTcpClient('127.0.0.1', server.port, timeout_in_seconds, max_requests_per_slave, 8)
+    await client.connect()
+    try:
+        request_list = list()
+        for _ in range(100):
+            starting_address = random.randint(300, 900)
+            request_list.append({'slave_id': delayed_slave_id,
+                                 'function_code': random.choice((1, 3, 4)),
+                                 'starting_address': starting_address,
+                                 'quantity': random.randint(1, 20),
+                                 'point_list': list()})
+        server.received_transaction_id_list.clear()
+        server.sent_transaction_id_list.clear()
+        result_list = await modbus_engine.read_requests(client, request_list)
+
+        mismatch_count = 0
+        for request, data in result_list:
+            value_list = [get_register_value(delayed_slave_id, address)
+                          for address in range(request['starting_address'],
+                                               request['starting_address'] + request['quantity'])]
+            if request['function_code'] in planner.register_function_code_list:
+                expected_data = b''.join(struct.pack('>H', value) for value in value_list)
+            else:
+                expected_data = bytes(sum((value_list[j] % 2) << (j - i) for j in range(i, min(i + 8, len(value_list))))
+                                      for i in range(0, len(value_list), 8))
+            if data != expected_data:
+                mismatch_count += 1
+
+        is_passed = check(len(result_list) == len(request_list) and mismatch_count == 0,
+                          'the responses of {} requests are matched by the transaction identifiers with {} in flight '
+                          'to the slave, {} mismatches'.format(len(request_list), max_requests_per_slave,
+                                                              mismatch_count))
+        if max_requests_per_slave > 1:
+            is_passed &= check(server.sent_transaction_id_list != server.received_transaction_id_list,
+                               'the responses are sent out of the order of the requests')
+        is_passed &= check(server.max_in_flight_count_dict[delayed_slave_id] == max_requests_per_slave,
+                           'at most {} requests are in flight to the slave, {} in the test'.format(
+                               max_requests_per_slave, server.max_in_flight_count_dict[delayed_slave_id]))
+        server.max_in_flight_count_dict.clear()
+        return is_passed
+    finally:
+        await client.close()
+
+
+########################################################################################################################
+# Test the semaphore of the connection: the requests to different slaves are sent one at a time like to a Modbus RTU
+# gateway, and the requests waiting to be sent don't time out though the sweep takes longer than the timeout
+########################################################################################################################
+async def test_connection_limit(server):
+    client = modbus_engine.ModbusTcpClient('127.0.0.1', server.port, timeout_in_seconds, 4, 1)
+    await client.connect()
+    try:
+        request_list = [{'slave_id': slave_id,
+                         'function_code': 3,
+                         'starting_address': 400 + i,
+                         'quantity': 1,
+                         'point_list': list()} for i in range(20) for slave_id in (delayed_slave_id, 4, 5)]
+        server.max_in_flight_count = 0
+        start_time = asyncio.get_running_loop().time()
+        result_list = await modbus_engine.read_requests(client, request_list)
+        elapsed_time = asyncio.get_running_loop().time() - start_time
+        is_passed = check(server.max_in_flight_count == 1,
+                          'at most 1 request is in flight on the connection, {} in the test'.format(
+                              server.max_in_flight_count))
+        is_passed &= check(elapsed_time > timeout_in_seconds and
+                           all(data == struct.pack('>H', get_register_value(request['slave_id'],
+                                                                            request['starting_address']))
+                               for request, data in result_list),
+                           'all {} requests are answered in {:.2f} seconds, longer than the timeout'.format(
+                               len(request_list), elapsed_time))
+        return is_passed
+    finally:
+        await client.close()
+
+
+########################################################################################################################
+# Test the timeout path: the requests of the silent slave and the late slave time out, the late responses are dropped,
+# and the other requests on the same connection are not affected
+########################################################################################################################
+async def test_timeout(server):
+    client = modbus_engine.ModbusTcpClient('127.0.0.1', server.port, timeout_in_seconds, 1, 8)
+    await client.connect()
+    try:
+        request_list = [{'slave_id': slave_id,
+                         'function_code': 3,
+                         'starting_address': 400,
+                         'quantity': 2,
+                         'point_list': list()} for slave_id in (silent_slave_id, late_slave_id, delayed_slave_id)]
+        result_list = await modbus_engine.read_requests(client, request_list)
+        is_passed = check(all(isinstance(data, TimeoutError) and 'timed out' in str(data)
+                              for _, data in result_list[:2]),
+                          'the requests of the silent slave and the late slave time out')
+        is_passed &= check(result_list[2][1] == struct.pack('>HH', get_register_value(delayed_slave_id, 400),
+                                                            get_register_value(delayed_slave_id, 401)),
+                           'the request of the other slave is answered')
+
+        # wait for the late response, which is dropped, and the connection is still in use
+        await asyncio.sleep(timeout_in_seconds * 2)
+        data = await client.read(delayed_slave_id, 3, 500, 1)
+        is_passed &= check(len(client.pending_dict) == 0 and client.connection_error is None and
+                           data == struct.pack('>H', get_register_value(delayed_slave_id, 500)),
+                           'the late response is dropped and the connection is still in use')
+        return is_passed
+    finally:
+        await client.close()
+
+
+########################################################################################################################
+# Test fail_pending_requests: the requests in flight fail when the connection is lost, and so do the requests after it
+########################################################################################################################
+async def test_connection_lost(server):
+    client = modbus_engine.ModbusTcpClient('127.0.0.1', server.port, timeout_in_seconds * 10, 1, 8)
+    await client.connect()
+    try:
+        request_list = [{'slave_id': silent_slave_id,
+                         'function_code': 3,
+                         'starting_address': 400,
+                         'quantity': 1,
+                         'point_list': list()},
+                        {'slave_id': closing_slave_id,
+                         'function_code': 3,
+                         'starting_address': 400,
+                         'quantity': 1,
+                         'point_list': list()}]
+        result_list = await asyncio.wait_for(modbus_engine.read_requests(client, request_list), timeout_in_seconds * 5)
+        is_passed = check(all(isinstance(data, ConnectionError) for _, data in result_list) and
+                          len(client.pending_dict) == 0 and client.connection_error is not None,
+                          'the requests in flight fail when the connection is lost, before they time out')
+        try:
+            await client.read(delayed_slave_id, 3, 400, 1)
+            is_passed &= check(False, 'the requests after the connection is lost fail')
+        except ConnectionError:
+            is_passed &= check(True, 'the requests after the connection is lost fail')
+        return is_passed
+    finally:
+        await client.close()
+
+
+########################################################################################################################
+# Test the blocks failed with exception code 02 are read again with single-point requests, and the points failed in
+# single-point requests are kept out of the blocks planned again
+########################################################################################################################
+async def test_exception_retry(server):
+    client = modbus_engine.ModbusTcpClient('127.0.0.1', server.port, timeout_in_seconds, 4, 8)
+    await client.connect()
+    try:
+        point_list = get_point_list(list(range(96, 106)) + list(range(200, 210)))
+        request_list = planner.plan_requests(point_list, 0, 125)
+        result_list = await modbus_engine.read_requests(client, request_list)
+
+        value_dict = dict()
+        single_point_id_set = set()
+        for request, data in result_list:
+            if isinstance(data, modbus_engine.ModbusException):
+                if len(request['point_list']) == 1:
+                    single_point_id_set.add(request['point_list'][0]['id'])
+                continue
+            for point, result in planner.decode_values(request, data):
+                value_dict[point['id']] = result[0]
+
+        is_passed = check(len(request_list) == 2 and all(isinstance(data, modbus_engine.ModbusException) and
+                                                         data.exception_code == 2
+                                                         for _, data in result_list[:2]),
+                          'the blocks including the unmapped registers fail with exception code 02')
+        is_passed &= check(single_point_id_set == {100, 205} and
+                           value_dict == dict((point['id'], get_register_value(delayed_slave_id, point['id']))
+                                              for point in point_list if point['id'] not in single_point_id_set),
+                           'the other points of the blocks are read with single-point requests')
+
+        is_passed &= check(modbus_engine.get_single_point_id_set(result_list) == single_point_id_set,
+                           'the failed points are read with single-point requests afterwards')
+
+        request_list = planner.plan_requests(point_list, 0, 125, single_point_id_set)
+        result_list = await modbus_engine.read_requests(client, request_list)
+        is_passed &= check(len(result_list) == len(request_list) == 6 and
+                           sum(isinstance(data, Exception) for _, data in result_list) == 2,
+                           'the blocks planned again without the failed points are answered')
+
+        # the block over the gap not mapped fails, though the single-point requests of its points are answered
+        point_list = get_point_list([1000, 1002])
+        request_list = planner.plan_requests(point_list, 1, 125)
+        result_list = await modbus_engine.read_requests(client, request_list)
+        single_point_id_set = modbus_engine.get_single_point_id_set(result_list)
+        is_passed &= check(len(request_list) == 1 and isinstance(result_list[0][1], modbus_engine.ModbusException) and
+                           not any(isinstance(data, Exception) for _, data in result_list[1:]) and
+                           single_point_id_set == {1000, 1002},
+                           'the points of the block failed over a gap are read with single-point requests afterwards')
+        request_list = planner.plan_requests(point_list, 1, 125, single_point_id_set)
+        result_list = await modbus_engine.read_requests(client, request_list)
+        is_passed &= check(len(result_list) == 2 and not any(isinstance(data, Exception) for _, data in result_list),
+                           'the points planned again are answered without exceptions')
+        return is_passed
+    finally:
+        await client.close()
+
+
+async def run_tests():
+    server = ModbusServerStub()
+    await server.start()
+    try:
+        is_passed = True
+        for max_requests_per_slave in (1, 4):
+            is_passed &= await test_concurrent_requests(server, max_requests_per_slave)
+        is_passed &= await test_connection_limit(server)
+        is_passed &= await test_timeout(server)
+        is_passed &= await test_connection_lost(server)
+        is_passed &= await test_exception_retry(server)
+        return is_passed
+    finally:
+        await server.stop()
+
+
+########################################################################################################################
+# main procedure
+# Usage: python3 test_modbus_engine.py
+# Starts a local asyncio Modbus TCP server stub, and tests the engine with slaves answering out of order, answering
+# one request at a time on the connection, never answering, answering late, closing the connection and answering with
+# exceptions
+########################################################################################################################
+def main():
+    random.seed(0)
+    is_passed = asyncio.run(run_tests())
+    print('PASSED' if is_passed else 'FAILED')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import math
+import random
+import sys
+
+import modbus_tk.defines as cst
+from modbus_tk import modbus_tcp
+
+import planner
+
+
+# the formats of the points of the simulated slaves by number of registers
+format_list_dict = {1: ['>h', '>H', '<H'],
+                    2: ['>f', '<f', '>l', '>L', '>HH'],
+                    4: ['>d', '<d', '>q', '>Q']}
+
+
+########################################################################################################################
+# Read a point with a single request of modbus_tk, and apply the byte swap in the same way as acquisition before the
+# planner, to compare the results
+########################################################################################################################
+def read_point(master, point):
+    address = point['address']
+    result = master.execute(slave=address['slave_id'],
+                            function_code=address['function_code'],
+                            starting_address=address['offset'],
+                            quantity_of_x=address['number_of_registers'],
+                            data_format=address['format'])
+    if address['byte_swap'] and address['number_of_registers'] == 2:
+        result = (planner.byte_swap_32_bit(result[0]), ) + result[1:]
+    elif address['byte_swap'] and address['number_of_registers'] == 4:
+        result = (planner.byte_swap_64_bit(result[0]), ) + result[1:]
+    return result
+
+
+def is_same_result(result1, result2):
+    if len(result1) != len(result2):
+        return False
+    for value1, value2 in zip(result1, result2):
+        if isinstance(value1, float) and isinstance(value2, float) and math.isnan(value1) and math.isnan(value2):
+            continue
+        if value1 != value2:
+            return False
+    return True
+
+
+########################################################################################################################
+# Generate the points of a data source on the simulated slaves,
+# with adjacent, overlapping and scattered registers, and coils
+########################################################################################################################
+def generate_point_list(server, slave_count):
+    point_list = list()
+    for slave_id in range(1, slave_count + 1):
+        slave = server.add_slave(slave_id)
+        slave.add_block('holding_registers', cst.HOLDING_REGISTERS, 0, 1000)
+        slave.add_block('input_registers', cst.ANALOG_INPUTS, 0, 1000)
+        slave.add_block('coils', cst.COILS, 0, 1000)
+        slave.set_values('holding_registers', 0, [random.randint(0, 65535) for _ in range(1000)])
+        slave.set_values('input_registers', 0, [random.randint(0, 65535) for _ in range(1000)])
+        slave.set_values('coils', 0, [random.randint(0, 1) for _ in range(1000)])
+
+        for function_code in (3, 4):
+            offset = 0
+            while offset < 990:
+                number_of_registers = random.choice((1, 2, 2, 4))
+                point_list.append({'id': len(point_list) + 1,
+                                   'address': {'slave_id': slave_id,
+                                               'function_code': function_code,
+                                               'offset': offset,
+                                               'number_of_registers': number_of_registers,
+                                               'format': random.choice(format_list_dict[number_of_registers]),
+                                               'byte_swap': random.random() < 0.3}})
+                # the next point is adjacent, overlapping, or after a gap
+                offset = max(offset + number_of_registers + random.choice((0, 0, 0, -1, 2, 10, 200)), offset + 1)
+
+        for offset in range(0, 980, 7):
+            number_of_registers = random.choice((1, 1, 8, 16))
+            point_list.append({'id': len(point_list) + 1,
+                               'address': {'slave_id': slave_id,
+                                           'function_code': 1,
+                                           'offset': offset,
+                                           'number_of_registers': number_of_registers,
+                                           'format': '>' + 'B' * ((number_of_registers + 7) // 8),
+                                           'byte_swap': False}})
+    return point_list
+
+
+########################################################################################################################
+# main procedure
+# Usage: python3 test_planner.py [PORT]
+# Starts a local Modbus TCP simulator, reads the points of the simulated slaves with the block reads planned by the
+# planner, checks the values are the same as the single reads of the points, and reports the reduction in request count
+########################################################################################################################
+def main():
+    random.seed(0)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5020
+    server = modbus_tcp.TcpServer(port=port, address='127.0.0.1')
+    server.start()
+    try:
+        point_list = generate_point_list(server, 3)
+        master = modbus_tcp.TcpMaster(host='127.0.0.1', port=port, timeout_in_sec=5.0)
+        expected_result_dict = dict()
+        for point in point_list:
+            expected_result_dict[point['id']] = read_point(master, point)
+
+        is_passed = True
+        for max_gap, max_block_size in ((0, 125), (10, 125), (10, 32), (200, 1)):
+            request_list = planner.plan_requests(point_list, max_gap, max_block_size)
+            mismatch_count = 0
+            for request in request_list:
+                data = master.execute(slave=request['slave_id'],
+                                      function_code=request['function_code'],
+                                      starting_address=request['starting_address'],
+                                      quantity_of_x=request['quantity'],
+                                      data_format='>' + 'B' * (request['quantity'] * 2
+                                                               if request['function_code'] in (3, 4)
+                                                               else (request['quantity'] + 7) // 8))
+                if request['function_code'] == 1:
+                    # modbus_tk expands the bytes of coils to bits, which are packed back into the data bytes
+                    data = bytes(sum(bit << i for i, bit in enumerate(data[j:j + 8])) for j in range(0, len(data), 8))
+                else:
+                    data = bytes(data)
+                for point, result in planner.decode_values(request, data):
+                    if isinstance(result, Exception) or not is_same_result(result,
+                                                                           expected_result_dict[point['id']]):
+                        mismatch_count += 1
+            print('max_gap={:<4} max_block_size={:<4} {:>5} points {:>5} requests {:>5.1f}% fewer, '
+                  '{} mismatches'.format(max_gap, max_block_size, len(point_list), len(request_list),
+                                         100.0 * (len(point_list) - len(request_list)) / len(point_list),
+                                         mismatch_count))
+            if mismatch_count > 0:
+                is_passed = False
+        print('PASSED' if is_passed else 'FAILED')
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+from datetime import datetime, timezone
+
+import config
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+########################################################################################################################
+# Reader of the archive of historical point data, which is written by myems-cleaning
+#
+# The archive is a directory of Parquet files, one file of every point in every month, such as
+#   ARCHIVE_PATH/tbl_energy_value/2024-01/point_id=1.parquet
+# and every archived month holds a _SUCCESS file, which is written after all files of the month.
+# The months are archived from the oldest one, so all data before the end of the latest archived month are read from
+# the archive, and all data since then are read from database.
+########################################################################################################################
+
+
+########################################################################################################################
+# Get the archived months of a table
+# Returns: ascending list of the start datetimes in UTC of the archived months, or an empty list if the archive is
+#          disabled
+########################################################################################################################
+def get_archived_months(table_name):
+    if len(config.archive_path) == 0:
+        return list()
+
+    table_path = os.path.join(config.archive_path, table_name)
+    if not os.path.isdir(table_path):
+        return list()
+
+    month_list = list()
+    for month in os.listdir(table_path):
+        if len(month) == 7 and os.path.isfile(os.path.join(table_path, month, '_SUCCESS')):
+            month_list.append(datetime.strptime(month, '%Y-%m').replace(tzinfo=timezone.utc))
+    return sorted(month_list)
+
+
+########################################################################################################################
+# Get the datetime before which all data of a table are read from the archive
+# Returns: the start datetime in UTC of the month after the latest archived month, or None if there isn't any
+########################################################################################################################
+def get_archived_until(table_name):
+    month_list = get_archived_months(table_name)
+    if len(month_list) == 0:
+        return None
+    return get_next_month(month_list[-1])
+
+
+########################################################################################################################
+# Get the archived values of points in a time window
+# start_datetime_utc: the start datetime in UTC, included
+# end_datetime_utc: the end datetime in UTC, excluded
+# is_good_only: if True only the values checked good by myems-cleaning are returned, same as is_bad = 0
+# Returns: dict of point id to the list of (utc_date_time, actual_value) ordered by utc_date_time
+########################################################################################################################
+def get_values(table_name, point_id_list, start_datetime_utc, end_datetime_utc, is_good_only):
+    values_dict = dict()
+    for point_id in point_id_list:
+        values_dict[point_id] = list()
+
+    # the date times in the archive are naive in UTC, the same as in database
+    start_datetime_utc = start_datetime_utc.replace(tzinfo=None)
+    end_datetime_utc = end_datetime_utc.replace(tzinfo=None)
+    if len(config.archive_path) == 0 or start_datetime_utc >= end_datetime_utc:
+        return values_dict
+
+    if pq is None:
+        raise Exception("pyarrow is not installed to read the archive in " + config.archive_path)
+
+    filters = [('utc_date_time', '>=', start_datetime_utc), ('utc_date_time', '<', end_datetime_utc)]
+    if is_good_only:
+        filters.append(('is_bad', '=', False))
+
+    month_start_datetime_utc = start_datetime_utc.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month_start_datetime_utc < end_datetime_utc:
+        month_path = os.path.join(config.archive_path, table_name, month_start_datetime_utc.strftime('%Y-%m'))
+        for point_id in point_id_list:
+            file_path = os.path.join(month_path, 'point_id=' + str(point_id) + '.parquet')
+            if not os.path.isfile(file_path):
+                continue
+            table = pq.read_table(file_path, columns=['utc_date_time', 'actual_value'], filters=filters)
+            values_dict[point_id].extend(zip(table['utc_date_time'].to_pylist(), table['actual_value'].to_pylist()))
+        month_start_datetime_utc = get_next_month(month_start_datetime_utc)
+
+    return values_dict
+
+
+########################################################################################################################
+# Get the latest archived good values of points before a datetime
+# Returns: dict of point id to (utc_date_time, actual_value), the points without any archived value are omitted
+# NOTE: the archived months are searched from the latest one, until the values of all points are found
+########################################################################################################################
+def get_latest_good_values_before(table_name, point_id_list, before_datetime_utc):
+    latest_value_dict = dict()
+
+    month_list = [month_start_datetime_utc.replace(tzinfo=None) for month_start_datetime_utc
+                  in get_archived_months(table_name)]
+    if len(month_list) == 0:
+        return latest_value_dict
+
+    if pq is None:
+        raise Exception("pyarrow is not installed to read the archive in " + config.archive_path)
+
+    before_datetime_utc = before_datetime_utc.replace(tzinfo=None)
+    filters = [('utc_date_time', '<', before_datetime_utc), ('is_bad', '=', False)]
+    for month_start_datetime_utc in reversed(month_list):
+        if month_start_datetime_utc >= before_datetime_utc:
+            continue
+        pending_point_id_list = [point_id for point_id in point_id_list if point_id not in latest_value_dict]
+        if len(pending_point_id_list) == 0:
+            break
+        month_path = os.path.join(config.archive_path, table_name, month_start_datetime_utc.strftime('%Y-%m'))
+        for point_id in pending_point_id_list:
+            file_path = os.path.join(month_path, 'point_id=' + str(point_id) + '.parquet')
+            if not os.path.isfile(file_path):
+                continue
+            table = pq.read_table(file_path, columns=['utc_date_time', 'actual_value'], filters=filters)
+            if table.num_rows > 0:
+                latest_value_dict[point_id] = (table['utc_date_time'][-1].as_py(), table['actual_value'][-1].as_py())
+
+    return latest_value_dict
+
+
+########################################################################################################################
+# Get the start datetime of the next month
+########################################################################################################################
+def get_next_month(month_start_datetime_utc):
+    if month_start_datetime_utc.month == 12:
+        return month_start_datetime_utc.replace(year=month_start_datetime_utc.year + 1, month=1)
+    return month_start_datetime_utc.replace(month=month_start_datetime_utc.month + 1)
@@ -37,6 +37,9 @@ minutes_to_clean = config('MINUTES_TO_CLEAN', default=30, cast=int)
 # format string: "%Y-%m-%d %H:%M:%S"
 start_datetime_utc = config('START_DATETIME_UTC', default='2019-12-31 16:00:00')
 
+# indicates in how many hours of raw data to normalize and save at a time when catching up a backlog
+backfill_chunk_hours = config('BACKFILL_CHUNK_HOURS', default=24, cast=int)
+
 # indicates the project's time zone offset from UTC
 utc_offset = config('UTC_OFFSET', default='+08:00')
 
@@ -44,3 +47,6 @@ utc_offset = config('UTC_OFFSET', default='+08:00')
 # the pool size depends on the computing performance of the database server and the analysis server
 pool_size = config('POOL_SIZE', default=5, cast=int)
 
+# indicates where myems-cleaning archives the historical point data as Parquet files, such as /var/lib/myems/archive
+# the archived months are read from the archive if it is not empty, and it requires pyarrow to be installed
+archive_path = config('ARCHIVE_PATH', default='')
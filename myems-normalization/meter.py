@@ -6,17 +6,36 @@ from multiprocessing import Pool
 
 import mysql.connector
 
+import archive
 import config
 
 
+# the maximum number of meters or points in the IN clause of one query
+id_chunk_size = 500
+
+
 ########################################################################################################################
 # PROCEDURES:
 # Step 1: Query all meters and associated energy value points
-# Step 2: Create multiprocessing pool to call worker in parallel
+# Step 2: Get the normalization states of all meters, and discover the start datetime of the meters without state
+# Step 3: Plan the time windows of all meters in chunks of backfill_chunk_hours
+# for each batch of meters sharing the same time window:
+#   Step 4: Get raw data of all points of the batch from historical database in one range query
+#   Step 5: Dispatch the raw data of every point to the workers in parallel to normalize energy values
+#   Step 6: Insert into energy database, save the normalization states and notify myems-aggregation
+#
+# NOTE: the connections to energy database and historical database are opened once in every pass and reused for all
+# meters, instead of twice for every meter
+# NOTE: the normalization state of a meter holds its last normalized time slot and the last energy value read before
+# the next time slot, and it is saved in the same transaction as the hourly data, so that every pass resumes from the
+# saved states without querying MAX(start_datetime_utc) or the latest energy value before the start datetime
+# NOTE: the raw data of the months archived by myems-cleaning are read from the archive instead of historical database
 ########################################################################################################################
 
 
 def calculate_hourly(logger):
+    # the pool is kept across passes
+    p = Pool(processes=config.pool_size)
 
     while True:
         ################################################################################################################
@@ -80,17 +99,92 @@ def calculate_hourly(logger):
 
         print("Got all meters in MyEMS System Database")
 
-        ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
-        ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, meter_list)
-        p.close()
-        p.join()
+        cnx_energy_db = None
+        cursor_energy_db = None
+        cnx_historical_db = None
+        cursor_historical_db = None
+        try:
+            cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+            cursor_energy_db = cnx_energy_db.cursor()
+            cnx_historical_db = mysql.connector.connect(**config.myems_historical_db)
+            cursor_historical_db = cnx_historical_db.cursor()
+
+            ############################################################################################################
+            # Step 2: Get the normalization states of all meters, and discover the start datetime of the meters without
+            # state, such as new meters, meters bound to another point and meters recalculated from the scratch
+            ############################################################################################################
+            state_dict = get_normalization_states(cursor_energy_db)
+            for meter in meter_list:
+                state = state_dict.get(meter['id'])
+                if state is not None and state['point_id'] == meter['point_id']:
+                    meter['start_datetime_utc'] = state['start_datetime_utc']
+                    meter['energy_value_just_before_start'] = state['energy_value_just_before_start']
+                else:
+                    meter['start_datetime_utc'] = None
+                    # None means the latest energy value before the start datetime is to be queried
+                    meter['energy_value_just_before_start'] = None
+
+            start_datetime_dict = get_start_datetimes(cursor_energy_db,
+                                                      [meter['id'] for meter in meter_list
+                                                       if meter['start_datetime_utc'] is None])
+            print("Step 2: " + str(len(start_datetime_dict)) + " of " + str(len(meter_list)) +
+                  " meters without normalization state")
+
+            ############################################################################################################
+            # Step 3: Plan the time windows of all meters in chunks of backfill_chunk_hours
+            ############################################################################################################
+            # we should allow myems-cleaning service to take at most [minutes_to_clean] minutes to clean the data
+            end_datetime_utc = datetime.utcnow().replace(tzinfo=timezone.utc) - \
+                timedelta(minutes=config.minutes_to_clean)
+            pending_meter_list = list()
+            for meter in meter_list:
+                if meter['start_datetime_utc'] is None:
+                    meter['start_datetime_utc'] = start_datetime_dict[meter['id']]
+                # trim end_datetime_utc to the end of the last whole time slot
+                slot_count = (end_datetime_utc - meter['start_datetime_utc']) // \
+                    timedelta(minutes=config.minutes_to_count)
+                meter['end_datetime_utc'] = meter['start_datetime_utc'] + \
+                    timedelta(minutes=config.minutes_to_count) * slot_count
+                if slot_count >= 1:
+                    pending_meter_list.append(meter)
+            print("Step 3: " + str(len(pending_meter_list)) + " of " + str(len(meter_list)) +
+                  " meters to normalize")
+
+            # the chunk is a whole number of time slots
+            chunk_timedelta = timedelta(minutes=config.minutes_to_count *
+                                        max(1, config.backfill_chunk_hours * 60 // config.minutes_to_count))
+            while len(pending_meter_list) > 0:
+                # the meters sharing the same start datetime are normalized in batches,
+                # which are almost all meters after the first pass
+                batch_dict = dict()
+                for meter in pending_meter_list:
+                    batch_dict.setdefault(meter['start_datetime_utc'], list()).append(meter)
+
+                for chunk_start_datetime_utc, batch_meter_list in sorted(batch_dict.items()):
+                    while len(batch_meter_list) > 0:
+                        normalize_batch(p,
+                                        cnx_energy_db,
+                                        cursor_energy_db,
+                                        cursor_historical_db,
+                                        batch_meter_list[:id_chunk_size],
+                                        chunk_start_datetime_utc,
+                                        chunk_timedelta)
+                        batch_meter_list = batch_meter_list[id_chunk_size:]
+
+                pending_meter_list = [meter for meter in pending_meter_list
+                                      if meter['start_datetime_utc'] < meter['end_datetime_utc']]
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+        except Exception as e:
+            logger.error("Error in meter.calculate_hourly " + str(e))
+        finally:
+            if cursor_historical_db:
+                cursor_historical_db.close()
+            if cnx_historical_db:
+                cnx_historical_db.close()
+            if cursor_energy_db:
+                cursor_energy_db.close()
+            if cnx_energy_db:
+                cnx_energy_db.close()
 
         print("go to sleep ...")
         time.sleep(60)
@@ -99,169 +193,241 @@ def calculate_hourly(logger):
 
 
 ########################################################################################################################
-# PROCEDURES:
-# Step 1: Determine the start datetime and end datetime
-# Step 2: Get raw data from historical database between start_datetime_utc and end datetime
-# Step 3: Normalize energy values by minutes_to_count
-# Step 4: Insert into energy database
-#
-# NOTE: returns None or the error string because that the logger object cannot be passed in as parameter
+# Get the normalization states of all meters in one query
+# Returns: dict of meter id to dict of point_id, start_datetime_utc of the next time slot after the last normalized
+#          one, and energy_value_just_before_start, which is an empty dict if there wasn't any energy value
 ########################################################################################################################
+def get_normalization_states(cursor_energy_db):
+    state_dict = dict()
+    cursor_energy_db.execute(" SELECT meter_id, point_id, last_start_datetime_utc, "
+                             "        last_utc_date_time, last_actual_value "
+                             " FROM tbl_meter_normalization_states ")
+    for row in cursor_energy_db.fetchall():
+        energy_value_just_before_start = dict()
+        if isinstance(row[3], datetime) and row[4] is not None:
+            energy_value_just_before_start = {"utc_date_time": row[3], "actual_value": row[4]}
+        state_dict[row[0]] = {"point_id": row[1],
+                              "start_datetime_utc": row[2].replace(second=0, microsecond=0, tzinfo=timezone.utc) +
+                              timedelta(minutes=config.minutes_to_count),
+                              "energy_value_just_before_start": energy_value_just_before_start}
+    return state_dict
 
-def worker(meter):
-    print("Start to process meter: " + "'" + meter['name'] + "'")
-    ####################################################################################################################
-    # Step 1: Determine the start datetime and end datetime
-    ####################################################################################################################
-    cnx_energy_db = None
-    cursor_energy_db = None
-    try:
-        cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
-        cursor_energy_db = cnx_energy_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.1 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-        print(error_string)
-        return error_string
 
+########################################################################################################################
+# Get the start datetime of all meters in one grouped query per chunk of ids
+# Returns: dict of meter id to the next time slot after the latest start_datetime_utc in tbl_meter_hourly,
+#          or to the start datetime in config file if there isn't any energy data of the meter
+########################################################################################################################
+def get_start_datetimes(cursor_energy_db, meter_id_list):
     # get the initial start datetime from config file in case there is no energy data
     start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
     start_datetime_utc = start_datetime_utc.replace(tzinfo=timezone.utc)
     start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0)
 
-    try:
-        query = (" SELECT MAX(start_datetime_utc) "
-                 " FROM tbl_meter_hourly "
-                 " WHERE meter_id = %s ")
-        cursor_energy_db.execute(query, (meter['id'],))
-        row_datetime = cursor_energy_db.fetchone()
-    except Exception as e:
-        error_string = "Error in step 1.3 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-        print(error_string)
-        return error_string
-
-    if row_datetime is not None and len(row_datetime) > 0 and isinstance(row_datetime[0], datetime):
-        start_datetime_utc = row_datetime[0].replace(tzinfo=timezone.utc)
-        # replace second and microsecond with 0
-        # NOTE: DO NOT replace minute in case of calculating in half hourly
-        start_datetime_utc = start_datetime_utc.replace(second=0, microsecond=0)
-        # start from the next time slot
-        start_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-    end_datetime_utc = datetime.utcnow().replace(tzinfo=timezone.utc)
-    # we should allow myems-cleaning service to take at most [minutes_to_clean] minutes to clean the data
-    end_datetime_utc -= timedelta(minutes=config.minutes_to_clean)
-
-    time_difference = end_datetime_utc - start_datetime_utc
-    time_difference_in_minutes = time_difference / timedelta(minutes=1)
-    if time_difference_in_minutes < config.minutes_to_count:
-        error_string = "it's too early to calculate" + " for '" + meter['name'] + "'"
-        print(error_string)
-        return error_string
-
-    # trim end_datetime_utc
-    trimmed_end_datetime_utc = start_datetime_utc + timedelta(minutes=config.minutes_to_count)
-    while trimmed_end_datetime_utc <= end_datetime_utc:
-        trimmed_end_datetime_utc += timedelta(minutes=config.minutes_to_count)
-
-    end_datetime_utc = trimmed_end_datetime_utc - timedelta(minutes=config.minutes_to_count)
-
-    if end_datetime_utc <= start_datetime_utc:
-        error_string = "it's too early to calculate" + " for '" + meter['name'] + "'"
-        print(error_string)
-        return error_string
-
-    print("start_datetime_utc: " + start_datetime_utc.isoformat()[0:19]
-          + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
+    start_datetime_dict = dict()
+    for meter_id in meter_id_list:
+        start_datetime_dict[meter_id] = start_datetime_utc
+
+    meter_id_list = sorted(set(meter_id_list))
+    while len(meter_id_list) > 0:
+        query_id_list = meter_id_list[:id_chunk_size]
+        meter_id_list = meter_id_list[id_chunk_size:]
+        cursor_energy_db.execute(" SELECT meter_id, MAX(start_datetime_utc) "
+                                 " FROM tbl_meter_hourly "
+                                 " WHERE meter_id IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                                 " GROUP BY meter_id ",
+                                 tuple(query_id_list))
+        for row in cursor_energy_db.fetchall():
+            if isinstance(row[1], datetime):
+                # replace second and microsecond with 0
+                # NOTE: DO NOT replace minute in case of calculating in half hourly
+                # start from the next time slot
+                start_datetime_dict[row[0]] = row[1].replace(second=0, microsecond=0, tzinfo=timezone.utc) + \
+                    timedelta(minutes=config.minutes_to_count)
+
+    return start_datetime_dict
+
+
+########################################################################################################################
+# Normalize a batch of meters sharing the same start datetime, and save the energy data of the chunk
+# meter_list: the meters of the batch, the start_datetime_utc and energy_value_just_before_start of every meter are
+#             moved to the end of the chunk
+# NOTE: the energy data and the normalization states of the batch are committed in one transaction, which is the
+# checkpoint to resume from
+########################################################################################################################
+def normalize_batch(p, cnx_energy_db, cursor_energy_db, cursor_historical_db, meter_list, chunk_start_datetime_utc,
+                    chunk_timedelta):
+    chunk_end_datetime_utc = max(min(chunk_start_datetime_utc + chunk_timedelta, meter['end_datetime_utc'])
+                                 for meter in meter_list)
+    point_id_list = sorted(set(meter['point_id'] for meter in meter_list))
+    print("normalizing " + str(len(meter_list)) + " meters from " + chunk_start_datetime_utc.isoformat()[0:19] +
+          " to " + chunk_end_datetime_utc.isoformat()[0:19])
 
     ####################################################################################################################
-    # Step 2: Get raw data from historical database between start_datetime_utc and end_datetime_utc
+    # Step 4: Get raw data of all points of the batch from historical database in one range query
     ####################################################################################################################
+    # the raw data before archived_until_datetime_utc were moved to the archive by myems-cleaning
+    archived_until_datetime_utc = archive.get_archived_until('tbl_energy_value')
+    archived_condition = ""
+    archived_params = tuple()
+    if archived_until_datetime_utc is not None:
+        archived_condition = " AND utc_date_time >= %s "
+        archived_params = (archived_until_datetime_utc, )
+
+    # query latest record before chunk_start_datetime_utc of every point of the meters without normalization state
+    unknown_point_id_list = sorted(set(meter['point_id'] for meter in meter_list
+                                       if meter['energy_value_just_before_start'] is None))
+    if len(unknown_point_id_list) > 0:
+        energy_value_before_start_dict = dict()
+        query = (" SELECT v.point_id, v.utc_date_time, v.actual_value "
+                 " FROM tbl_energy_value v, "
+                 "      (SELECT point_id, MAX(utc_date_time) AS utc_date_time "
+                 "       FROM tbl_energy_value "
+                 "       WHERE point_id IN (" + ", ".join(["%s"] * len(unknown_point_id_list)) + ") "
+                 "             AND utc_date_time < %s AND is_bad = 0 " + archived_condition +
+                 "       GROUP BY point_id) l "
+                 " WHERE v.point_id = l.point_id AND v.utc_date_time = l.utc_date_time "
+                 "       AND v.is_bad = 0 ")
+        cursor_historical_db.execute(query, tuple(unknown_point_id_list) + (chunk_start_datetime_utc, ) +
+                                     archived_params)
+        for row in cursor_historical_db.fetchall():
+            energy_value_before_start_dict[row[0]] = {"utc_date_time": row[1], "actual_value": row[2]}
+        # the latest records of the other points are searched in the archive
+        for point_id, row in archive.get_latest_good_values_before('tbl_energy_value',
+                                                                   [point_id for point_id in unknown_point_id_list
+                                                                    if point_id not in energy_value_before_start_dict],
+                                                                   chunk_start_datetime_utc).items():
+            energy_value_before_start_dict[point_id] = {"utc_date_time": row[0], "actual_value": row[1]}
+        for meter in meter_list:
+            if meter['energy_value_just_before_start'] is None:
+                meter['energy_value_just_before_start'] = energy_value_before_start_dict.get(meter['point_id'],
+                                                                                             dict())
+
+    # query energy values to be normalized of all points, and slice them by point
+    rows_energy_values_dict = dict()
+    for point_id in point_id_list:
+        rows_energy_values_dict[point_id] = list()
+    if archived_until_datetime_utc is not None and chunk_start_datetime_utc < archived_until_datetime_utc:
+        rows_energy_values_dict = archive.get_values('tbl_energy_value',
+                                                     point_id_list,
+                                                     chunk_start_datetime_utc,
+                                                     min(chunk_end_datetime_utc, archived_until_datetime_utc),
+                                                     True)
+    cursor_historical_db.execute(" SELECT point_id, utc_date_time, actual_value "
+                                 " FROM tbl_energy_value "
+                                 " WHERE point_id IN (" + ", ".join(["%s"] * len(point_id_list)) + ") "
+                                 "       AND utc_date_time >= %s AND utc_date_time < %s AND is_bad = 0 " +
+                                 archived_condition +
+                                 " ORDER BY point_id, utc_date_time ",
+                                 tuple(point_id_list) + (chunk_start_datetime_utc, chunk_end_datetime_utc) +
+                                 archived_params)
+    for row in cursor_historical_db:
+        rows_energy_values_dict[row[0]].append((row[1], row[2]))
 
-    cnx_historical_db = None
-    cursor_historical_db = None
-    try:
-        cnx_historical_db = mysql.connector.connect(**config.myems_historical_db)
-        cursor_historical_db = cnx_historical_db.cursor()
-    except Exception as e:
-        error_string = "Error in step 1.2 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-        if cursor_historical_db:
-            cursor_historical_db.close()
-        if cnx_historical_db:
-            cnx_historical_db.close()
-
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-
-        print(error_string)
-        return error_string
-
-    # query latest record before start_datetime_utc
-    energy_value_just_before_start = dict()
-    try:
-        query = (" SELECT utc_date_time, actual_value "
-                 " FROM tbl_energy_value "
-                 " WHERE point_id = %s AND utc_date_time < %s AND is_bad = 0 "
-                 " ORDER BY utc_date_time DESC "
-                 " LIMIT 1 ")
-        cursor_historical_db.execute(query, (meter['point_id'], start_datetime_utc,))
-        row_energy_value_before_start = cursor_historical_db.fetchone()
-
-        if row_energy_value_before_start is not None and len(row_energy_value_before_start) > 0:
-            energy_value_just_before_start = {"utc_date_time": row_energy_value_before_start[0],
-                                              "actual_value": row_energy_value_before_start[1]}
-    except Exception as e:
-        error_string = "Error in step 2.2 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-        if cursor_historical_db:
-            cursor_historical_db.close()
-        if cnx_historical_db:
-            cnx_historical_db.close()
-
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-
-        print(error_string)
-        return error_string
-
-    # query energy values to be normalized
-    try:
-        query = (" SELECT utc_date_time, actual_value "
-                 " FROM tbl_energy_value "
-                 " WHERE point_id = %s AND utc_date_time >= %s AND utc_date_time < %s AND is_bad = 0 "
-                 " ORDER BY utc_date_time ")
-        cursor_historical_db.execute(query, (meter['point_id'], start_datetime_utc, end_datetime_utc))
-        rows_energy_values = cursor_historical_db.fetchall()
-    except Exception as e:
-        error_string = "Error in step 2.3 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-
-        print(error_string)
-        return error_string
-    finally:
-        if cursor_historical_db:
-            cursor_historical_db.close()
-        if cnx_historical_db:
-            cnx_historical_db.close()
+    ####################################################################################################################
+    # Step 5: Dispatch the raw data of every point to the workers in parallel to normalize energy values
+    ####################################################################################################################
+    task_list = list()
+    for meter in meter_list:
+        meter_end_datetime_utc = min(chunk_start_datetime_utc + chunk_timedelta, meter['end_datetime_utc'])
+        # the raw data of the point is sliced to the time window of the meter
+        rows_energy_values = [row for row in rows_energy_values_dict[meter['point_id']]
+                              if row[0].replace(tzinfo=timezone.utc) < meter_end_datetime_utc]
+        task_list.append({"rows_energy_values": rows_energy_values,
+                          "energy_value_just_before_start": meter['energy_value_just_before_start'],
+                          "start_datetime_utc": chunk_start_datetime_utc,
+                          "end_datetime_utc": meter_end_datetime_utc,
+                          "hourly_low_limit": meter['hourly_low_limit'],
+                          "hourly_high_limit": meter['hourly_high_limit']})
+    normalized_values_list = p.map(worker, task_list)
 
     ####################################################################################################################
-    # Step 3: Normalize energy values by minutes_to_count
+    # Step 6: Insert into energy database, save the normalization states and notify myems-aggregation
     ####################################################################################################################
+    add_value_list = list()
+    appended_meter_id_set = set()
+    for meter, normalized_values in zip(meter_list, normalized_values_list):
+        for meta_data in normalized_values:
+            add_value_list.append(" (" + str(meter['id']) + "," +
+                                  "'" + meta_data['start_datetime_utc'].isoformat()[0:19] + "'," +
+                                  str(meta_data['actual_value']) + ")")
+        if len(normalized_values) > 0:
+            appended_meter_id_set.add(meter['id'])
+
+    while len(add_value_list) > 0:
+        insert_1000 = add_value_list[:1000]
+        add_value_list = add_value_list[1000:]
+        cursor_energy_db.execute(" INSERT INTO tbl_meter_hourly (meter_id, start_datetime_utc, actual_value) "
+                                 " VALUES " + ", ".join(insert_1000))
+
+    notified_datetime_utc = datetime.utcnow().isoformat()[0:19]
+    appended_meter_id_list = sorted(appended_meter_id_set)
+    while len(appended_meter_id_list) > 0:
+        insert_1000 = appended_meter_id_list[:1000]
+        appended_meter_id_list = appended_meter_id_list[1000:]
+        cursor_energy_db.execute(" INSERT INTO tbl_hourly_notifications "
+                                 "             (table_name, object_id, origin_datetime_utc, created_datetime_utc) "
+                                 " VALUES " +
+                                 ", ".join(["('tbl_meter_hourly', " + str(meter_id) + ", '" +
+                                            notified_datetime_utc + "', '" + notified_datetime_utc + "')"
+                                            for meter_id in insert_1000]))
+
+    # the last energy value read before the next time slot is the last one in the time window,
+    # or the one before the start datetime if there isn't any energy value in the time window
+    state_value_list = list()
+    for meter, task in zip(meter_list, task_list):
+        if len(task['rows_energy_values']) > 0:
+            meter['energy_value_just_before_start'] = {"utc_date_time": task['rows_energy_values'][-1][0],
+                                                       "actual_value": task['rows_energy_values'][-1][1]}
+        meter['start_datetime_utc'] = task['end_datetime_utc']
+        state_value_list.append((meter['id'],
+                                 meter['point_id'],
+                                 (meter['start_datetime_utc'] -
+                                  timedelta(minutes=config.minutes_to_count)).isoformat()[0:19],
+                                 meter['energy_value_just_before_start'].get('utc_date_time'),
+                                 meter['energy_value_just_before_start'].get('actual_value')))
+
+    while len(state_value_list) > 0:
+        insert_1000 = state_value_list[:1000]
+        state_value_list = state_value_list[1000:]
+        cursor_energy_db.execute(" INSERT INTO tbl_meter_normalization_states "
+                                 "             (meter_id, point_id, last_start_datetime_utc, "
+                                 "              last_utc_date_time, last_actual_value) "
+                                 " VALUES " + ", ".join(["(%s, %s, %s, %s, %s)"] * len(insert_1000)) +
+                                 " ON DUPLICATE KEY UPDATE point_id = VALUES(point_id), "
+                                 "                         last_start_datetime_utc = VALUES(last_start_datetime_utc), "
+                                 "                         last_utc_date_time = VALUES(last_utc_date_time), "
+                                 "                         last_actual_value = VALUES(last_actual_value) ",
+                                 tuple(value for state_value in insert_1000 for value in state_value))
+    cnx_energy_db.commit()
 
+
+########################################################################################################################
+# Normalize the energy values of a meter in the worker process
+# task: dict of the arguments of normalize_energy_values
+# Returns: list of dict of start_datetime_utc and actual_value
+########################################################################################################################
+def worker(task):
+    return normalize_energy_values(task['rows_energy_values'],
+                                   task['energy_value_just_before_start'],
+                                   task['start_datetime_utc'],
+                                   task['end_datetime_utc'],
+                                   task['hourly_low_limit'],
+                                   task['hourly_high_limit'])
+
+
+########################################################################################################################
+# Normalize energy values by minutes_to_count
+# rows_energy_values: iterable of (utc_date_time, actual_value) of the energy value point in ascending order of date
+#                     time between start_datetime_utc and end_datetime_utc, such as a list or the cursor of the query
+# energy_value_just_before_start: dict of utc_date_time and actual_value of the latest energy value before
+#                                 start_datetime_utc, or empty dict if there isn't any
+# Returns: list of dict of start_datetime_utc and actual_value, the energy increment in every time slot
+# NOTE: the rows are iterated once, so that the time is linear in the number of rows and time slots,
+# and the rows are not kept in memory if they are iterated from the cursor
+########################################################################################################################
+def normalize_energy_values(rows_energy_values, energy_value_just_before_start, start_datetime_utc, end_datetime_utc,
+                            hourly_low_limit, hourly_high_limit):
     ####################################################################################################################
     # special test case 1 (disconnected)
     # id       point_id  utc_date_time        actual_value
@@ -340,96 +506,59 @@ def worker(meter):
     # 300346191	1003344	2019-03-14 01:25:00	0	            1
     ####################################################################################################################
 
+    row_iterator = iter(rows_energy_values if rows_energy_values is not None else list())
+    # the next energy value not yet put into a time slot
+    row_energy_value = next(row_iterator, None)
+
     normalized_values = list()
-    if rows_energy_values is None or len(rows_energy_values) == 0:
+    if row_energy_value is None:
         # NOTE: there isn't any value to be normalized
         # that means the meter is offline or all values are bad
         current_datetime_utc = start_datetime_utc
         while current_datetime_utc < end_datetime_utc:
             normalized_values.append({'start_datetime_utc': current_datetime_utc, 'actual_value': Decimal(0.0)})
             current_datetime_utc += timedelta(minutes=config.minutes_to_count)
-    else:
-        maximum = Decimal(0.0)
-        if energy_value_just_before_start is not None and \
-                len(energy_value_just_before_start) > 0 and \
-                energy_value_just_before_start['actual_value'] > Decimal(0.0):
-            maximum = energy_value_just_before_start['actual_value']
-
-        current_datetime_utc = start_datetime_utc
-        while current_datetime_utc < end_datetime_utc:
-            initial_maximum = maximum
-            # get all energy values in current time slot
-            current_energy_values = list()
-            while len(rows_energy_values) > 0:
-                row_energy_value = rows_energy_values.pop(0)
-                energy_value_datetime = row_energy_value[0].replace(tzinfo=timezone.utc)
-                if energy_value_datetime < current_datetime_utc + timedelta(minutes=config.minutes_to_count):
-                    current_energy_values.append(row_energy_value)
-                else:
-                    rows_energy_values.insert(0, row_energy_value)
-                    break
-
-            # get the energy increment one by one in current time slot
+        return normalized_values
+
+    maximum = Decimal(0.0)
+    if energy_value_just_before_start is not None and \
+            len(energy_value_just_before_start) > 0 and \
+            energy_value_just_before_start['actual_value'] > Decimal(0.0):
+        maximum = energy_value_just_before_start['actual_value']
+
+    current_datetime_utc = start_datetime_utc
+    while current_datetime_utc < end_datetime_utc:
+        initial_maximum = maximum
+        next_datetime_utc = current_datetime_utc + timedelta(minutes=config.minutes_to_count)
+
+        # get the energy increment one by one in current time slot
+        increment = Decimal(0.0)
+        # maximum should be equal to the maximum value of last time here
+        while row_energy_value is not None and \
+                row_energy_value[0].replace(tzinfo=timezone.utc) < next_datetime_utc:
+            actual_value = row_energy_value[1]
+            if maximum < actual_value:
+                increment += actual_value - maximum
+            maximum = actual_value
+            row_energy_value = next(row_iterator, None)
+
+        # omit huge initial value for a new meter
+        # or omit huge value for a recovered meter with zero values during failure
+        # NOTE: this method may cause the lose of energy consumption in this time slot
+        if initial_maximum <= Decimal(0.1):
             increment = Decimal(0.0)
-            # maximum should be equal to the maximum value of last time here
-            for index in range(len(current_energy_values)):
-                current_energy_value = current_energy_values[index]
-                if maximum < current_energy_value[1]:
-                    increment += current_energy_value[1] - maximum
-                maximum = current_energy_value[1]
-
-            # omit huge initial value for a new meter
-            # or omit huge value for a recovered meter with zero values during failure
-            # NOTE: this method may cause the lose of energy consumption in this time slot
-            if initial_maximum <= Decimal(0.1):
-                increment = Decimal(0.0)
-
-            # check with hourly low limit
-            if increment < meter['hourly_low_limit']:
-                increment = Decimal(0.0)
-
-            # check with hourly high limit
-            # NOTE: this method may cause the lose of energy consumption in this time slot
-            if increment > meter['hourly_high_limit']:
-                increment = Decimal(0.0)
-
-            meta_data = {'start_datetime_utc': current_datetime_utc,
-                         'actual_value': increment}
-            # append mete_data
-            normalized_values.append(meta_data)
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
-    ####################################################################################################################
-    # Step 4: Insert into energy database
-    ####################################################################################################################
-    while len(normalized_values) > 0:
-        insert_100 = normalized_values[:100]
-        normalized_values = normalized_values[100:]
-        try:
-            add_values = (" INSERT INTO tbl_meter_hourly (meter_id, start_datetime_utc, actual_value) "
-                          " VALUES  ")
-
-            for meta_data in insert_100:
-                add_values += " (" + str(meter['id']) + ","
-                add_values += "'" + meta_data['start_datetime_utc'].isoformat()[0:19] + "',"
-                add_values += str(meta_data['actual_value']) + "), "
-            # trim ", " at the end of string and then execute
-            cursor_energy_db.execute(add_values[:-2])
-            cnx_energy_db.commit()
-        except Exception as e:
-            error_string = "Error in step 4.1 of meter.worker " + str(e) + " for '" + meter['name'] + "'"
-            if cursor_energy_db:
-                cursor_energy_db.close()
-            if cnx_energy_db:
-                cnx_energy_db.close()
+        # check with hourly low limit
+        if increment < hourly_low_limit:
+            increment = Decimal(0.0)
 
-            print(error_string)
-            return error_string
+        # check with hourly high limit
+        # NOTE: this method may cause the lose of energy consumption in this time slot
+        if increment > hourly_high_limit:
+            increment = Decimal(0.0)
 
-    if cursor_energy_db:
-        cursor_energy_db.close()
-    if cnx_energy_db:
-        cnx_energy_db.close()
+        normalized_values.append({'start_datetime_utc': current_datetime_utc,
+                                  'actual_value': increment})
+        current_datetime_utc = next_datetime_utc
 
-    print("End of processing meter: " + "'" + meter['name'] + "'")
-    return None
+    return normalized_values
@@ -250,7 +250,8 @@ def calculate_hourly(logger):
                                                (offline_meter_id,
                                                 start_datetime_utc.isoformat()[0:19],
                                                 end_datetime_utc.isoformat()[0:19]))
-                                cnx.commit()
+                                # the deleted rows are committed along with the rows inserted again, so that the
+                                # rollup tables of myems-aggregation are rebuilt from the inserted rows
                                 # todo: check with hourly low limit and hourly high limit
                                 add_values = (" INSERT INTO tbl_offline_meter_hourly "
                                               "             (offline_meter_id, start_datetime_utc, actual_value) "
@@ -266,6 +267,16 @@ def calculate_hourly(logger):
                                 # trim ", " at the end of string and then execute
                                 cursor.execute(add_values[:-2])
                                 cnx.commit()
+
+                            # notify myems-aggregation of the appended hourly data
+                            notified_datetime_utc = datetime.utcnow().isoformat()[0:19]
+                            cursor.execute(" INSERT INTO tbl_hourly_notifications "
+                                           "             (table_name, object_id, "
+                                           "              origin_datetime_utc, created_datetime_utc) "
+                                           " VALUES (%s, %s, %s, %s) ",
+                                           ('tbl_offline_meter_hourly', offline_meter_id,
+                                            notified_datetime_utc, notified_datetime_utc))
+                            cnx.commit()
                     except Exception as e:
                         logger.error("Error in step 3.3 of offlinemeter.calculate_hourly " + str(e))
                         time.sleep(60)
@@ -0,0 +1,91 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import config
+import meter
+
+
+def normalize_energy_values_by_pop(rows_energy_values, energy_value_just_before_start, start_datetime_utc,
+                                   end_datetime_utc, hourly_low_limit, hourly_high_limit):
+    """the previous implementation of step 3 of meter.worker, to compare the results"""
+    rows_energy_values = list(rows_energy_values)
+    normalized_values = list()
+    maximum = Decimal(0.0)
+    if energy_value_just_before_start is not None and \
+            len(energy_value_just_before_start) > 0 and \
+            energy_value_just_before_start['actual_value'] > Decimal(0.0):
+        maximum = energy_value_just_before_start['actual_value']
+
+    current_datetime_utc = start_datetime_utc
+    while current_datetime_utc < end_datetime_utc:
+        initial_maximum = maximum
+        current_energy_values = list()
+        while len(rows_energy_values) > 0:
+            row_energy_value = rows_energy_values.pop(0)
+            energy_value_datetime = row_energy_value[0].replace(tzinfo=timezone.utc)
+            if energy_value_datetime < current_datetime_utc + timedelta(minutes=config.minutes_to_count):
+                current_energy_values.append(row_energy_value)
+            else:
+                rows_energy_values.insert(0, row_energy_value)
+                break
+
+        increment = Decimal(0.0)
+        for current_energy_value in current_energy_values:
+            if maximum < current_energy_value[1]:
+                increment += current_energy_value[1] - maximum
+            maximum = current_energy_value[1]
+
+        if initial_maximum <= Decimal(0.1):
+            increment = Decimal(0.0)
+        if increment < hourly_low_limit:
+            increment = Decimal(0.0)
+        if increment > hourly_high_limit:
+            increment = Decimal(0.0)
+
+        normalized_values.append({'start_datetime_utc': current_datetime_utc, 'actual_value': increment})
+        current_datetime_utc += timedelta(minutes=config.minutes_to_count)
+
+    return normalized_values
+
+
+def main():
+    """main"""
+    print('Replaying 90 days of 1-minute readings of a meter ...')
+    start_datetime_utc = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end_datetime_utc = start_datetime_utc + timedelta(days=90)
+    rows_energy_values = list()
+    actual_value = Decimal('1000000.0')
+    current_datetime_utc = start_datetime_utc
+    while current_datetime_utc < end_datetime_utc:
+        # some readings drop to zero to test the recovered meter, and some jump to test the high limit
+        if random.random() < 0.001:
+            rows_energy_values.append((current_datetime_utc.replace(tzinfo=None), Decimal(0.0)))
+        elif random.random() < 0.001:
+            rows_energy_values.append((current_datetime_utc.replace(tzinfo=None), actual_value * 2))
+        else:
+            actual_value += Decimal(random.randint(0, 1000)) / Decimal(100)
+            rows_energy_values.append((current_datetime_utc.replace(tzinfo=None), actual_value))
+        current_datetime_utc += timedelta(minutes=1, seconds=random.randint(-5, 5))
+    energy_value_just_before_start = {"utc_date_time": start_datetime_utc - timedelta(minutes=1),
+                                      "actual_value": Decimal('1000000.0')}
+    print('rows: ' + str(len(rows_energy_values)))
+
+    start_time = time.perf_counter()
+    normalized_values = meter.normalize_energy_values(rows_energy_values, energy_value_just_before_start,
+                                                      start_datetime_utc, end_datetime_utc,
+                                                      Decimal(0.0), Decimal(10000.0))
+    print('normalize_energy_values: ' + str(round(time.perf_counter() - start_time, 3)) + ' seconds')
+
+    start_time = time.perf_counter()
+    expected_values = normalize_energy_values_by_pop(rows_energy_values, energy_value_just_before_start,
+                                                     start_datetime_utc, end_datetime_utc,
+                                                     Decimal(0.0), Decimal(10000.0))
+    print('normalize_energy_values_by_pop: ' + str(round(time.perf_counter() - start_time, 3)) + ' seconds')
+
+    print('identical: ' + str(normalized_values == expected_values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from sympy import sympify
+
+import virtualmeter
+
+
+def main():
+    """main"""
+    print('Testing compile_equation and evaluate_equation ...')
+    # a year of hourly values of a virtual meter with 20 variables
+    length = 24 * 365
+    variable_name_list = ['x' + str(i) for i in range(1, 21)]
+    equation = ' + '.join(variable_name_list[:10]) + ' - (' + ' + '.join(variable_name_list[10:]) + ') * 0.5'
+    column_list = list()
+    for _ in variable_name_list:
+        column_list.append([Decimal(random.randint(0, 1000000)) / Decimal(1000) for _ in range(length)])
+
+    start_time = time.perf_counter()
+    equation_function = virtualmeter.compile_equation(equation, variable_name_list)
+    print('compiled the equation in ' + str(round((time.perf_counter() - start_time) * 1000, 3)) + ' milliseconds')
+    start_time = time.perf_counter()
+    actual_value_list = virtualmeter.evaluate_equation(equation_function, column_list, length)
+    print('evaluated ' + str(length) + ' time slots in ' +
+          str(round((time.perf_counter() - start_time) * 1000, 3)) + ' milliseconds')
+
+    # the values are rounded half up to 3 decimal places when saved to the hourly tables
+    print('Comparing with evalf of SymPy in the first 100 time slots ...')
+    expr = sympify(equation)
+    start_time = time.perf_counter()
+    mismatch_count = 0
+    for i in range(100):
+        subs = dict()
+        for j, variable_name in enumerate(variable_name_list):
+            subs[variable_name] = column_list[j][i]
+        expected_value = Decimal(str(expr.evalf(subs=subs))).quantize(Decimal('0.001'), ROUND_HALF_UP)
+        if actual_value_list[i].quantize(Decimal('0.001'), ROUND_HALF_UP) != expected_value:
+            mismatch_count += 1
+            print(i, actual_value_list[i], expected_value)
+    print('evaluated 100 time slots with evalf in ' +
+          str(round((time.perf_counter() - start_time) * 1000, 3)) + ' milliseconds')
+    print('mismatches: ' + str(mismatch_count))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import math
 import random
 import time
 from datetime import datetime, timedelta
@@ -5,18 +6,38 @@ from decimal import Decimal
 from multiprocessing import Pool
 
 import mysql.connector
-from sympy import sympify
+from sympy import lambdify, sympify, Symbol
 
 import config
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the compiled functions of equations by (equation, tuple of variable names), the equations of virtual meters are
+# compiled once in every process instead of once in every pass
+compiled_equation_dict = dict()
+
+# the maximum number of objects in the IN clause of one query
+id_chunk_size = 500
 
 
 ########################################################################################################################
 # PROCEDURES:
 # Step 1: Query all virtual meters
-# Step 2: Create multiprocessing pool to call worker in parallel
+# Step 2: Query the meters, virtual meters and offline meters associated with all virtual meters, and sort the virtual
+#         meters into levels of the dependency graph, the virtual meters in cycles are logged and skipped
+# Step 3: Get the latest start datetime of all meters, offline meters and virtual meters in grouped queries
+# Step 4: Call worker in parallel for the stale virtual meters of every level in topological order
+#
+# NOTE: a virtual meter is stale if all the objects associated with its equation have energy data after its latest
+# time slot, so that a chain of virtual meters is calculated in one pass instead of one pass for every virtual meter
 ########################################################################################################################
 
 def calculate_hourly(logger):
+    # the pool is kept across passes
+    p = Pool(processes=config.pool_size)
 
     while True:
         # the outermost while loop to reconnect server if there is a connection error
@@ -37,7 +58,7 @@ def calculate_hourly(logger):
 
         print("Connected to MyEMS System Database")
 
-        virtual_meter_list = list()
+        virtual_meter_dict = dict()
         try:
             cursor_system_db.execute(" SELECT id, name, equation "
                                      " FROM tbl_virtual_meters "
@@ -50,8 +71,42 @@ def calculate_hourly(logger):
                 continue
 
             for row in rows_virtual_meters:
-                meta_result = {"id": row[0], "name": row[1], "equation": row[2]}
-                virtual_meter_list.append(meta_result)
+                virtual_meter_dict[row[0]] = {"id": row[0],
+                                              "name": row[1],
+                                              "equation": row[2],
+                                              "meter_list_in_expression": list(),
+                                              "virtual_meter_list_in_expression": list(),
+                                              "offline_meter_list_in_expression": list()}
+
+            ############################################################################################################
+            # Step 2: Query the meters, virtual meters and offline meters associated with all virtual meters
+            ############################################################################################################
+            cursor_system_db.execute(" SELECT v.virtual_meter_id, m.id as meter_id, v.name as variable_name "
+                                     " FROM tbl_meters m, tbl_variables v "
+                                     " WHERE m.id = v.meter_id "
+                                     "       AND v.meter_type = 'meter' ")
+            for row in cursor_system_db.fetchall():
+                if row[0] in virtual_meter_dict:
+                    virtual_meter_dict[row[0]]['meter_list_in_expression'].append(
+                        {"meter_id": row[1], "variable_name": row[2].lower()})
+
+            cursor_system_db.execute(" SELECT v.virtual_meter_id, m.id as virtual_meter_id, v.name as variable_name "
+                                     " FROM tbl_virtual_meters m, tbl_variables v "
+                                     " WHERE m.id = v.meter_id "
+                                     "       AND v.meter_type = 'virtual_meter' ")
+            for row in cursor_system_db.fetchall():
+                if row[0] in virtual_meter_dict:
+                    virtual_meter_dict[row[0]]['virtual_meter_list_in_expression'].append(
+                        {"virtual_meter_id": row[1], "variable_name": row[2].lower()})
+
+            cursor_system_db.execute(" SELECT v.virtual_meter_id, m.id as offline_meter_id, v.name as variable_name "
+                                     " FROM tbl_offline_meters m, tbl_variables v "
+                                     " WHERE m.id = v.meter_id "
+                                     "       AND v.meter_type = 'offline_meter' ")
+            for row in cursor_system_db.fetchall():
+                if row[0] in virtual_meter_dict:
+                    virtual_meter_dict[row[0]]['offline_meter_list_in_expression'].append(
+                        {"offline_meter_id": row[1], "variable_name": row[2].lower()})
 
         except Exception as e:
             logger.error("Error in step 1 of virtual meter calculate hourly " + str(e))
@@ -64,32 +119,170 @@ def calculate_hourly(logger):
             if cnx_system_db:
                 cnx_system_db.close()
 
-        # shuffle the virtual meter list for randomly calculating the meter hourly value
-        random.shuffle(virtual_meter_list)
-
         print("Got all virtual meters in MyEMS System Database")
+
+        level_list, cycle_virtual_meter_list = sort_virtual_meters(virtual_meter_dict)
+        if len(cycle_virtual_meter_list) > 0:
+            logger.error("Error in step 2 of virtual meter calculate hourly, the virtual meters are in or depend on "
+                         "cycles of virtual meters: " +
+                         ", ".join(["'" + virtual_meter['name'] + "'" for virtual_meter in cycle_virtual_meter_list]))
+
         ################################################################################################################
-        # Step 2: Create multiprocessing pool to call worker in parallel
+        # Step 3: Get the latest start datetime of all meters, offline meters and virtual meters in grouped queries
         ################################################################################################################
-        p = Pool(processes=config.pool_size)
-        error_list = p.map(worker, virtual_meter_list)
-        p.close()
-        p.join()
+        cnx_energy_db = None
+        cursor_energy_db = None
+        try:
+            cnx_energy_db = mysql.connector.connect(**config.myems_energy_db)
+            cursor_energy_db = cnx_energy_db.cursor()
+
+            meter_id_set = set()
+            offline_meter_id_set = set()
+            for virtual_meter in virtual_meter_dict.values():
+                for meter_in_expression in virtual_meter['meter_list_in_expression']:
+                    meter_id_set.add(meter_in_expression['meter_id'])
+                for offline_meter_in_expression in virtual_meter['offline_meter_list_in_expression']:
+                    offline_meter_id_set.add(offline_meter_in_expression['offline_meter_id'])
+            latest_meter_dict = get_latest_datetimes(cursor_energy_db, 'tbl_meter_hourly', 'meter_id',
+                                                     meter_id_set)
+            latest_offline_meter_dict = get_latest_datetimes(cursor_energy_db, 'tbl_offline_meter_hourly',
+                                                             'offline_meter_id', offline_meter_id_set)
+            latest_virtual_meter_dict = get_latest_datetimes(cursor_energy_db, 'tbl_virtual_meter_hourly',
+                                                             'virtual_meter_id', virtual_meter_dict.keys())
+
+            ############################################################################################################
+            # Step 4: Call worker in parallel for the stale virtual meters of every level in topological order
+            ############################################################################################################
+            for level, virtual_meter_list in enumerate(level_list):
+                stale_virtual_meter_list = [virtual_meter for virtual_meter in virtual_meter_list
+                                            if is_stale(virtual_meter,
+                                                        latest_meter_dict,
+                                                        latest_offline_meter_dict,
+                                                        latest_virtual_meter_dict)]
+                print("level " + str(level) + ": " + str(len(stale_virtual_meter_list)) + " of " +
+                      str(len(virtual_meter_list)) + " virtual meters are stale")
+                if len(stale_virtual_meter_list) == 0:
+                    continue
+
+                # shuffle the virtual meter list for randomly calculating the meter hourly value
+                random.shuffle(stale_virtual_meter_list)
+                error_list = p.map(worker, stale_virtual_meter_list)
+                for error in error_list:
+                    if error is not None and len(error) > 0:
+                        logger.error(error)
+
+                # the virtual meters of the next levels depend on the data appended just now,
+                # end the transaction to read the data committed by the workers
+                cnx_energy_db.commit()
+                latest_virtual_meter_dict.update(
+                    get_latest_datetimes(cursor_energy_db, 'tbl_virtual_meter_hourly', 'virtual_meter_id',
+                                         [virtual_meter['id'] for virtual_meter in stale_virtual_meter_list]))
 
-        for error in error_list:
-            if error is not None and len(error) > 0:
-                logger.error(error)
+        except Exception as e:
+            logger.error("Error in step 3 of virtual meter calculate hourly " + str(e))
+        finally:
+            if cursor_energy_db:
+                cursor_energy_db.close()
+            if cnx_energy_db:
+                cnx_energy_db.close()
 
         print("go to sleep ...")
         time.sleep(60)
         print("wake from sleep, and continue to work...")
 
 
+########################################################################################################################
+# Sort the virtual meters into levels of the dependency graph by Kahn's algorithm
+# virtual_meter_dict: dict of virtual meter id to virtual meter with virtual_meter_list_in_expression
+# Returns: list of levels, where every virtual meter depends on the virtual meters of the previous levels only,
+#          and list of the virtual meters in or depending on cycles, which can never be calculated
+########################################################################################################################
+def sort_virtual_meters(virtual_meter_dict):
+    dependency_count_dict = dict()
+    dependent_list_dict = dict()
+    for virtual_meter_id, virtual_meter in virtual_meter_dict.items():
+        dependency_id_set = set(virtual_meter_in_expression['virtual_meter_id']
+                                for virtual_meter_in_expression in virtual_meter['virtual_meter_list_in_expression'])
+        dependency_count_dict[virtual_meter_id] = len(dependency_id_set)
+        for dependency_id in dependency_id_set:
+            dependent_list_dict.setdefault(dependency_id, list()).append(virtual_meter_id)
+
+    level_list = list()
+    current_id_list = sorted(virtual_meter_id for virtual_meter_id, dependency_count in dependency_count_dict.items()
+                             if dependency_count == 0)
+    while len(current_id_list) > 0:
+        level_list.append([virtual_meter_dict[virtual_meter_id] for virtual_meter_id in current_id_list])
+        next_id_list = list()
+        for virtual_meter_id in current_id_list:
+            for dependent_id in dependent_list_dict.get(virtual_meter_id, list()):
+                dependency_count_dict[dependent_id] -= 1
+                if dependency_count_dict[dependent_id] == 0:
+                    next_id_list.append(dependent_id)
+        current_id_list = sorted(next_id_list)
+
+    cycle_virtual_meter_list = [virtual_meter_dict[virtual_meter_id]
+                                for virtual_meter_id, dependency_count in sorted(dependency_count_dict.items())
+                                if dependency_count > 0]
+    return level_list, cycle_virtual_meter_list
+
+
+########################################################################################################################
+# Get the latest start datetime of many objects in one grouped query per chunk of ids
+# cursor_energy_db: the cursor of energy database
+# table_name: the hourly table, such as tbl_meter_hourly
+# id_column_name: the object id column in the hourly table, such as meter_id
+# Returns: dict of object id to the latest start_datetime_utc, the objects without energy data are omitted
+########################################################################################################################
+def get_latest_datetimes(cursor_energy_db, table_name, id_column_name, id_list):
+    latest_datetime_dict = dict()
+    id_list = sorted(set(id_list))
+    while len(id_list) > 0:
+        query_id_list = id_list[:id_chunk_size]
+        id_list = id_list[id_chunk_size:]
+        cursor_energy_db.execute(" SELECT " + id_column_name + ", MAX(start_datetime_utc) "
+                                 " FROM " + table_name +
+                                 " WHERE " + id_column_name + " IN (" + ", ".join(["%s"] * len(query_id_list)) + ") "
+                                 " GROUP BY " + id_column_name,
+                                 tuple(query_id_list))
+        for row in cursor_energy_db.fetchall():
+            if isinstance(row[1], datetime):
+                latest_datetime_dict[row[0]] = row[1].replace(second=0, microsecond=0, tzinfo=None)
+    return latest_datetime_dict
+
+
+########################################################################################################################
+# Check if the virtual meter is stale, that is all the objects associated with its equation have energy data after the
+# latest time slot of the virtual meter, which is the condition for the worker to append any energy data
+# NOTE: the virtual meters without any object in the equation are always stale
+########################################################################################################################
+def is_stale(virtual_meter, latest_meter_dict, latest_offline_meter_dict, latest_virtual_meter_dict):
+    if virtual_meter['id'] in latest_virtual_meter_dict:
+        start_datetime_utc = latest_virtual_meter_dict[virtual_meter['id']] + \
+            timedelta(minutes=config.minutes_to_count)
+    else:
+        start_datetime_utc = datetime.strptime(config.start_datetime_utc, '%Y-%m-%d %H:%M:%S')
+        start_datetime_utc = start_datetime_utc.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+    latest_datetime_list = list()
+    for meter_in_expression in virtual_meter['meter_list_in_expression']:
+        latest_datetime_list.append(latest_meter_dict.get(meter_in_expression['meter_id']))
+    for virtual_meter_in_expression in virtual_meter['virtual_meter_list_in_expression']:
+        latest_datetime_list.append(latest_virtual_meter_dict.get(virtual_meter_in_expression['virtual_meter_id']))
+    for offline_meter_in_expression in virtual_meter['offline_meter_list_in_expression']:
+        latest_datetime_list.append(latest_offline_meter_dict.get(offline_meter_in_expression['offline_meter_id']))
+
+    for latest_datetime_utc in latest_datetime_list:
+        if latest_datetime_utc is None or latest_datetime_utc < start_datetime_utc:
+            return False
+    return True
+
+
 ########################################################################################################################
 # Step 1: get start datetime and end datetime
-# Step 2: parse the expression and get all meters, virtual meters, offline meters associated with the expression
+# Step 2: get all meters, virtual meters, offline meters associated with the expression from calculate_hourly
 # Step 3: query energy consumption values from table meter hourly, virtual meter hourly and offline meter hourly
 # Step 4: evaluate the equation with variables values from previous step and save to table virtual meter hourly
+# Step 5: notify myems-aggregation of the appended hourly data
 # returns the error string for logging or returns None
 ########################################################################################################################
 
@@ -167,86 +360,12 @@ def worker(virtual_meter):
           + "end_datetime_utc: " + end_datetime_utc.isoformat()[0:19])
 
     ############################################################################################################
-    # Step 2: parse the expression and get all meters, virtual meters, and
-    #         offline meters associated with the expression
+    # Step 2: get all meters, virtual meters, and offline meters associated with the expression,
+    #         which are queried for all virtual meters at once by calculate_hourly
     ############################################################################################################
-    cnx_system_db = None
-    cursor_system_db = None
-    try:
-        cnx_system_db = mysql.connector.connect(**config.myems_system_db)
-        cursor_system_db = cnx_system_db.cursor()
-    except Exception as e:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-        return "Error in step 2.1 of virtual meter worker " + str(e) + " for '" + virtual_meter['name'] + "'"
-
-    meter_list_in_expression = list()
-    virtual_meter_list_in_expression = list()
-    offline_meter_list_in_expression = list()
-    try:
-        ########################################################################################################
-        # get all meters associated with the expression
-        ########################################################################################################
-
-        cursor_system_db.execute(" SELECT m.id as meter_id, v.name as variable_name "
-                                 " FROM tbl_meters m, tbl_variables v "
-                                 " WHERE m.id = v.meter_id "
-                                 "       AND v.meter_type = 'meter' "
-                                 "       AND v.virtual_meter_id = %s ",
-                                 (virtual_meter['id'], ))
-        rows = cursor_system_db.fetchall()
-        if rows is not None and len(rows) > 0:
-            for row in rows:
-                meter_list_in_expression.append({"meter_id": row[0], "variable_name": row[1].lower()})
-
-        ########################################################################################################
-        # get all virtual meters associated with the expression
-        ########################################################################################################
-
-        cursor_system_db.execute(" SELECT m.id as virtual_meter_id, v.name as variable_name "
-                                 " FROM tbl_virtual_meters m, tbl_variables v "
-                                 " WHERE m.id = v.meter_id "
-                                 "       AND v.meter_type = 'virtual_meter' "
-                                 "       AND v.virtual_meter_id = %s ",
-                                 (virtual_meter['id'],))
-        rows = cursor_system_db.fetchall()
-        if rows is not None and len(rows) > 0:
-            for row in rows:
-                virtual_meter_list_in_expression.append({"virtual_meter_id": row[0],
-                                                         "variable_name": row[1].lower()})
-
-        ########################################################################################################
-        # get all offline meters associated with the expression
-        ########################################################################################################
-
-        cursor_system_db.execute(" SELECT m.id as offline_meter_id, v.name as variable_name "
-                                 " FROM tbl_offline_meters m, tbl_variables v "
-                                 " WHERE m.id = v.meter_id "
-                                 "       AND v.meter_type = 'offline_meter' "
-                                 "       AND v.virtual_meter_id = %s ",
-                                 (virtual_meter['id'],))
-        rows = cursor_system_db.fetchall()
-        if rows is not None and len(rows) > 0:
-            for row in rows:
-                offline_meter_list_in_expression.append({"offline_meter_id": row[0],
-                                                         "variable_name": row[1].lower()})
-    except Exception as e:
-        if cursor_energy_db:
-            cursor_energy_db.close()
-        if cnx_energy_db:
-            cnx_energy_db.close()
-        return "Error in step 2.2 of virtual meter worker " + str(e) + " for '" + virtual_meter['name'] + "'"
-    finally:
-        if cursor_system_db:
-            cursor_system_db.close()
-        if cnx_system_db:
-            cnx_system_db.close()
+    meter_list_in_expression = virtual_meter['meter_list_in_expression']
+    virtual_meter_list_in_expression = virtual_meter['virtual_meter_list_in_expression']
+    offline_meter_list_in_expression = virtual_meter['offline_meter_list_in_expression']
 
     ############################################################################################################
     # Step 3: query energy consumption values from table meter hourly, virtual meter hourly
@@ -385,59 +504,49 @@ def worker(virtual_meter):
     # Converting Strings to SymPy Expressions
     # The sympify function(that’s sympify, not to be confused with simplify) can be used to
     # convert strings into SymPy expressions.
+    # The expression is compiled once into a numeric function, and evaluated over the aligned values of all
+    # variables in the common time slot in one call, instead of evaluating the expression time slot by time slot.
     ############################################################################################################
     try:
-        expr = sympify(virtual_meter['equation'].lower())
-        print("the expression to be evaluated: " + str(expr))
-        current_datetime_utc = common_start_datetime_utc
         print("common_start_datetime_utc: " + str(common_start_datetime_utc))
         print("common_end_datetime_utc: " + str(common_end_datetime_utc))
-        while common_start_datetime_utc is not None \
-                and common_end_datetime_utc is not None \
-                and current_datetime_utc <= common_end_datetime_utc:
-            meta_data = dict()
-            meta_data['start_datetime_utc'] = current_datetime_utc
-
-            ####################################################################################################
-            # create a dictionary of Symbol: point pairs
-            ####################################################################################################
-
-            subs = dict()
-
+        if common_start_datetime_utc is not None and common_end_datetime_utc is not None:
             ####################################################################################################
-            # Evaluating the expression at current_datetime_utc
+            # create a dictionary of variable name: energy hourly pairs
             ####################################################################################################
+            variable_dict = dict()
+            for meter_in_expression in meter_list_in_expression:
+                variable_dict[meter_in_expression['variable_name']] = \
+                    energy_meter_hourly[str(meter_in_expression['meter_id'])]
+            for virtual_meter_in_expression in virtual_meter_list_in_expression:
+                variable_dict[virtual_meter_in_expression['variable_name']] = \
+                    energy_virtual_meter_hourly[str(virtual_meter_in_expression['virtual_meter_id'])]
+            for offline_meter_in_expression in offline_meter_list_in_expression:
+                variable_dict[offline_meter_in_expression['variable_name']] = \
+                    energy_offline_meter_hourly[str(offline_meter_in_expression['offline_meter_id'])]
 
-            if meter_list_in_expression is not None and len(meter_list_in_expression) > 0:
-                for meter_in_expression in meter_list_in_expression:
-                    meter_id = str(meter_in_expression['meter_id'])
-                    actual_value = energy_meter_hourly[meter_id].get(current_datetime_utc, Decimal(0.0))
-                    subs[meter_in_expression['variable_name']] = actual_value
-
-            if virtual_meter_list_in_expression is not None and len(virtual_meter_list_in_expression) > 0:
-                for virtual_meter_in_expression in virtual_meter_list_in_expression:
-                    virtual_meter_id = str(virtual_meter_in_expression['virtual_meter_id'])
-                    actual_value = energy_virtual_meter_hourly[virtual_meter_id].get(current_datetime_utc, Decimal(0.0))
-                    subs[virtual_meter_in_expression['variable_name']] = actual_value
-
-            if offline_meter_list_in_expression is not None and len(offline_meter_list_in_expression) > 0:
-                for offline_meter_in_expression in offline_meter_list_in_expression:
-                    offline_meter_id = str(offline_meter_in_expression['offline_meter_id'])
-                    actual_value = energy_offline_meter_hourly[offline_meter_id].get(current_datetime_utc, Decimal(0.0))
-                    subs[offline_meter_in_expression['variable_name']] = actual_value
+            datetime_utc_list = list()
+            current_datetime_utc = common_start_datetime_utc
+            while current_datetime_utc <= common_end_datetime_utc:
+                datetime_utc_list.append(current_datetime_utc)
+                current_datetime_utc += timedelta(minutes=config.minutes_to_count)
 
             ####################################################################################################
-            # To numerically evaluate an expression with a Symbol at a point,
-            # we might use subs followed by evalf,
-            # but it is more efficient and numerically stable to pass the substitution to evalf
-            # using the subs flag, which takes a dictionary of Symbol: point pairs.
+            # align the values of every variable to the time slots, the missing values are zero
             ####################################################################################################
+            variable_name_list = list(variable_dict.keys())
+            column_list = list()
+            for variable_name in variable_name_list:
+                energy_hourly = variable_dict[variable_name]
+                column_list.append([energy_hourly.get(current_datetime_utc, Decimal(0.0))
+                                    for current_datetime_utc in datetime_utc_list])
 
-            meta_data['actual_value'] = expr.evalf(subs=subs)
-
-            normalized_values.append(meta_data)
+            equation_function = compile_equation(virtual_meter['equation'].lower(), variable_name_list)
+            actual_value_list = evaluate_equation(equation_function, column_list, len(datetime_utc_list))
 
-            current_datetime_utc += timedelta(minutes=config.minutes_to_count)
+            for current_datetime_utc, actual_value in zip(datetime_utc_list, actual_value_list):
+                normalized_values.append({'start_datetime_utc': current_datetime_utc,
+                                          'actual_value': actual_value})
 
     except Exception as e:
         if cursor_energy_db:
@@ -448,6 +557,7 @@ def worker(virtual_meter):
 
     print("saving energy values to table energy virtual meter hourly...")
 
+    is_appended = len(normalized_values) > 0
     while len(normalized_values) > 0:
         insert_100 = normalized_values[:100]
         normalized_values = normalized_values[100:]
@@ -471,9 +581,74 @@ def worker(virtual_meter):
                 cnx_energy_db.close()
             return "Error in step 4.2 virtual meter worker " + str(e) + " for '" + virtual_meter['name'] + "'"
 
+    ####################################################################################################################
+    # Step 5: notify myems-aggregation of the appended hourly data
+    ####################################################################################################################
+    if is_appended:
+        try:
+            notified_datetime_utc = datetime.utcnow().isoformat()[0:19]
+            cursor_energy_db.execute(" INSERT INTO tbl_hourly_notifications "
+                                     "             (table_name, object_id, origin_datetime_utc, created_datetime_utc) "
+                                     " VALUES (%s, %s, %s, %s) ",
+                                     ('tbl_virtual_meter_hourly', virtual_meter['id'],
+                                      notified_datetime_utc, notified_datetime_utc))
+            cnx_energy_db.commit()
+        except Exception as e:
+            if cursor_energy_db:
+                cursor_energy_db.close()
+            if cnx_energy_db:
+                cnx_energy_db.close()
+            return "Error in step 5 virtual meter worker " + str(e) + " for '" + virtual_meter['name'] + "'"
+
     if cursor_energy_db:
         cursor_energy_db.close()
     if cnx_energy_db:
         cnx_energy_db.close()
 
     return None
+
+
+########################################################################################################################
+# Compile the equation into a numeric function of the variables
+# equation: the equation of virtual meter in lower case, such as 'x1 + x2 * 0.5'
+# variable_name_list: the variable names in the order of arguments of the function
+# Returns: the function, which is evaluated by NumPy over arrays if NumPy is installed, or by math over floats
+########################################################################################################################
+def compile_equation(equation, variable_name_list):
+    key = (equation, tuple(variable_name_list))
+    if key not in compiled_equation_dict:
+        expr = sympify(equation)
+        print("the expression to be compiled: " + str(expr))
+        symbol_dict = {str(symbol): symbol for symbol in expr.free_symbols}
+        symbol_list = [symbol_dict.get(variable_name, Symbol(variable_name)) for variable_name in variable_name_list]
+        compiled_equation_dict[key] = lambdify(symbol_list, expr, modules='numpy' if np is not None else 'math')
+    return compiled_equation_dict[key]
+
+
+########################################################################################################################
+# Evaluate the compiled equation over the aligned values of the variables
+# column_list: the values of every variable in the order of arguments of the function, all in the same length
+# length: the number of time slots
+# Returns: list of Decimal values, raises ValueError if any value is not finite, such as divided by zero
+########################################################################################################################
+def evaluate_equation(equation_function, column_list, length):
+    if np is not None:
+        value_array = equation_function(*[np.array(column, dtype=float) for column in column_list])
+        value_array = np.broadcast_to(np.asarray(value_array, dtype=float), (length, ))
+        if not np.all(np.isfinite(value_array)):
+            raise ValueError("the value of the equation is not finite")
+        value_list = value_array.tolist()
+    elif len(column_list) > 0:
+        value_list = [float(equation_function(*args)) for args in zip(*[[float(value) for value in column]
+                                                                         for column in column_list])]
+    else:
+        value_list = [float(equation_function())] * length
+
+    result = list()
+    for value in value_list:
+        if math.isnan(value) or math.isinf(value):
+            raise ValueError("the value of the equation is not finite")
+        # round to 15 significant digits as evalf does, so that the rounding errors of double precision don't
+        # change the value rounded to the precision of the hourly tables
+        result.append(Decimal(format(value, '.15g')))
+    return result
@@ -1,15 +1,26 @@
 import json
+import math
 import random
 import re
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 from multiprocessing import Pool
 
 import mysql.connector
-from sympy import sympify, Piecewise, symbols
+from sympy import lambdify, sympify, Symbol
 
+import archive
 import config
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the compiled functions of expressions by virtual point id, dict of address and function,
+# the expression is compiled again only when the address of the virtual point is changed
+compiled_expression_dict = dict()
 
 
 ########################################################################################################################
@@ -19,6 +30,7 @@ import config
 ########################################################################################################################
 
 def calculate(logger):
+    p = None
     while True:
         # the outermost while loop to reconnect server if there is a connection error
         cnx_system_db = None
@@ -77,10 +89,10 @@ def calculate(logger):
         ################################################################################################################
         # Step 2: Create multiprocessing pool to call worker in parallel
         ################################################################################################################
-        p = Pool(processes=config.pool_size)
+        # the pool is kept across passes so that the workers keep the compiled expressions
+        if p is None:
+            p = Pool(processes=config.pool_size)
         error_list = p.map(worker, virtual_point_list)
-        p.close()
-        p.join()
 
         for error in error_list:
             if error is not None and len(error) > 0:
@@ -136,6 +148,11 @@ def worker(virtual_point):
     if row is not None and len(row) > 0 and isinstance(row[0], datetime):
         start_datetime_utc = row[0].replace(tzinfo=None)
 
+    # the archived months are never calculated again, because the analog values in them were moved to the archive
+    archived_until_datetime_utc = archive.get_archived_until('tbl_analog_value')
+    if archived_until_datetime_utc is not None:
+        start_datetime_utc = max(start_datetime_utc, archived_until_datetime_utc.replace(tzinfo=None))
+
     end_datetime_utc = datetime.utcnow().replace(tzinfo=None)
 
     if end_datetime_utc <= start_datetime_utc:
@@ -175,162 +192,146 @@ def worker(virtual_point):
             cnx_historical_db.close()
         return "Error in step 2.2 of virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
 
-    ############################################################################################################
-    # Step 3: query points value from historical database
-    ############################################################################################################
-
-    print("getting point values ")
-    point_values_dict = dict()
-    if point_list is not None and len(point_list) > 0:
-        try:
-            for point in point_list:
-                point_id = str(point['point_id'])
-                query = (" SELECT utc_date_time, actual_value "
-                         " FROM tbl_analog_value "
-                         " WHERE point_id = %s AND utc_date_time > %s AND utc_date_time < %s "
-                         " ORDER BY utc_date_time ")
-                cursor_historical_db.execute(query, (point_id, start_datetime_utc, end_datetime_utc,))
-                rows = cursor_historical_db.fetchall()
-                if rows is None or len(rows) == 0:
-                    point_values_dict[point_id] = None
-                else:
-                    point_values_dict[point_id] = dict()
-                    for row in rows:
-                        point_values_dict[point_id][row[0]] = row[1]
-        except Exception as e:
-            if cursor_historical_db:
-                cursor_historical_db.close()
-            if cnx_historical_db:
-                cnx_historical_db.close()
-            return "Error in step 3.1 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
-
-    ############################################################################################################
-    # Step 4: evaluate the equation with points values
-    ############################################################################################################
-
-    print("getting date time set for all points")
-    utc_date_time_set = set()
-    if point_values_dict is not None and len(point_values_dict) > 0:
-        for point_id, point_values in point_values_dict.items():
-            if point_values is not None and len(point_values) > 0:
-                utc_date_time_set = utc_date_time_set.union(point_values.keys())
-
-    print("evaluating the equation with SymPy")
-    normalized_values = list()
-
     ############################################################################################################
     # Converting Strings to SymPy Expressions
     # The sympify function(that’s sympify, not to be confused with simplify) can be used to
     # convert strings into SymPy expressions.
+    # The expression is compiled once into a numeric function until the address of the point is changed,
+    # and evaluated over the aligned values of all points in one call, instead of date time by date time.
     ############################################################################################################
     try:
-        if re.search(',', expression):
-            for item in substitutions.keys():
-                locals()[item] = symbols(item)
-            expr = eval(expression)
-            print("the expression will be evaluated as piecewise function: " + str(expr))
-        else:
-            expr = sympify(expression)
-            print("the expression will be evaluated as algebraic expression: " + str(expr))
-
-        for utc_date_time in utc_date_time_set:
-            meta_data = dict()
-            meta_data['utc_date_time'] = utc_date_time
-
-            ####################################################################################################
-            # create a dictionary of Symbol: point pairs
-            ####################################################################################################
-
-            subs = dict()
-
-            ####################################################################################################
-            # Evaluating the expression at current_datetime_utc
-            ####################################################################################################
-
-            if point_list is not None and len(point_list) > 0:
-                for point in point_list:
-                    point_id = str(point['point_id'])
-                    actual_value = point_values_dict[point_id].get(utc_date_time, None)
-                    if actual_value is None:
-                        break
-                    subs[point['variable_name']] = actual_value
-
-            if len(subs) != len(point_list):
-                continue
-
-            ####################################################################################################
-            # To numerically evaluate an expression with a Symbol at a point,
-            # we might use subs followed by evalf,
-            # but it is more efficient and numerically stable to pass the substitution to evalf
-            # using the subs flag, which takes a dictionary of Symbol: point pairs.
-            ####################################################################################################
-            if re.search(',', expression):
-                formula = Piecewise(*expr)
-                meta_data['actual_value'] = Decimal(str(formula.subs(subs)))
-                normalized_values.append(meta_data)
-            else:
-                meta_data['actual_value'] = Decimal(str(expr.evalf(subs=subs)))
-                normalized_values.append(meta_data)
+        variable_name_list = [point['variable_name'] for point in point_list]
+        expression_function = compile_expression(virtual_point['id'],
+                                                 virtual_point['address'],
+                                                 expression,
+                                                 variable_name_list)
     except Exception as e:
         if cursor_historical_db:
             cursor_historical_db.close()
         if cnx_historical_db:
             cnx_historical_db.close()
-        return "Error in step 4.1 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
-
-    print("saving virtual points values to historical database")
-
-    if len(normalized_values) > 0:
-        latest_meta_data = normalized_values[0]
-
+        return "Error in step 2.3 of virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
+
+    # the points values are read, evaluated and saved in chunks of backfill_chunk_hours, so that the memory doesn't
+    # grow with the backlog, and the saved chunks are the checkpoint to resume from after a restart
+    chunk_start_datetime_utc = start_datetime_utc
+    while chunk_start_datetime_utc < end_datetime_utc:
+        chunk_end_datetime_utc = min(chunk_start_datetime_utc + timedelta(hours=config.backfill_chunk_hours),
+                                     end_datetime_utc)
+
+        ############################################################################################################
+        # Step 3: query points value from historical database
+        ############################################################################################################
+
+        print("getting point values from " + chunk_start_datetime_utc.isoformat()[0:19] +
+              " to " + chunk_end_datetime_utc.isoformat()[0:19])
+        point_values_dict = dict()
         try:
-            add_values = (" INSERT INTO tbl_analog_value "
-                          " (point_id, utc_date_time, actual_value) "
-                          " VALUES  ")
-
-            for meta_data in normalized_values:
-                add_values += " (" + str(virtual_point['id']) + ","
-                add_values += "'" + meta_data['utc_date_time'].isoformat()[0:19] + "',"
-                add_values += str(meta_data['actual_value']) + "), "
-
-                if meta_data['utc_date_time'] > latest_meta_data['utc_date_time']:
-                    latest_meta_data = meta_data
-
-            print("add_values:" + add_values)
-            # trim ", " at the end of string and then execute
-            cursor_historical_db.execute(add_values[:-2])
-            cnx_historical_db.commit()
+            for point in point_list:
+                point_id = str(point['point_id'])
+                query = (" SELECT utc_date_time, actual_value "
+                         " FROM tbl_analog_value "
+                         " WHERE point_id = %s AND utc_date_time > %s "
+                         "       AND utc_date_time >= %s AND utc_date_time < %s "
+                         " ORDER BY utc_date_time ")
+                cursor_historical_db.execute(query, (point_id, start_datetime_utc,
+                                                     chunk_start_datetime_utc, chunk_end_datetime_utc,))
+                # iterate the cursor to put the rows into the dict without keeping the whole result set
+                point_values_dict[point_id] = dict()
+                for row in cursor_historical_db:
+                    point_values_dict[point_id][row[0]] = row[1]
         except Exception as e:
             if cursor_historical_db:
                 cursor_historical_db.close()
             if cnx_historical_db:
                 cnx_historical_db.close()
-            return "Error in step 4.2 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
-
-        try:
-            # update tbl_analog_value_latest
-            delete_value = " DELETE FROM tbl_analog_value_latest WHERE point_id = {} ".format(virtual_point['id'])
-            latest_value = (" INSERT INTO tbl_analog_value_latest (point_id, utc_date_time, actual_value) "
-                            " VALUES ({}, '{}', {}) "
-                            .format(virtual_point['id'],
-                                    latest_meta_data['utc_date_time'].isoformat()[0:19],
-                                    latest_meta_data['actual_value']))
+            return "Error in step 3.1 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
 
-            print("delete_value:" + delete_value)
-            print("latest_value:" + latest_value)
+        ############################################################################################################
+        # Step 4: evaluate the equation with points values
+        ############################################################################################################
 
-            cursor_historical_db.execute(delete_value)
-            cnx_historical_db.commit()
+        # the expression is evaluated at the date times when all points have values
+        utc_date_time_set = None
+        for point in point_list:
+            point_values = point_values_dict[str(point['point_id'])]
+            if utc_date_time_set is None:
+                utc_date_time_set = set(point_values.keys())
+            else:
+                utc_date_time_set.intersection_update(point_values.keys())
+        utc_date_time_list = sorted(utc_date_time_set) if utc_date_time_set is not None else list()
 
-            cursor_historical_db.execute(latest_value)
-            cnx_historical_db.commit()
+        normalized_values = list()
+        try:
+            if len(utc_date_time_list) > 0:
+                # align the values of every point to the date times
+                column_list = list()
+                for point in point_list:
+                    point_values = point_values_dict[str(point['point_id'])]
+                    column_list.append([point_values[utc_date_time] for utc_date_time in utc_date_time_list])
 
+                actual_value_list = evaluate_expression(expression_function, column_list, len(utc_date_time_list))
+                for utc_date_time, actual_value in zip(utc_date_time_list, actual_value_list):
+                    normalized_values.append({'utc_date_time': utc_date_time, 'actual_value': actual_value})
         except Exception as e:
             if cursor_historical_db:
                 cursor_historical_db.close()
             if cnx_historical_db:
                 cnx_historical_db.close()
-            return "Error in step 4.3 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
+            return "Error in step 4.1 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
+
+        print("saving " + str(len(normalized_values)) + " virtual points values to historical database")
+
+        if len(normalized_values) > 0:
+            # the values are in ascending order of date time
+            latest_meta_data = normalized_values[-1]
+
+            try:
+                add_values = (" INSERT INTO tbl_analog_value "
+                              " (point_id, utc_date_time, actual_value) "
+                              " VALUES  ")
+
+                for meta_data in normalized_values:
+                    add_values += " (" + str(virtual_point['id']) + ","
+                    add_values += "'" + meta_data['utc_date_time'].isoformat()[0:19] + "',"
+                    add_values += str(meta_data['actual_value']) + "), "
+
+                # trim ", " at the end of string and then execute
+                cursor_historical_db.execute(add_values[:-2])
+                cnx_historical_db.commit()
+            except Exception as e:
+                if cursor_historical_db:
+                    cursor_historical_db.close()
+                if cnx_historical_db:
+                    cnx_historical_db.close()
+                return "Error in step 4.2 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
+
+            try:
+                # update tbl_analog_value_latest
+                delete_value = " DELETE FROM tbl_analog_value_latest WHERE point_id = {} ".format(virtual_point['id'])
+                latest_value = (" INSERT INTO tbl_analog_value_latest (point_id, utc_date_time, actual_value) "
+                                " VALUES ({}, '{}', {}) "
+                                .format(virtual_point['id'],
+                                        latest_meta_data['utc_date_time'].isoformat()[0:19],
+                                        latest_meta_data['actual_value']))
+
+                print("delete_value:" + delete_value)
+                print("latest_value:" + latest_value)
+
+                cursor_historical_db.execute(delete_value)
+                cnx_historical_db.commit()
+
+                cursor_historical_db.execute(latest_value)
+                cnx_historical_db.commit()
+
+            except Exception as e:
+                if cursor_historical_db:
+                    cursor_historical_db.close()
+                if cnx_historical_db:
+                    cnx_historical_db.close()
+                return "Error in step 4.3 virtual point worker " + str(e) + " for '" + virtual_point['name'] + "'"
+
+        chunk_start_datetime_utc = chunk_end_datetime_utc
 
     if cursor_historical_db:
         cursor_historical_db.close()
@@ -338,3 +339,56 @@ def worker(virtual_point):
         cnx_historical_db.close()
 
     return None
+
+
+########################################################################################################################
+# Compile the expression of virtual point into a numeric function of the variables
+# address: the address of virtual point in JSON, the cached function is compiled again if it is changed
+# expression: the algebraic expression such as 'x1-x2',
+#             or the pieces of piecewise function such as '(1,x<200 ), (2,x>=500), (0,True)'
+# variable_name_list: the variable names in the order of arguments of the function
+# Returns: the function, which is evaluated by NumPy over arrays if NumPy is installed, or by math over floats,
+#          the conditions of piecewise functions are evaluated as masked selects by NumPy
+########################################################################################################################
+def compile_expression(virtual_point_id, address, expression, variable_name_list):
+    compiled_expression = compiled_expression_dict.get(virtual_point_id)
+    if compiled_expression is not None and compiled_expression['address'] == address:
+        return compiled_expression['function']
+
+    symbol_dict = {variable_name: Symbol(variable_name) for variable_name in variable_name_list}
+    if re.search(',', expression):
+        expr = sympify('Piecewise(' + expression + ')', locals=symbol_dict)
+        print("the expression will be evaluated as piecewise function: " + str(expr))
+    else:
+        expr = sympify(expression, locals=symbol_dict)
+        print("the expression will be evaluated as algebraic expression: " + str(expr))
+
+    function = lambdify([symbol_dict[variable_name] for variable_name in variable_name_list], expr,
+                        modules='numpy' if np is not None else 'math')
+    compiled_expression_dict[virtual_point_id] = {"address": address, "function": function}
+    return function
+
+
+########################################################################################################################
+# Evaluate the compiled expression over the aligned values of the points
+# column_list: the values of every point in the order of arguments of the function, all in the same length
+# length: the number of date times
+# Returns: list of Decimal values, raises ValueError if any value is not finite or no piece of piecewise function
+#          matches
+########################################################################################################################
+def evaluate_expression(expression_function, column_list, length):
+    if np is not None:
+        value_array = expression_function(*[np.array(column, dtype=float) for column in column_list])
+        value_array = np.broadcast_to(np.asarray(value_array, dtype=float), (length, ))
+        value_list = value_array.tolist()
+    else:
+        value_list = [float(expression_function(*args)) for args in zip(*[[float(value) for value in column]
+                                                                           for column in column_list])]
+
+    result = list()
+    for value in value_list:
+        if math.isnan(value) or math.isinf(value):
+            raise ValueError("the value of the expression is not finite")
+        # round to 15 significant digits as evalf does
+        result.append(Decimal(format(value, '.15g')))
+    return result